@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.lib.benchmark.generators import planted_partition
+from src.lib.adapter.layout.force_directed import BarnesHutLayout
+
+log = logging.getLogger("bench_layout")
+
+@dataclass
+class LayoutTiming:
+    nodes: int
+    edges: int
+    seconds: float
+    # Mean distance of a node to its planted community's centroid over the median
+    # distance between centroids: well below 1 when communities form separate clusters
+    spread: float
+
+def _spread(xy: np.ndarray, truth: np.ndarray) -> float:
+    _, labels = np.unique(truth, return_inverse=True)
+    counts = np.bincount(labels)
+    centroids = np.stack([np.bincount(labels, weights=xy[:, i]) / counts for i in range(2)], axis=1)
+    inner = float(np.linalg.norm(xy - centroids[labels], axis=1).mean())
+    between = centroids[:, None, :] - centroids[None, :, :]
+    apart = float(np.median(np.linalg.norm(between, axis=2)[np.triu_indices(len(centroids), 1)]))
+    return inner / max(apart, 1e-12)
+
+def run(sizes: List[int], block: int, seed: int) -> List[LayoutTiming]:
+    out: List[LayoutTiming] = []
+    for n in sizes:
+        G, truth = planted_partition(n, block, 10.0, 1.0, seed)
+        t0 = time.perf_counter()
+        xy = BarnesHutLayout(seed=seed).layout(G)
+        dt = time.perf_counter() - t0
+        row = LayoutTiming(n, G.num_edges(), dt, _spread(xy, np.asarray(truth)))
+        log.info("n=%d m=%d layout=%.2fs spread=%.3f", n, row.edges, dt, row.spread)
+        out.append(row)
+    return out
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Time the multilevel Barnes-Hut layout on planted-partition graphs.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 30_000, 100_000])
+    ap.add_argument("--block", type=int, default=50, help="nodes per planted community")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", type=Path, default=None, help="write timings to this file")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    rows = run(args.sizes, args.block, args.seed)
+    payload = json.dumps([asdict(r) for r in rows], indent=2)
+    if args.json:
+        args.json.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
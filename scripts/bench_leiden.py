@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.lib.benchmark.generators import GENERATORS
+from src.lib.benchmark.runner import compare_reports, markdown_table, report, run_case
+from src.lib.domain.algorithms.distance.leiden import MOVE_ENGINES
+
+log = logging.getLogger("bench_leiden")
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Time and memory-profile the Leiden phases on synthetic graphs with planted communities."
+    )
+    ap.add_argument("--families", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    ap.add_argument("--edges", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                    help="target edge counts (the generators scale to 1e7)")
+    ap.add_argument("--engine", choices=sorted(MOVE_ENGINES), default="serial")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--theta", type=float, default=0.01)
+    ap.add_argument("--repeat", type=int, default=1, help="keep the best of this many timed runs")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--json", type=Path, default=None, help="write the report to this file")
+    ap.add_argument("--markdown", type=Path, default=None, help="also write a markdown summary table")
+    ap.add_argument("--compare", type=Path, default=None,
+                    help="baseline report; exit 1 if any phase or quality metric regressed")
+    ap.add_argument("--time-tolerance", type=float, default=0.25)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    results = []
+    for family in args.families:
+        for edges in args.edges:
+            r = run_case(
+                family, edges, engine=args.engine, seed=args.seed, theta=args.theta,
+                repeat=args.repeat, memory=not args.no_memory,
+            )
+            log.info(
+                "%-16s m=%-9d n=%-8d levels=%d move=%.3fs refine=%.3fs aggregate=%.3fs Q=%.4f NMI=%.4f",
+                family, r.edges, r.nodes, len(r.levels), r.phases["move"].seconds,
+                r.phases["refine"].seconds, r.phases["aggregate"].seconds, r.modularity, r.nmi,
+            )
+            results.append(r)
+
+    payload = report(
+        results, commit=git_commit(), python=platform.python_version(), numpy=np.__version__,
+        machine=platform.machine(),
+    )
+    text = json.dumps(payload, indent=2)
+    if args.json:
+        args.json.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.markdown:
+        args.markdown.write_text(markdown_table(payload) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, payload, time_tolerance=args.time_tolerance)
+        for line in regressions:
+            log.warning("regression: %s", line)
+        if regressions:
+            sys.exit(1)
+        log.info("no regressions against %s (commit %s)", args.compare, baseline.get("commit"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.lib.adapter.distributed.worker import ShardWorker
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serve one shard worker for distributed Leiden.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766, help="0 picks a free port")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    worker = ShardWorker(args.host, args.port)
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.lib.adapter.service.jobs import JobService
+from src.lib.adapter.service.server import JobServer
+
+async def serve(args: argparse.Namespace) -> None:
+    async with JobService(workers=args.workers) as service:
+        server = JobServer(service)
+        await server.start(args.host, args.port, path=args.socket)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Serve community detection jobs over local HTTP.")
+    ap.add_argument("--workers", type=int, default=2, help="worker processes (jobs run at once)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--socket", default=None, help="listen on this Unix socket instead of TCP")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Set
+import random
+
+from src.lib.port.algorithms.CommunityDetection import CommunityDetectionPort
+from src.lib.port.instrumentation import InstrumentationPort
+from src.lib.domain.types.nodes import BaseNode
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.leiden_state import RunLimits
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.domain.services.partition import singleton_partition, intern_partition
+from src.lib.adapter.distributed.coordinator import Address, DistributedCoordinator, LevelTraffic
+
+class DistributedLeidenAdapter(CommunityDetectionPort):
+    """
+    Adapter: Leiden with local moving and refinement on ShardWorkers (see
+    DistributedCoordinator), e.g. LocalWorkers(4).addresses for a single machine.
+    Every call connects to the workers, runs, and disconnects; traffic then holds the
+    run's communication volume per level. The graph is converted to a CSRGraph, and
+    delta_fn must be a ModularityObjective or CPMObjective.
+    """
+    def __init__(
+        self,
+        workers: Sequence[Address],
+        batch_size: int = 4096,
+        max_sweeps: int = 50,
+        min_nodes: int = 50_000,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.workers = list(workers)
+        self.batch_size = batch_size
+        self.max_sweeps = max_sweeps
+        self.min_nodes = min_nodes
+        self.timeout = timeout
+        self.traffic: List[LevelTraffic] = []
+
+    def detect(
+        self,
+        g: GraphLike,
+        p0: Optional[Partition],
+        *,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        seed: Optional[int] = None,
+        observer: Optional[InstrumentationPort] = None,
+        time_budget: Optional[float] = None,
+        min_improvement: Optional[float] = None,
+    ) -> List[Set[BaseNode]]:
+        """
+        Final communities of detect_hierarchy() (same arguments).
+        """
+        return self.detect_hierarchy(
+            g, p0, delta_fn=delta_fn, gamma=gamma, theta=theta, max_levels=max_levels,
+            seed=seed, observer=observer, time_budget=time_budget, min_improvement=min_improvement,
+        ).communities()
+
+    def detect_hierarchy(
+        self,
+        g: GraphLike,
+        p0: Optional[Partition],
+        *,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        seed: Optional[int] = None,
+        observer: Optional[InstrumentationPort] = None,
+        time_budget: Optional[float] = None,
+        min_improvement: Optional[float] = None,
+    ) -> Hierarchy:
+        """
+        Runs Leiden over the workers and keeps every level. seed, observer,
+        time_budget and min_improvement work as in LeidenAdapter.detect_hierarchy; the
+        observer also receives CommunicationStats for the move and refine phases.
+        """
+        if not isinstance(g, CSRGraph):
+            csr = CSRGraph.from_graph(g)
+            p0 = intern_partition(csr, p0) if p0 is not None else None
+            g = csr
+        elif p0 is not None:
+            p0 = intern_partition(g, p0)
+        p = p0 or singleton_partition(g)
+        rng = random.Random(seed) if seed is not None else None
+        limits = None
+        if time_budget is not None or min_improvement is not None:
+            limits = RunLimits(time_budget, min_improvement)
+        with DistributedCoordinator(
+            self.workers, self.batch_size, self.max_sweeps, self.min_nodes, self.timeout,
+        ) as cluster:
+            try:
+                return leiden_hierarchy(
+                    g, p, delta_fn, gamma, theta, max_levels, cluster.move_nodes, cluster.refine,
+                    rng, observer, limits,
+                )
+            finally:
+                self.traffic = cluster.traffic
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Optional, Iterable, List, Set, Tuple
+import random
+from src.lib.port.algorithms.DynamicCommunityDetection import DynamicCommunityDetectionPort
+from src.lib.domain.types.nodes import BaseNode, NodeLike
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.algorithms.distance.dynamic_leiden import DynamicLeiden
+from src.lib.domain.services.objective import IncrementalObjective
+from src.lib.domain.services.partition import singleton_partition
+
+class DynamicLeidenAdapter(DynamicCommunityDetectionPort):
+    """
+    Adapter: keeps a domain DynamicLeiden between update batches.
+    """
+    def __init__(self) -> None:
+        self._state: Optional[DynamicLeiden] = None
+
+    def start(
+        self,
+        g: Graph,
+        p0: Optional[Partition],
+        *,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        seed: Optional[int] = None,
+    ) -> List[Set[BaseNode]]:
+        """
+        delta_fn must be an IncrementalObjective. seed gives the session its own
+        random.Random, used by the initial run and every update.
+        """
+        if not isinstance(delta_fn, IncrementalObjective):
+            raise TypeError(f"dynamic Leiden needs an IncrementalObjective, got {type(delta_fn).__name__}")
+        rng = random.Random(seed) if seed is not None else None
+        p = p0 or singleton_partition(g)
+        self._state = DynamicLeiden(g, p, delta_fn, gamma, theta, max_levels, rng)
+        return self._state.communities()
+
+    def update(
+        self,
+        *,
+        inserted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+        deleted: Iterable[Tuple[NodeLike, NodeLike]] = (),
+        reweighted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+    ) -> List[Set[BaseNode]]:
+        return self._session().update(inserted, deleted, reweighted)
+
+    def rebuild(self) -> List[Set[BaseNode]]:
+        """
+        Full Leiden run warm-started from the current communities (see DynamicLeiden).
+        """
+        return self._session().rebuild()
+
+    def _session(self) -> DynamicLeiden:
+        if self._state is None:
+            raise RuntimeError("call start() before update()")
+        return self._state
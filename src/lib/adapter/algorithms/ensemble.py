@@ -0,0 +1,207 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import logging
+import random
+
+import numpy as np
+
+from src.lib.domain.types.nodes import BaseNode
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.algorithms.distance.leiden import leiden as leiden_domain
+from src.lib.domain.services.partition import intern_partition
+from src.lib.domain.services.metrics import (
+    QualityFn,
+    modularity,
+    membership_array,
+    communities_from_labels,
+)
+from src.lib.adapter.parallel.refine import ProcessPoolRefiner
+from src.lib.adapter.parallel.shared_arrays import (
+    SharedArrays,
+    SharedArraySpec,
+    attach_arrays,
+    csr_graph_arrays,
+    csr_graph_from_arrays,
+)
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class EnsembleResult:
+    """
+    Outcome of LeidenEnsemble.run(). seeds[i] / qualities[i] describe run i; the best
+    run is the highest quality (earliest run on ties). consensus is set when requested.
+    """
+    best: List[Set[BaseNode]]
+    best_seed: int
+    best_quality: float
+    seeds: List[int]
+    qualities: List[float]
+    consensus: Optional[List[Set[BaseNode]]] = field(default=None)
+
+@dataclass(frozen=True)
+class _RunParams:
+    delta_fn: DeltaFn
+    gamma: float
+    theta: float
+    max_levels: int
+    engine: str
+    quality: QualityFn
+
+def _run_seed(G: CSRGraph, p0: Optional[np.ndarray], params: _RunParams, seed: int) -> Tuple[np.ndarray, float]:
+    # Same call LeidenAdapter.detect(G, p0, seed=seed) makes on a CSRGraph
+    p = CompactPartition(p0) if p0 is not None else CompactPartition.singletons(G.num_nodes())
+    communities = leiden_domain(
+        G, p, params.delta_fn, params.gamma, params.theta, params.max_levels,
+        params.engine, ProcessPoolRefiner(1), random.Random(seed),
+    )
+    labels = membership_array(G, communities)
+    return labels, params.quality(G, labels)
+
+# Per-process state set up once by the pool initializer
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(specs: Dict[str, SharedArraySpec], params: _RunParams) -> None:
+    arrays, blocks = attach_arrays(specs)
+    _WORKER.update(G=csr_graph_from_arrays(arrays), p0=arrays.get("p0"), params=params, blocks=blocks)
+
+def _worker_run(seed: int) -> Tuple[np.ndarray, float]:
+    w = _WORKER
+    return _run_seed(w["G"], w["p0"], w["params"], seed)
+
+def _components(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Connected-component labels (smallest member id) by min-label propagation with pointer jumping.
+    """
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        low = np.minimum(labels[src], labels[dst])
+        nxt = labels.copy()
+        np.minimum.at(nxt, src, low)
+        np.minimum.at(nxt, dst, low)
+        nxt = nxt[nxt]
+        if np.array_equal(nxt, labels):
+            return labels
+        labels = nxt
+
+class LeidenEnsemble:
+    """
+    Runs N independently seeded Leiden detections and keeps the best one by `quality`.
+
+    Every run owns a random.Random(seed), so run i is exactly
+    LeidenAdapter().detect(G, p0, seed=seeds[i], ...) on the CSR form of the graph,
+    whatever the worker count. With workers > 1 the runs go to a process pool that
+    attaches to the CSR arrays through shared memory.
+
+    Memory does not grow with N: at most 2 * workers runs are in flight, only the best
+    membership array is kept, and the optional consensus counts co-assignment per edge
+    (O(m)) rather than per node pair. The consensus partition is the connected
+    components of the edges whose endpoints shared a community in at least
+    `consensus_threshold` of the runs.
+    """
+    def __init__(self, workers: int = 1, quality: QualityFn = modularity) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.quality = quality
+
+    def run(
+        self,
+        g: GraphLike,
+        p0: Optional[Partition] = None,
+        *,
+        runs: int,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        engine: str = "serial",
+        seed: Optional[int] = None,
+        consensus: bool = False,
+        consensus_threshold: float = 0.5,
+    ) -> EnsembleResult:
+        """
+        seed fixes the whole ensemble: run seeds are drawn from it, so the same seed
+        and runs give the same seeds list (and a longer ensemble extends a shorter one).
+        engine is "serial" or "vectorized"; nested process pools are not supported.
+        """
+        if runs < 1:
+            raise ValueError(f"runs must be >= 1, got {runs}")
+        if engine == "parallel":
+            raise ValueError("engine='parallel' cannot run inside ensemble workers; use 'serial' or 'vectorized'")
+        G = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+        p0_labels = intern_partition(G, p0).labels if p0 is not None else None
+        params = _RunParams(delta_fn, gamma, theta, max_levels, engine, self.quality)
+        seeds = [int(s) for s in np.random.SeedSequence(seed).generate_state(runs, dtype=np.uint64)]
+
+        qualities: List[float] = [float("nan")] * runs
+        best: Tuple[float, int] = (float("-inf"), runs)
+        best_labels: Optional[np.ndarray] = None
+        if consensus:
+            rows = G.row_ids()
+            upper = rows < G.indices
+            src, dst = rows[upper], G.indices[upper]
+            together = np.zeros(len(src), dtype=np.int32)
+
+        for i, (labels, q) in self._results(G, p0_labels, params, seeds):
+            qualities[i] = q
+            log.debug("ensemble run %d (seed %d): quality %.6f", i, seeds[i], q)
+            if (q, -i) > (best[0], -best[1]):
+                best, best_labels = (q, i), labels
+            if consensus:
+                together += labels[src] == labels[dst]
+
+        assert best_labels is not None
+        result = EnsembleResult(
+            best=communities_from_labels(G, best_labels),
+            best_seed=seeds[best[1]],
+            best_quality=best[0],
+            seeds=seeds,
+            qualities=qualities,
+        )
+        if consensus:
+            keep = together >= consensus_threshold * runs
+            result.consensus = communities_from_labels(G, _components(G.num_nodes(), src[keep], dst[keep]))
+        return result
+
+    def _results(
+        self,
+        G: CSRGraph,
+        p0: Optional[np.ndarray],
+        params: _RunParams,
+        seeds: List[int],
+    ) -> Iterator[Tuple[int, Tuple[np.ndarray, float]]]:
+        """
+        Yield (run index, (labels, quality)) as runs finish, keeping at most 2 * workers in flight.
+        """
+        if self.workers == 1 or len(seeds) == 1:
+            for i, s in enumerate(seeds):
+                yield i, _run_seed(G, p0, params, s)
+            return
+        arrays = csr_graph_arrays(G)
+        if p0 is not None:
+            arrays["p0"] = p0
+        with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(shared.specs, params),
+        ) as pool:
+            pending: Dict[Future, int] = {}
+            todo = iter(enumerate(seeds))
+            for i, s in todo:
+                pending[pool.submit(_worker_run, s)] = i
+                if len(pending) >= 2 * self.workers:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
+                    nxt = next(todo, None)
+                    if nxt is not None:
+                        pending[pool.submit(_worker_run, nxt[1])] = nxt[0]
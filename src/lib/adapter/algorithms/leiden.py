@@ -1,12 +1,29 @@
 from __future__ import annotations
-from typing import Optional, List, Set
+from pathlib import Path
+from typing import Optional, List, Set, Union
+import logging
+import random
 from src.lib.port.algorithms.CommunityDetection import CommunityDetectionPort
+from src.lib.port.instrumentation import InstrumentationPort
+from src.lib.port.checkpoint import CheckpointPort
+from src.lib.port.result_cache import ResultCachePort
 from src.lib.domain.types.nodes import BaseNode
 from src.lib.domain.types.delta import DeltaFn
-from src.lib.domain.models.graph import Graph
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.sharded_graph import ShardedGraph
 from src.lib.domain.models.partition import Partition
-from src.lib.domain.algorithms.distance.leiden import leiden as leiden_domain
-from src.lib.domain.services.partition import singleton_partition
+from src.lib.domain.models.leiden_state import RunLimits
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.algorithms.distance.leiden import MoveFn, leiden_hierarchy
+from src.lib.domain.services.partition import singleton_partition, intern_partition
+from src.lib.adapter.parallel.refine import ProcessPoolRefiner
+from src.lib.adapter.parallel.local_moving import ParallelLocalMover
+from src.lib.adapter.checkpoint.npz_store import NpzCheckpointStore
+from src.lib.adapter.cache.disk_cache import DiskResultCache, detection_key
+from src.lib.adapter.graph.sharded import ShardedSpill
+
+log = logging.getLogger(__name__)
 
 class LeidenAdapter(CommunityDetectionPort):
     """
@@ -14,13 +31,150 @@ class LeidenAdapter(CommunityDetectionPort):
     """
     def detect(
         self,
-        g: Graph,
+        g: GraphLike,
         p0: Optional[Partition],
         *,
         delta_fn: DeltaFn,
         gamma: float = 1.0,
         theta: float = 1.0,
         max_levels: int = 100,
+        engine: str = "serial",
+        workers: int = 1,
+        seed: Optional[int] = None,
+        observer: Optional[InstrumentationPort] = None,
+        time_budget: Optional[float] = None,
+        min_improvement: Optional[float] = None,
+        checkpoint: Optional[Union[str, Path, CheckpointPort]] = None,
+        resume: bool = False,
+        cache: Optional[Union[str, Path, ResultCachePort]] = None,
     ) -> List[Set[BaseNode]]:
+        """
+        Final communities of detect_hierarchy() (same arguments).
+        """
+        return self.detect_hierarchy(
+            g, p0, delta_fn=delta_fn, gamma=gamma, theta=theta, max_levels=max_levels,
+            engine=engine, workers=workers, seed=seed, observer=observer,
+            time_budget=time_budget, min_improvement=min_improvement,
+            checkpoint=checkpoint, resume=resume, cache=cache,
+        ).communities()
+
+    def detect_hierarchy(
+        self,
+        g: Union[GraphLike, ShardedGraph],
+        p0: Optional[Partition],
+        *,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        engine: str = "serial",
+        workers: int = 1,
+        seed: Optional[int] = None,
+        observer: Optional[InstrumentationPort] = None,
+        time_budget: Optional[float] = None,
+        min_improvement: Optional[float] = None,
+        checkpoint: Optional[Union[str, Path, CheckpointPort]] = None,
+        resume: bool = False,
+        cache: Optional[Union[str, Path, ResultCachePort]] = None,
+    ) -> Hierarchy:
+        """
+        Runs Leiden and keeps every level: the Hierarchy answers node -> community
+        lookups at any level and can be saved with NpzHierarchyWriter.
+        engine selects local moving: "serial" (any graph, any DeltaFn), "vectorized"
+        (NumPy batches; needs an IncrementalObjective, a Graph is converted to CSR) or
+        "parallel" (vectorized batches scored on `workers` processes; see
+        ParallelLocalMover for its quality tolerance).
+        workers > 1 also refines communities on a process pool (CSR graphs only; the
+        delta_fn must be picklable). Every community is refined with its own RNG
+        stream whatever the worker count, so a seeded run gives the same communities
+        for workers=1 and workers=N.
+        seed gives the run its own random.Random instead of the global module, so the
+        same seed and arguments reproduce the same communities.
+        observer receives the run's level/phase events (see InstrumentationPort); it
+        does not change the result.
+        time_budget (seconds) and min_improvement (per-level quality gain, needs an
+        IncrementalObjective) make the run anytime: when either is hit it returns the
+        best partition so far (RunFinished.reason tells which). Limits are checked
+        between phases.
+        checkpoint (a path for an NpzCheckpointStore, or any CheckpointPort) saves the
+        run after every level; resume=True continues from the saved state if there is
+        one (p0 is then ignored). Resuming needs the same graph and arguments; with a
+        seed, a resumed run ends with the communities the uninterrupted run would have.
+        cache (a directory for a DiskResultCache, or any ResultCachePort) returns the
+        stored result of an identical earlier call (same graph contents, p0, delta_fn,
+        gamma, theta, max_levels, seed, engine and workers) without running, and stores
+        new results. Only seeded runs without a time_budget or checkpoint are cached, as
+        only those are reproducible, and only with a delta_fn detection_key can describe;
+        a cache hit sends no observer events.
+        g may be a ShardedGraph (see ShardedGraphReader) too large for memory: its levels
+        stream over the shards within the graph's memory budget, aggregated levels that
+        still exceed it being written to a temporary directory (ShardedSpill) and removed
+        after the run; the first level that fits runs in memory with `engine`, as do the
+        coarser ones. It takes no checkpoint and is not cached.
+        """
+        result_cache = DiskResultCache(cache) if isinstance(cache, (str, Path)) else cache
+        key: Optional[str] = None
+        if result_cache is not None:
+            if seed is None or time_budget is not None or checkpoint is not None:
+                log.debug("result cache skipped: run is not reproducible (seed, time_budget or checkpoint)")
+            elif isinstance(g, ShardedGraph):
+                log.debug("result cache skipped: sharded graphs are not digested")
+            else:
+                try:
+                    key = detection_key(
+                        g, p0, objective=delta_fn, gamma=gamma, theta=theta, max_levels=max_levels,
+                        seed=seed, engine=engine, workers=workers, min_improvement=min_improvement,
+                    )
+                except TypeError as e:
+                    log.info("result cache skipped: delta_fn has no stable key (%s)", e)
+                else:
+                    cached = result_cache.get(key)
+                    if cached is not None:
+                        return cached
+        hierarchy = self._run(
+            g, p0, delta_fn, gamma, theta, max_levels, engine, workers, seed, observer,
+            time_budget, min_improvement, checkpoint, resume,
+        )
+        if result_cache is not None and key is not None:
+            result_cache.put(key, hierarchy)
+        return hierarchy
+
+    def _run(
+        self,
+        g: Union[GraphLike, ShardedGraph],
+        p0: Optional[Partition],
+        delta_fn: DeltaFn,
+        gamma: float,
+        theta: float,
+        max_levels: int,
+        engine: str,
+        workers: int,
+        seed: Optional[int],
+        observer: Optional[InstrumentationPort],
+        time_budget: Optional[float],
+        min_improvement: Optional[float],
+        checkpoint: Optional[Union[str, Path, CheckpointPort]],
+        resume: bool,
+    ) -> Hierarchy:
+        if p0 is not None and isinstance(g, (CSRGraph, ShardedGraph)):
+            p0 = intern_partition(g, p0)
         p = p0 or singleton_partition(g)
-        return leiden_domain(g, p, delta_fn, gamma, theta, max_levels)
+        move_nodes: Union[str, MoveFn] = ParallelLocalMover(workers) if engine == "parallel" else engine
+        # Same per-community RNG streams for every worker count, so workers never changes the result
+        refine = ProcessPoolRefiner(workers)
+        rng = random.Random(seed) if seed is not None else None
+        limits = None
+        if time_budget is not None or min_improvement is not None:
+            limits = RunLimits(time_budget, min_improvement)
+        store = NpzCheckpointStore(checkpoint) if isinstance(checkpoint, (str, Path)) else checkpoint
+        state = store.load() if store is not None and resume else None
+        if isinstance(g, ShardedGraph) and g.memory_budget is not None:
+            with ShardedSpill(g.memory_budget) as spill:
+                return leiden_hierarchy(
+                    g, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, observer,
+                    limits, store.save if store is not None else None, state, spill,
+                )
+        return leiden_hierarchy(
+            g, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, observer,
+            limits, store.save if store is not None else None, state,
+        )
@@ -0,0 +1,237 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, FrozenSet, List, Optional, Tuple, Union
+import functools
+import hashlib
+import json
+import logging
+import os
+import types
+
+import numpy as np
+
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.services.partition import intern_partition
+from src.lib.adapter.graph.binary import encode_labels
+from src.lib.adapter.hierarchy.npz_hierarchy import NpzHierarchyReader, NpzHierarchyWriter
+from src.lib.port.result_cache import ResultCachePort
+
+log = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# Bumped whenever the key recipe or the stored format changes, so old entries miss
+KEY_VERSION = 2
+
+def graph_digest(G: GraphLike) -> str:
+    """
+    blake2b of the graph's CSR arrays and node labels, in node order: the same graph
+    built in the same order always gives the same digest, across processes and runs.
+    """
+    csr = G if isinstance(G, CSRGraph) else CSRGraph.from_graph(G)
+    h = hashlib.blake2b(digest_size=20)
+    for name, arr, dtype in (
+        ("offsets", csr.offsets, "<i8"), ("indices", csr.indices, "<i8"), ("weights", csr.weights, "<f8"),
+    ):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(arr, dtype=dtype).data)
+    if csr.sizes is not None:
+        h.update(b"sizes")
+        h.update(np.ascontiguousarray(csr.sizes, dtype="<f8").data)
+    try:
+        encoded = encode_labels(csr.labels)
+    except TypeError:
+        h.update(b"labels:repr")
+        h.update(repr(list(csr.labels)).encode("utf-8"))  # type: ignore[arg-type]
+    else:
+        if encoded is not None:
+            kind, arrays = encoded
+            h.update(f"labels:{kind}".encode())
+            for arr in arrays:
+                h.update(np.ascontiguousarray(arr).data)
+    return h.hexdigest()
+
+def _describe(obj: Any, _seen: FrozenSet[int] = frozenset()) -> Any:
+    """
+    Stable identity of an objective / delta function, never its address: a function by
+    its qualified name (a nested one also by its code and the values it closes over), a
+    partial by its function and bound arguments, an object by its type and plain
+    attributes (e.g. a resolution). Raises TypeError for a value it cannot pin down,
+    such as an object without a __dict__, since two of those could not be told apart.
+    """
+    if isinstance(obj, (int, float, str, bool, type(None))):
+        return obj
+    if id(obj) in _seen:
+        return "<recursive>"
+    seen = _seen | {id(obj)}
+    if isinstance(obj, (list, tuple)):
+        return [_describe(v, seen) for v in obj]
+    if isinstance(obj, dict):
+        return sorted(([_describe(k, seen), _describe(v, seen)] for k, v in obj.items()), key=repr)
+    if isinstance(obj, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(obj).data, digest_size=20).hexdigest()
+        return {"array": obj.dtype.str, "shape": list(obj.shape), "digest": digest}
+    if isinstance(obj, functools.partial):
+        return {"partial": _describe(obj.func, seen), "args": _describe(obj.args, seen), "keywords": _describe(obj.keywords, seen)}
+    if isinstance(obj, types.FunctionType):
+        name = f"{obj.__module__}.{obj.__qualname__}"
+        if "<" not in obj.__qualname__ and not obj.__closure__:
+            return name
+        # Lambdas and nested functions share a qualified name across definitions and calls
+        try:
+            cells = [c.cell_contents for c in obj.__closure__ or ()]
+        except ValueError:
+            raise TypeError(f"cannot describe {name}: a closure variable is unset") from None
+        code = hashlib.blake2b(obj.__code__.co_code, digest_size=20).hexdigest()
+        return {
+            "function": name, "code": code, "constants": _describe(obj.__code__.co_consts, seen),
+            "closure": _describe(cells, seen), "defaults": _describe(obj.__defaults__, seen),
+        }
+    if isinstance(obj, types.CodeType):
+        return {"code": hashlib.blake2b(obj.co_code, digest_size=20).hexdigest(), "constants": _describe(obj.co_consts, seen)}
+    if isinstance(obj, (types.BuiltinFunctionType, type)):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    if isinstance(obj, types.MethodType):
+        return {"method": obj.__func__.__qualname__, "of": _describe(obj.__self__, seen)}
+    kind = type(obj)
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is None:
+        raise TypeError(f"cannot describe a {kind.__module__}.{kind.__qualname__} for a cache key")
+    return {
+        "type": f"{kind.__module__}.{kind.__qualname__}",
+        "attrs": {k: _describe(v, seen) for k, v in sorted(attrs.items()) if not k.startswith("_")},
+    }
+
+def detection_key(
+    g: GraphLike,
+    p0: Optional[Partition],
+    *,
+    objective: Any,
+    gamma: float,
+    theta: float,
+    max_levels: int,
+    seed: int,
+    **options: Any,
+) -> str:
+    """
+    Content key of one detection: graph digest, starting partition, objective (type and
+    plain attributes), gamma, theta, max_levels, seed and any further options that
+    change the result (engine, workers, ...). Equal keys mean equal results. Raises
+    TypeError when the objective cannot be described (see _describe).
+    """
+    csr = g if isinstance(g, CSRGraph) else CSRGraph.from_graph(g)
+    h = hashlib.blake2b(digest_size=20)
+    recipe = {
+        "version": KEY_VERSION,
+        "graph": graph_digest(csr),
+        "objective": _describe(objective),
+        "gamma": gamma,
+        "theta": theta,
+        "max_levels": max_levels,
+        "seed": seed,
+        "options": {k: options[k] for k in sorted(options)},
+    }
+    h.update(json.dumps(recipe, sort_keys=True, default=repr).encode("utf-8"))
+    if p0 is not None:
+        h.update(b"p0")
+        h.update(np.ascontiguousarray(intern_partition(csr, p0).compact(), dtype="<i8").data)
+    return h.hexdigest()
+
+class DiskResultCache(ResultCachePort):
+    """
+    Adapter: detection results as compressed .npz hierarchies (NpzHierarchyWriter) under
+    directory/<2 hex chars>/<key>.npz.
+    - Entries are written to a temporary file and renamed into place, so readers in other
+      processes see a whole entry or none; concurrent writers of one key are harmless
+      (same content, last rename wins).
+    - A hit is read fully into memory and its mtime bumped, which is the LRU order.
+    - After each put, least recently used entries are removed until the cache is within
+      max_bytes and max_entries (None: unbounded). Files another process already removed,
+      or that cannot be removed, are skipped.
+    """
+    def __init__(
+        self,
+        directory: PathLike,
+        max_bytes: Optional[int] = 1 << 30,
+        max_entries: Optional[int] = None,
+        compress: bool = True,
+    ) -> None:
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        if max_entries is not None and max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.writer = NpzHierarchyWriter(compress=compress)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        if len(key) < 3 or not all(c in "0123456789abcdef" for c in key):
+            raise ValueError(f"not a cache key: {key!r}")
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[Hierarchy]:
+        path = self._path(key)
+        try:
+            h = NpzHierarchyReader().read(path)
+            # Pull every array in now: the entry may be evicted right after this
+            maps = [np.array(m) for m in h.maps]
+            labels = h.labels
+            os.utime(path)
+        except (OSError, ValueError, KeyError) as e:
+            if path.exists():
+                log.warning("result cache: unreadable entry %s (%s)", path, e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Hierarchy(maps, labels)
+
+    def put(self, key: str, h: Hierarchy) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.writer.write(h, path)
+        except TypeError as e:
+            log.info("result cache: not storing %s (%s)", key, e)
+            return
+        except OSError as e:
+            log.warning("result cache: could not store %s: %s", path, e)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        if self.max_bytes is None and self.max_entries is None:
+            return
+        entries: List[Tuple[float, int, Path]] = []
+        for path in self.directory.glob("??/*.npz"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            over_count = self.max_entries is not None and count > self.max_entries
+            if not (over_bytes or over_count):
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning("result cache: could not evict %s: %s", path, e)
+                continue
+            total -= size
+            count -= 1
+
+    def clear(self) -> None:
+        for path in self.directory.glob("??/*.npz"):
+            path.unlink(missing_ok=True)
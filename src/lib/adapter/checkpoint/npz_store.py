@@ -0,0 +1,105 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+import json
+import os
+import time
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.leiden_state import LeidenState
+from src.lib.port.checkpoint import CheckpointPort
+
+FORMAT_VERSION = 2
+
+class NpzCheckpointStore(CheckpointPort):
+    """
+    Adapter: keeps the latest LeidenState in one .npz file (the level graph's CSR
+    arrays, the labels, the concatenated membership maps and a JSON header).
+    Each save writes a temporary file next to the target and renames it over the old
+    one, so a job killed mid-write leaves the previous checkpoint intact.
+    min_interval rate-limits intermediate saves (in seconds); the final state of a
+    run is always written.
+    """
+    def __init__(self, path: Union[str, Path], min_interval: float = 0.0) -> None:
+        self.path = Path(path)
+        self.min_interval = min_interval
+        self._last_save = float("-inf")
+
+    def save(self, state: LeidenState) -> None:
+        now = time.monotonic()
+        if state.stop_reason is None and now - self._last_save < self.min_interval:
+            return
+        G = state.graph
+        meta = {
+            "version": FORMAT_VERSION,
+            "base": state.base,
+            "params": state.params,
+            "rng_state": _rng_to_json(state.rng_state),
+            "quality": state.quality,
+            "stop_reason": state.stop_reason,
+        }
+        arrays: Dict[str, np.ndarray] = {
+            "offsets": np.asarray(G.offsets),
+            "indices": np.asarray(G.indices),
+            "weights": np.asarray(G.weights),
+            "degrees": np.asarray(G.degrees),
+            "labels": np.asarray(state.labels, dtype=np.int64),
+            "memberships": np.concatenate(state.memberships) if state.memberships else np.empty(0, np.int64),
+            "membership_lengths": np.array([len(m) for m in state.memberships], dtype=np.int64),
+            "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        }
+        if G.sizes is not None:
+            arrays["sizes"] = np.asarray(G.sizes)
+
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as fh:
+                np.savez(fh, **arrays)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            raise OSError(f"could not write checkpoint {self.path}: {e}") from e
+        self._last_save = now
+
+    def load(self) -> Optional[LeidenState]:
+        if not self.path.exists():
+            return None
+        try:
+            with np.load(self.path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            raise ValueError(f"could not read checkpoint {self.path}: {e}") from e
+        meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported checkpoint version {meta.get('version')}")
+        G = CSRGraph(
+            arrays["offsets"], arrays["indices"], arrays["weights"], None,
+            arrays.get("sizes"), arrays["degrees"],
+        )
+        cuts = np.cumsum(arrays["membership_lengths"])[:-1]
+        memberships = np.split(arrays["memberships"], cuts) if len(arrays["membership_lengths"]) else []
+        return LeidenState(
+            G, arrays["labels"], list(memberships), meta["base"],
+            _rng_from_json(meta["rng_state"]), meta["quality"], meta["stop_reason"], meta["params"],
+        )
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+def _rng_to_json(state: Optional[Tuple[Any, ...]]) -> Optional[list]:
+    # random.Random.getstate(): (version, tuple of 625 ints, gauss_next)
+    if state is None:
+        return None
+    version, internal, gauss = state
+    return [version, list(internal), gauss]
+
+def _rng_from_json(state: Optional[list]) -> Optional[Tuple[Any, ...]]:
+    if state is None:
+        return None
+    version, internal, gauss = state
+    return version, tuple(internal), gauss
@@ -0,0 +1,306 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import random
+import socket
+
+import numpy as np
+
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.events import (
+    PHASE_MOVE,
+    PHASE_REFINE,
+    CommunicationStats,
+    LocalMovingStats,
+    Observer,
+)
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph import community_membership
+from src.lib.domain.services.graph.vectorized import move_nodes_fast_vectorized
+from src.lib.domain.services.objective import IncrementalObjective
+from src.lib.domain.services.partition import refine_partition
+from src.lib.adapter.distributed.protocol import Channel, Message, encode_objective
+
+log = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+@dataclass
+class LevelTraffic:
+    """
+    Coordinator socket traffic of one level (one distributed graph), summed over all
+    workers: shipping the shards, local moving and refinement.
+    """
+    level: int
+    nodes: int
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    messages: int = 0
+
+class DistributedCoordinator:
+    """
+    Adapter: runs the local-moving and refinement stages of leiden() on ShardWorkers
+    reached over sockets, one node range per worker; aggregation stays with the
+    caller (leiden() aggregates the coarse level in memory, here).
+    Pass move_nodes and refine to leiden_hierarchy (see DistributedLeidenAdapter).
+
+    - A new graph (one per level) is split into contiguous node ranges of about equal
+      entry counts; each worker gets its rows and the ids of its ghosts (neighbors
+      owned by another worker).
+    - Local moving runs in supersteps: every worker scores and applies one batch of
+      its queue against its view of the communities and replies with its moves, the
+      community-degree (and size, count) deltas and the ghosts it wants revisited.
+      The coordinator folds the deltas into the global totals and sends each worker,
+      with the next step, the new communities of its ghosts, the totals of every
+      changed community and its own nodes to revisit. A move is scored against
+      totals that may miss the other workers' moves of the same superstep (as in
+      ParallelLocalMover), so the run stops after max_sweeps * n evaluations.
+    - Refinement refines every community restricted to each worker's range, so
+      refined communities never span workers (the next level can still merge them).
+    - Graphs under min_nodes (the coarse levels) run here, with the vectorized engine
+      and refine_partition: a worker's whole range would fit in one superstep, so
+      nearly every move would be scored against stale totals.
+    traffic holds the bytes and messages of every level; the stages also emit
+    CommunicationStats to the observer the move stage was given.
+    """
+    def __init__(
+        self,
+        workers: Sequence[Address],
+        batch_size: int = 4096,
+        max_sweeps: int = 50,
+        min_nodes: int = 50_000,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if not workers:
+            raise ValueError("at least one worker address is needed")
+        self.addresses = [tuple(a) for a in workers]
+        self.batch_size = max(1, batch_size)
+        self.max_sweeps = max_sweeps
+        self.min_nodes = min_nodes
+        self.timeout = timeout
+        self.channels: List[Channel] = []
+        self.traffic: List[LevelTraffic] = []
+        self._graph: Optional[CSRGraph] = None
+        self._bounds = np.zeros(1, dtype=np.int64)
+        self._ghosts: List[np.ndarray] = []
+        self._objective: Optional[IncrementalObjective] = None
+        self._observer: Optional[Observer] = None
+
+    def connect(self) -> DistributedCoordinator:
+        try:
+            for host, port in self.addresses:
+                sock = socket.create_connection((host, port), timeout=self.timeout)
+                sock.settimeout(self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.channels.append(Channel(sock))
+        except OSError as e:
+            self.close()
+            raise OSError(f"could not connect to worker {host}:{port}: {e}") from e
+        return self
+
+    def close(self) -> None:
+        for channel in self.channels:
+            try:
+                channel.send("bye")
+            except OSError:
+                pass
+            channel.close()
+        self.channels = []
+        self._graph = None
+
+    def __enter__(self) -> DistributedCoordinator:
+        return self.connect()
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ---- messaging ----
+    def _counters(self) -> Tuple[int, int, int]:
+        return (
+            sum(c.bytes_sent for c in self.channels),
+            sum(c.bytes_received for c in self.channels),
+            sum(c.messages for c in self.channels),
+        )
+
+    def _gather(self, expected: str) -> List[Message]:
+        replies = [channel.recv() for channel in self.channels]
+        for address, reply in zip(self.addresses, replies):
+            if reply.kind == "error":
+                raise RuntimeError(f"worker {address[0]}:{address[1]}: {reply.meta.get('message')}")
+            if reply.kind != expected:
+                raise ValueError(f"worker {address[0]}:{address[1]} sent {reply.kind!r}, expected {expected!r}")
+        return replies
+
+    def _account(self, phase: str, before: Tuple[int, int, int]) -> None:
+        sent, received, messages = (a - b for a, b in zip(self._counters(), before))
+        level = self.traffic[-1]
+        level.bytes_sent += sent
+        level.bytes_received += received
+        level.messages += messages
+        if self._observer is not None:
+            self._observer.emit(CommunicationStats(phase, sent, received, messages))
+
+    # ---- stages ----
+    def _distribute(self, G: CSRGraph, objective: IncrementalObjective) -> None:
+        n, k = G.num_nodes(), len(self.channels)
+        targets = np.arange(1, k, dtype=np.float64) * len(G.indices) / k
+        self._bounds = np.concatenate(([0], np.searchsorted(G.offsets, targets, side="left"), [n])).astype(np.int64)
+        self._bounds = np.maximum.accumulate(np.minimum(self._bounds, n))
+        self._ghosts = []
+        spec = encode_objective(objective)
+        for i, channel in enumerate(self.channels):
+            lo, hi = int(self._bounds[i]), int(self._bounds[i + 1])
+            a, b = int(G.offsets[lo]), int(G.offsets[hi])
+            indices = np.asarray(G.indices[a:b], dtype=np.int64)
+            ghosts = np.unique(indices[(indices < lo) | (indices >= hi)])
+            self._ghosts.append(ghosts)
+            arrays = {
+                "offsets": np.asarray(G.offsets[lo:hi + 1], dtype=np.int64) - a,
+                "indices": indices,
+                "weights": np.asarray(G.weights[a:b], dtype=np.float64),
+                "degrees": np.asarray(G.degrees[lo:hi], dtype=np.float64),
+                "ghosts": ghosts,
+            }
+            if G.sizes is not None:
+                arrays["sizes"] = np.asarray(G.sizes[lo:hi], dtype=np.float64)
+            channel.send("load", {"n": n, "lo": lo, "hi": hi, "total": G.total_weight(), "objective": spec}, arrays)
+        self._gather("loaded")
+        self._graph, self._objective = G, objective
+        self.traffic.append(LevelTraffic(len(self.traffic), n))
+
+    def _owner(self, nodes: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self._bounds, nodes, side="right") - 1
+
+    def move_nodes(
+        self,
+        G: GraphLike,
+        P: Partition,
+        delta_fn: DeltaFn,
+        rng: Optional[random.Random] = None,
+        observer: Optional[Observer] = None,
+    ) -> Partition:
+        """
+        Local-moving engine (move_nodes_fast signature) on the workers; G must be a
+        CSRGraph and delta_fn a ModularityObjective or CPMObjective.
+        """
+        if not isinstance(G, CSRGraph):
+            raise TypeError(f"distributed local moving needs a CSRGraph, got {type(G).__name__}")
+        if not isinstance(delta_fn, IncrementalObjective):
+            raise TypeError(
+                f"distributed local moving needs an IncrementalObjective, got {type(delta_fn).__name__}"
+            )
+        if not self.channels:
+            raise RuntimeError("coordinator is not connected")
+        n = G.num_nodes()
+        if n < self.min_nodes:
+            log.debug("%d nodes are under min_nodes=%d; moving them here", n, self.min_nodes)
+            self._graph = None
+            return move_nodes_fast_vectorized(G, P, delta_fn, self.batch_size, rng, observer)
+        self._observer = observer
+        before = self._counters()
+        if G is not self._graph or delta_fn is not self._objective:
+            self._distribute(G, delta_fn)
+        r = rng or random
+        sizes = np.ones(n, dtype=np.float64) if G.sizes is None else G.sizes
+        comm = community_membership(P, n).astype(np.int64)
+        com_degree = np.bincount(comm, weights=G.degrees, minlength=2 * n)
+        com_size = np.bincount(comm, weights=sizes, minlength=2 * n)
+        com_count = np.bincount(comm, minlength=2 * n)
+        for i, channel in enumerate(self.channels):
+            lo, hi = int(self._bounds[i]), int(self._bounds[i + 1])
+            ghosts = self._ghosts[i]
+            ids = np.unique(np.concatenate((comm[lo:hi], comm[ghosts])))
+            channel.send(
+                "begin", {"seed": r.getrandbits(64), "batch_size": self.batch_size},
+                {"comm": comm[lo:hi], "ghost_comm": comm[ghosts], "com_ids": ids,
+                 "com_degree": com_degree[ids], "com_size": com_size[ids], "com_count": com_count[ids]},
+            )
+        self._gather("ready")
+
+        k = len(self.channels)
+        ghost_of = []
+        for ghosts in self._ghosts:
+            mask = np.zeros(n, dtype=bool)
+            mask[ghosts] = True
+            ghost_of.append(mask)
+        empty = np.empty(0, dtype=np.int64)
+        updates: List[Dict[str, np.ndarray]] = [
+            {"ghosts": empty, "ghost_comm": empty, "com_ids": empty, "com_degree": np.empty(0),
+             "com_size": np.empty(0), "com_count": empty, "wake": empty}
+            for _ in range(k)
+        ]
+        budget = self.max_sweeps * n
+        visited = moved = peak = steps = 0
+        while True:
+            for channel, update in zip(self.channels, updates):
+                channel.send("step", {}, update)
+            replies = self._gather("stepped")
+            steps += 1
+            movers = np.concatenate([m.arrays["moved"] for m in replies])
+            comm[movers] = np.concatenate([m.arrays["dest"] for m in replies])
+            ids = np.concatenate([m.arrays["com_ids"] for m in replies])
+            np.add.at(com_degree, ids, np.concatenate([m.arrays["d_degree"] for m in replies]))
+            np.add.at(com_size, ids, np.concatenate([m.arrays["d_size"] for m in replies]))
+            np.add.at(com_count, ids, np.concatenate([m.arrays["d_count"] for m in replies]))
+            changed = np.unique(ids)
+            wake = np.unique(np.concatenate([m.arrays["wake"] for m in replies]))
+            owner = self._owner(wake)
+            queued = sum(int(m.meta["queued"]) for m in replies)
+            visited += sum(int(m.meta["visited"]) for m in replies)
+            moved += len(movers)
+            peak = max(peak, queued + len(wake))
+            if queued == 0 and not len(wake):
+                break
+            if visited >= budget:
+                log.warning("distributed local moving hit max_sweeps=%d with %d nodes queued", self.max_sweeps, queued)
+                break
+            totals = {"com_ids": changed, "com_degree": com_degree[changed],
+                      "com_size": com_size[changed], "com_count": com_count[changed]}
+            for i in range(k):
+                seen = movers[ghost_of[i][movers]]
+                updates[i] = {"ghosts": seen, "ghost_comm": comm[seen], **totals, "wake": wake[owner == i]}
+        log.debug("distributed local moving: %d supersteps, %d visits, %d moves", steps, visited, moved)
+        self._account(PHASE_MOVE, before)
+        if observer is not None:
+            observer.emit(LocalMovingStats(visited, moved, peak))
+        return CompactPartition(np.unique(comm, return_inverse=True)[1])
+
+    def refine(
+        self,
+        G: GraphLike,
+        P: Partition,
+        delta_fn: DeltaFn,
+        gamma: float,
+        theta: float,
+        rng: Optional[random.Random] = None,
+    ) -> Partition:
+        """
+        refine_partition-compatible stage on the workers, for the graph the last
+        move_nodes call distributed (graphs under min_nodes are refined here).
+        """
+        if G is not self._graph:
+            if G.num_nodes() < self.min_nodes:
+                return refine_partition(G, P, delta_fn, gamma, theta, rng=rng)
+            raise ValueError("refine() must follow move_nodes() on the same graph")
+        before = self._counters()
+        n = G.num_nodes()
+        labels = community_membership(P, n)
+        r = rng or random
+        for i, channel in enumerate(self.channels):
+            lo, hi = int(self._bounds[i]), int(self._bounds[i + 1])
+            channel.send(
+                "refine", {"gamma": gamma, "theta": theta, "seed": r.getrandbits(64)},
+                {"labels": labels[lo:hi]},
+            )
+        refined = np.empty(n, dtype=np.int64)
+        next_id = 0
+        for i, reply in enumerate(self._gather("refined")):
+            part = reply.arrays["labels"]
+            refined[self._bounds[i]:self._bounds[i + 1]] = part + next_id
+            next_id += int(part.max()) + 1 if len(part) else 0
+        self._account(PHASE_REFINE, before)
+        return CompactPartition(refined)
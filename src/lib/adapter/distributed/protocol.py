@@ -0,0 +1,102 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import json
+import socket
+import struct
+
+import numpy as np
+
+from src.lib.domain.services.objective import CPMObjective, IncrementalObjective, ModularityObjective
+
+# Frame: 4-byte big-endian header length, a UTF-8 JSON header
+#   {"kind": str, "meta": {...}, "arrays": [[name, dtype, shape], ...]}
+# then the raw bytes of every listed array, in order (C order, dtype as given).
+_LENGTH = struct.Struct("!I")
+MAX_HEADER = 1 << 20
+
+# Objectives a worker can rebuild from a message (no pickles on the wire)
+OBJECTIVES = {cls.__name__: cls for cls in (ModularityObjective, CPMObjective)}
+
+@dataclass
+class Message:
+    kind: str
+    meta: Dict[str, Any] = field(default_factory=dict)
+    arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+
+class Channel:
+    """
+    One end of a coordinator/worker connection: framed messages over a stream socket,
+    with running totals of the bytes and messages that went through it.
+    A peer closing mid-frame raises ConnectionError; a malformed frame ValueError.
+    """
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages = 0
+
+    def send(self, kind: str, meta: Optional[Dict[str, Any]] = None, arrays: Optional[Dict[str, np.ndarray]] = None) -> None:
+        payload = [np.ascontiguousarray(a) for a in (arrays or {}).values()]
+        header = json.dumps({
+            "kind": kind,
+            "meta": meta or {},
+            "arrays": [[name, a.dtype.str, list(a.shape)] for name, a in zip(arrays or {}, payload)],
+        }).encode("utf-8")
+        self.sock.sendall(_LENGTH.pack(len(header)) + header)
+        for a in payload:
+            if a.nbytes:
+                self.sock.sendall(memoryview(a).cast("B"))
+        self.bytes_sent += _LENGTH.size + len(header) + sum(a.nbytes for a in payload)
+        self.messages += 1
+
+    def recv(self) -> Message:
+        (length,) = _LENGTH.unpack(self._read(_LENGTH.size))
+        if length > MAX_HEADER:
+            raise ValueError(f"message header of {length} bytes exceeds {MAX_HEADER}")
+        try:
+            header = json.loads(self._read(length))
+            arrays: Dict[str, np.ndarray] = {}
+            for name, dtype, shape in header["arrays"]:
+                dt = np.dtype(dtype)
+                if dt.hasobject:
+                    raise ValueError(f"array {name!r} has an object dtype")
+                count = int(np.prod(shape)) if shape else 1
+                arrays[name] = np.frombuffer(self._read(count * dt.itemsize), dtype=dt).reshape(shape)
+            message = Message(header["kind"], header["meta"], arrays)
+        except (KeyError, TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"malformed message: {e}") from None
+        self.bytes_received += _LENGTH.size + length + sum(a.nbytes for a in arrays.values())
+        self.messages += 1
+        return message
+
+    def _read(self, size: int) -> bytearray:
+        buf = bytearray(size)
+        view = memoryview(buf)
+        got = 0
+        while got < size:
+            n = self.sock.recv_into(view[got:])
+            if n == 0:
+                raise ConnectionError("peer closed the connection")
+            got += n
+        return buf
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+def encode_objective(objective: IncrementalObjective) -> Dict[str, Any]:
+    name = type(objective).__name__
+    if OBJECTIVES.get(name) is not type(objective):
+        raise TypeError(
+            f"distributed Leiden supports {', '.join(sorted(OBJECTIVES))}, got {name}"
+        )
+    return {"name": name, "gamma": objective.gamma}  # type: ignore[attr-defined]
+
+def decode_objective(spec: Dict[str, Any]) -> IncrementalObjective:
+    try:
+        return OBJECTIVES[spec["name"]](gamma=float(spec["gamma"]))
+    except KeyError:
+        raise ValueError(f"unknown objective {spec!r}") from None
@@ -0,0 +1,299 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+import multiprocessing
+import random
+import socket
+import threading
+
+import numpy as np
+
+from src.lib.domain.models.sharded_graph import GraphShard
+from src.lib.domain.services.graph.vectorized import score_batch
+from src.lib.domain.services.graph.sharded import refine_subgraph
+from src.lib.adapter.distributed.protocol import Channel, Message, decode_objective
+
+log = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+_UNSET = np.iinfo(np.int64).max
+
+class _IdSpace:
+    """
+    What score_batch reads from a graph: num_nodes() bounds the community ids (the
+    worker's ids run over 0..2n-1, see _Shard.step) and degrees holds the owned rows.
+    """
+    def __init__(self, size: int, degrees: np.ndarray) -> None:
+        self.size = size
+        self.degrees = degrees
+
+    def num_nodes(self) -> int:
+        return self.size
+
+class _Shard:
+    """
+    A worker's part of one level: the rows of nodes lo..hi-1 (neighbor ids global),
+    and, for one local-moving call, the community of every owned and ghost node
+    (a neighbor owned by another worker) plus the totals of every community those are in.
+    Node and community tables are indexed by global id, so they are sized to the
+    level's node count; only the edges are split between workers.
+    """
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+        n = self.n = int(meta["n"])
+        self.lo, self.hi = int(meta["lo"]), int(meta["hi"])
+        self.rows = GraphShard(self.lo, self.hi, arrays["offsets"], arrays["indices"], arrays["weights"]).rows
+        self.total = float(meta["total"])
+        self.objective = decode_objective(meta["objective"])
+        self.ghosts = arrays["ghosts"]
+        self.degrees = np.zeros(n, dtype=np.float64)
+        self.degrees[self.lo:self.hi] = arrays["degrees"]
+        self.sizes = np.ones(n, dtype=np.float64)
+        if "sizes" in arrays:
+            self.sizes[self.lo:self.hi] = arrays["sizes"]
+        self.space = _IdSpace(2 * n, self.degrees)
+
+    # ---- local moving ----
+    def begin(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+        n = self.n
+        self.comm = np.full(n, -1, dtype=np.int64)
+        self.comm[self.lo:self.hi] = arrays["comm"]
+        self.comm[self.ghosts] = arrays["ghost_comm"]
+        self.com_degree = np.zeros(2 * n, dtype=np.float64)
+        self.com_size = np.zeros(2 * n, dtype=np.float64)
+        self.com_count = np.zeros(2 * n, dtype=np.int64)
+        self._set_totals(arrays)
+        self.batch_size = max(1, int(meta["batch_size"]))
+        order = list(range(self.lo, self.hi))
+        random.Random(meta["seed"]).shuffle(order)
+        self.queue: Deque[int] = deque(order)
+        self.in_queue = np.zeros(n, dtype=bool)
+        self.in_queue[self.lo:self.hi] = True
+        self.first_move = np.full(n, _UNSET, dtype=np.int64)
+
+    def _set_totals(self, arrays: Dict[str, np.ndarray]) -> None:
+        ids = arrays["com_ids"]
+        self.com_degree[ids] = arrays["com_degree"]
+        self.com_size[ids] = arrays["com_size"]
+        self.com_count[ids] = arrays["com_count"]
+
+    def step(self, arrays: Dict[str, np.ndarray]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """
+        Applies the coordinator's updates (ghost communities, community totals, owned
+        nodes to revisit), then scores and applies one batch off the queue.
+        """
+        comm, com_degree, com_size, com_count = self.comm, self.com_degree, self.com_size, self.com_count
+        comm[arrays["ghosts"]] = arrays["ghost_comm"]
+        self._set_totals(arrays)
+        wake = arrays["wake"]
+        wake = wake[~self.in_queue[wake]]
+        self.in_queue[wake] = True
+        self.queue.extend(wake.tolist())
+
+        empty = np.empty(0, dtype=np.int64)
+        L = min(self.batch_size, len(self.queue))
+        if L == 0:
+            return {"queued": 0, "visited": 0}, {
+                "moved": empty, "dest": empty, "com_ids": empty, "d_degree": np.empty(0),
+                "d_size": np.empty(0), "d_count": empty, "wake": empty,
+            }
+        batch = np.fromiter((self.queue.popleft() for _ in range(L)), dtype=np.int64, count=L)
+        owner, nbr, _, _, best_c, to_new, moving = score_batch(
+            self.space, batch, comm, com_degree, com_size, self.sizes, self.total, self.objective,
+            self.rows(batch),
+        )
+        cur = comm[batch]
+        # Two singletons joining each other from different workers would swap forever:
+        # a singleton only joins another singleton community with a smaller id
+        swap = ~to_new & (com_count[cur] == 1) & (com_count[np.maximum(best_c, 0)] == 1) & (best_c > cur)
+        moving &= ~swap
+        # A fresh community is slot n + v, else v; every other id may be in use elsewhere
+        dest = best_c.copy()
+        if to_new.any():
+            nv = np.flatnonzero(moving & to_new)
+            slot = np.where(com_count[self.n + batch[nv]] == 0, self.n + batch[nv], batch[nv])
+            taken = com_count[slot] != 0
+            dest[nv] = slot
+            moving[nv[taken]] = False
+
+        # Defer movers with a neighbor that moved earlier in the batch (as ParallelLocalMover)
+        mp = np.flatnonzero(moving)
+        self.first_move[batch[mp]] = mp
+        affected = np.full(L, _UNSET, dtype=np.int64)
+        if len(owner):
+            np.minimum.at(affected, owner, self.first_move[nbr])
+        self.first_move[batch[mp]] = _UNSET
+        clean = affected >= np.arange(L)
+        movers = mp[clean[mp]]
+        deferred = batch[mp[~clean[mp]]]
+
+        vs, src, dst = batch[movers], cur[movers], dest[movers]
+        k_v, n_v = self.degrees[vs], self.sizes[vs]
+        comm[vs] = dst
+        np.subtract.at(com_degree, src, k_v)
+        np.add.at(com_degree, dst, k_v)
+        np.subtract.at(com_size, src, n_v)
+        np.add.at(com_size, dst, n_v)
+        np.subtract.at(com_count, src, 1)
+        np.add.at(com_count, dst, 1)
+        ids, inv = np.unique(np.concatenate((src, dst)), return_inverse=True)
+        sign = np.concatenate((-np.ones(len(vs)), np.ones(len(vs))))
+        d_degree = np.bincount(inv, weights=sign * np.concatenate((k_v, k_v)), minlength=len(ids))
+        d_size = np.bincount(inv, weights=sign * np.concatenate((n_v, n_v)), minlength=len(ids))
+        d_count = np.bincount(inv, weights=sign, minlength=len(ids)).astype(np.int64)
+
+        # Requeue neighbors outside the mover's new community; ghosts go to their owner
+        self.in_queue[batch] = False
+        self.in_queue[deferred] = True
+        wake_out = empty
+        if len(vs):
+            m_owner, m_nbr, _ = self.rows(vs)
+            cand = m_nbr[comm[m_nbr] != dst[m_owner]]
+            own = (cand >= self.lo) & (cand < self.hi)
+            wake_out = np.unique(cand[~own])
+            cand = cand[own]
+            cand = cand[~self.in_queue[cand]]
+            if len(cand):
+                _, first = np.unique(cand, return_index=True)
+                cand = cand[np.sort(first)]
+                self.in_queue[cand] = True
+                self.queue.extend(cand.tolist())
+        if len(deferred):
+            self.queue.extendleft(reversed(deferred.tolist()))
+        return {"queued": len(self.queue), "visited": L - len(deferred)}, {
+            "moved": vs, "dest": dst, "com_ids": ids, "d_degree": d_degree, "d_size": d_size,
+            "d_count": d_count, "wake": wake_out,
+        }
+
+    # ---- refinement ----
+    def refine(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Refines every community restricted to the owned nodes, on the owned rows alone.
+        """
+        labels = arrays["labels"]
+        lo, hi = self.lo, self.hi
+        owner, nbr, w = self.rows(np.arange(lo, hi, dtype=np.int64))
+        keep = (nbr >= lo) & (nbr < hi)
+        owner, nbr, w = owner[keep], nbr[keep] - lo, w[keep]
+        keep = labels[owner] == labels[nbr]
+        _, dense = np.unique(labels, return_inverse=True)
+        return refine_subgraph(
+            owner[keep], nbr[keep], w[keep], dense, self.degrees[lo:hi], self.sizes[lo:hi], self.total,
+            self.objective, float(meta["gamma"]), float(meta["theta"]), random.Random(meta["seed"]),
+        )
+
+class ShardWorker:
+    """
+    Adapter: one worker of a distributed Leiden run (see DistributedCoordinator).
+    Listens on (host, port) (port 0: any free port, see address) and serves one
+    coordinator connection at a time until close(). Per connection it keeps the shard
+    it was last sent: "load" (rows of a node range and its ghost ids), then "begin",
+    "step"... for local moving and "refine"; "bye" ends the connection. An error in a
+    command is sent back as an "error" message and the connection stays usable.
+    There is no authentication: bind to localhost or a private network.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.listener = socket.create_server((host, port))
+        self._closed = threading.Event()
+
+    @property
+    def address(self) -> Address:
+        host, port = self.listener.getsockname()[:2]
+        return host, port
+
+    def serve_forever(self) -> None:
+        log.info("shard worker listening on %s:%d", *self.address)
+        while not self._closed.is_set():
+            try:
+                sock, peer = self.listener.accept()
+            except OSError:
+                if self._closed.is_set():
+                    break
+                raise
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            channel = Channel(sock)
+            try:
+                self._serve(channel)
+            except ConnectionError:
+                log.warning("coordinator %s dropped the connection", peer)
+            finally:
+                channel.close()
+            log.debug("coordinator %s done: %d bytes in, %d out", peer, channel.bytes_received, channel.bytes_sent)
+
+    def close(self) -> None:
+        self._closed.set()
+        self.listener.close()
+
+    def _serve(self, channel: Channel) -> None:
+        shard: Optional[_Shard] = None
+        while True:
+            message = channel.recv()
+            if message.kind == "bye":
+                return
+            try:
+                shard = self._handle(channel, message, shard)
+            except Exception as e:
+                log.exception("command %r failed", message.kind)
+                channel.send("error", {"message": f"{type(e).__name__}: {e}"})
+
+    def _handle(self, channel: Channel, message: Message, shard: Optional[_Shard]) -> Optional[_Shard]:
+        kind, meta, arrays = message.kind, message.meta, message.arrays
+        if kind == "load":
+            shard = _Shard(meta, arrays)
+            channel.send("loaded", {"nodes": shard.hi - shard.lo, "ghosts": len(shard.ghosts)})
+            return shard
+        if shard is None:
+            raise ValueError(f"{kind!r} before any shard was loaded")
+        if kind == "begin":
+            shard.begin(meta, arrays)
+            channel.send("ready")
+        elif kind == "step":
+            reply_meta, reply_arrays = shard.step(arrays)
+            channel.send("stepped", reply_meta, reply_arrays)
+        elif kind == "refine":
+            channel.send("refined", {}, {"labels": shard.refine(meta, arrays)})
+        else:
+            raise ValueError(f"unknown command {kind!r}")
+        return shard
+
+def _serve_local(host: str, addresses: Any) -> None:
+    worker = ShardWorker(host, 0)
+    addresses.put(worker.address)
+    worker.serve_forever()
+
+class LocalWorkers:
+    """
+    count ShardWorker processes on this machine (ephemeral ports on host), for trying
+    out and testing the distributed mode; addresses lists where they listen. close()
+    (or leaving the with block) stops them.
+    """
+    def __init__(self, count: int, host: str = "127.0.0.1") -> None:
+        if count < 1:
+            raise ValueError(f"count must be >= 1, got {count}")
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        self.processes: List[Any] = [
+            ctx.Process(target=_serve_local, args=(host, queue), daemon=True) for _ in range(count)
+        ]
+        for p in self.processes:
+            p.start()
+        try:
+            self.addresses: List[Address] = [tuple(queue.get(timeout=60)) for _ in range(count)]  # type: ignore[misc]
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for p in self.processes:
+            if p.is_alive():
+                p.terminate()
+        for p in self.processes:
+            p.join()
+        self.processes = []
+
+    def __enter__(self) -> LocalWorkers:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union, overload
+import struct
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.port.graph import GraphReaderPort, GraphWriterPort
+
+PathLike = Union[str, Path]
+
+# File layout (little endian), every section starting on a 64-byte boundary:
+#   header  MAGIC, version u32, flags u32, n u64, nnz u64, label_bytes u64
+#   offsets int64[n+1] | indices int32/int64[nnz] | weights float64[nnz] | degrees float64[n]
+#   [sizes float64[n]] [labels int64[n] | label_offsets int64[n+1] + utf-8 blob[label_bytes]]
+MAGIC = b"HIERCSR\x00"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQ")
+_ALIGN = 64
+
+_INDEX32 = 1
+_SIZES = 2
+_LABELS_INT = 4
+_LABELS_STR = 8
+
+def _aligned(pos: int) -> int:
+    return -(-pos // _ALIGN) * _ALIGN
+
+class IntLabels(Sequence[int]):
+    """
+    Read-only label list over a stored int64 array; labels come back as Python ints.
+    """
+    def __init__(self, values: np.ndarray) -> None:
+        self.values = values
+
+    @overload
+    def __getitem__(self, i: int) -> int: ...
+    @overload
+    def __getitem__(self, i: slice) -> List[int]: ...
+    def __getitem__(self, i: Union[int, slice]) -> Union[int, List[int]]:
+        if isinstance(i, slice):
+            return self.values[i].tolist()
+        return int(self.values[i])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.values.tolist())
+
+class StrLabels(Sequence[str]):
+    """
+    Read-only label list over stored utf-8 bytes; a label is decoded when it is read.
+    """
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray) -> None:
+        self.offsets = offsets
+        self.blob = blob
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+    @overload
+    def __getitem__(self, i: slice) -> List[str]: ...
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        a, b = self.offsets[i], self.offsets[i + 1]
+        return self.blob[a:b].tobytes().decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+def encode_labels(
+    labels: Optional[Sequence[NodeLike]], what: str = "label arrays",
+) -> Optional[Tuple[str, List[np.ndarray]]]:
+    """
+    Labels as storable arrays: ("int", [int64 values]) or ("str", [int64 offsets, utf-8
+    blob]), the inputs of IntLabels / StrLabels. Mixed or other labels raise TypeError.
+    """
+    if labels is None:
+        return None
+    if isinstance(labels, IntLabels):
+        return "int", [np.asarray(labels.values, dtype="<i8")]
+    if all(isinstance(x, int) and not isinstance(x, bool) for x in labels):
+        return "int", [np.array(list(labels), dtype="<i8")]
+    if all(isinstance(x, str) for x in labels):
+        encoded = [x.encode("utf-8") for x in labels]  # type: ignore[union-attr]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return "str", [offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)]
+    raise TypeError(f"{what} store int or str labels only")
+
+class BinaryGraphWriter(GraphWriterPort):
+    """
+    Writes a CSRGraph in the binary layout above. Labels must be all ints or all strings
+    (or absent); anything else raises TypeError.
+    """
+    def write(self, G: CSRGraph, path: PathLike) -> None:
+        n, nnz = G.num_nodes(), len(G.indices)
+        flags = 0
+        index_dtype = np.dtype("<i8")
+        if n < 2**31:
+            flags |= _INDEX32
+            index_dtype = np.dtype("<i4")
+        if G.sizes is not None:
+            flags |= _SIZES
+        label_section = encode_labels(G.labels, "binary graph files")
+        label_bytes = 0
+        if label_section is not None:
+            kind, arrays = label_section
+            flags |= _LABELS_STR if kind == "str" else _LABELS_INT
+            if kind == "str":
+                label_bytes = len(arrays[1])
+
+        with open(path, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, VERSION, flags, n, nnz, label_bytes))
+            self._section(fh, np.asarray(G.offsets, dtype="<i8"))
+            self._section(fh, np.asarray(G.indices).astype(index_dtype, copy=False))
+            self._section(fh, np.asarray(G.weights, dtype="<f8"))
+            self._section(fh, np.asarray(G.degrees, dtype="<f8"))
+            if G.sizes is not None:
+                self._section(fh, np.asarray(G.sizes, dtype="<f8"))
+            if label_section is not None:
+                for arr in label_section[1]:
+                    self._section(fh, arr)
+
+    @staticmethod
+    def _section(fh: BinaryIO, arr: np.ndarray) -> None:
+        fh.write(b"\x00" * (_aligned(fh.tell()) - fh.tell()))
+        arr.tofile(fh)
+
+class BinaryGraphReader(GraphReaderPort):
+    """
+    Opens a binary graph file as a CSRGraph whose arrays are read-only np.memmap views:
+    nothing is parsed or copied, pages are loaded on first touch and shared between
+    processes reading the same file. Labels stay on disk too (IntLabels / StrLabels).
+    mmap=False reads the arrays into memory instead.
+    """
+    def __init__(self, mmap: bool = True) -> None:
+        self.mmap = mmap
+
+    def read(self, path: PathLike) -> CSRGraph:
+        with open(path, "rb") as fh:
+            magic, version, flags, n, nnz, label_bytes = _HEADER.unpack(fh.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary graph file")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported binary graph version {version}")
+
+        pos = _HEADER.size
+        def section(dtype: str, count: int) -> np.ndarray:
+            nonlocal pos
+            start = _aligned(pos)
+            pos = start + np.dtype(dtype).itemsize * count
+            if count == 0:
+                return np.empty(0, dtype=dtype)
+            if self.mmap:
+                return np.memmap(path, dtype=dtype, mode="r", offset=start, shape=(count,))
+            return np.fromfile(path, dtype=dtype, count=count, offset=start)
+
+        offsets = section("<i8", n + 1)
+        indices = section("<i4" if flags & _INDEX32 else "<i8", nnz)
+        weights = section("<f8", nnz)
+        degrees = section("<f8", n)
+        sizes = section("<f8", n) if flags & _SIZES else None
+        labels: Optional[Sequence[NodeLike]] = None
+        if flags & _LABELS_INT:
+            labels = IntLabels(section("<i8", n))
+        elif flags & _LABELS_STR:
+            label_offsets = section("<i8", n + 1)
+            labels = StrLabels(label_offsets, section("u1", label_bytes))
+        return CSRGraph(offsets, indices, weights, labels, sizes, degrees)
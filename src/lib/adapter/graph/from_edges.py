@@ -1,12 +1,20 @@
 from __future__ import annotations
-from typing import Sequence, Tuple
+from typing import Iterable, Tuple
 from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.csr_graph import CSRGraph
 from src.lib.domain.types.nodes import NodeLike
-from src.lib.port.graph import GraphBuilderPort
+from src.lib.port.graph import GraphBuilderPort, CSRGraphBuilderPort
 
 class EdgesGraphBuilder(GraphBuilderPort):
-   def build(self, edges: Sequence[Tuple[NodeLike, NodeLike, float]]) -> Graph:
+   def build(self, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> Graph:
         G = Graph()
         for u, v, w in edges:
             G.add_edge(u, v, w)
         return G
+
+class CSREdgesGraphBuilder(CSRGraphBuilderPort):
+    """
+    Builds the array-backed graph directly, interning nodes to ids in first-seen order.
+    """
+    def build(self, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> CSRGraph:
+        return CSRGraph.from_edges(edges)
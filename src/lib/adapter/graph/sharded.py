@@ -0,0 +1,290 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import json
+import logging
+import shutil
+import tempfile
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.sharded_graph import STATE_BYTES_PER_NODE, GraphShard, ShardedGraph
+from src.lib.domain.services.graph.sharded import SHARD_WORKING_SET
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.adapter.graph.binary import IntLabels, StrLabels, encode_labels
+from src.lib.port.graph import GraphWriterPort, ShardedGraphReaderPort
+
+log = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+EdgeChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Directory layout (all arrays .npy, little endian):
+#   meta.json                      format, version, nodes, edges, bounds, shard_nnz, labels, sizes
+#   degrees.npy [sizes.npy]        float64[n]
+#   [labels.npy | label_offsets.npy + label_blob.npy]
+#   shard-NNNNN.offsets.npy        int64[rows + 1], local (starts at 0)
+#   shard-NNNNN.indices.npy        int32/int64[nnz], global ids
+#   shard-NNNNN.weights.npy        float64[nnz]
+FORMAT = "sharded-csr"
+VERSION = 1
+_SPILL = np.dtype([("row", "<i8"), ("col", "<i8"), ("weight", "<f8")])
+
+def _shard_file(path: Path, i: int, name: str) -> Path:
+    return path / f"shard-{i:05d}.{name}.npy"
+
+def _split(row_entries: np.ndarray, per_shard: int) -> List[int]:
+    # Node-range bounds with at most per_shard entries per shard (a larger single row
+    # gets a shard of its own)
+    ends = np.cumsum(row_entries)
+    n = len(row_entries)
+    bounds = [0]
+    while bounds[-1] < n:
+        lo = bounds[-1]
+        before = int(ends[lo - 1]) if lo else 0
+        hi = int(np.searchsorted(ends, before + per_shard, side="right"))
+        bounds.append(min(n, max(hi, lo + 1)))
+    return bounds
+
+class ShardedGraphWriter(GraphWriterPort):
+    """
+    Writes a graph as a directory of node-range shards (layout above), each holding at
+    most shard_bytes of rows (a single larger row gets a shard of its own). Shards are
+    the unit the out-of-core pipeline loads, so shard_bytes should stay well below the
+    memory budget the graph will be read with (see check_budget).
+    - write(G, path) copies a CSRGraph range by range; with BinaryGraphReader's
+      memory-mapped graph nothing edge-sized is held in memory.
+    - write_edges(chunks, n, path) builds the shards from an edge stream, for graphs
+      that never existed as one CSR file; see its docstring.
+    """
+    def __init__(self, shard_bytes: int = 64 << 20) -> None:
+        if shard_bytes <= 0:
+            raise ValueError(f"shard_bytes must be > 0, got {shard_bytes}")
+        self.shard_bytes = shard_bytes
+
+    def write(self, G: CSRGraph, path: PathLike) -> None:
+        path = Path(path)
+        n = G.num_nodes()
+        index_dtype = np.dtype("<i4") if n < 2**31 else np.dtype("<i8")
+        offsets = np.asarray(G.offsets, dtype=np.int64)
+        bounds = _split(np.diff(offsets), self.shard_bytes // (index_dtype.itemsize + 8))
+        shard_nnz: List[int] = []
+        loops = 0
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            for i in range(len(bounds) - 1):
+                lo, hi = bounds[i], bounds[i + 1]
+                a, b = int(offsets[lo]), int(offsets[hi])
+                indices = np.asarray(G.indices[a:b]).astype(index_dtype)
+                rows = np.repeat(np.arange(lo, hi, dtype=np.int64), np.diff(offsets[lo:hi + 1]))
+                loops += int(np.count_nonzero(indices == rows))
+                np.save(_shard_file(path, i, "offsets"), offsets[lo:hi + 1] - a)
+                np.save(_shard_file(path, i, "indices"), indices)
+                np.save(_shard_file(path, i, "weights"), np.asarray(G.weights[a:b], dtype="<f8"))
+                shard_nnz.append(b - a)
+            self._finish(path, bounds, shard_nnz, (int(offsets[-1]) + loops) // 2,
+                         np.asarray(G.degrees, dtype="<f8"), G.sizes, G.labels, index_dtype)
+        except OSError as e:
+            raise OSError(f"could not write sharded graph {path}: {e}") from e
+
+    def write_edges(
+        self,
+        chunks: Callable[[], Iterable[EdgeChunk]],
+        n: int,
+        path: PathLike,
+        sizes: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Shards from undirected (src, dst, weight) id chunks, with the EdgeListReader
+        rules: zero weights are dropped, parallel edges summed, self-loops stored once.
+        chunks() is called twice: the first pass counts row lengths to place the shard
+        bounds, the second appends every entry to its shard's spill file. Each spill is
+        then sorted in memory on its own (about 4 x shard_bytes), so no more than one
+        shard's entries are ever held. Ids must be in 0..n-1; labels are not stored,
+        node sizes are if given.
+        """
+        path = Path(path)
+        index_dtype = np.dtype("<i4") if n < 2**31 else np.dtype("<i8")
+        counts = np.zeros(n, dtype=np.int64)
+        for src, dst, w in chunks():
+            src, dst = self._checked(src, n), self._checked(dst, n)
+            keep = np.asarray(w) != 0
+            counts += np.bincount(src[keep], minlength=n)
+            counts += np.bincount(dst[keep & (src != dst)], minlength=n)
+        bounds = np.asarray(_split(counts, self.shard_bytes // (index_dtype.itemsize + 8)), dtype=np.int64)
+        del counts
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            spills = [path / f"shard-{i:05d}.spill" for i in range(len(bounds) - 1)]
+            for spill in spills:
+                spill.write_bytes(b"")
+            for src, dst, w in chunks():
+                src, dst = self._checked(src, n), self._checked(dst, n)
+                w = np.asarray(w, dtype=np.float64)
+                keep = w != 0
+                src, dst, w = src[keep], dst[keep], w[keep]
+                off = src != dst
+                records = np.empty(len(src) + int(off.sum()), dtype=_SPILL)
+                records["row"] = np.concatenate((src, dst[off]))
+                records["col"] = np.concatenate((dst, src[off]))
+                records["weight"] = np.concatenate((w, w[off]))
+                shard = np.searchsorted(bounds, records["row"], side="right") - 1
+                order = np.argsort(shard, kind="stable")
+                records, shard = records[order], shard[order]
+                cuts = np.flatnonzero(np.concatenate(([True], shard[1:] != shard[:-1]))) if len(shard) else []
+                for a, b in zip(cuts, list(cuts[1:]) + [len(shard)]):
+                    with open(spills[shard[a]], "ab") as fh:
+                        records[a:b].tofile(fh)
+
+            degrees = np.zeros(n, dtype="<f8")
+            shard_nnz: List[int] = []
+            loops = 0
+            for i, spill in enumerate(spills):
+                lo, hi = int(bounds[i]), int(bounds[i + 1])
+                records = np.fromfile(spill, dtype=_SPILL)
+                part = CSRGraph.from_coo(hi - lo, records["row"] - lo, records["col"], records["weight"])
+                del records
+                nonzero = part.weights != 0
+                if not nonzero.all():
+                    rows = part.row_ids()[nonzero]
+                    part = CSRGraph.from_coo(hi - lo, rows, part.indices[nonzero], part.weights[nonzero])
+                rows = part.row_ids() + lo
+                loops += int(np.count_nonzero(part.indices == rows))
+                degrees[lo:hi] = part.degrees
+                np.save(_shard_file(path, i, "offsets"), part.offsets)
+                np.save(_shard_file(path, i, "indices"), part.indices.astype(index_dtype))
+                np.save(_shard_file(path, i, "weights"), part.weights)
+                shard_nnz.append(len(part.indices))
+                spill.unlink()
+            self._finish(path, bounds.tolist(), shard_nnz, (sum(shard_nnz) + loops) // 2,
+                         degrees, sizes, None, index_dtype)
+        except OSError as e:
+            raise OSError(f"could not write sharded graph {path}: {e}") from e
+
+    @staticmethod
+    def _checked(ids: np.ndarray, n: int) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and (ids.min() < 0 or ids.max() >= n):
+            raise ValueError(f"node ids must be in 0..{n - 1}")
+        return ids
+
+    @staticmethod
+    def _finish(
+        path: Path,
+        bounds: Sequence[int],
+        shard_nnz: Sequence[int],
+        num_edges: int,
+        degrees: np.ndarray,
+        sizes: Optional[np.ndarray],
+        labels: Optional[Sequence[NodeLike]],
+        index_dtype: np.dtype,
+    ) -> None:
+        np.save(path / "degrees.npy", degrees)
+        if sizes is not None:
+            np.save(path / "sizes.npy", np.asarray(sizes, dtype="<f8"))
+        label_section = encode_labels(labels, "sharded graphs")
+        if label_section is not None:
+            kind, arrays = label_section
+            names = ["labels"] if kind == "int" else ["label_offsets", "label_blob"]
+            for name, arr in zip(names, arrays):
+                np.save(path / f"{name}.npy", arr)
+        meta = {
+            "format": FORMAT,
+            "version": VERSION,
+            "nodes": len(degrees),
+            "edges": num_edges,
+            "bounds": [int(b) for b in bounds],
+            "shard_nnz": [int(c) for c in shard_nnz],
+            "index_dtype": index_dtype.str,
+            "labels": label_section[0] if label_section is not None else None,
+            "sizes": sizes is not None,
+        }
+        # meta.json last: a directory without it is an incomplete write
+        (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        log.info("wrote %s: %d nodes, %d edges in %d shards", path, len(degrees), num_edges, len(shard_nnz))
+
+class ShardedSpill:
+    """
+    SpillFn for leiden_hierarchy (see services.graph.sharded): every aggregated level
+    that does not fit memory_budget is written with ShardedGraphWriter.write_edges
+    under directory (a temporary one by default) and read back with the same budget,
+    in shards small enough for check_budget. close() removes what it wrote.
+    """
+    def __init__(self, memory_budget: int, directory: Optional[PathLike] = None, shard_bytes: int = 64 << 20) -> None:
+        self.memory_budget = memory_budget
+        self.shard_bytes = shard_bytes
+        self._owned = directory is None
+        self.directory = Path(tempfile.mkdtemp(prefix="leiden-spill-")) if directory is None else Path(directory)
+        self._written: List[Path] = []
+
+    def __call__(self, chunks: Callable[[], Iterable[EdgeChunk]], n: int, sizes: np.ndarray) -> ShardedGraph:
+        free = self.memory_budget - STATE_BYTES_PER_NODE * n
+        if free <= 0:
+            raise ValueError(
+                f"memory_budget {self.memory_budget} bytes cannot hold the per-node state of {n} nodes"
+            )
+        # 12 bytes per stored entry (int32 index + float64 weight), 16 per scanned one
+        shard_bytes = max(12, min(self.shard_bytes, 12 * (free // (16 * SHARD_WORKING_SET))))
+        path = self.directory / f"level-{len(self._written) + 1:03d}"
+        self._written.append(path)
+        ShardedGraphWriter(shard_bytes).write_edges(chunks, n, path, sizes)
+        return ShardedGraphReader(self.memory_budget).read(path)
+
+    def close(self) -> None:
+        for path in self._written:
+            shutil.rmtree(path, ignore_errors=True)
+        self._written = []
+        if self._owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> ShardedSpill:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+class ShardedGraphReader(ShardedGraphReaderPort):
+    """
+    Opens a sharded graph directory as a ShardedGraph. Degrees and sizes are read into
+    memory; labels and shards stay on disk as read-only memory maps, a shard being
+    mapped when the pipeline asks for it and unmapped once it drops it.
+    memory_budget (bytes, None: unbounded) is handed to the graph; see ShardedGraph.
+    """
+    def __init__(self, memory_budget: Optional[int] = 1 << 30) -> None:
+        self.memory_budget = memory_budget
+
+    def read(self, path: PathLike) -> ShardedGraph:
+        path = Path(path)
+        try:
+            meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+            degrees = np.load(path / "degrees.npy")
+            sizes = np.load(path / "sizes.npy") if meta["sizes"] else None
+            labels: Optional[Sequence[NodeLike]] = None
+            if meta["labels"] == "int":
+                labels = IntLabels(np.load(path / "labels.npy", mmap_mode="r"))
+            elif meta["labels"] == "str":
+                labels = StrLabels(
+                    np.load(path / "label_offsets.npy", mmap_mode="r"), np.load(path / "label_blob.npy", mmap_mode="r"),
+                )
+        except OSError as e:
+            raise OSError(f"could not read sharded graph {path}: {e}") from e
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a sharded graph directory")
+        if meta.get("version") != VERSION:
+            raise ValueError(f"{path}: unsupported sharded graph version {meta.get('version')}")
+        bounds = meta["bounds"]
+
+        def load(i: int) -> GraphShard:
+            try:
+                arrays: Dict[str, np.ndarray] = {
+                    name: np.load(_shard_file(path, i, name), mmap_mode="r")
+                    for name in ("offsets", "indices", "weights")
+                }
+            except OSError as e:
+                raise OSError(f"could not read shard {i} of {path}: {e}") from e
+            return GraphShard(bounds[i], bounds[i + 1], **arrays)
+
+        return ShardedGraph(
+            bounds, meta["shard_nnz"], degrees, load, meta["edges"], labels, sizes, self.memory_budget,
+        )
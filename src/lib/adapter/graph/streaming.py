@@ -0,0 +1,252 @@
+from __future__ import annotations
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import csv
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.port.graph import CSRGraphBuilderPort, GraphReaderPort
+
+PathLike = Union[str, Path]
+
+class EdgeAccumulator:
+    """
+    Merges (src, dst, weight) id chunks into one undirected edge set with bounded overhead.
+
+    Each chunk is canonicalized to (min, max) pairs, zero weights are dropped and
+    duplicates summed (the Graph.add_edge rule); the merged arrays are re-reduced
+    whenever the unmerged backlog outgrows them, so memory stays near 20 bytes per
+    distinct edge instead of a Python tuple per input line. Ids must be < 2**32.
+    """
+    def __init__(self) -> None:
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_len = 0
+        self.max_id = -1
+
+    def add(self, src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> None:
+        keep = weights != 0
+        src, dst, weights = src[keep], dst[keep], weights[keep]
+        if not len(src):
+            return
+        lo, hi = np.minimum(src, dst), np.maximum(src, dst)
+        self.max_id = max(self.max_id, int(hi.max()))
+        if self.max_id >= 1 << 32:
+            raise ValueError(f"node id {self.max_id} does not fit the 32-bit edge key")
+        keys = (lo.astype(np.uint64) << np.uint64(32)) | hi.astype(np.uint64)
+        self._pending.append(self._reduce(keys, weights.astype(np.float64)))
+        self._pending_len += len(keys)
+        if self._pending_len > max(len(self._keys), 1 << 20):
+            self._merge()
+
+    @staticmethod
+    def _reduce(keys: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(keys, kind="stable")
+        keys, weights = keys[order], weights[order]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        return keys[starts], np.add.reduceat(weights, starts)
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        keys = np.concatenate([self._keys] + [k for k, _ in self._pending])
+        weights = np.concatenate([self._weights] + [w for _, w in self._pending])
+        self._pending, self._pending_len = [], 0
+        self._keys, self._weights = self._reduce(keys, weights)
+
+    def to_csr(self, n: Optional[int] = None, labels: Optional[Sequence[NodeLike]] = None) -> CSRGraph:
+        self._merge()
+        src = (self._keys >> np.uint64(32)).astype(np.int64)
+        dst = (self._keys & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        weights = self._weights
+        self._keys, self._weights = np.empty(0, dtype=np.uint64), np.empty(0)
+        count = n if n is not None else self.max_id + 1
+        return CSRGraph.from_undirected(count, src, dst, weights, labels)
+
+class NodeInterner:
+    """
+    Label -> id in first-seen order (the CSRGraph.from_edges rule), one dict entry per
+    distinct node. `parse` converts a raw token into the stored label (e.g. int).
+    """
+    def __init__(self, parse: Optional[Callable[[str], NodeLike]] = None) -> None:
+        self.parse = parse
+        self.index: Dict[NodeLike, int] = {}
+        self.labels: List[NodeLike] = []
+
+    def ids(self, tokens: Iterable[NodeLike]) -> np.ndarray:
+        index, labels, parse = self.index, self.labels, self.parse
+        out: List[int] = []
+        for tok in tokens:
+            lbl = parse(tok) if parse is not None else tok  # type: ignore[arg-type]
+            i = index.get(lbl)
+            if i is None:
+                i = index[lbl] = len(labels)
+                labels.append(lbl)
+            out.append(i)
+        return np.array(out, dtype=np.int64)
+
+def _open_text(path: PathLike) -> IO[str]:
+    return open(path, "r", encoding="utf-8", newline="")
+
+class EdgeListReader(GraphReaderPort):
+    """
+    Streams a text edge list ("u v [w]" per line) into a CSRGraph, chunk_lines at a time.
+
+    - delimiter None splits on whitespace; comment lines and blank lines are skipped.
+    - int_ids=True uses the integer tokens as node ids directly (ids 0..max, no
+      label list, isolated ids in between become isolated nodes); chunks are then
+      parsed by np.loadtxt, falling back to per-line splitting for ragged rows.
+      Otherwise nodes are interned in first-seen order and labelled with parse(token).
+    - A missing weight column means weight 1; zero-weight edges are skipped before
+      interning, as in CSRGraph.from_edges.
+    """
+    def __init__(
+        self,
+        delimiter: Optional[str] = None,
+        comment: str = "#",
+        int_ids: bool = False,
+        parse: Callable[[str], NodeLike] = str,
+        chunk_lines: int = 1_000_000,
+        skip_lines: int = 0,
+    ) -> None:
+        self.delimiter = delimiter
+        self.comment = comment
+        self.int_ids = int_ids
+        self.parse = parse
+        self.chunk_lines = chunk_lines
+        self.skip_lines = skip_lines
+        self._cols = (0, 1, 2)
+
+    def read(self, path: PathLike) -> CSRGraph:
+        with _open_text(path) as fh:
+            return self.read_stream(fh)
+
+    def read_stream(self, fh: IO[str]) -> CSRGraph:
+        acc = EdgeAccumulator()
+        interner = None if self.int_ids else NodeInterner(self.parse)
+        for _ in range(self.skip_lines):
+            fh.readline()
+        for lines in self._chunks(fh):
+            if interner is None:
+                acc.add(*self._int_columns(lines))
+                continue
+            u, v, w = self._columns(self._rows(lines))
+            keep = np.flatnonzero(w)
+            if len(keep) < len(w):
+                u, v, w = [u[i] for i in keep], [v[i] for i in keep], w[keep]
+            pairs = interner.ids(t for pair in zip(u, v) for t in pair)
+            acc.add(pairs[0::2], pairs[1::2], w)
+        if interner is None:
+            return acc.to_csr()
+        graph = acc.to_csr(len(interner.labels), interner.labels)
+        graph._index = interner.index
+        return graph
+
+    def _chunks(self, fh: IO[str]) -> Iterator[List[str]]:
+        while True:
+            lines = list(islice(fh, self.chunk_lines))
+            if not lines:
+                return
+            yield lines
+
+    def _rows(self, lines: List[str]) -> List[List[str]]:
+        return [
+            line.split(self.delimiter)
+            for line in lines
+            if line.strip() and not line.lstrip().startswith(self.comment)
+        ]
+
+    def _int_columns(self, lines: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        try:
+            table = self._load_table(lines)
+        except ValueError:
+            u, v, w = self._columns(self._rows(lines))
+            return np.array(u, dtype=np.int64), np.array(v, dtype=np.int64), w
+        w = table[:, 2] if table.shape[1] > 2 else np.ones(len(table))
+        return table[:, 0].astype(np.int64), table[:, 1].astype(np.int64), w
+
+    def _load_table(self, lines: List[str]) -> np.ndarray:
+        """
+        The chunk as a float table whose columns are source, target and optional weight.
+        """
+        # Float64 holds ids exactly up to 2**53, far beyond the 32-bit edge key
+        return np.loadtxt(
+            lines, dtype=np.float64, delimiter=self.delimiter, comments=self.comment, ndmin=2,
+        )
+
+    def _columns(self, rows: List[List[str]]) -> Tuple[List[str], List[str], np.ndarray]:
+        s, t, wc = self._cols
+        u = [r[s].strip() for r in rows]
+        v = [r[t].strip() for r in rows]
+        w = np.array([r[wc] if 0 <= wc < len(r) else 1.0 for r in rows], dtype=np.float64)
+        return u, v, w
+
+class CSVEdgeReader(EdgeListReader):
+    """
+    EdgeListReader for CSV (csv-module quoting). With a header row the source, target and
+    weight columns are looked up by name; without one they are columns 0, 1 and 2.
+    """
+    def __init__(
+        self,
+        source: str = "source",
+        target: str = "target",
+        weight: Optional[str] = "weight",
+        header: bool = True,
+        delimiter: str = ",",
+        int_ids: bool = False,
+        parse: Callable[[str], NodeLike] = str,
+        chunk_lines: int = 1_000_000,
+    ) -> None:
+        super().__init__(delimiter, "#", int_ids, parse, chunk_lines)
+        self.source, self.target, self.weight = source, target, weight
+        self.header = header
+
+    def read_stream(self, fh: IO[str]) -> CSRGraph:
+        self._cols = (0, 1, 2)
+        if self.header:
+            names = next(csv.reader([fh.readline()], delimiter=self.delimiter or ","))
+            names = [c.strip() for c in names]
+            try:
+                src_col, dst_col = names.index(self.source), names.index(self.target)
+            except ValueError:
+                raise ValueError(f"CSV header {names} lacks {self.source!r}/{self.target!r}") from None
+            w_col = names.index(self.weight) if self.weight in names else -1
+            self._cols = (src_col, dst_col, w_col)
+        return super().read_stream(fh)
+
+    def _rows(self, lines: List[str]) -> List[List[str]]:
+        return [r for r in csv.reader(lines, delimiter=self.delimiter or ",") if r]
+
+    def _load_table(self, lines: List[str]) -> np.ndarray:
+        s, t, wc = self._cols
+        return np.loadtxt(
+            lines, dtype=np.float64, delimiter=self.delimiter, quotechar='"',
+            usecols=(s, t, wc) if wc >= 0 else (s, t), ndmin=2,
+        )
+
+class ChunkedEdgesGraphBuilder(CSRGraphBuilderPort):
+    """
+    CSRGraphBuilderPort over any iterable of (u, v, w) tuples (e.g. a generator), consumed
+    chunk_size at a time, so the input never has to be materialized as a list.
+    """
+    def __init__(self, chunk_size: int = 1_000_000) -> None:
+        self.chunk_size = chunk_size
+
+    def build(self, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> CSRGraph:
+        acc = EdgeAccumulator()
+        interner = NodeInterner()
+        it = iter(edges)
+        while True:
+            chunk = list(islice(it, self.chunk_size))
+            if not chunk:
+                break
+            chunk = [e for e in chunk if e[2] != 0]
+            pairs = interner.ids(t for u, v, _ in chunk for t in (u, v))
+            acc.add(pairs[0::2], pairs[1::2], np.array([w for _, _, w in chunk], dtype=np.float64))
+        graph = acc.to_csr(len(interner.labels), interner.labels)
+        graph._index = interner.index
+        return graph
@@ -1,9 +1,13 @@
 from __future__ import annotations
 from typing import Optional
+
+import numpy as np
+
 from src.lib.domain.models.graph import Graph
 from src.lib.domain.models.partition import Partition
 from src.lib.domain.types.nodes import NodeLike
 from src.lib.domain.types.general import CommunityId
+from src.lib.domain.services.objective import IncrementalObjective
 
 def heuristic_delta_by_neighbor_weight(
     G: Graph,
@@ -29,3 +33,15 @@ def heuristic_delta_by_neighbor_weight(
     w_cur = total_weight_to(cur)
     w_new = total_weight_to(dest)
     return w_new - w_cur
+
+class NeighborWeightObjective(IncrementalObjective):
+    """
+    Incremental form of heuristic_delta_by_neighbor_weight: the same deltas, but all
+    candidates of v are scored from one pass over its neighbors.
+    """
+    def insert_gain(self, k_vc: float, k_v: float, n_v: float, tot_c: float, n_c: float, total: float) -> float:
+        return k_vc
+
+    def community_quality(self, internal: np.ndarray, degree: np.ndarray, size: np.ndarray, total: float) -> float:
+        # Weight inside communities, every inner edge once
+        return float(internal.sum() / 2.0)
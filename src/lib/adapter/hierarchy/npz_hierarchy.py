@@ -0,0 +1,152 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union, overload
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.types.nodes import BaseNode
+from src.lib.adapter.graph.binary import IntLabels, StrLabels, encode_labels
+from src.lib.port.hierarchy import HierarchyReaderPort, HierarchyWriterPort
+
+PathLike = Union[str, Path]
+
+# .npz members: meta (JSON bytes), map_0 .. map_{depth-1} (each in its smallest
+# unsigned dtype), then labels (int64) or label_offsets + label_blob (utf-8)
+FORMAT_VERSION = 1
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+class NpzHierarchyWriter(HierarchyWriterPort):
+    """
+    Saves a Hierarchy as an .npz of its level-to-level maps (not the composed
+    per-level arrays, which the reader rebuilds on demand): a few bytes per node for
+    the finest level and far less for the coarser ones. Uncompressed by default so the
+    reader can memory-map every member; compress=True trades that for a smaller file.
+    The file is written next to the target and renamed over it.
+    """
+    def __init__(self, compress: bool = False) -> None:
+        self.compress = compress
+
+    def write(self, h: Hierarchy, path: PathLike) -> None:
+        path = Path(path)
+        compact = h.compacted()
+        arrays: Dict[str, np.ndarray] = {f"map_{l}": m for l, m in enumerate(compact.maps)}
+        label_section = encode_labels(h.labels, "hierarchy files")
+        if label_section is not None:
+            kind, label_arrays = label_section
+            if kind == "int":
+                arrays["labels"] = label_arrays[0]
+            else:
+                arrays["label_offsets"], arrays["label_blob"] = label_arrays
+        meta = {
+            "version": FORMAT_VERSION,
+            "depth": h.depth,
+            "labels": label_section[0] if label_section is not None else None,
+        }
+        arrays["meta"] = np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)
+
+        save = np.savez_compressed if self.compress else np.savez
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                save(fh, **arrays)
+            os.replace(tmp, path)
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            raise OSError(f"could not write hierarchy {path}: {e}") from e
+
+class NpzHierarchyReader(HierarchyReaderPort):
+    """
+    Opens a hierarchy file without reading its arrays: members stored uncompressed are
+    np.memmap views into the zip (pages load on first touch and are shared between
+    processes), compressed ones are decompressed on first access. Nothing n-sized is
+    built until a whole level's membership or communities are asked for.
+    """
+    def read(self, path: PathLike) -> Hierarchy:
+        members = _NpzMembers(Path(path))
+        meta = json.loads(members["meta"].tobytes().decode("utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported hierarchy version {meta.get('version')}")
+        labels: Optional[Sequence[BaseNode]] = None
+        if meta["labels"] == "int":
+            labels = IntLabels(members["labels"])
+        elif meta["labels"] == "str":
+            labels = StrLabels(members["label_offsets"], members["label_blob"])
+        return Hierarchy(_LevelMaps(members, int(meta["depth"])), labels)
+
+class _NpzMembers:
+    """
+    name -> array of one .npz, opened on first access and kept.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.arrays: Dict[str, np.ndarray] = {}
+        try:
+            with zipfile.ZipFile(path) as zf:
+                self.infos = {info.filename[:-4]: info for info in zf.infolist()}
+        except (OSError, zipfile.BadZipFile) as e:
+            raise ValueError(f"could not read hierarchy {path}: {e}") from e
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        arr = self.arrays.get(name)
+        if arr is None:
+            info = self.infos.get(name)
+            if info is None:
+                raise KeyError(f"{self.path} has no member {name!r}")
+            arr = self.arrays[name] = self._open(info)
+        return arr
+
+    def _open(self, info: zipfile.ZipInfo) -> np.ndarray:
+        with open(self.path, "rb") as fh:
+            if info.compress_type == zipfile.ZIP_STORED:
+                # A stored member's .npy bytes sit right after its local file header
+                fh.seek(info.header_offset)
+                magic, name_len, extra_len = _LOCAL_HEADER.unpack(fh.read(_LOCAL_HEADER.size))
+                if magic != b"PK\x03\x04":
+                    raise ValueError(f"{self.path}: corrupt zip member {info.filename}")
+                fh.seek(info.header_offset + _LOCAL_HEADER.size + name_len + extra_len)
+                version = np.lib.format.read_magic(fh)
+                read_header = (
+                    np.lib.format.read_array_header_1_0 if version == (1, 0)
+                    else np.lib.format.read_array_header_2_0
+                )
+                shape, fortran, dtype = read_header(fh)
+                if dtype.hasobject:
+                    raise ValueError(f"{self.path}: object arrays are not supported")
+                if not shape or shape[0] == 0:
+                    return np.empty(shape, dtype=dtype)
+                return np.memmap(
+                    self.path, dtype=dtype, mode="r", offset=fh.tell(), shape=shape,
+                    order="F" if fortran else "C",
+                )
+        with np.load(self.path) as data:
+            return data[info.filename[:-4]]
+
+class _LevelMaps(Sequence[np.ndarray]):
+    """
+    The hierarchy's maps, each opened when the hierarchy first touches it.
+    """
+    def __init__(self, members: _NpzMembers, depth: int) -> None:
+        self.members = members
+        self.depth = depth
+
+    @overload
+    def __getitem__(self, l: int) -> np.ndarray: ...
+    @overload
+    def __getitem__(self, l: slice) -> List[np.ndarray]: ...
+    def __getitem__(self, l: Union[int, slice]) -> Union[np.ndarray, List[np.ndarray]]:
+        if isinstance(l, slice):
+            return [self[i] for i in range(*l.indices(self.depth))]
+        if not -self.depth <= l < self.depth:
+            raise IndexError(l)
+        return self.members[f"map_{l % self.depth}"]
+
+    def __len__(self) -> int:
+        return self.depth
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return (self[i] for i in range(self.depth))
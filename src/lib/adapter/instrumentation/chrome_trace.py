@@ -0,0 +1,75 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import json
+import os
+import time
+
+from src.lib.domain.types.events import (
+    CommunicationStats,
+    LeidenEvent,
+    LevelFinished,
+    LevelStarted,
+    LocalMovingStats,
+    PhaseFinished,
+    PhaseStarted,
+    RunFinished,
+)
+from src.lib.port.instrumentation import InstrumentationPort
+
+class ChromeTraceObserver(InstrumentationPort):
+    """
+    Adapter: records a Chrome trace-event timeline (chrome://tracing, Perfetto).
+    Levels and phases become nested duration slices; local-moving counts and
+    distributed traffic become instant events; queue peak and per-level quality become
+    counter tracks. Events are timestamped on arrival. With a path, the JSON is written
+    on RunFinished / close().
+    """
+    def __init__(self, path: Optional[Union[str, Path]] = None, name: str = "leiden") -> None:
+        self.path = path
+        self.name = name
+        self.events: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _add(self, ph: str, name: str, **fields: Any) -> None:
+        ts = (time.perf_counter() - self._t0) * 1e6
+        self.events.append({"name": name, "ph": ph, "ts": ts, "pid": self._pid, "tid": 0, **fields})
+
+    def emit(self, event: LeidenEvent) -> None:
+        if isinstance(event, LevelStarted):
+            self._add("B", f"level {event.level}", cat=self.name,
+                      args={"nodes": event.nodes, "edges": event.edges})
+        elif isinstance(event, PhaseStarted):
+            self._add("B", event.phase, cat=self.name)
+        elif isinstance(event, PhaseFinished):
+            self._add("E", event.phase, cat=self.name)
+        elif isinstance(event, LocalMovingStats):
+            args = {"visited": event.visited, "moved": event.moved, "queue_peak": event.queue_peak}
+            self._add("i", "local moving", cat=self.name, s="t", args=args)
+            self._add("C", "queue peak", args={"nodes": event.queue_peak})
+        elif isinstance(event, CommunicationStats):
+            args = {"sent": event.bytes_sent, "received": event.bytes_received, "messages": event.messages}
+            self._add("i", f"{event.phase} traffic", cat=self.name, s="t", args=args)
+        elif isinstance(event, LevelFinished):
+            self._add("E", f"level {event.level}", cat=self.name,
+                      args={"communities": event.communities, "quality": event.quality})
+            if event.quality is not None:
+                self._add("C", "quality", args={"quality": event.quality})
+        elif isinstance(event, RunFinished):
+            self._add("i", "run finished", cat=self.name, s="p",
+                      args={"levels": event.levels, "communities": event.communities, "reason": event.reason})
+            self.close()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def write(self, path: Union[str, Path]) -> None:
+        try:
+            Path(path).write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        except OSError as e:
+            raise OSError(f"could not write Chrome trace to {path}: {e}") from e
+
+    def close(self) -> None:
+        if self.path is not None:
+            self.write(self.path)
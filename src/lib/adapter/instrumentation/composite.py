@@ -0,0 +1,20 @@
+from __future__ import annotations
+from typing import List
+
+from src.lib.domain.types.events import LeidenEvent
+from src.lib.port.instrumentation import InstrumentationPort
+
+class CompositeObserver(InstrumentationPort):
+    """
+    Adapter: fans every event out to several observers, in the order given.
+    """
+    def __init__(self, *observers: InstrumentationPort) -> None:
+        self.observers: List[InstrumentationPort] = list(observers)
+
+    def emit(self, event: LeidenEvent) -> None:
+        for observer in self.observers:
+            observer.emit(event)
+
+    def close(self) -> None:
+        for observer in self.observers:
+            observer.close()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import Optional
+import logging
+
+from src.lib.domain.types.events import (
+    CommunicationStats,
+    LeidenEvent,
+    LevelFinished,
+    LevelStarted,
+    LocalMovingStats,
+    PhaseFinished,
+    RunFinished,
+)
+from src.lib.port.instrumentation import InstrumentationPort
+
+log = logging.getLogger(__name__)
+
+class LoggingObserver(InstrumentationPort):
+    """
+    Adapter: one log line per level boundary, phase end and local-moving summary, to
+    logger (this module's by default). PhaseStarted is not logged. Nothing is
+    formatted unless the logger is enabled for `level`.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or log
+        self.level = level
+
+    def emit(self, event: LeidenEvent) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        write = self.logger.log
+        if isinstance(event, LevelStarted):
+            write(self.level, "level %d: %d nodes, %d edges", event.level, event.nodes, event.edges)
+        elif isinstance(event, LocalMovingStats):
+            write(self.level, "  local moving: %d visits, %d moves, queue peak %d",
+                  event.visited, event.moved, event.queue_peak)
+        elif isinstance(event, CommunicationStats):
+            write(self.level, "  %s traffic: %d bytes sent, %d received in %d messages",
+                  event.phase, event.bytes_sent, event.bytes_received, event.messages)
+        elif isinstance(event, PhaseFinished):
+            write(self.level, "  %s: %.3fs", event.phase, event.seconds)
+        elif isinstance(event, LevelFinished):
+            quality = "n/a" if event.quality is None else f"{event.quality:.6f}"
+            write(self.level, "level %d done in %.3fs: %d communities, quality %s",
+                  event.level, event.seconds, event.communities, quality)
+        elif isinstance(event, RunFinished):
+            write(self.level, "leiden: %d levels, %d communities in %.3fs (%s)",
+                  event.levels, event.communities, event.seconds, event.reason)
+
+    def close(self) -> None:
+        pass
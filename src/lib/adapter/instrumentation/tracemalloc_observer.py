@@ -0,0 +1,59 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List
+import tracemalloc
+
+from src.lib.domain.types.events import LeidenEvent, PhaseFinished, PhaseStarted, RunFinished
+from src.lib.port.instrumentation import InstrumentationPort
+
+@dataclass(frozen=True)
+class PhaseMemory:
+    """
+    peak_bytes is the most the phase had allocated at once above what was live when it
+    started; retained_bytes is what it left allocated (negative if it freed more).
+    """
+    level: int
+    phase: str
+    peak_bytes: int
+    retained_bytes: int
+
+class TracemallocObserver(InstrumentationPort):
+    """
+    Adapter: per-phase memory profile from tracemalloc (Python and NumPy allocations).
+    Starts tracing at the first phase unless it is already on, and stops what it started
+    on close() / RunFinished. Tracing itself slows allocation-heavy Python code, so
+    don't read phase times from a traced run.
+    """
+    def __init__(self) -> None:
+        self.records: List[PhaseMemory] = []
+        self._owns_trace = False
+        self._base = 0
+
+    def emit(self, event: LeidenEvent) -> None:
+        if isinstance(event, PhaseStarted):
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_trace = True
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        elif isinstance(event, PhaseFinished) and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self.records.append(PhaseMemory(
+                event.level, event.phase, max(peak - self._base, 0), current - self._base,
+            ))
+        elif isinstance(event, RunFinished):
+            self.close()
+
+    def peak_by_phase(self) -> Dict[str, int]:
+        """
+        Largest peak_bytes of each phase over all levels.
+        """
+        out: Dict[str, int] = {}
+        for r in self.records:
+            out[r.phase] = max(out.get(r.phase, 0), r.peak_bytes)
+        return out
+
+    def close(self) -> None:
+        if self._owns_trace:
+            tracemalloc.stop()
+            self._owns_trace = False
@@ -0,0 +1,292 @@
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import random
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.types.positions import Positions
+from src.lib.domain.services.graph import aggregate_csr_graph
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.services.partition import singleton_partition
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.port.layout import LayoutPort
+
+# Node-cell pairs handled per vectorized pass of the tree walk
+_PAIR_BUDGET = 1 << 21
+# Finest quadtree grid: 2**20 cells a side (Morton codes fit in 40 bits)
+_MAX_DEPTH = 20
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    # Bits b0 b1 b2 ... of v (< 2**32) moved to positions 0, 2, 4, ... (Morton interleave)
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in (
+        (16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+        (2, 0x3333333333333333), (1, 0x5555555555555555),
+    ):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+class QuadTree:
+    """
+    Barnes-Hut quadtree over 2-D points, stored level by level as arrays: at depth d
+    the nonempty cells of a 2**d x 2**d grid, as sorted Morton codes with their total
+    mass and center of mass. A cell's children are the depth-(d+1) codes in
+    [4c, 4c + 4), a range found once by binary search, so no pointers are kept. The tree is as deep
+    as it takes for no leaf to hold more than 4 * leaf_size points (at most 20 levels);
+    the points of a leaf are contiguous in `order`.
+    """
+    def __init__(self, pos: np.ndarray, mass: np.ndarray, leaf_size: int = 8) -> None:
+        n = len(pos)
+        lo = pos.min(axis=0)
+        self.span = max(float((pos.max(axis=0) - lo).max()), 1e-9) * (1.0 + 1e-9)
+        side = 1 << _MAX_DEPTH
+        grid = np.minimum(((pos - lo) / self.span * side).astype(np.int64), side - 1)
+        code = (_spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << np.uint64(1))).astype(np.int64)
+        self.order = np.argsort(code, kind="stable")
+        ordered = code[self.order]
+        depth = int(np.clip(np.ceil(np.log(max(n / leaf_size, 1.0)) / np.log(4.0)), 1, _MAX_DEPTH))
+        while depth < _MAX_DEPTH:
+            leaf = ordered >> (2 * (_MAX_DEPTH - depth))
+            if np.diff(np.flatnonzero(np.r_[True, leaf[1:] != leaf[:-1], True])).max() <= 4 * leaf_size:
+                break
+            depth += 1
+        self.depth = depth
+        self.node_codes: List[np.ndarray] = []
+        self.codes: List[np.ndarray] = []
+        self.mass: List[np.ndarray] = []
+        self.com_x: List[np.ndarray] = []
+        self.com_y: List[np.ndarray] = []
+        self.child_first: List[np.ndarray] = []
+        self.child_count: List[np.ndarray] = []
+        for d in range(depth + 1):
+            node_code = code >> (2 * (_MAX_DEPTH - d))
+            cells, inverse = np.unique(node_code, return_inverse=True)
+            m = np.bincount(inverse, weights=mass, minlength=len(cells))
+            self.node_codes.append(node_code)
+            self.codes.append(cells)
+            self.mass.append(m)
+            self.com_x.append(np.bincount(inverse, weights=mass * pos[:, 0], minlength=len(cells)) / m)
+            self.com_y.append(np.bincount(inverse, weights=mass * pos[:, 1], minlength=len(cells)) / m)
+            if d:
+                # Children of the depth-(d-1) cells, as a range of depth-d cell indices
+                first = np.searchsorted(cells, self.codes[d - 1] << 2)
+                self.child_first.append(first)
+                self.child_count.append(np.searchsorted(cells, (self.codes[d - 1] << 2) + 4) - first)
+        # Leaf i holds points order[leaf_start[i]:leaf_start[i + 1]]
+        self.leaf_start = np.searchsorted(ordered >> (2 * (_MAX_DEPTH - depth)), np.r_[self.codes[depth], self.codes[depth][-1] + 1])
+
+    def repulsion(self, pos: np.ndarray, mass: np.ndarray, theta: float, k2: float) -> np.ndarray:
+        """
+        Fruchterman-Reingold repulsion on every point, k2 * m_j * (x_i - x_j) / |x_i - x_j|^2
+        summed over the others. The tree is walked once per leaf rather than per point
+        (Barnes' grouping): a cell of width s counts as one mass at its center for all
+        points of a leaf when s < theta * r, r being the distance from the cell's center
+        to the nearest point of the leaf's bounding box. Cells that are never far enough
+        are summed point by point, so theta=0 is exact.
+        Points are handled in tree order, as separate x and y arrays: a leaf's points
+        are then one contiguous slice, which keeps the gathers cheap.
+        """
+        n = len(pos)
+        x, y, m = pos[self.order, 0], pos[self.order, 1], mass[self.order]
+        fx, fy = np.zeros(n), np.zeros(n)
+        starts, ends = self.leaf_start[:-1], self.leaf_start[1:]
+        lo_x, hi_x = np.minimum.reduceat(x, starts), np.maximum.reduceat(x, starts)
+        lo_y, hi_y = np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+        center_x, center_y = 0.5 * (lo_x + hi_x), 0.5 * (lo_y + hi_y)
+        radius = 0.5 * np.hypot(hi_x - lo_x, hi_y - lo_y)
+        occupancy = ends - starts
+        leaf_codes = self.codes[self.depth]
+        chunk = max(1, len(starts) * _PAIR_BUDGET // max(n * 64, 1))
+        for first_leaf in range(0, len(starts), chunk):
+            leaves = np.arange(first_leaf, min(first_leaf + chunk, len(starts)))
+            cells = np.zeros(len(leaves), dtype=np.int64)
+            for d in range(self.depth + 1):
+                com_x, com_y = self.com_x[d], self.com_y[d]
+                gap = np.hypot(center_x[leaves] - com_x[cells], center_y[leaves] - com_y[cells]) - radius[leaves]
+                own = (leaf_codes[leaves] >> (2 * (self.depth - d))) == self.codes[d][cells]
+                take = ~own & (gap > 0) & (self.span / (1 << d) < theta * gap)
+                if take.any():
+                    # Every point of the leaf against the cell's center of mass
+                    count = occupancy[leaves[take]]
+                    _, slots = _expand(leaves[take], starts[leaves[take]], count)
+                    far = np.repeat(cells[take], count)
+                    _push(fx, fy, slots, x[slots] - com_x[far], y[slots] - com_y[far], self.mass[d][far], k2)
+                leaves, cells = leaves[~take], cells[~take]
+                if d == self.depth:
+                    break
+                leaves, cells = _expand(leaves, self.child_first[d][cells], self.child_count[d][cells])
+            # Leaf pairs still open (cells are leaves by now): every point against every other point
+            _, slots = _expand(leaves, starts[leaves], occupancy[leaves])
+            others_per = np.repeat(cells, occupancy[leaves])
+            slots, others = _expand(slots, starts[others_per], occupancy[others_per])
+            keep = others != slots
+            slots, others = slots[keep], others[keep]
+            _push(fx, fy, slots, x[slots] - x[others], y[slots] - y[others], m[others], k2)
+        out = np.empty((n, 2))
+        out[self.order, 0] = fx
+        out[self.order, 1] = fy
+        return out
+
+def _push(fx: np.ndarray, fy: np.ndarray, slots: np.ndarray, dx: np.ndarray, dy: np.ndarray, m: np.ndarray, k2: float) -> None:
+    scale = k2 * m / np.maximum(dx * dx + dy * dy, 1e-9)
+    fx += np.bincount(slots, weights=dx * scale, minlength=len(fx))
+    fy += np.bincount(slots, weights=dy * scale, minlength=len(fy))
+
+def _keep_communities(G: GraphLike, P: Partition, delta_fn: DeltaFn, gamma: float, theta: float, **_: object) -> Partition:
+    # RefineFn that aggregates the moved communities as they are (Louvain-style levels)
+    return P
+
+def _expand(nodes: np.ndarray, first: np.ndarray, count: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # (node, first + j) for j < count, per input pair
+    out_nodes = np.repeat(nodes, count)
+    offsets = np.arange(len(out_nodes)) - np.repeat(np.cumsum(count) - count, count)
+    return out_nodes, np.repeat(first, count) + offsets
+
+class BarnesHutLayout(LayoutPort):
+    """
+    Force-directed (Fruchterman-Reingold) layout with Barnes-Hut repulsion: O(n log n)
+    per iteration instead of O(n^2), every step vectorized over all nodes.
+    With multilevel=True the graph is first laid out at the coarsest level of a Leiden
+    hierarchy (one node per community, weighted by its member count), and every finer
+    level starts from its parents' positions and is only refined briefly, so members of
+    a community end up together. hierarchy is used when given (it must be over the same
+    nodes); otherwise one is computed with modularity and the vectorized engine, without
+    Leiden's refinement phase (the layout only needs the coarsening).
+    theta trades accuracy for speed (0 is exact); refine_theta is used for the brief
+    refinement of the finer levels, where nodes only settle around their parents and
+    a coarser far field costs little. Positions are deterministic for a seed.
+    scripts/bench_layout.py times the defaults: a 100k-node, 500k-edge planted-partition
+    graph takes about 11 s on one core, some 5 s of it building the hierarchy.
+    """
+    def __init__(
+        self,
+        iterations: int = 100,
+        refine_iterations: int = 10,
+        theta: float = 1.2,
+        multilevel: bool = True,
+        hierarchy: Optional[Hierarchy] = None,
+        seed: int = 7,
+        refine_theta: float = 2.0,
+    ) -> None:
+        if iterations < 0 or refine_iterations < 0:
+            raise ValueError("iteration counts must be >= 0")
+        if theta < 0 or refine_theta < 0:
+            raise ValueError("theta must be >= 0")
+        self.iterations = iterations
+        self.refine_iterations = refine_iterations
+        self.theta = theta
+        self.refine_theta = refine_theta
+        self.multilevel = multilevel
+        self.hierarchy = hierarchy
+        self.seed = seed
+
+    def get_positions(self, G: GraphLike) -> Positions:
+        csr = G if isinstance(G, CSRGraph) else CSRGraph.from_graph(G)
+        xy = self.layout(csr)
+        names = csr.labels if csr.labels is not None else range(csr.num_nodes())
+        return {u: (x, y) for u, (x, y) in zip(names, xy.tolist())}
+
+    def layout(self, G: GraphLike) -> np.ndarray:
+        """
+        Positions as an (n, 2) array in G's node order (CSR ids, or G.adj order).
+        """
+        csr = G if isinstance(G, CSRGraph) else CSRGraph.from_graph(G)
+        n = csr.num_nodes()
+        rng = np.random.default_rng(self.seed)
+        if n == 0:
+            return np.empty((0, 2))
+        unit = float(np.mean(csr.weights)) if len(csr.weights) else 1.0
+        if not self.multilevel or n < 3:
+            return self._run(csr, np.ones(n), rng.random((n, 2)) * np.sqrt(n), self.iterations, 0.1, unit, self.theta)
+
+        levels = self._levels(csr)
+        # Coarsest first: a level's nodes start around their parent community's position
+        pos = np.empty((0, 2))
+        upper: Optional[np.ndarray] = None
+        upper_mass = np.empty(0)
+        for membership, k in reversed([(np.arange(n), n)] + levels):
+            g = aggregate_csr_graph(csr, membership, k) if k < n else csr
+            mass = np.asarray(g.sizes, dtype=np.float64) if k < n else np.ones(n)
+            if upper is None:
+                pos = self._run(g, mass, rng.random((k, 2)) * np.sqrt(n), self.iterations, 0.1, unit, self.theta)
+            else:
+                parent = np.empty(k, dtype=np.int64)
+                parent[membership] = upper
+                # Uniform over the disk a community of that mass fills at equilibrium
+                radius = 0.5 * np.sqrt(upper_mass[parent] * rng.random(k))
+                angle = rng.random(k) * 2.0 * np.pi
+                pos = pos[parent] + radius[:, None] * np.stack([np.cos(angle), np.sin(angle)], axis=1)
+                pos = self._run(g, mass, pos, self.refine_iterations, 0.05, unit, self.refine_theta)
+            upper, upper_mass = membership, mass
+        return pos
+
+    def _levels(self, G: CSRGraph) -> List[Tuple[np.ndarray, int]]:
+        """
+        (base node -> community, count) per distinct hierarchy level, finest first.
+        """
+        h = self.hierarchy
+        if h is None:
+            # Modularity's refinement resolution is 1/2m, as in the benchmark runner. The
+            # layout only needs a coarsening, so refinement (most of Leiden's time) is skipped
+            h = leiden_hierarchy(
+                G, singleton_partition(G), ModularityObjective(), gamma=1.0 / G.total_weight(),
+                theta=0.01, engine="vectorized", refine=_keep_communities, rng=random.Random(self.seed),
+            )
+        if h.num_nodes() != G.num_nodes():
+            raise ValueError(f"hierarchy has {h.num_nodes()} nodes, the graph {G.num_nodes()}")
+        order = None
+        if h.labels is not None and G.labels is not None:
+            order = np.array([h.node_id(u) for u in G.labels], dtype=np.int64)
+        levels: List[Tuple[np.ndarray, int]] = []
+        for level in range(h.depth):
+            k = h.num_communities(level)
+            if k == G.num_nodes():
+                continue
+            # A level that does not shrink the graph repeats the previous partition: Leiden stalled
+            if levels and k >= levels[-1][1]:
+                break
+            membership = np.asarray(h.membership(level), dtype=np.int64)
+            levels.append((membership[order] if order is not None else membership, k))
+        return levels
+
+    def _run(
+        self,
+        G: CSRGraph,
+        mass: np.ndarray,
+        pos: np.ndarray,
+        iterations: int,
+        start_temp: float,
+        unit: float,
+        theta: float,
+    ) -> np.ndarray:
+        """
+        Fruchterman-Reingold steps. Forces on a supernode are the sums of its members'
+        (repulsion mass * mass, attraction the summed edge weight in units of the base
+        graph's mean weight `unit`), moved per unit mass, so every level has the same
+        equilibrium scale as the base graph.
+        """
+        n = len(pos)
+        rows = G.row_ids()
+        cols = np.asarray(G.indices)
+        keep = rows != cols
+        rows, cols = rows[keep], cols[keep]
+        w = np.asarray(G.weights, dtype=np.float64)[keep] / unit
+        k2 = 1.0
+        extent = float(np.sqrt(mass.sum()))
+        for it in range(iterations):
+            temp = start_temp * extent * (1.0 - it / max(iterations, 1)) + 1e-3
+            # repulsion() is already per unit mass of the point it acts on
+            disp = QuadTree(pos, mass).repulsion(pos, mass, theta, k2)
+            delta = pos[rows] - pos[cols]
+            dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+            pull = delta * (w * dist)[:, None]
+            disp[:, 0] -= np.bincount(rows, weights=pull[:, 0], minlength=n) / mass
+            disp[:, 1] -= np.bincount(rows, weights=pull[:, 1], minlength=n) / mass
+            length = np.maximum(np.sqrt(np.einsum("ij,ij->i", disp, disp)), 1e-12)
+            pos = pos + disp * (np.minimum(length, temp) / length)[:, None]
+        return pos
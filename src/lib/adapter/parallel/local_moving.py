@@ -0,0 +1,217 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from types import ModuleType
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+import logging
+import random
+
+import numpy as np
+
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.events import LocalMovingStats, Observer
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.objective import IncrementalObjective
+from src.lib.domain.services.graph import move_nodes_fast, community_membership
+from src.lib.domain.services.graph.vectorized import (
+    gather_rows,
+    score_batch,
+    move_nodes_fast_vectorized,
+)
+from src.lib.adapter.parallel.shared_arrays import (
+    SharedArrays,
+    SharedArraySpec,
+    attach_arrays,
+    csr_graph_arrays,
+    csr_graph_from_arrays,
+)
+
+log = logging.getLogger(__name__)
+
+_UNSET = np.iinfo(np.int64).max
+
+# Per-process state set up once by the pool initializer
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(specs: Dict[str, SharedArraySpec], objective: IncrementalObjective) -> None:
+    arrays, blocks = attach_arrays(specs)
+    G = csr_graph_from_arrays(arrays)
+    sizes = arrays["sizes"] if "sizes" in arrays else np.ones(G.num_nodes())
+    _WORKER.update(
+        G=G, arrays=arrays, blocks=blocks, sizes=sizes,
+        total=G.total_weight(), objective=objective,
+    )
+
+def _score_chunk(batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    w = _WORKER
+    a = w["arrays"]
+    *_, best_c, to_new, moving = score_batch(
+        w["G"], batch, a["comm"], a["com_degree"], a["com_size"],
+        w["sizes"], w["total"], w["objective"],
+    )
+    return best_c, to_new, moving
+
+class ParallelLocalMover:
+    """
+    Local-moving engine (move_nodes_fast signature) that scores node batches on a process pool.
+
+    Each round the coordinator takes up to workers * batch_size nodes off the queue;
+    every worker scores a slice of them with score_batch against the community state,
+    which lives in shared memory next to the CSR arrays. The coordinator then applies
+    the moves, updates the state in place and requeues neighbors as move_nodes_fast does.
+
+    Conflicts: a proposed move is deferred to the next round if one of the node's
+    neighbors moved earlier in the same round, so k_{v,C} is always exact and two
+    neighbors never swap communities. Unlike the vectorized engine, a move is not
+    deferred when another mover of the round only changed its source or target
+    community, i.e. the totals (Sigma_C, n_C) it was scored against may be stale by at
+    most one round's worth of moves. On planted-partition graphs the result stays
+    within 0.5% of the vectorized (serial-equivalent) engine's modularity, see
+    scripts/bench_parallel_moving.py; smaller batches trade throughput for less
+    staleness. Because stale moves are not guaranteed to improve the objective, the
+    run stops after max_sweeps * n node evaluations.
+
+    Small graphs (< min_nodes) and workers == 1 go to the vectorized engine; a dict
+    Graph goes to move_nodes_fast.
+    """
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int = 8192,
+        min_nodes: int = 50_000,
+        max_sweeps: int = 50,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.min_nodes = min_nodes
+        self.max_sweeps = max_sweeps
+
+    def __call__(
+        self,
+        G: GraphLike,
+        P: Partition,
+        delta_fn: DeltaFn,
+        rng: Optional[random.Random] = None,
+        observer: Optional[Observer] = None,
+    ) -> Partition:
+        if not isinstance(delta_fn, IncrementalObjective):
+            raise TypeError(
+                f"parallel local moving needs an IncrementalObjective, got {type(delta_fn).__name__}"
+            )
+        if not isinstance(G, CSRGraph):
+            log.debug("parallel local moving needs a CSRGraph; moving %s serially", type(G).__name__)
+            return move_nodes_fast(G, P, delta_fn, rng, observer)
+        n = G.num_nodes()
+        if self.workers == 1 or n < self.min_nodes:
+            return move_nodes_fast_vectorized(G, P, delta_fn, self.batch_size, rng, observer)
+
+        comm = community_membership(P, n)
+        sizes = np.ones(n, dtype=np.float64) if G.sizes is None else G.sizes
+        state = {
+            "comm": comm,
+            "com_degree": np.bincount(comm, weights=G.degrees, minlength=n),
+            "com_size": np.bincount(comm, weights=sizes, minlength=n),
+        }
+        with SharedArrays({**csr_graph_arrays(G), **state}) as shared, ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(shared.specs, delta_fn),
+        ) as pool:
+            labels = self._run(G, shared.arrays, sizes, delta_fn, pool, rng or random, observer)
+        return CompactPartition(labels)
+
+    def _run(
+        self,
+        G: CSRGraph,
+        arrays: Dict[str, np.ndarray],
+        sizes: np.ndarray,
+        objective: IncrementalObjective,
+        pool: Executor,
+        rng: Union[random.Random, ModuleType],
+        observer: Optional[Observer] = None,
+    ) -> np.ndarray:
+        n = G.num_nodes()
+        comm, com_degree, com_size = arrays["comm"], arrays["com_degree"], arrays["com_size"]
+        com_count = np.bincount(comm, minlength=n)
+        free: List[int] = np.flatnonzero(com_count == 0)[::-1].tolist()
+        total = G.total_weight()
+        first_move = np.full(n, _UNSET, dtype=np.int64)
+
+        order = list(range(n))
+        rng.shuffle(order)
+        Q: Deque[int] = deque(order)
+        in_queue = np.ones(n, dtype=bool)
+        round_size = self.workers * self.batch_size
+        budget = self.max_sweeps * n
+        visited = moves = 0
+        peak = len(Q)
+
+        while Q:
+            if budget <= 0:
+                log.warning("parallel local moving hit max_sweeps=%d with %d nodes queued", self.max_sweeps, len(Q))
+                break
+            L = min(round_size, len(Q))
+            budget -= L
+            batch = np.fromiter((Q.popleft() for _ in range(L)), dtype=np.int64, count=L)
+            if L >= 2 * self.workers:
+                scored = list(pool.map(_score_chunk, np.array_split(batch, self.workers)))
+                best_c, to_new, moving = (np.concatenate(parts) for parts in zip(*scored))
+            else:
+                *_, best_c, to_new, moving = score_batch(
+                    G, batch, comm, com_degree, com_size, sizes, total, objective,
+                )
+
+            # Drop movers with a neighbor that moved earlier in the round
+            mp = np.flatnonzero(moving)
+            first_move[batch[mp]] = np.arange(len(mp), dtype=np.int64)
+            m_owner, m_nbr, _ = gather_rows(G, batch[mp])
+            affected = np.full(len(mp), _UNSET, dtype=np.int64)
+            np.minimum.at(affected, m_owner, first_move[m_nbr])
+            clean = affected >= np.arange(len(mp))
+            first_move[batch[mp]] = _UNSET
+
+            movers = mp[clean]
+            vs = batch[movers]
+            src = comm[vs]
+            k_v, n_v = G.degrees[vs], sizes[vs]
+            np.subtract.at(com_count, src, 1)
+            free.extend(np.unique(src[com_count[src] == 0]).tolist())
+            dest = best_c[movers]
+            new_slots = to_new[movers]
+            if new_slots.any():
+                dest[new_slots] = [free.pop() for _ in range(int(new_slots.sum()))]
+            np.add.at(com_count, dest, 1)
+            comm[vs] = dest
+            np.subtract.at(com_degree, src, k_v)
+            np.add.at(com_degree, dest, k_v)
+            np.subtract.at(com_size, src, n_v)
+            np.add.at(com_size, dest, n_v)
+
+            # Requeue, in mover order: neighbors outside the mover's new community
+            deferred = batch[mp[~clean]]
+            in_queue[batch] = False
+            in_queue[deferred] = True
+            if len(vs):
+                keep = clean[m_owner]
+                c_owner = np.cumsum(clean)[m_owner[keep]] - 1
+                c_nbr = m_nbr[keep]
+                cand = c_nbr[(comm[c_nbr] != dest[c_owner]) & ~in_queue[c_nbr]]
+                if len(cand):
+                    _, first = np.unique(cand, return_index=True)
+                    cand = cand[np.sort(first)]
+                    in_queue[cand] = True
+                    Q.extend(cand.tolist())
+            if len(deferred):
+                Q.extendleft(reversed(deferred.tolist()))
+            visited += L - len(deferred)
+            moves += len(vs)
+            peak = max(peak, len(Q))
+
+        if observer is not None:
+            observer.emit(LocalMovingStats(visited, moves, peak))
+        return comm.copy()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import random
+
+import numpy as np
+
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph import merge_nodes_subset, community_membership
+from src.lib.domain.services.partition import refine_partition
+from src.lib.adapter.parallel.shared_arrays import (
+    SharedArrays,
+    SharedArraySpec,
+    attach_arrays,
+    csr_graph_arrays,
+    csr_graph_from_arrays,
+)
+
+log = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+
+def _community_rng(seed: int, level: int, index: int) -> random.Random:
+    # One stream per (run seed, level, community): independent of chunking and worker count.
+    # Random() hashes the whole int into its state, so packing the triple is enough.
+    return random.Random((seed << 96) | (level << 64) | index)
+
+def _refine_span(
+    G: CSRGraph,
+    P: CompactPartition,
+    order: np.ndarray,
+    bounds: np.ndarray,
+    span: Span,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    seed: int,
+    level: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    lo, hi = span
+    for i in range(lo, hi):
+        if bounds[i + 1] - bounds[i] < 2:
+            continue  # a singleton has nothing to merge
+        S = set(order[bounds[i]:bounds[i + 1]].tolist())
+        merge_nodes_subset(G, P, S, delta_fn, gamma, theta, _community_rng(seed, level, i))
+    nodes = order[bounds[lo]:bounds[hi]]
+    return nodes.copy(), P.labels[nodes]
+
+# Per-process state set up once by the pool initializer
+_WORKER: Dict[str, Any] = {}
+
+def _init_worker(
+    specs: Dict[str, SharedArraySpec],
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    seed: int,
+    level: int,
+) -> None:
+    arrays, blocks = attach_arrays(specs)
+    G = csr_graph_from_arrays(arrays)
+    _WORKER.update(
+        G=G, P=CompactPartition.singletons(G.num_nodes()),
+        order=arrays["order"], bounds=arrays["bounds"], blocks=blocks,
+        delta_fn=delta_fn, gamma=gamma, theta=theta, seed=seed, level=level,
+    )
+
+def _refine_chunk(span: Span) -> Tuple[np.ndarray, np.ndarray]:
+    w = _WORKER
+    return _refine_span(
+        w["G"], w["P"], w["order"], w["bounds"], span,
+        w["delta_fn"], w["gamma"], w["theta"], w["seed"], w["level"],
+    )
+
+def _balanced_spans(volumes: np.ndarray, parts: int) -> List[Span]:
+    """
+    Contiguous community ranges of roughly equal total volume.
+    """
+    k = len(volumes)
+    cum = np.cumsum(volumes)
+    total = float(cum[-1]) if k else 0.0
+    if total <= 0:
+        cuts = np.linspace(0, k, parts + 1).astype(np.int64)
+    else:
+        cuts = np.searchsorted(cum, np.linspace(0, total, parts + 1)[1:-1], side="right")
+        cuts = np.concatenate(([0], cuts, [k]))
+    return [(int(a), int(b)) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+class ProcessPoolRefiner:
+    """
+    RefineFn that refines the communities of P on a process pool.
+
+    Each community is refined independently (merge_nodes_subset only touches its own
+    nodes), so communities are split into volume-balanced ranges and dispatched to
+    workers that attach to the CSR arrays through shared memory instead of unpickling
+    the graph. Every community gets its own RNG seeded from (seed, level, index), so
+    the refined partition is the same for any worker count, including the in-process
+    path used for small graphs and workers=1 (LeidenAdapter refines with it for every
+    worker count). A dict Graph cannot be shared and falls back to refine_partition.
+    """
+    def __init__(
+        self,
+        workers: int,
+        seed: Optional[int] = None,
+        chunks_per_worker: int = 4,
+        min_nodes: int = 100_000,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.chunks_per_worker = chunks_per_worker
+        self.min_nodes = min_nodes
+        self._level = 0
+
+    def __call__(
+        self,
+        G: GraphLike,
+        P: Partition,
+        delta_fn: DeltaFn,
+        gamma: float,
+        theta: float,
+        rng: Optional[random.Random] = None,
+    ) -> Partition:
+        """
+        With rng, the per-community seeds derive from one rng draw per call instead of
+        the refiner's own seed and call count, so a seeded leiden() run stays
+        reproducible, also when it is resumed from a checkpoint by a new refiner.
+        """
+        if not isinstance(G, CSRGraph):
+            log.debug("parallel refinement needs a CSRGraph; refining %s serially", type(G).__name__)
+            return refine_partition(G, P, delta_fn, gamma, theta, rng)
+        if rng is None:
+            seed, level = self.seed, self._level
+            self._level += 1
+        else:
+            seed, level = rng.getrandbits(64), 0
+        n = G.num_nodes()
+        membership = community_membership(P, n)
+        k = int(membership.max()) + 1 if n else 0
+        order = np.argsort(membership, kind="stable")
+        bounds = np.zeros(k + 1, dtype=np.int64)
+        np.cumsum(np.bincount(membership, minlength=k), out=bounds[1:])
+
+        if self.workers == 1 or n < self.min_nodes or k < 2:
+            Prefined = CompactPartition.singletons(n)
+            _refine_span(G, Prefined, order, bounds, (0, k), delta_fn, gamma, theta, seed, level)
+            return Prefined
+
+        volumes = np.bincount(membership, weights=G.degrees, minlength=k)
+        spans = _balanced_spans(volumes, self.workers * self.chunks_per_worker)
+        labels = np.arange(n, dtype=np.int64)
+        with SharedArrays({**csr_graph_arrays(G), "order": order, "bounds": bounds}) as shared:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(shared.specs, delta_fn, gamma, theta, seed, level),
+            ) as pool:
+                for nodes, lab in pool.map(_refine_chunk, spans):
+                    labels[nodes] = lab
+        return CompactPartition(labels)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+
+log = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """
+    Picklable handle to one array in a shared-memory block.
+    """
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+class SharedArrays:
+    """
+    Owner side: copies named arrays into shared-memory blocks once; workers attach
+    to them by spec with attach_arrays() instead of unpickling the data. `arrays`
+    holds the owner's writable views, so state can be updated between rounds
+    without re-sharing it. close() drops the views and unlinks the blocks.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self._blocks: List[SharedMemory] = []
+        self.specs: Dict[str, SharedArraySpec] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        try:
+            for key, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                shm = SharedMemory(create=True, size=max(1, arr.nbytes))
+                self._blocks.append(shm)
+                view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+                view[...] = arr
+                self.arrays[key] = view
+                self.specs[key] = SharedArraySpec(shm.name, arr.shape, arr.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self.arrays = {}
+        for shm in self._blocks:
+            try:
+                shm.close()
+            except BufferError:
+                # A view is still referenced (e.g. by a traceback); unlink anyway
+                log.warning("shared memory block %s still has live views", shm.name)
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                log.warning("shared memory block %s was already unlinked", shm.name)
+        self._blocks = []
+
+    def __enter__(self) -> SharedArrays:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+def attach_arrays(specs: Dict[str, SharedArraySpec]) -> Tuple[Dict[str, np.ndarray], List[SharedMemory]]:
+    """
+    Worker side: zero-copy views of the owner's arrays. Keep the returned blocks
+    referenced for as long as the views are used. Pool workers share the owner's
+    resource tracker, so attaching does not take over the unlink.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    blocks: List[SharedMemory] = []
+    for key, spec in specs.items():
+        shm = SharedMemory(name=spec.name)
+        blocks.append(shm)
+        arrays[key] = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+    return arrays, blocks
+
+def csr_graph_arrays(G: CSRGraph) -> Dict[str, np.ndarray]:
+    arrays = {"offsets": G.offsets, "indices": G.indices, "weights": G.weights}
+    if G.sizes is not None:
+        arrays["sizes"] = G.sizes
+    return arrays
+
+def csr_graph_from_arrays(arrays: Dict[str, np.ndarray]) -> CSRGraph:
+    """
+    Rebuild a CSRGraph over attached arrays (labels stay with the owner).
+    """
+    sizes: Optional[np.ndarray] = arrays.get("sizes")
+    return CSRGraph(arrays["offsets"], arrays["indices"], arrays["weights"], None, sizes)
@@ -0,0 +1,443 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from src.lib.domain.types.events import LeidenEvent
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.cache.disk_cache import graph_digest
+from src.lib.adapter.graph.binary import BinaryGraphReader
+from src.lib.adapter.graph.streaming import CSVEdgeReader, EdgeListReader
+
+log = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+_FINISHED = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+OBJECTIVES = ("modularity", "cpm")
+GRAPH_FORMATS = ("binary", "edgelist", "csv")
+
+@dataclass(frozen=True)
+class DetectionRequest:
+    """
+    One Leiden run, described by value so it can be sent to a worker process and
+    compared with other requests. The graph is a file (read in the worker, which keeps
+    recently used graphs loaded) or, for in-process callers, a CSRGraph.
+    graph_format None picks by extension: .bin binary, .csv csv, anything else an
+    edge list. objective is "modularity" or "cpm" (resolution: gamma); modularity's
+    refinement then runs at gamma / 2m, as in the benchmark runner.
+    """
+    graph: Union[str, CSRGraph]
+    graph_format: Optional[str] = None
+    objective: str = "modularity"
+    gamma: float = 1.0
+    theta: float = 1.0
+    max_levels: int = 100
+    engine: str = "vectorized"
+    seed: Optional[int] = 0
+    cache: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.objective not in OBJECTIVES:
+            raise ValueError(f"unknown objective {self.objective!r}; expected one of {', '.join(OBJECTIVES)}")
+        if self.graph_format is not None and self.graph_format not in GRAPH_FORMATS:
+            raise ValueError(f"unknown graph format {self.graph_format!r}; expected one of {', '.join(GRAPH_FORMATS)}")
+        if self.engine == "parallel":
+            raise ValueError("engine='parallel' cannot run inside pool workers; use 'serial' or 'vectorized'")
+
+    def key(self) -> str:
+        """
+        Identity for de-duplication: the parameters plus the graph file's path, size
+        and mtime (or the digest of an in-memory graph).
+        """
+        if isinstance(self.graph, CSRGraph):
+            source: Any = graph_digest(self.graph)
+        else:
+            st = os.stat(self.graph)
+            source = [os.path.abspath(self.graph), st.st_size, st.st_mtime_ns]
+        params = {k: v for k, v in asdict(self).items() if k not in ("graph", "cache")}
+        blob = json.dumps([source, params], sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+class JobCancelled(Exception):
+    """
+    Raised inside a worker when its job was cancelled while running.
+    """
+
+# ---- worker process side ----
+
+# Per-process state: the event queue and cancel flags (set by the pool initializer)
+# and the most recently used graphs
+_WORKER: Dict[str, Any] = {}
+_GRAPHS: "OrderedDict[Tuple[str, int, int], CSRGraph]" = OrderedDict()
+_MAX_GRAPHS = 4
+
+def _init_worker(events: Any, cancelled: Any) -> None:
+    _WORKER.update(events=events, cancelled=cancelled)
+
+def _load_graph(request: DetectionRequest) -> CSRGraph:
+    if isinstance(request.graph, CSRGraph):
+        return request.graph
+    path = request.graph
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    G = _GRAPHS.get(key)
+    if G is not None:
+        _GRAPHS.move_to_end(key)
+        return G
+    fmt = request.graph_format
+    if fmt is None:
+        fmt = "binary" if path.endswith(".bin") else "csv" if path.endswith(".csv") else "edgelist"
+    reader = BinaryGraphReader() if fmt == "binary" else CSVEdgeReader() if fmt == "csv" else EdgeListReader()
+    G = _GRAPHS[key] = reader.read(path)
+    while len(_GRAPHS) > _MAX_GRAPHS:
+        _GRAPHS.popitem(last=False)
+    return G
+
+def event_record(event: LeidenEvent) -> Dict[str, Any]:
+    """
+    JSON-ready form of a pipeline event: its fields plus "event" (the class name).
+    """
+    return {"event": type(event).__name__, **asdict(event)}
+
+class _QueueObserver:
+    """
+    Forwards a job's events to the service and stops the run once it is cancelled.
+    """
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+
+    def emit(self, event: LeidenEvent) -> None:
+        _WORKER["events"].put((self.job_id, event_record(event)))
+        if self.job_id in _WORKER["cancelled"]:
+            raise JobCancelled(self.job_id)
+
+    def close(self) -> None:
+        pass
+
+def _run_job(job_id: str, request: DetectionRequest) -> Tuple[List[np.ndarray], Optional[List[Any]]]:
+    try:
+        return _detect(job_id, request)
+    finally:
+        # End of the job's events: the service finishes the job once it has read this
+        _WORKER["events"].put((job_id, None))
+
+def _detect(job_id: str, request: DetectionRequest) -> Tuple[List[np.ndarray], Optional[List[Any]]]:
+    if job_id in _WORKER["cancelled"]:
+        raise JobCancelled(job_id)
+    G = _load_graph(request)
+    if request.objective == "cpm":
+        objective, gamma = CPMObjective(request.gamma), request.gamma
+    else:
+        objective, gamma = ModularityObjective(request.gamma), request.gamma / G.total_weight()
+    h = LeidenAdapter().detect_hierarchy(
+        G, None, delta_fn=objective, gamma=gamma, theta=request.theta,
+        max_levels=request.max_levels, engine=request.engine, seed=request.seed,
+        observer=_QueueObserver(job_id), cache=request.cache,
+    )
+    labels = list(h.labels) if h.labels is not None else None
+    return [np.asarray(m) for m in h.maps], labels
+
+# ---- service side ----
+
+@dataclass
+class Job:
+    """
+    A submitted request and everything callers can observe about it. events keeps the
+    whole history so late subscribers replay it. key is the request's key() at submit.
+    """
+    id: str
+    key: str
+    request: DetectionRequest
+    priority: int
+    state: str = JOB_QUEUED
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Hierarchy] = None
+    error: Optional[str] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    subscribers: int = 1
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+    # The worker's end-of-job marker has been read: every event is in `events`
+    drained: bool = field(default=False, repr=False)
+
+    def status(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "id": self.id, "state": self.state, "priority": self.priority,
+            "events": len(self.events), "subscribers": self.subscribers,
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+        }
+        if self.result is not None:
+            out["levels"] = self.result.depth
+            out["communities"] = self.result.num_communities()
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+class JobService:
+    """
+    Runs detection jobs on a pool of `workers` processes from an asyncio program.
+    - submit() queues a job and returns at once; an identical request (same
+      DetectionRequest.key()) that is still queued or running is shared instead of
+      run twice, and takes the higher of the two priorities.
+    - Queued jobs start highest priority first (FIFO among equals); at most `workers`
+      run at a time, so a high-priority job waits for one slot, not for a backlog.
+    - events() streams a job's pipeline events (see event_record) as the worker emits
+      them; result() waits for the Hierarchy.
+    - cancel() withdraws one submitter; once every submitter of a job has cancelled,
+      a queued job is dropped at once and a running one stops at its next event
+      (phase boundary); the worker stays up for the next job, and an identical
+      request submitted meanwhile starts a new job.
+    Workers keep the last few graph files they loaded, so repeated jobs on one graph
+    skip parsing. Use as `async with JobService(...) as service:`.
+    """
+    def __init__(self, workers: int = 2, max_finished: int = 1000) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.workers = workers
+        self.max_finished = max_finished
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+        self._pending: List[Tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._running = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pump: Optional[threading.Thread] = None
+
+    async def __aenter__(self) -> JobService:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        ctx = multiprocessing.get_context("spawn")
+        self._manager = ctx.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._pool = ProcessPoolExecutor(
+            self.workers, mp_context=ctx, initializer=_init_worker, initargs=(self._events, self._cancelled),
+        )
+        self._pump = threading.Thread(target=self._pump_events, name="job-events", daemon=True)
+        self._pump.start()
+
+    async def close(self) -> None:
+        for job in list(self.jobs.values()):
+            if job.state not in _FINISHED:
+                await self._cancel(job)
+        if self._pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._pool.shutdown)
+            self._pool = None
+        if self._pump is not None:
+            self._events.put(None)
+            self._pump.join()
+            self._pump = None
+            self._manager.shutdown()
+
+    # ---- public API ----
+    async def submit(self, request: DetectionRequest, priority: int = 0) -> Job:
+        if self._pool is None:
+            raise RuntimeError("the service is not running; use `async with JobService()`")
+        key = request.key()
+        existing = self._by_key.get(key)
+        if existing is not None:
+            job = self.jobs[existing]
+            job.subscribers += 1
+            if priority > job.priority and job.state == JOB_QUEUED:
+                job.priority = priority
+                heapq.heappush(self._pending, (-priority, next(self._seq), job.id))
+            log.info("job %s: joined by an identical request", job.id)
+            return job
+        job = Job(f"job-{next(self._ids)}", key, request, priority)
+        self.jobs[job.id] = job
+        self._by_key[key] = job.id
+        heapq.heappush(self._pending, (-priority, next(self._seq), job.id))
+        self._dispatch()
+        self._forget_finished()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        try:
+            return self.jobs[job_id]
+        except KeyError:
+            raise KeyError(f"no job {job_id!r}") from None
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Withdraws one submitter of the job. True if the job was queued or running,
+        False if it had already finished. The job itself ends as cancelled only when
+        this was its last subscriber; identical requests that joined it keep it going.
+        """
+        job = self.get(job_id)
+        if job.state in _FINISHED:
+            return False
+        job.subscribers = max(job.subscribers - 1, 0)
+        if job.subscribers:
+            log.info("job %s: one of its submitters cancelled, %d left", job.id, job.subscribers)
+            self._notify(job)
+            return True
+        await self._cancel(job)
+        return True
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Every event of the job from the first one on, then new ones as they arrive,
+        until it finishes.
+        """
+        job = self.get(job_id)
+        seen = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.events) > seen or job.state in _FINISHED)
+                fresh = job.events[seen:]
+                done = job.state in _FINISHED
+            for record in fresh:
+                yield record
+            seen += len(fresh)
+            if done and seen == len(job.events):
+                return
+
+    async def result(self, job_id: str) -> Hierarchy:
+        """
+        Waits for the job; raises RuntimeError if it failed or was cancelled.
+        """
+        job = self.get(job_id)
+        async with job.changed:
+            await job.changed.wait_for(lambda: job.state in _FINISHED)
+        if job.result is None:
+            raise RuntimeError(f"job {job_id} {job.state}" + (f": {job.error}" if job.error else ""))
+        return job.result
+
+    # ---- internals ----
+    async def _cancel(self, job: Job) -> None:
+        if job.state == JOB_QUEUED:
+            await self._finish(job, JOB_CANCELLED)
+        else:
+            # The worker notices at its next event; _settle records the outcome. An
+            # identical request submitted from now on starts a fresh job
+            self._cancelled[job.id] = True
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+    def _dispatch(self) -> None:
+        assert self._pool is not None
+        while self._running < self.workers and self._pending:
+            neg_priority, _, job_id = heapq.heappop(self._pending)
+            job = self.jobs.get(job_id)
+            # Skip cancelled jobs and stale entries left by a priority bump
+            if job is None or job.state != JOB_QUEUED or -neg_priority != job.priority:
+                continue
+            job.state = JOB_RUNNING
+            job.started = time.time()
+            self._running += 1
+            job.future = self._pool.submit(_run_job, job.id, job.request)
+            job.future.add_done_callback(
+                lambda f, job=job: self._loop.call_soon_threadsafe(  # type: ignore[union-attr]
+                    lambda: asyncio.ensure_future(self._on_done(job))
+                )
+            )
+            self._notify(job)
+
+    async def _on_done(self, job: Job) -> None:
+        # The worker is free, but the job's last events may still be in the queue: it
+        # finishes once the end-of-job marker is read too (unless the worker died)
+        self._running -= 1
+        self._cancelled.pop(job.id, None)
+        assert job.future is not None
+        if job.drained or isinstance(job.future.exception(), BrokenExecutor):
+            await self._settle(job)
+        self._dispatch()
+
+    async def _end_of_events(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.drained = True
+        if job.future is not None and job.future.done():
+            await self._settle(job)
+
+    async def _settle(self, job: Job) -> None:
+        assert job.future is not None
+        if job.state in _FINISHED:
+            return
+        try:
+            maps, labels = job.future.result()
+        except JobCancelled:
+            await self._finish(job, JOB_CANCELLED)
+        except Exception as e:
+            log.warning("job %s failed: %s", job.id, e)
+            await self._finish(job, JOB_FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            job.result = Hierarchy(maps, labels)
+            await self._finish(job, JOB_DONE)
+
+    async def _finish(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        if self._by_key.get(job.key) == job.id:
+            del self._by_key[job.key]
+        async with job.changed:
+            job.changed.notify_all()
+
+    def _notify(self, job: Job) -> None:
+        async def wake() -> None:
+            async with job.changed:
+                job.changed.notify_all()
+        asyncio.ensure_future(wake())
+
+    def _forget_finished(self) -> None:
+        finished = [j.id for j in self.jobs.values() if j.state in _FINISHED]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def _pump_events(self) -> None:
+        # Blocking reads of the workers' event queue, handed to the loop in order
+        while True:
+            try:
+                item = self._events.get()
+            except (EOFError, OSError, queue.Empty):
+                return
+            if item is None:
+                return
+            job_id, record = item
+            if record is None:
+                self._loop.call_soon_threadsafe(  # type: ignore[union-attr]
+                    lambda job_id=job_id: asyncio.ensure_future(self._end_of_events(job_id))
+                )
+            else:
+                self._loop.call_soon_threadsafe(self._add_event, job_id, record)  # type: ignore[union-attr]
+
+    def _add_event(self, job_id: str, record: Dict[str, Any]) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.events.append(record)
+        self._notify(job)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from dataclasses import fields
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from src.lib.adapter.service.jobs import DetectionRequest, JobService
+
+log = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict"}
+_REQUEST_FIELDS = {f.name for f in fields(DetectionRequest)}
+_MAX_BODY = 1 << 20
+
+class JobServer:
+    """
+    Adapter: a JobService behind a small HTTP/1.1 endpoint on TCP (host, port) or a
+    Unix socket (path), so one warm process serves many local callers. JSON in and out:
+    - POST /jobs {"graph": path, "priority": 0, ...DetectionRequest fields}
+      -> 202 {"id", "state", "deduplicated"}
+    - GET /jobs -> every job's status; GET /jobs/<id> -> one status
+    - GET /jobs/<id>/result -> {"membership": final level, "labels"} once done (409
+      if the job failed or was cancelled)
+    - GET /jobs/<id>/events -> the job's events as NDJSON, streamed until it finishes
+      (the response ends when the connection closes)
+    - DELETE /jobs/<id> -> {"cancelled": bool}
+    One request per connection; there is no authentication, so bind to localhost or a
+    socket with restricted permissions.
+    """
+    def __init__(self, service: JobService) -> None:
+        self.service = service
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, path: Optional[str] = None) -> asyncio.AbstractServer:
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        log.info("job server listening on %s", path or f"{host}:{self.port}")
+        return self.server
+
+    @property
+    def port(self) -> Optional[int]:
+        if self.server is None or not self.server.sockets:
+            return None
+        address = self.server.sockets[0].getsockname()
+        return address[1] if isinstance(address, tuple) else None
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    # ---- HTTP plumbing ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, target, body = await self._read_request(reader)
+            await self._route(method, target, body, writer)
+        except ValueError as e:
+            self._respond(writer, 400, {"error": str(e)})
+        except KeyError as e:
+            self._respond(writer, 404, {"error": e.args[0] if e.args else "not found"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise ValueError(f"malformed request line {lines[0]!r}") from None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        if length > _MAX_BODY:
+            raise ValueError(f"request body over {_MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0].rstrip("/"), body
+
+    def _start_response(self, writer: asyncio.StreamWriter, status: int, content_type: str, length: Optional[int]) -> None:
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}", "Connection: close"]
+        if length is not None:
+            head.append(f"Content-Length: {length}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+    def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self._start_response(writer, status, "application/json", len(body))
+        writer.write(body)
+
+    # ---- routes ----
+    async def _route(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = [p for p in target.split("/") if p]
+        if not parts or parts[0] != "jobs" or len(parts) > 3:
+            raise KeyError(f"no route {target!r}")
+        if len(parts) == 1:
+            if method == "POST":
+                self._respond(writer, 202, await self._submit(body))
+            elif method == "GET":
+                self._respond(writer, 200, [job.status() for job in self.service.jobs.values()])
+            else:
+                self._respond(writer, 405, {"error": f"{method} not allowed on /jobs"})
+            return
+        job_id = parts[1]
+        action = parts[2] if len(parts) == 3 else None
+        if method == "DELETE" and action is None:
+            self._respond(writer, 200, {"cancelled": await self.service.cancel(job_id)})
+        elif method != "GET":
+            self._respond(writer, 405, {"error": f"{method} not allowed on {target}"})
+        elif action is None:
+            self._respond(writer, 200, self.service.get(job_id).status())
+        elif action == "result":
+            try:
+                h = await self.service.result(job_id)
+            except RuntimeError as e:
+                self._respond(writer, 409, {"error": str(e)})
+                return
+            self._respond(writer, 200, {
+                "membership": h.membership().tolist(),
+                "labels": list(h.labels) if h.labels is not None else None,
+            })
+        elif action == "events":
+            await self._stream_events(job_id, writer)
+        else:
+            raise KeyError(f"no route {target!r}")
+
+    async def _submit(self, body: bytes) -> Dict[str, Any]:
+        try:
+            spec = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"request body is not JSON: {e}") from None
+        if not isinstance(spec, dict) or not isinstance(spec.get("graph"), str):
+            raise ValueError('expected a JSON object with a "graph" path')
+        priority = spec.pop("priority", 0)
+        unknown = set(spec) - _REQUEST_FIELDS
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        try:
+            request = DetectionRequest(**spec)
+            job = await self.service.submit(request, priority=int(priority))
+        except OSError as e:
+            raise ValueError(f"cannot read graph {spec['graph']}: {e}") from None
+        except TypeError as e:
+            raise ValueError(str(e)) from None
+        return {"id": job.id, "state": job.state, "deduplicated": job.subscribers > 1}
+
+    async def _stream_events(self, job_id: str, writer: asyncio.StreamWriter) -> None:
+        self.service.get(job_id)
+        self._start_response(writer, 200, "application/x-ndjson", None)
+        async for record in self.service.events(job_id):
+            writer.write(json.dumps(record).encode("utf-8") + b"\n")
+            await writer.drain()
+        writer.write(json.dumps({"event": "JobFinished", **self.service.get(job_id).status()}).encode("utf-8") + b"\n")
@@ -0,0 +1,289 @@
+# pyright: reportUnknownMemberType=false
+
+from __future__ import annotations
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.domain.types.positions import Positions
+from src.lib.port.visualizer import VisualizerPort
+from src.lib.adapter.visualizer.hulls import HullCache
+
+# Node positions as a mapping or as an (n, 2) array in the graph's node order
+PositionsLike = Union[Positions, np.ndarray]
+
+DETAIL_AUTO = "auto"
+DETAIL_NODES = "nodes"
+DETAIL_COMMUNITIES = "communities"
+
+# Edge-density rasterization: sample points in all, and per vectorized pass
+_DENSITY_BUDGET = 1 << 25
+_DENSITY_CHUNK = 1 << 22
+
+class BatchedMatplotlibVisualizer(VisualizerPort):
+    """
+    VisualizerPort for large graphs: every layer is one matplotlib artist (a single
+    LineCollection for the edges, one scatter for the nodes), built from arrays.
+    - max_edges: draw a uniform sample of at most this many edges (seeded).
+    - detail: "nodes", "communities" (one marker per community at its centroid, sized
+      by member count, with inter-community edges merged and weighted) or "auto",
+      which switches to communities above community_view_nodes nodes.
+    - density_edges: from this many edges on, edges are rasterized into a
+      density_bins x density_bins image (log scale) instead of drawn as lines.
+    - label_threshold: node (or community) labels are drawn only up to this count;
+      hulls only up to max_hulls communities (None: always).
+    - hull_cache: hulls are kept between renders and only those of communities whose
+      members or positions changed are recomputed; pass a HullCache to share one
+      between visualizers.
+    It renders on a bare Figure (no pyplot state, no window): with save_path the
+    image goes to that file, and show=True additionally opens a pyplot window.
+    """
+    def __init__(
+        self,
+        max_edges: Optional[int] = 200_000,
+        detail: str = DETAIL_AUTO,
+        community_view_nodes: int = 50_000,
+        density_edges: int = 1_000_000,
+        density_bins: int = 1024,
+        label_threshold: int = 200,
+        max_hulls: Optional[int] = 200,
+        figsize: Tuple[float, float] = (8.0, 6.0),
+        dpi: int = 150,
+        seed: Optional[int] = 0,
+        show: bool = False,
+        hull_cache: Optional[HullCache] = None,
+    ) -> None:
+        if detail not in (DETAIL_AUTO, DETAIL_NODES, DETAIL_COMMUNITIES):
+            raise ValueError(f"unknown detail {detail!r}; expected auto, nodes or communities")
+        if max_edges is not None and max_edges < 0:
+            raise ValueError("max_edges must be >= 0")
+        if density_bins < 1:
+            raise ValueError("density_bins must be >= 1")
+        self.max_edges = max_edges
+        self.detail = detail
+        self.community_view_nodes = community_view_nodes
+        self.density_edges = density_edges
+        self.density_bins = density_bins
+        self.label_threshold = label_threshold
+        self.max_hulls = max_hulls
+        self.figsize = figsize
+        self.dpi = dpi
+        self.seed = seed
+        self.show = show
+        self.hull_cache = hull_cache if hull_cache is not None else HullCache()
+
+    def render(
+        self,
+        G: GraphLike,
+        final_partition: List[Set[NodeLike]],
+        positions: PositionsLike,
+        title: str = "Graph edges and convex hulls per community",
+        save_path: Optional[str] = None,
+    ) -> Optional[str]:
+        names = _node_names(G)
+        xy = _coordinates(names, positions)
+        community = _community_index(names, final_partition)
+        src, dst, w = _edge_arrays(G, names)
+        k = len(final_partition)
+
+        by_community = self.detail == DETAIL_COMMUNITIES or (
+            self.detail == DETAIL_AUTO and len(names) > self.community_view_nodes
+        )
+        if by_community:
+            xy, src, dst, w, sizes = _community_view(xy, community, src, dst, w, k)
+            names = list(range(1, k + 1))
+            community = np.arange(k)
+        else:
+            sizes = None
+
+        if self.show:
+            import matplotlib.pyplot as plt
+            fig = plt.figure(figsize=self.figsize, layout="constrained")
+        else:
+            fig = Figure(figsize=self.figsize, layout="constrained")
+        ax = fig.add_subplot()
+
+        if len(src) >= self.density_edges:
+            self._density(ax, xy, src, dst)
+        else:
+            self._edges(ax, xy, src, dst, w if by_community else None)
+        self._nodes(ax, xy, community, k, sizes)
+        if not by_community and (self.max_hulls is None or k <= self.max_hulls):
+            self._hulls(ax, xy, community, k)
+        if len(names) <= self.label_threshold:
+            for name, (x, y) in zip(names, xy.tolist()):
+                ax.text(x, y, str(name), fontsize=6)
+
+        ax.set_title(title)
+        ax.set_xlabel("x")
+        ax.set_ylabel("y")
+        ax.set_aspect("equal", adjustable="box")
+        if save_path:
+            fig.savefig(save_path, dpi=self.dpi)
+        if self.show:
+            import matplotlib.pyplot as plt
+            plt.show()
+        return save_path
+
+    def _sample(self, m: int) -> Optional[np.ndarray]:
+        if self.max_edges is None or m <= self.max_edges:
+            return None
+        rng = np.random.default_rng(self.seed)
+        return np.sort(rng.choice(m, size=self.max_edges, replace=False))
+
+    def _edges(
+        self, ax: Axes, xy: np.ndarray, src: np.ndarray, dst: np.ndarray, w: Optional[np.ndarray],
+    ) -> None:
+        keep = self._sample(len(src))
+        if keep is not None:
+            src, dst = src[keep], dst[keep]
+            w = w[keep] if w is not None else None
+        if not len(src):
+            return
+        segments = np.stack([xy[src], xy[dst]], axis=1)
+        if w is not None:
+            # Merged community edges: width grows with the log of their total weight
+            widths = 0.3 + 2.0 * np.log1p(w) / max(float(np.log1p(w).max()), 1e-12)
+            lines = LineCollection(segments, linewidths=widths, colors="0.4", alpha=0.5)
+        else:
+            alpha = float(np.clip(2000.0 / len(src), 0.05, 0.6))
+            lines = LineCollection(segments, linewidths=0.4, colors="0.3", alpha=alpha)
+        lines.set_rasterized(len(src) > 20_000)
+        ax.add_collection(lines)
+
+    def _density(self, ax: Axes, xy: np.ndarray, src: np.ndarray, dst: np.ndarray) -> None:
+        """
+        Edge ink per pixel: each edge is sampled about once per bin it crosses; past
+        _DENSITY_BUDGET samples in all, every edge gets proportionally fewer, heavier
+        samples, so the total ink (and its distribution) stays the same. Chunked so that
+        the sample points of one pass stay around 100 MB.
+        """
+        bins = self.density_bins
+        lo = xy.min(axis=0)
+        span = np.maximum(xy.max(axis=0) - lo, 1e-12)
+        scaled = (xy - lo) / span * (bins - 1)
+        a_all, b_all = scaled[src], scaled[dst]
+        length = np.maximum(np.abs(b_all - a_all).max(axis=1), 1.0)
+        steps_all = np.ceil(length)
+        total = steps_all.sum()
+        if total > _DENSITY_BUDGET:
+            steps_all *= _DENSITY_BUDGET / total
+        steps_all = np.maximum(np.ceil(steps_all).astype(np.int64), 2)
+        ink_all = length / steps_all
+        density = np.zeros(bins * bins, dtype=np.float64)
+        ends = np.searchsorted(np.cumsum(steps_all), np.arange(1, steps_all.sum() // _DENSITY_CHUNK + 1) * _DENSITY_CHUNK)
+        for start, stop in zip(np.r_[0, ends], np.r_[ends, len(src)]):
+            if stop <= start:
+                continue
+            a, b, steps = a_all[start:stop], b_all[start:stop], steps_all[start:stop]
+            edge = np.repeat(np.arange(len(a)), steps)
+            first = np.cumsum(steps) - steps
+            t = (np.arange(len(edge)) - first[edge]) / (steps[edge] - 1)
+            cells = np.rint(a[edge] + (b[edge] - a[edge]) * t[:, None]).astype(np.int64)
+            density += np.bincount(
+                cells[:, 1] * bins + cells[:, 0], weights=ink_all[start:stop][edge], minlength=bins * bins,
+            )
+        extent = (lo[0], lo[0] + span[0], lo[1], lo[1] + span[1])
+        ax.imshow(
+            np.log1p(density.reshape(bins, bins)), origin="lower", extent=extent,
+            cmap="Greys", interpolation="nearest", aspect="auto",
+        )
+
+    def _nodes(
+        self, ax: Axes, xy: np.ndarray, community: np.ndarray, k: int, sizes: Optional[np.ndarray],
+    ) -> None:
+        if not len(xy):
+            return
+        marker_size = 12.0 * np.sqrt(sizes) if sizes is not None else float(np.clip(4000.0 / len(xy), 0.5, 20.0))
+        colors = community % 20 if k else None
+        ax.scatter(
+            xy[:, 0], xy[:, 1], s=marker_size, c=colors, cmap="tab20", vmin=0, vmax=19,
+            linewidths=0, rasterized=len(xy) > 20_000, zorder=3,
+        )
+
+    def _hulls(self, ax: Axes, xy: np.ndarray, community: np.ndarray, k: int) -> None:
+        offsets, vertices = self.hull_cache.hulls(xy, community, k)
+        counts = np.diff(offsets)
+        polygons = np.flatnonzero(counts >= 3)
+        if not len(polygons):
+            return
+        # Closed outlines: each hull's vertices followed by its first vertex again
+        outlines = [
+            np.concatenate([vertices[offsets[c]:offsets[c + 1]], vertices[offsets[c]:offsets[c] + 1]])
+            for c in polygons.tolist()
+        ]
+        hulls = LineCollection(outlines, linewidths=1.5, cmap="tab20", zorder=4)
+        hulls.set_array(polygons % 20)
+        hulls.set_clim(0, 19)
+        ax.add_collection(hulls)
+
+def _node_names(G: GraphLike) -> List[NodeLike]:
+    if isinstance(G, CSRGraph):
+        return list(G.labels) if G.labels is not None else list(range(G.num_nodes()))
+    return list(G.adj)
+
+def _coordinates(names: List[NodeLike], positions: PositionsLike) -> np.ndarray:
+    if isinstance(positions, np.ndarray):
+        if positions.shape != (len(names), 2):
+            raise ValueError(f"positions array must have shape ({len(names)}, 2), got {positions.shape}")
+        return positions.astype(np.float64, copy=False)
+    try:
+        return np.array([positions[u] for u in names], dtype=np.float64).reshape(len(names), 2)
+    except KeyError as e:
+        raise KeyError(f"no position for node {e.args[0]!r}") from None
+
+def _community_index(names: List[NodeLike], partition: List[Set[NodeLike]]) -> np.ndarray:
+    index: Dict[NodeLike, int] = {u: i for i, u in enumerate(names)}
+    community = np.full(len(names), -1, dtype=np.int64)
+    for c, members in enumerate(partition):
+        community[[index[u] for u in members]] = c
+    if len(community) and community.min() < 0:
+        raise ValueError("final_partition does not cover every node of the graph")
+    return community
+
+def _edge_arrays(G: GraphLike, names: List[NodeLike]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Each undirected non-loop edge once, as (src, dst, weight) arrays of node positions.
+    """
+    if isinstance(G, CSRGraph):
+        rows = G.row_ids()
+        keep = rows < G.indices
+        return rows[keep], np.asarray(G.indices)[keep], np.asarray(G.weights)[keep]
+    index = {u: i for i, u in enumerate(names)}
+    src: List[int] = []
+    dst: List[int] = []
+    w: List[float] = []
+    for u, nbrs in G.adj.items():
+        iu = index[u]
+        for v, wv in nbrs.items():
+            iv = index[v]
+            if iu < iv:
+                src.append(iu)
+                dst.append(iv)
+                w.append(wv)
+    return np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), np.array(w, dtype=np.float64)
+
+def _community_view(
+    xy: np.ndarray, community: np.ndarray, src: np.ndarray, dst: np.ndarray, w: np.ndarray, k: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Centroids, merged inter-community edges (src, dst, total weight) and member counts.
+    """
+    sizes = np.bincount(community, minlength=k).astype(np.float64)
+    safe = np.maximum(sizes, 1.0)
+    centroids = np.stack([
+        np.bincount(community, weights=xy[:, 0], minlength=k) / safe,
+        np.bincount(community, weights=xy[:, 1], minlength=k) / safe,
+    ], axis=1)
+    cu, cv = community[src], community[dst]
+    between = cu != cv
+    lo, hi = np.minimum(cu, cv)[between], np.maximum(cu, cv)[between]
+    pairs, inverse = np.unique(lo * k + hi, return_inverse=True)
+    weights = np.bincount(inverse, weights=w[between], minlength=len(pairs))
+    return centroids, pairs // k, pairs % k, weights, sizes
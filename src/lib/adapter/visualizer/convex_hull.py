@@ -4,11 +4,13 @@ from __future__ import annotations
 from typing import Optional, List, Set, FrozenSet
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 from src.lib.domain.models.graph import Graph
 from src.lib.domain.types.nodes import NodeLike
 from src.lib.domain.types.positions import Positions, Position
 from src.lib.port.visualizer import VisualizerPort
+from src.lib.adapter.visualizer.hulls import HullCache
 
 def _cross(o: Position, a: Position, b: Position) -> float:
     return (a[0]-o[0])*(b[1]-o[1]) - (a[1]-o[1])*(b[0]-o[0])
@@ -30,6 +32,13 @@ def _convex_hull(points: List[Position]) -> List[Position]:
     return lower[:-1] + upper[:-1]
 
 class MatplotlibVisualizer(VisualizerPort):
+    """
+    Draws every edge, node and label through pyplot. The community hulls are computed
+    in one pass and kept between renders (pass a HullCache to share them).
+    """
+    def __init__(self, hull_cache: Optional[HullCache] = None) -> None:
+        self.hull_cache = hull_cache if hull_cache is not None else HullCache()
+
     def render(
         self,
         G: Graph,
@@ -52,6 +61,11 @@ class MatplotlibVisualizer(VisualizerPort):
                 x2, y2 = positions[v]
                 ax.plot([x1, x2], [y1, y2])
 
+        members = [n for comm in final_partition for n in comm]
+        xy = np.array([positions[n] for n in members], dtype=np.float64).reshape(-1, 2)
+        community = np.repeat(np.arange(len(final_partition)), [len(comm) for comm in final_partition])
+        offsets, vertices = self.hull_cache.hulls(xy, community, len(final_partition))
+
         markers = ['o', 's', '^', 'D', 'P', 'X', '*', 'v', '<', '>']
         for idx, comm in enumerate(final_partition):
             pts: List[Position] = [positions[n] for n in comm]
@@ -61,12 +75,11 @@ class MatplotlibVisualizer(VisualizerPort):
             for n in comm:
                 x, y = positions[n]
                 ax.text(x, y, str(n))
-            if len(pts) >= 3:
-                hull = _convex_hull(pts)
-                if len(hull) >= 3:
-                    hx = [p[0] for p in hull] + [hull[0][0]]
-                    hy = [p[1] for p in hull] + [hull[0][1]]
-                    ax.plot(hx, hy, linewidth=2)
+            hull = vertices[offsets[idx]:offsets[idx + 1]]
+            if len(hull) >= 3:
+                hx = hull[:, 0].tolist() + [hull[0, 0]]
+                hy = hull[:, 1].tolist() + [hull[0, 1]]
+                ax.plot(hx, hy, linewidth=2)
 
         ax.set_title(title)
         ax.set_xlabel("x")
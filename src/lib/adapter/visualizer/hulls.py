@@ -0,0 +1,301 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+# Hull vertices of community c are vertices[offsets[c]:offsets[c+1]]
+HullArrays = Tuple[np.ndarray, np.ndarray]
+
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer (uint64 arithmetic wraps)
+    h = (h ^ (h >> np.uint64(30))) * _MIX1
+    h = (h ^ (h >> np.uint64(27))) * _MIX2
+    return h ^ (h >> np.uint64(31))
+
+def _group_bounds(group: np.ndarray, k: int) -> np.ndarray:
+    return np.searchsorted(group, np.arange(k + 1))
+
+def _interior(pts: np.ndarray, group: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    Points strictly inside the octagon spanned by their community's extreme points in
+    the x, y and diagonal directions (Akl-Toussaint): they cannot be hull vertices.
+    pts must be grouped by community; bounds are the group boundaries.
+    """
+    k = len(bounds) - 1
+    counts = np.diff(bounds)
+    present = np.flatnonzero(counts)
+    x, y = pts[:, 0], pts[:, 1]
+    corners = []
+    # Counter-clockwise, starting from the leftmost point
+    for key, pick in ((x, np.minimum), (x + y, np.minimum), (y, np.minimum), (x - y, np.maximum),
+                      (x, np.maximum), (x + y, np.maximum), (y, np.maximum), (x - y, np.minimum)):
+        best = np.zeros(k)
+        best[present] = pick.reduceat(key, bounds[:-1][present])
+        hit = np.flatnonzero(key == np.repeat(best, counts))
+        first = hit[np.r_[True, group[hit][1:] != group[hit][:-1]]]
+        corner = np.zeros((k, 2))
+        corner[group[first]] = pts[first]
+        corners.append(corner)
+    inside = np.ones(len(pts), dtype=bool)
+    spread = np.zeros(k, dtype=bool)
+    # Bounds on |x|, |y| per community: the scale of the rounding in the test below
+    reach_x, reach_y = (np.abs(corners[0][:, 0]) + np.abs(corners[4][:, 0]),
+                        np.abs(corners[2][:, 1]) + np.abs(corners[6][:, 1]))
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        ex, ey = b[:, 0] - a[:, 0], b[:, 1] - a[:, 1]
+        # Corners that coincide leave a zero-length edge, which constrains nothing
+        moved = (ex != 0) | (ey != 0)
+        spread |= moved
+        # cross(a, b, p) > 0 as ex*y - ey*x > ex*ay - ey*ax, with the bound of a
+        # zero-length edge at -inf; a point within rounding of the edge is kept
+        bound = ex * a[:, 1] - ey * a[:, 0]
+        bound += 1e-12 * (np.abs(ex) * reach_y + np.abs(ey) * reach_x)
+        bound = np.where(moved, bound, -np.inf)
+        inside &= np.repeat(ex, counts) * y - np.repeat(ey, counts) * x > np.repeat(bound, counts)
+    return inside & np.repeat(spread, counts)
+
+def _sort_by_angle(group: np.ndarray, angle: np.ndarray, radius: np.ndarray) -> np.ndarray:
+    """
+    Order by (group, angle, radius) for group-sorted input. One argsort of a combined
+    float key does nearly all of it; groups where rounding in that key left angle
+    ties or near-ties out of order are re-sorted exactly.
+    """
+    order = np.argsort(group * 8.0 + angle, kind="stable")  # angle in [-pi, pi]
+    g, a, r = group[order], angle[order], radius[order]
+    same = g[1:] == g[:-1]
+    bad = same & ((a[1:] < a[:-1]) | ((a[1:] == a[:-1]) & (r[1:] < r[:-1])))
+    if bad.any():
+        redo = np.flatnonzero(np.isin(g, g[1:][bad]))
+        order[redo] = order[redo][np.lexsort((r[redo], a[redo], g[redo]))]
+    return order
+
+def _lexicographic_extremes(pts: np.ndarray, group: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Smallest and largest (x, y) of each group (NaN for empty groups).
+    """
+    bounds = _group_bounds(group, k)
+    counts = np.diff(bounds)
+    present = counts > 0
+    starts = bounds[:-1][present]
+    out = []
+    for pick, fill in ((np.minimum, np.inf), (np.maximum, -np.inf)):
+        ends = np.full((k, 2), np.nan)
+        if len(pts):
+            best_x = np.zeros(k)
+            best_x[present] = pick.reduceat(pts[:, 0], starts)
+            y = np.where(pts[:, 0] == np.repeat(best_x, counts), pts[:, 1], fill)
+            ends[present, 0] = best_x[present]
+            ends[present, 1] = pick.reduceat(y, starts)
+        out.append(ends)
+    return out[0], out[1]
+
+def _monotone_chain(pts: np.ndarray) -> np.ndarray:
+    """
+    Andrew's monotone chain over one community's points, the same steps (and float
+    arithmetic) as _convex_hull.
+    """
+    ordered = sorted(set(map(tuple, pts.tolist())))
+    if len(ordered) <= 1:
+        return np.array(ordered, dtype=np.float64).reshape(-1, 2)
+
+    def chain(points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        out: List[Tuple[float, float]] = []
+        for p in points:
+            while len(out) >= 2 and (
+                (out[-1][0] - out[-2][0]) * (p[1] - out[-2][1]) - (out[-1][1] - out[-2][1]) * (p[0] - out[-2][0])
+            ) <= 0:
+                out.pop()
+            out.append(p)
+        return out
+
+    return np.array(chain(ordered)[:-1] + chain(ordered[::-1])[:-1], dtype=np.float64)
+
+def convex_hulls(xy: np.ndarray, community: np.ndarray, k: int) -> HullArrays:
+    """
+    Convex hull of every community at once, as (offsets, vertices): counter-clockwise,
+    starting at the community's lexicographically smallest point, like _convex_hull.
+    Points inside their community's extreme-point octagon are discarded first. The
+    rest are sorted by angle around their community's centroid, which makes a
+    star-shaped polygon containing every hull vertex; its reflex (and collinear)
+    vertices are never on the hull, so all of them, in all communities, are dropped in
+    one vectorized pass, repeated until none are left. Communities whose points are
+    all collinear keep their two extreme points, a single point keeps itself.
+    A turn too small for float rounding to decide (thin or nearly collinear
+    communities), a flat result from three or more points, or a
+    lexicographic extreme missing from the result sends that community through
+    _monotone_chain instead.
+    """
+    xy = np.asarray(xy, dtype=np.float64) + 0.0  # also turns -0.0 into 0.0
+    community = np.asarray(community, dtype=np.int64)
+    order = np.argsort(community, kind="stable")
+    group, pts = community[order], xy[order]
+    all_group, all_pts = group, pts
+    bounds = _group_bounds(group, k)
+    present = bounds[1:] > bounds[:-1]
+    if len(pts) > 8 * np.count_nonzero(present):
+        # Worth it only when communities hold more points than the octagon has corners
+        outer = ~_interior(pts, group, bounds)
+        group, pts = group[outer], pts[outer]
+
+    size = np.maximum(np.bincount(group, minlength=k), 1).astype(np.float64)
+    centroid = np.stack([
+        np.bincount(group, weights=pts[:, 0], minlength=k) / size,
+        np.bincount(group, weights=pts[:, 1], minlength=k) / size,
+    ], axis=1)
+    rel = pts - centroid[group]
+    order = _sort_by_angle(group, np.arctan2(rel[:, 1], rel[:, 0]), np.hypot(rel[:, 0], rel[:, 1]))
+    group, pts = group[order], pts[order]
+    if len(pts):
+        # Duplicate points have the same angle and radius, so they are adjacent now
+        fresh = np.r_[True, (group[1:] != group[:-1]) | np.any(pts[1:] != pts[:-1], axis=1)]
+        group, pts = group[fresh], pts[fresh]
+    lowest_of, highest_of = _lexicographic_extremes(pts, group, k)
+
+    uncertain = np.zeros(k, dtype=bool)
+    while len(pts):
+        bounds = _group_bounds(group, k)
+        first = bounds[:-1][group]
+        last = bounds[1:][group] - 1
+        idx = np.arange(len(pts))
+        prev = np.where(idx == first, last, idx - 1)
+        nxt = np.where(idx == last, first, idx + 1)
+        a, b = pts[prev], pts[nxt]
+        cross = (pts[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1]) - (pts[:, 1] - a[:, 1]) * (b[:, 0] - a[:, 0])
+        drop = cross <= 0
+        # Every vertex of a flat community turns by 0; leave those to the fallback
+        drop &= (last - first) >= 2
+        if not drop.any():
+            break
+        # |cross| within rounding of its two products: the turn's sign is not reliable
+        scale = np.abs(pts[:, 0] - a[:, 0]) * np.abs(b[:, 1] - a[:, 1]) + np.abs(pts[:, 1] - a[:, 1]) * np.abs(b[:, 0] - a[:, 0])
+        uncertain[group[drop & (np.abs(cross) <= 1e-12 * scale)]] = True
+        group, pts = group[~drop], pts[~drop]
+
+    # Collinear communities lose every point in the loop (or keep < 3); from 3 or
+    # more points that may be rounding, so they are checked too
+    bounds = _group_bounds(group, k)
+    counts = np.diff(bounds)
+    flat = present & (counts < 3)
+    uncertain |= flat & (np.bincount(all_group, minlength=k) >= 3)
+    keep = ~flat[group]
+    group, pts = group[keep], pts[keep]
+    bounds = _group_bounds(group, k)
+    counts = np.diff(bounds)
+    rank = np.arange(len(pts)) - bounds[:-1][group]
+    # Rotate each hull to start at its lexicographically smallest vertex
+    heads = np.flatnonzero(np.all(pts == lowest_of[group], axis=1))
+    start = np.zeros(k, dtype=np.int64)
+    start[group[heads]] = rank[heads]
+    rank = (rank - start[group]) % np.maximum(counts, 1)[group]
+
+    # Flat communities: [lowest, highest], or the one point
+    single = flat & np.all(lowest_of == highest_of, axis=1)
+    counts = np.where(flat, np.where(single, 1, 2), counts)
+    offsets = np.r_[0, np.cumsum(counts)].astype(np.int64)
+    vertices = np.empty((int(offsets[-1]), 2), dtype=np.float64)
+    vertices[offsets[:-1][group] + rank] = pts
+    vertices[offsets[:-1][flat]] = lowest_of[flat]
+    pair = flat & ~single
+    vertices[offsets[:-1][pair] + 1] = highest_of[pair]
+
+    counts = np.diff(offsets)
+    has_lowest = np.zeros(k, dtype=bool)
+    has_highest = np.zeros(k, dtype=bool)
+    owner = np.repeat(np.arange(k), counts)
+    has_lowest[owner[np.all(vertices == lowest_of[owner], axis=1)]] = True
+    has_highest[owner[np.all(vertices == highest_of[owner], axis=1)]] = True
+    redo = np.flatnonzero(uncertain | (present & ~(has_lowest & has_highest)))
+    if not len(redo):
+        return offsets, vertices
+    all_bounds = _group_bounds(all_group, k)
+    hulls = [vertices[offsets[c]:offsets[c + 1]] for c in range(k)]
+    for c in redo.tolist():
+        hulls[c] = _monotone_chain(all_pts[all_bounds[c]:all_bounds[c + 1]])
+    counts = np.fromiter((len(h) for h in hulls), dtype=np.int64, count=k)
+    offsets = np.r_[0, np.cumsum(counts)].astype(np.int64)
+    return offsets, np.concatenate(hulls).reshape(-1, 2)
+
+class HullCache:
+    """
+    Convex hulls per community, remembered between calls. A community is keyed by its
+    point set (a 128-bit order-independent hash of its members' coordinates), so for a
+    new partition or layout only the communities whose membership or positions changed
+    are recomputed, in one convex_hulls pass. Least recently used hulls past
+    max_entries are forgotten.
+    """
+    def __init__(self, max_entries: int = 1_000_000) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        self.max_entries = max_entries
+        self._hulls: OrderedDict[Tuple[int, int, int], np.ndarray] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._hulls)
+
+    def clear(self) -> None:
+        self._hulls.clear()
+
+    def hulls(self, xy: np.ndarray, community: np.ndarray, k: int) -> HullArrays:
+        """
+        Same result as convex_hulls(xy, community, k).
+        """
+        xy = np.asarray(xy, dtype=np.float64)
+        community = np.asarray(community, dtype=np.int64)
+        keys = _community_keys(xy, community, k)
+        found: List[np.ndarray] = [None] * k  # type: ignore[list-item]
+        missing: List[int] = []
+        for c, key in enumerate(keys):
+            hull = self._hulls.get(key)
+            if hull is None:
+                missing.append(c)
+            else:
+                self._hulls.move_to_end(key)
+                found[c] = hull
+        self.hits += k - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # Recompute just the stale communities, renumbered 0..len(missing)-1
+            renumber = np.full(k, -1, dtype=np.int64)
+            renumber[missing] = np.arange(len(missing))
+            new_id = renumber[community]
+            sel = new_id >= 0
+            offsets, vertices = convex_hulls(xy[sel], new_id[sel], len(missing))
+            for i, c in enumerate(missing):
+                hull = vertices[offsets[i]:offsets[i + 1]]
+                hull.flags.writeable = False
+                found[c] = hull
+                if self.max_entries:
+                    self._hulls[keys[c]] = hull
+            while len(self._hulls) > self.max_entries:
+                self._hulls.popitem(last=False)
+
+        counts = np.fromiter((len(h) for h in found), dtype=np.int64, count=k)
+        offsets = np.r_[0, np.cumsum(counts)].astype(np.int64)
+        vertices = np.concatenate(found) if k else np.empty((0, 2))
+        return offsets, vertices.reshape(-1, 2)
+
+def _community_keys(xy: np.ndarray, community: np.ndarray, k: int) -> List[Tuple[int, int, int]]:
+    """
+    (size, hash, hash) of each community's coordinates, independent of node order.
+    """
+    bits = np.ascontiguousarray(xy + 0.0).view(np.uint64).reshape(-1, 2)
+    h1 = _mix(bits[:, 0] ^ _mix(bits[:, 1] ^ _SALT))
+    h2 = _mix(h1 ^ _SALT)
+    order = np.argsort(community, kind="stable")
+    bounds = _group_bounds(community[order], k)
+    starts = np.minimum(bounds[:-1], max(len(order) - 1, 0))
+    sums = []
+    for h in (h1, h2):
+        # uint64 sums wrap around, which keeps them order-independent
+        s = np.add.reduceat(h[order], starts) if len(order) else np.zeros(k, dtype=np.uint64)
+        s[bounds[:-1] == bounds[1:]] = 0
+        sums.append(s.tolist())
+    return list(zip(np.diff(bounds).tolist(), sums[0], sums[1]))
@@ -0,0 +1,176 @@
+from __future__ import annotations
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+
+# A generated benchmark instance: the graph and its planted community per node id
+PlantedGraph = Tuple[CSRGraph, np.ndarray]
+
+def _simple_graph(n: int, src: np.ndarray, dst: np.ndarray) -> CSRGraph:
+    """
+    Unit-weight graph over sampled endpoint pairs, without self-loops or parallel edges.
+    """
+    keep = src != dst
+    lo, hi = np.minimum(src, dst)[keep], np.maximum(src, dst)[keep]
+    keys = np.unique(lo.astype(np.int64) * n + hi)
+    return CSRGraph.from_undirected(n, keys // n, keys % n, np.ones(len(keys)))
+
+def _pair_within(groups: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Configuration-model matching of stubs: stubs[i] belongs to group groups[i] and is
+    paired with a random stub of the same group (one stub is left over in odd groups).
+    Returns positions into the stub array.
+    """
+    order = np.lexsort((rng.random(len(groups)), groups))
+    g = groups[order]
+    starts = np.flatnonzero(np.concatenate(([True], g[1:] != g[:-1])))
+    rank = np.arange(len(g)) - np.repeat(starts, np.diff(np.append(starts, len(g))))
+    first = np.flatnonzero((rank % 2 == 0)[:-1] & (g[1:] == g[:-1]))
+    return order[first], order[first + 1]
+
+def planted_partition(
+    n: int,
+    block: int,
+    deg_in: float,
+    deg_out: float,
+    seed: int = 0,
+) -> PlantedGraph:
+    """
+    Blocks of `block` consecutive nodes; each node gets ~deg_in neighbors inside its
+    block and ~deg_out anywhere, endpoints drawn uniformly.
+    """
+    rng = np.random.default_rng(seed)
+    truth = np.arange(n) // block
+    m_in, m_out = int(n * deg_in / 2), int(n * deg_out / 2)
+    u = rng.integers(0, n, m_in)
+    v = np.minimum(truth[u] * block + rng.integers(0, block, m_in), n - 1)
+    src = np.concatenate((u, rng.integers(0, n, m_out)))
+    dst = np.concatenate((v, rng.integers(0, n, m_out)))
+    return _simple_graph(n, src, dst), truth
+
+def stochastic_block_model(
+    sizes: Sequence[int],
+    probs: np.ndarray,
+    seed: int = 0,
+) -> PlantedGraph:
+    """
+    Nodes of block b are a consecutive id range of sizes[b]; each pair in blocks (a, b)
+    is an edge with probability probs[a, b]. Edge counts per block pair are exact
+    binomial draws; endpoints are then drawn with replacement, so the graph matches the
+    model in the sparse regime (duplicate draws merge).
+    """
+    rng = np.random.default_rng(seed)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    probs = np.asarray(probs, dtype=np.float64)
+    k = len(sizes)
+    if probs.shape != (k, k):
+        raise ValueError(f"probs must be {k}x{k}, got {probs.shape}")
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    a, b = np.triu_indices(k)
+    pairs = np.where(a == b, sizes[a] * (sizes[a] - 1) // 2, sizes[a] * sizes[b])
+    counts = rng.binomial(pairs, probs[a, b])
+    pa, pb = np.repeat(a, counts), np.repeat(b, counts)
+    u = starts[pa] + (rng.random(len(pa)) * sizes[pa]).astype(np.int64)
+    v = starts[pb] + (rng.random(len(pb)) * sizes[pb]).astype(np.int64)
+    truth = np.repeat(np.arange(k), sizes)
+    return _simple_graph(int(sizes.sum()), u, v), truth
+
+def _power_law(rng: np.random.Generator, count: int, exponent: float, low: float, high: float) -> np.ndarray:
+    # Inverse CDF of p(x) ~ x^-exponent on [low, high]
+    e = 1.0 - exponent
+    r = rng.random(count)
+    return (low ** e + r * (high ** e - low ** e)) ** (1.0 / e)
+
+def lfr_like(
+    n: int,
+    avg_degree: float = 10.0,
+    max_degree: Optional[int] = None,
+    mu: float = 0.3,
+    tau1: float = 2.5,
+    tau2: float = 1.5,
+    min_community: int = 20,
+    max_community: Optional[int] = None,
+    seed: int = 0,
+) -> PlantedGraph:
+    """
+    LFR-style benchmark: power-law degrees (exponent tau1, mean ~avg_degree) and
+    community sizes (exponent tau2). Each node sends a fraction mu of its degree
+    outside its community; internal and external stubs are paired by a configuration
+    model and self-loops, parallel edges and external stubs that land inside the
+    community are dropped. Unlike LFR proper there is no rewiring, so realized degrees
+    and mixing run slightly below target.
+    """
+    rng = np.random.default_rng(seed)
+    max_degree = max_degree or max(int(avg_degree) * 5, int(np.sqrt(n)))
+    max_community = max_community or max(min_community * 5, n // 20)
+    # Scale a unit-minimum power law to the target mean, then round
+    raw = _power_law(rng, n, tau1, 1.0, max_degree)
+    degrees = np.clip(np.rint(raw * avg_degree / raw.mean()), 1, max_degree).astype(np.int64)
+
+    # n // min_community draws always cover n nodes; keep those up to the one crossing n
+    sizes = _power_law(rng, n // min_community + 1, tau2, min_community, max_community).astype(np.int64)
+    ends = np.cumsum(sizes)
+    sizes = sizes[: int(np.searchsorted(ends, n)) + 1]
+    sizes[-1] -= int(sizes.sum()) - n
+    truth = np.empty(n, dtype=np.int64)
+    truth[rng.permutation(n)] = np.repeat(np.arange(len(sizes)), sizes)
+
+    size_of = np.asarray(sizes)[truth]
+    k_in = np.minimum(np.rint((1.0 - mu) * degrees).astype(np.int64), size_of - 1)
+    k_out = degrees - k_in
+
+    stubs = np.repeat(np.arange(n), k_in)
+    i, j = _pair_within(truth[stubs], rng)
+    src, dst = [stubs[i]], [stubs[j]]
+    stubs = np.repeat(np.arange(n), k_out)
+    i, j = _pair_within(np.zeros(len(stubs), dtype=np.int64), rng)
+    external = truth[stubs[i]] != truth[stubs[j]]
+    src.append(stubs[i][external])
+    dst.append(stubs[j][external])
+    return _simple_graph(n, np.concatenate(src), np.concatenate(dst)), truth
+
+def ring_of_cliques(num_cliques: int, clique_size: int, seed: Optional[int] = 0) -> PlantedGraph:
+    """
+    num_cliques complete graphs of clique_size nodes, clique c joined to clique c+1 by
+    one edge. Any seed shuffles the node ids so that ids do not give the cliques away;
+    seed=None keeps clique c on ids c*clique_size .. (c+1)*clique_size-1.
+    """
+    n = num_cliques * clique_size
+    a, b = np.triu_indices(clique_size, k=1)
+    base = np.arange(num_cliques)[:, None] * clique_size
+    src = (base + a).ravel()
+    dst = (base + b).ravel()
+    ring = np.arange(num_cliques)
+    src = np.concatenate((src, ring * clique_size))
+    dst = np.concatenate((dst, ((ring + 1) % num_cliques) * clique_size + clique_size - 1))
+    truth = np.arange(n) // clique_size
+    if seed is not None:
+        perm = np.random.default_rng(seed).permutation(n)
+        src, dst = perm[src], perm[dst]
+        truth = truth[np.argsort(perm)]
+    return _simple_graph(n, src, dst), truth
+
+def _sized_sbm(m: int, seed: int) -> PlantedGraph:
+    """
+    ~m edges over at most 200 blocks of uneven size (0.5x to 1.5x the mean), mean
+    degree ~8 inside a block and ~2 across.
+    """
+    n = max(m // 5, 2)
+    rng = np.random.default_rng(seed)
+    k = int(np.clip(n // 100, 1, 200))
+    weights = rng.uniform(0.5, 1.5, k)
+    sizes = np.maximum(np.floor(weights / weights.sum() * n).astype(np.int64), 1)
+    sizes[-1] += n - sizes.sum()
+    probs = np.full((k, k), min(2.0 / n, 1.0))
+    np.fill_diagonal(probs, np.minimum(8.0 / np.maximum(sizes - 1, 1), 1.0))
+    return stochastic_block_model(sizes, probs, seed)
+
+# Families sized by a target edge count: (edges, seed) -> PlantedGraph, ~edges edges
+GENERATORS: Dict[str, Callable[[int, int], PlantedGraph]] = {
+    "planted": lambda m, seed: planted_partition(max(m // 5, 2), 100, 8.0, 2.0, seed),
+    "sbm": lambda m, seed: _sized_sbm(m, seed),
+    "lfr": lambda m, seed: lfr_like(max(m // 5, 2 * 20), avg_degree=10.0, seed=seed),
+    "ring_of_cliques": lambda m, seed: ring_of_cliques(max(m // 29, 3), 8, seed),
+}
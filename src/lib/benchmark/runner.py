@@ -0,0 +1,250 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.services.graph import aggregate_csr_graph, community_membership
+from src.lib.domain.services.partition import refine_partition, lift_partition_by_membership
+from src.lib.domain.services.metrics import modularity, normalized_mutual_information
+from src.lib.domain.algorithms.distance.leiden import MOVE_ENGINES
+from src.lib.benchmark.generators import GENERATORS
+
+T = TypeVar("T")
+
+# Bumped whenever a field of the JSON report changes meaning
+SCHEMA_VERSION = 1
+
+PHASES = ("move", "refine", "aggregate")
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0
+    peak_bytes: int = 0
+
+@dataclass
+class LevelStats:
+    level: int
+    nodes: int
+    edges: int
+    communities: int
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+
+@dataclass
+class CaseResult:
+    """
+    One (family, target size) run. Phase totals sum seconds over levels and take the
+    largest per-level peak; peak_bytes is what the phase allocated above what was live
+    when it started (tracemalloc), 0 when memory tracking is off.
+    """
+    family: str
+    target_edges: int
+    seed: int
+    engine: str
+    nodes: int
+    edges: int
+    generate_seconds: float
+    levels: List[LevelStats]
+    phases: Dict[str, PhaseStats]
+    communities: int
+    modularity: float
+    nmi: float
+
+class _Probe:
+    """
+    Runs one phase and records its wall time, or (memory=True) its tracemalloc peak.
+    Tracing slows Python-heavy phases several-fold, so the two are never measured together.
+    """
+    def __init__(self, memory: bool) -> None:
+        self.memory = memory
+
+    def __call__(self, fn: Callable[[], T]) -> Tuple[T, PhaseStats]:
+        if not self.memory:
+            t0 = time.perf_counter()
+            out = fn()
+            return out, PhaseStats(seconds=time.perf_counter() - t0)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        out = fn()
+        return out, PhaseStats(peak_bytes=max(tracemalloc.get_traced_memory()[1] - base, 0))
+
+def run_phases(
+    G: CSRGraph,
+    *,
+    engine: str = "serial",
+    gamma: Optional[float] = None,
+    theta: float = 0.01,
+    max_levels: int = 100,
+    seed: int = 0,
+    memory: bool = False,
+) -> Tuple[np.ndarray, List[LevelStats]]:
+    """
+    The _leiden_csr loop with every stage measured separately: local moving (the
+    MOVE_ENGINES entry, move_nodes_fast for "serial"), refine_partition, and aggregation
+    (membership, aggregate_csr_graph, lifting the partition). gamma defaults to
+    1 / total weight. Returns the final base-node labels and per-level stats; runs with
+    the same seed make the same moves, whether or not memory is traced.
+    """
+    move_nodes = MOVE_ENGINES[engine]
+    objective = ModularityObjective()
+    gamma = 1.0 / G.total_weight() if gamma is None else gamma
+    rng = random.Random(seed)
+    probe = _Probe(memory)
+    own_trace = memory and not tracemalloc.is_tracing()
+    if own_trace:
+        tracemalloc.start()
+    try:
+        g, p = G, CompactPartition.singletons(G.num_nodes())
+        memberships: List[np.ndarray] = []
+        levels: List[LevelStats] = []
+        while True:
+            stats = LevelStats(len(levels), g.num_nodes(), g.num_edges(), 0)
+            levels.append(stats)
+            p, stats.phases["move"] = probe(lambda: move_nodes(g, p, objective, rng=rng))
+            stats.communities = p.size()
+            if p.size() == g.num_nodes() or len(memberships) >= max_levels:
+                break
+            refined, stats.phases["refine"] = probe(
+                lambda: refine_partition(g, p, objective, gamma, theta, rng=rng)
+            )
+            (g, p, membership), stats.phases["aggregate"] = probe(lambda: _aggregate(g, p, refined))
+            memberships.append(membership)
+    finally:
+        if own_trace:
+            tracemalloc.stop()
+
+    labels = community_membership(p, g.num_nodes())
+    for membership in reversed(memberships):
+        labels = labels[membership]
+    return labels, levels
+
+def _aggregate(g: CSRGraph, p: Partition, refined: Partition) -> Tuple[CSRGraph, Partition, np.ndarray]:
+    membership = community_membership(refined, g.num_nodes())
+    g2 = aggregate_csr_graph(g, membership, refined.size())
+    return g2, lift_partition_by_membership(p, membership), membership
+
+def run_case(
+    family: str,
+    edges: int,
+    *,
+    engine: str = "serial",
+    seed: int = 0,
+    theta: float = 0.01,
+    max_levels: int = 100,
+    repeat: int = 1,
+    memory: bool = True,
+) -> CaseResult:
+    """
+    Generate GENERATORS[family] at ~edges edges and measure one Leiden run on it.
+    Timings are the best of `repeat` untraced runs; memory=True adds one traced run
+    for the peaks. Quality is modularity (gamma 1) and NMI against the planted truth.
+    """
+    if family not in GENERATORS:
+        raise ValueError(f"unknown graph family {family!r}; expected one of {sorted(GENERATORS)}")
+    t0 = time.perf_counter()
+    G, truth = GENERATORS[family](edges, seed)
+    generated = time.perf_counter() - t0
+
+    labels, levels = run_phases(G, engine=engine, theta=theta, max_levels=max_levels, seed=seed)
+    for _ in range(repeat - 1):
+        _, again = run_phases(G, engine=engine, theta=theta, max_levels=max_levels, seed=seed)
+        for level, other in zip(levels, again):
+            for name, stats in level.phases.items():
+                stats.seconds = min(stats.seconds, other.phases[name].seconds)
+    if memory:
+        _, traced = run_phases(G, engine=engine, theta=theta, max_levels=max_levels, seed=seed, memory=True)
+        for level, other in zip(levels, traced):
+            for name, stats in level.phases.items():
+                stats.peak_bytes = other.phases[name].peak_bytes
+
+    totals = {name: PhaseStats() for name in PHASES}
+    for level in levels:
+        for name, stats in level.phases.items():
+            totals[name].seconds += stats.seconds
+            totals[name].peak_bytes = max(totals[name].peak_bytes, stats.peak_bytes)
+    return CaseResult(
+        family=family,
+        target_edges=edges,
+        seed=seed,
+        engine=engine,
+        nodes=G.num_nodes(),
+        edges=G.num_edges(),
+        generate_seconds=generated,
+        levels=levels,
+        phases=totals,
+        communities=int(len(np.unique(labels))),
+        modularity=modularity(G, labels),
+        nmi=normalized_mutual_information(labels, truth),
+    )
+
+def report(results: Sequence[CaseResult], **meta: Any) -> Dict[str, Any]:
+    """
+    JSON-ready report: SCHEMA_VERSION, caller metadata (commit, host, ...) and the cases.
+    """
+    return {"schema": SCHEMA_VERSION, **meta, "cases": [asdict(r) for r in results]}
+
+def markdown_table(payload: Dict[str, Any]) -> str:
+    """
+    One row per case of a report(), for pasting benchmark trends into docs or CI artifacts.
+    """
+    lines = [
+        "| family | nodes | edges | levels | move s | refine s | aggregate s | peak MiB | Q | NMI |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for c in payload["cases"]:
+        ph = c["phases"]
+        peak = max(ph[name]["peak_bytes"] for name in PHASES) / 2**20
+        lines.append(
+            f"| {c['family']} | {c['nodes']} | {c['edges']} | {len(c['levels'])} "
+            f"| {ph['move']['seconds']:.3f} | {ph['refine']['seconds']:.3f} | {ph['aggregate']['seconds']:.3f} "
+            f"| {peak:.1f} | {c['modularity']:.4f} | {c['nmi']:.4f} |"
+        )
+    return "\n".join(lines)
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    *,
+    time_tolerance: float = 0.25,
+    memory_tolerance: float = 0.10,
+    quality_tolerance: float = 0.005,
+    min_seconds: float = 0.05,
+) -> List[str]:
+    """
+    Regressions of `current` against `baseline`, matching cases on (family, target_edges,
+    seed, engine): a phase slower by more than time_tolerance (relative, phases under
+    min_seconds in the baseline are too noisy to judge), a phase peak larger by more
+    than memory_tolerance, or modularity / NMI lower by more than quality_tolerance.
+    """
+    if baseline.get("schema") != current.get("schema"):
+        return [f"schema {baseline.get('schema')} vs {current.get('schema')}: reports are not comparable"]
+
+    def key(case: Dict[str, Any]) -> Tuple[Any, ...]:
+        return case["family"], case["target_edges"], case["seed"], case["engine"]
+
+    before = {key(c): c for c in baseline["cases"]}
+    out: List[str] = []
+    for case in current["cases"]:
+        old = before.get(key(case))
+        if old is None:
+            continue
+        name = "{}/{} ({} engine)".format(case["family"], case["target_edges"], case["engine"])
+        for phase in PHASES:
+            a, b = old["phases"].get(phase), case["phases"].get(phase)
+            if a is None or b is None:
+                continue
+            if a["seconds"] >= min_seconds and b["seconds"] > a["seconds"] * (1 + time_tolerance):
+                out.append(f"{name}: {phase} {a['seconds']:.3f}s -> {b['seconds']:.3f}s")
+            if a["peak_bytes"] and b["peak_bytes"] > a["peak_bytes"] * (1 + memory_tolerance):
+                out.append(f"{name}: {phase} peak {a['peak_bytes']:,} -> {b['peak_bytes']:,} bytes")
+        for metric in ("modularity", "nmi"):
+            if case[metric] < old[metric] - quality_tolerance:
+                out.append(f"{name}: {metric} {old[metric]:.4f} -> {case[metric]:.4f}")
+    return out
@@ -0,0 +1,184 @@
+from __future__ import annotations
+from collections import deque, defaultdict
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+import random
+
+from src.lib.domain.types.nodes import BaseNode, NodeLike
+from src.lib.domain.types.general import CommunityId
+from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import IncrementalObjective
+from src.lib.domain.services.graph import move_nodes_frontier, merge_nodes_subset
+from src.lib.domain.services.partition import refine_partition
+from src.lib.domain.algorithms.distance.leiden import leiden
+
+class DynamicLeiden:
+    """
+    Leiden state kept alive across in-place edge updates of a Graph.
+
+    State is the top of the hierarchy: the community partition P and its refinement R
+    (every R-community lies inside one P-community, as after one Leiden level), both
+    bound to G so their community stats follow each update in O(1) per edge.
+    update() then works from the changed edges outward:
+      1. local moving seeded with the changed edges' endpoints (move_nodes_frontier);
+      2. refinement of only the refined communities holding a changed or moved node
+         (merge_nodes_subset over their nodes, per current community);
+      3. one aggregated level: the re-refined communities move as wholes, scored from
+         their members' edges instead of a rebuilt supergraph.
+    Work is proportional to the batch plus the volume of the refined communities it
+    touches. Well-connectedness is checked against those nodes rather than the whole
+    community, and merges that static Leiden would only find two or more levels up are
+    not searched; rebuild() reruns the full algorithm warm-started from the current
+    communities.
+    Needs an IncrementalObjective.
+    """
+    def __init__(
+        self,
+        g: Graph,
+        p: Partition,
+        delta_fn: IncrementalObjective,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if not isinstance(delta_fn, IncrementalObjective):
+            raise TypeError(f"dynamic Leiden needs an IncrementalObjective, got {type(delta_fn).__name__}")
+        self.G = g
+        self.objective = delta_fn
+        self.gamma = gamma
+        self.theta = theta
+        self.max_levels = max_levels
+        self.rng = rng
+        self._start(p)
+
+    def _start(self, p: Partition) -> None:
+        communities = leiden(self.G, p, self.objective, self.gamma, self.theta, self.max_levels, rng=self.rng)
+        self.P = Partition({u: i for i, members in enumerate(communities) for u in members})
+        self.P.bind(self.G)
+        self.R = refine_partition(self.G, self.P, self.objective, self.gamma, self.theta, rng=self.rng)
+        self.R.bind(self.G)
+
+    def communities(self) -> List[Set[BaseNode]]:
+        return self.P.communities()
+
+    def rebuild(self) -> List[Set[BaseNode]]:
+        self._start(Partition(dict(self.P.node2com)))
+        return self.communities()
+
+    def update(
+        self,
+        inserted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+        deleted: Iterable[Tuple[NodeLike, NodeLike]] = (),
+        reweighted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+    ) -> List[Set[BaseNode]]:
+        """
+        Apply one batch to G in place and return the updated communities.
+        inserted adds weight to an edge (creating it and unseen nodes as needed),
+        deleted removes an existing edge, reweighted sets an edge's weight. A missing
+        deleted edge raises KeyError before anything is applied.
+        """
+        deleted = list(deleted)
+        for u, v in deleted:
+            if v not in self.G.adj.get(u, {}):
+                raise KeyError(f"no edge {u!r} - {v!r}")
+        frontier: Set[NodeLike] = set()
+        for u, v, w in inserted:
+            self._set_weight(u, v, self.G.weight(u, v) + w, frontier)
+        for u, v in deleted:
+            self._set_weight(u, v, 0.0, frontier)
+        for u, v, w in reweighted:
+            self._set_weight(u, v, w, frontier)
+        if not frontier:
+            return self.communities()
+
+        P, R, G = self.P, self.R, self.G
+        moved = move_nodes_frontier(G, P, self.objective, frontier, self.rng)
+
+        # Re-refine the refined communities holding a changed or moved node, split by
+        # the community their members are in now
+        dirty = {R.community_of(v) for v in frontier}
+        dirty.update(R.community_of(v) for v in moved)
+        groups: Dict[CommunityId, Set[NodeLike]] = defaultdict(set)
+        for r in dirty:
+            for v in R.members(r):
+                groups[P.community_of(v)].add(v)
+        supernodes: Set[CommunityId] = set()
+        for S in groups.values():
+            for v in S:
+                if not R.is_singleton(v):
+                    R.move(v, None)
+            merge_nodes_subset(G, R, S, self.objective, self.gamma, self.theta, self.rng)
+            supernodes.update(R.community_of(v) for v in S)
+        R.drop_empty()
+
+        self._move_supernodes(supernodes)
+        return self.communities()
+
+    def _set_weight(self, u: NodeLike, v: NodeLike, w: float, frontier: Set[NodeLike]) -> None:
+        for x in (u, v):
+            if x not in self.P.node2com:
+                self.P.add_node(x)
+                self.R.add_node(x)
+        dw = w - self.G.set_edge_weight(u, v, w)
+        if dw:
+            self.P.edge_reweighted(u, v, dw)
+            self.R.edge_reweighted(u, v, dw)
+            frontier.update((u, v))
+
+    def _move_supernodes(self, frontier: Iterable[CommunityId]) -> None:
+        """
+        Local moving over refined communities as units, the aggregated level of
+        leiden() without building the aggregated graph.
+        """
+        G, P, R, objective = self.G, self.P, self.R, self.objective
+        order = list(frontier)
+        (self.rng or random).shuffle(order)
+        Q: Deque[CommunityId] = deque(order)
+        in_queue: Set[CommunityId] = set(order)
+
+        while Q:
+            s = Q.popleft()
+            in_queue.discard(s)
+            members = R.members(s)
+            if not members:
+                continue
+            cur = P.community_of(next(iter(members)))
+            k: Dict[CommunityId, float] = defaultdict(float)
+            k_s = n_s = 0.0
+            for v in members:
+                k_s += G.degree(v)
+                n_s += G.node_size(v)
+                for x, w in G.neighbor_items(v):
+                    if R.community_of(x) != s:
+                        k[P.community_of(x)] += w
+
+            total = P.total_weight
+            stay = objective.insert_gain(
+                k.get(cur, 0.0), k_s, n_s, P.com_degree[cur] - k_s, P.com_size[cur] - n_s, total,
+            )
+            best_C: Optional[CommunityId] = None
+            best_delta = float("-inf")
+            for c, k_sc in k.items():
+                if c != cur:
+                    delta = objective.insert_gain(k_sc, k_s, n_s, P.com_degree[c], P.com_size[c], total) - stay
+                    if delta > best_delta:
+                        best_delta, best_C = delta, c
+            # Ties go to the neighbor community, as in move_nodes_fast
+            fresh = objective.insert_gain(0.0, k_s, n_s, 0.0, 0.0, total) - stay
+            if fresh > best_delta:
+                best_delta, best_C = fresh, None
+            if best_delta <= 0:
+                continue
+
+            nodes = list(members)
+            dest = P.move(nodes[0], best_C)
+            for v in nodes[1:]:
+                P.move(v, dest)
+            P.drop_empty()
+            for v in nodes:
+                for x in G.neighbors(v):
+                    t = R.community_of(x)
+                    if t not in in_queue and t != s and P.community_of(x) != dest:
+                        Q.append(t)
+                        in_queue.add(t)
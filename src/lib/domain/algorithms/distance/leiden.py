@@ -1,35 +1,502 @@
 from __future__ import annotations
-from typing import List, Set
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+import random
+import time
+
+import numpy as np
+
 from src.lib.domain.types.nodes import BaseNode
 from src.lib.domain.types.delta import DeltaFn
-from src.lib.domain.models.graph import Graph
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.types.events import (
+    LevelFinished,
+    LevelStarted,
+    Observer,
+    PHASE_AGGREGATE,
+    PHASE_MOVE,
+    PHASE_REFINE,
+    PhaseFinished,
+    PhaseStarted,
+    RunFinished,
+)
+from src.lib.domain.models.csr_graph import CSRGraph
 from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.models.sharded_graph import ShardedGraph
+from src.lib.domain.models.leiden_state import (
+    LeidenState,
+    RunLimits,
+    STOP_CONVERGED,
+    STOP_MAX_LEVELS,
+    STOP_MIN_IMPROVEMENT,
+    STOP_TIME_BUDGET,
+    graph_fingerprint,
+    run_parameters,
+)
 from src.lib.domain.services.graph import (
     move_nodes_fast,
     aggregate_graph,
+    aggregate_csr_graph,
+    community_membership,
+)
+from src.lib.domain.services.graph.vectorized import move_nodes_fast_vectorized
+from src.lib.domain.services.graph.sharded import (
+    SpillFn,
+    aggregate_sharded_graph,
+    check_budget,
+    coarse_edge_chunks,
+    move_nodes_sharded,
+    refine_sharded,
+    sharded_quality,
 )
 from src.lib.domain.services.partition import (
     refine_partition, 
-    lift_partition_to_aggregated
+    lift_partition_to_aggregated,
+    lift_partition_by_membership,
+    intern_partition,
 )
 
+# move_nodes_fast-compatible stage: (G, P, delta_fn, rng=None, observer=None) -> Partition
+MoveFn = Callable[..., Partition]
+
+# Local-moving engines selectable by name; "vectorized" needs a CSRGraph and an IncrementalObjective
+MOVE_ENGINES: Dict[str, MoveFn] = {
+    "serial": move_nodes_fast,
+    "vectorized": move_nodes_fast_vectorized,
+}
+
+# refine_partition-compatible stage: (G, P, delta_fn, gamma, theta, rng=None) -> refined Partition
+RefineFn = Callable[..., Partition]
+
+# Receives the run state after every level and when the run stops
+CheckpointFn = Callable[[LeidenState], None]
+
+# One level's aggregation for _run_levels: (g, P, Prefined) -> (coarse g, lifted P, membership)
+AggregateFn = Callable[[Any, Partition, Partition], Tuple[Any, Partition, np.ndarray]]
+
 
 def leiden(
-    g: Graph,
+    g: Union[GraphLike, ShardedGraph],
     p: Partition,
     delta_fn: DeltaFn,
     gamma: float = 1.0,
     theta: float = 1.0,
     max_levels: int = 100,
+    engine: Union[str, MoveFn] = "serial",
+    refine: RefineFn = refine_partition,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+    limits: Optional[RunLimits] = None,
+    checkpoint: Optional[CheckpointFn] = None,
+    state: Optional[LeidenState] = None,
+    spill: Optional[SpillFn] = None,
 ) -> List[Set[BaseNode]]:
-    levels = 0
+    """
+    Final communities of leiden_hierarchy() (same arguments) as sets of base nodes.
+    """
+    return leiden_hierarchy(
+        g, p, delta_fn, gamma, theta, max_levels, engine, refine, rng, observer,
+        limits, checkpoint, state, spill,
+    ).communities()
+
+def leiden_hierarchy(
+    g: Union[GraphLike, ShardedGraph],
+    p: Partition,
+    delta_fn: DeltaFn,
+    gamma: float = 1.0,
+    theta: float = 1.0,
+    max_levels: int = 100,
+    engine: Union[str, MoveFn] = "serial",
+    refine: RefineFn = refine_partition,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+    limits: Optional[RunLimits] = None,
+    checkpoint: Optional[CheckpointFn] = None,
+    state: Optional[LeidenState] = None,
+    spill: Optional[SpillFn] = None,
+) -> Hierarchy:
+    """
+    Runs Leiden and returns every level of it (see models.hierarchy.Hierarchy).
+    engine is a MOVE_ENGINES name or a MoveFn; anything but "serial" runs over a CSRGraph.
+    rng is handed to every move/refine stage; without it they use the global `random`.
+    observer receives the pipeline events (see types.events); the move stage gets it as
+    observer= (a custom MoveFn must accept it). Without one, no event is built or timed.
+    limits makes the run anytime (see RunLimits). checkpoint is called with a
+    LeidenState after every level and once more when the run stops; passing such a
+    state back as `state` resumes the run there and ignores p; a state taken on another
+    graph or with another objective, gamma or theta is a ValueError. Both run over a
+    CSRGraph, like the non-serial engines.
+    A ShardedGraph runs out of core (see _leiden_sharded) for as long as its aggregated
+    levels do not fit its memory budget, each written out by spill (a SpillFn such as
+    ShardedSpill); without spill such a level is a ValueError. engine applies from the
+    first in-memory level on, and checkpoints are not supported.
+    """
+    if isinstance(engine, str):
+        if engine not in MOVE_ENGINES:
+            raise ValueError(f"unknown local-moving engine {engine!r}; expected one of {sorted(MOVE_ENGINES)}")
+        move_nodes = MOVE_ENGINES[engine]
+    else:
+        move_nodes = engine
+    guard = _Guard(limits, delta_fn) if limits is not None else None
+    if isinstance(g, ShardedGraph):
+        if checkpoint is not None or state is not None:
+            raise ValueError("checkpoint and state are not supported on a ShardedGraph")
+        return _leiden_sharded(
+            g, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, observer, guard, spill,
+        )
+    needs_csr = move_nodes is not move_nodes_fast or checkpoint is not None or state is not None
+    if needs_csr and not isinstance(g, CSRGraph):
+        g = CSRGraph.from_graph(g)
+        p = intern_partition(g, p)
+    if isinstance(g, CSRGraph):
+        return _leiden_csr(
+            g, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, observer,
+            guard, checkpoint, state,
+        )
+    # Level 0 keeps the caller's labels; every aggregated level numbers its supernodes 0..k-1
+    base = list(g.adj)
+    index: Optional[Dict[BaseNode, int]] = {u: i for i, u in enumerate(base)}
+
+    def aggregate(g: GraphLike, p: Partition, Prefined: Partition) -> Tuple[GraphLike, Partition, np.ndarray]:
+        nonlocal index
+        membership = community_membership(Prefined, g.num_nodes(), index)
+        index = None
+        return aggregate_graph(g, Prefined), lift_partition_to_aggregated(p, Prefined), membership
+
+    memberships: List[np.ndarray] = []
+    trace = _Trace(observer, delta_fn) if observer is not None else None
+    if guard is not None:
+        guard.start(g, p)
+    g, p, reason = _run_levels(
+        g, p, delta_fn, gamma, theta, max_levels, move_nodes_fast, refine, rng, trace, guard,
+        memberships, aggregate,
+    )
+    hierarchy = Hierarchy(memberships + [community_membership(p, g.num_nodes(), index)], base)
+    if trace is not None:
+        trace.run_finished(hierarchy.num_communities(), reason)
+    return hierarchy
+
+def _run_levels(
+    g: GraphLike,
+    p: Partition,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    max_levels: int,
+    move_nodes: MoveFn,
+    refine: RefineFn,
+    rng: Optional[random.Random],
+    trace: Optional[_Trace],
+    guard: Optional[_Guard],
+    memberships: List[np.ndarray],
+    aggregate: AggregateFn,
+    save: Optional[Callable[[GraphLike, Partition, Optional[str]], None]] = None,
+) -> Tuple[GraphLike, Partition, str]:
+    """
+    The level loop shared by the dict and CSR paths: move, stop checks, refine, then
+    aggregate (which returns the coarse graph, the lifted partition and the level's
+    membership, appended to memberships). save, if given, is called after every level
+    and with the stop reason at the end. Returns the last level's graph and partition
+    and why the loop stopped; building the Hierarchy is left to the caller.
+    """
+    reason = STOP_CONVERGED
     while True:
-        p = move_nodes_fast(g, p, delta_fn)
-        done = (p.size() == len(g.nodes()))
-        if not done and levels < max_levels:
-            Prefined = refine_partition(g, p, delta_fn, gamma, theta)
-            g = aggregate_graph(g, Prefined)
-            p = lift_partition_to_aggregated(p, Prefined)
-            levels += 1
-            continue
-        return p.flattened_partition()
+        if guard is not None and guard.out_of_time():
+            reason = STOP_TIME_BUDGET
+            break
+        if trace is not None:
+            trace.level_started(len(memberships), g)
+        p = move_nodes(g, p, delta_fn, rng=rng, **_observed(trace))
+        done = (p.size() == g.num_nodes())
+        if trace is not None:
+            trace.moved(g, p)
+        if done:
+            break
+        if len(memberships) >= max_levels:
+            reason = STOP_MAX_LEVELS
+            break
+        stop = guard.after_move(g, p) if guard is not None else None
+        if stop is not None:
+            reason = stop
+            break
+        if trace is not None:
+            trace.phase(PHASE_REFINE)
+        Prefined = refine(g, p, delta_fn, gamma, theta, rng=rng)
+        if trace is not None:
+            trace.phase(PHASE_AGGREGATE)
+        g, p, membership = aggregate(g, p, Prefined)
+        memberships.append(membership)
+        if trace is not None:
+            trace.level_finished()
+        if save is not None:
+            save(g, p, None)
+
+    if trace is not None:
+        trace.level_finished()
+    if save is not None:
+        save(g, p, reason)
+    return g, p, reason
+
+def _leiden_csr(
+    g: CSRGraph,
+    p: Partition,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    max_levels: int,
+    move_nodes: MoveFn = move_nodes_fast,
+    refine: RefineFn = refine_partition,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+    guard: Optional[_Guard] = None,
+    checkpoint: Optional[CheckpointFn] = None,
+    state: Optional[LeidenState] = None,
+    trace: Optional[_Trace] = None,
+) -> Hierarchy:
+    """
+    Same loop as leiden() over int ids; p is keyed by g's ids. Supernodes are the
+    refined community indices, and labels are mapped back only once at the end.
+    trace continues the events of a run whose first levels ran elsewhere.
+    """
+    base = g
+    # Only checkpointed or resumed runs pay for hashing the graph
+    fingerprint = graph_fingerprint(base) if checkpoint is not None or state is not None else ""
+    params = run_parameters(delta_fn, gamma, theta)
+    memberships: List[np.ndarray] = []
+    if state is not None:
+        if state.base != fingerprint:
+            raise ValueError("checkpoint was taken on a different graph (its content digest does not match)")
+        if state.params != params:
+            raise ValueError(
+                f"checkpoint was taken with different parameters: {state.params}, not {params}"
+            )
+        g, p, memberships = state.graph, CompactPartition(state.labels), list(state.memberships)
+        if rng is not None and state.rng_state is not None:
+            rng.setstate(state.rng_state)
+    if trace is None and observer is not None:
+        trace = _Trace(observer, delta_fn)
+    if guard is not None:
+        guard.start(g, p, state.quality if state is not None else None)
+
+    def save(g: CSRGraph, p: Partition, stop_reason: Optional[str]) -> None:
+        labels = p.labels if isinstance(p, CompactPartition) else community_membership(p, g.num_nodes())
+        checkpoint(LeidenState(  # type: ignore[misc]
+            g, labels, list(memberships), fingerprint,
+            rng.getstate() if rng is not None else None,
+            guard.last_quality if guard is not None else None,
+            stop_reason, params,
+        ))
+
+    def aggregate(g: CSRGraph, p: Partition, Prefined: Partition) -> Tuple[CSRGraph, Partition, np.ndarray]:
+        membership = community_membership(Prefined, g.num_nodes())
+        coarse = aggregate_csr_graph(g, membership, Prefined.size())
+        return coarse, lift_partition_by_membership(p, membership), membership
+
+    g, p, reason = _run_levels(  # type: ignore[assignment]
+        g, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, trace, guard,
+        memberships, aggregate, save if checkpoint is not None else None,
+    )
+    hierarchy = Hierarchy(memberships + [community_membership(p, g.num_nodes())], base.labels)
+    if trace is not None:
+        trace.run_finished(hierarchy.num_communities(), reason)
+    return hierarchy
+
+def _leiden_sharded(
+    g: ShardedGraph,
+    p: Partition,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    max_levels: int,
+    move_nodes: MoveFn,
+    refine: RefineFn,
+    rng: Optional[random.Random],
+    observer: Optional[Observer],
+    guard: Optional[_Guard],
+    spill: Optional[SpillFn],
+) -> Hierarchy:
+    """
+    The levels of leiden() that do not fit in memory: local moving and refinement
+    stream over the shards (move_nodes_sharded, refine_sharded), and aggregation builds
+    the coarse graph in memory (aggregate_sharded_graph) when it fits the budget. A
+    coarse graph that does not is written out by `spill` and the next level streams
+    over it too; without spill that is a ValueError. From the first in-memory level on,
+    the run goes on as _leiden_csr with `move_nodes`. Qualities for the observer and
+    min_improvement are computed by streaming too (sharded_quality).
+    """
+    base_labels = g.labels
+    if not isinstance(p, CompactPartition):
+        p = intern_partition(g, p)  # type: ignore[arg-type]
+    quality = getattr(delta_fn, "quality", None)
+    streamed = partial(sharded_quality, objective=delta_fn)
+    trace = _Trace(observer, delta_fn) if observer is not None else None
+    if trace is not None and quality is not None:
+        trace.quality = streamed
+    if guard is not None:
+        if quality is not None:
+            guard.quality = streamed
+        guard.start(g, p)
+
+    memberships: List[np.ndarray] = []
+    while True:
+        check_budget(g)
+        n = g.num_nodes()
+        reason: Optional[str] = None
+        if guard is not None and guard.out_of_time():
+            reason = STOP_TIME_BUDGET
+        else:
+            if trace is not None:
+                trace.level_started(len(memberships), g)
+            p = move_nodes_sharded(g, p, delta_fn, rng=rng, **_observed(trace))
+            if trace is not None:
+                trace.moved(g, p)
+            if p.size() == n:
+                reason = STOP_CONVERGED
+            elif len(memberships) >= max_levels:
+                reason = STOP_MAX_LEVELS
+            elif guard is not None:
+                reason = guard.after_move(g, p)
+        if reason is not None:
+            if trace is not None:
+                trace.level_finished()
+            hierarchy = Hierarchy(memberships + [community_membership(p, n)], base_labels)
+            if trace is not None:
+                trace.run_finished(hierarchy.num_communities(), reason)
+            return hierarchy
+
+        if trace is not None:
+            trace.phase(PHASE_REFINE)
+        Prefined = refine_sharded(g, p, delta_fn, gamma, theta, rng=rng, refine=refine)
+        if trace is not None:
+            trace.phase(PHASE_AGGREGATE)
+        membership = Prefined.compact()
+        k = Prefined.size()
+        coarse = aggregate_sharded_graph(g, membership, k)
+        if coarse is None:
+            if spill is None:
+                raise ValueError(
+                    f"the aggregated graph of level {len(memberships)} ({k} nodes) does not fit "
+                    f"the {g.memory_budget} byte memory budget; raise the budget or pass a spill"
+                )
+            sizes = np.bincount(membership, weights=g.sizes, minlength=k).astype(np.float64)
+            spilled = spill(coarse_edge_chunks(g, membership, k), k, sizes)
+        p = lift_partition_by_membership(p, membership)
+        memberships.append(membership)
+        if trace is not None:
+            trace.level_finished()
+        if coarse is not None:
+            break
+        g = spilled
+
+    if trace is not None:
+        trace.quality = quality
+    if guard is not None:
+        guard.quality = quality
+    # The in-memory levels resume from here as if from a checkpoint of this run
+    state = LeidenState(
+        coarse, community_membership(p, coarse.num_nodes()), memberships, graph_fingerprint(coarse),
+        rng.getstate() if rng is not None else None,
+        guard.last_quality if guard is not None else None,
+        params=run_parameters(delta_fn, gamma, theta),
+    )
+    h = _leiden_csr(
+        coarse, p, delta_fn, gamma, theta, max_levels, move_nodes, refine, rng, observer,
+        guard, None, state, trace,
+    )
+    return Hierarchy(h.maps, base_labels)
+
+class _Guard:
+    """
+    Checks RunLimits between phases. last_quality is the quality after the previous
+    level's local moving (or of the starting partition).
+    """
+    def __init__(self, limits: RunLimits, delta_fn: DeltaFn) -> None:
+        self.limits = limits
+        self.quality = getattr(delta_fn, "quality", None)
+        if limits.min_improvement is not None and self.quality is None:
+            raise TypeError(
+                f"min_improvement needs an objective with quality(), got {type(delta_fn).__name__}"
+            )
+        self.deadline = (
+            time.perf_counter() + limits.time_budget if limits.time_budget is not None else None
+        )
+        self.last_quality: Optional[float] = None
+
+    def start(self, g: GraphLike, p: Partition, quality: Optional[float] = None) -> None:
+        if self.limits.min_improvement is not None:
+            self.last_quality = quality if quality is not None else self.quality(g, p)  # type: ignore[misc]
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def after_move(self, g: GraphLike, p: Partition) -> Optional[str]:
+        if self.limits.min_improvement is not None:
+            q = self.quality(g, p)  # type: ignore[misc]
+            gain = q - self.last_quality  # type: ignore[operator]
+            self.last_quality = q
+            if gain < self.limits.min_improvement:
+                return STOP_MIN_IMPROVEMENT
+        if self.out_of_time():
+            return STOP_TIME_BUDGET
+        return None
+
+def _observed(trace: Optional[_Trace]) -> Dict[str, Any]:
+    # Engines only get observer= when there is one, so unobserved runs call them as before
+    return {} if trace is None else {"observer": trace.observer}
+
+class _Trace:
+    """
+    Times the phases of one leiden() run and emits its events. Only created when an
+    observer is given; the loop's `trace is not None` checks are the whole cost otherwise.
+    level_started opens "move", moved closes it and scores the level, phase() closes
+    the running phase and opens the next, level_finished closes the open level (if any).
+    """
+    def __init__(self, observer: Observer, delta_fn: DeltaFn) -> None:
+        self.observer = observer
+        self.quality = getattr(delta_fn, "quality", None)
+        self.t_run = time.perf_counter()
+        self.level = 0
+        self.phase_name: Optional[str] = None
+        self.level_stats: Dict[str, Any] = {}
+        self.level_open = False
+        self.levels = 0
+
+    def _close_phase(self) -> None:
+        if self.phase_name is not None:
+            self.observer.emit(PhaseFinished(self.level, self.phase_name, time.perf_counter() - self.t_phase))
+            self.phase_name = None
+
+    def phase(self, name: str) -> None:
+        self._close_phase()
+        self.phase_name = name
+        self.observer.emit(PhaseStarted(self.level, name))
+        self.t_phase = time.perf_counter()
+
+    def level_started(self, level: int, g: GraphLike) -> None:
+        self.level = level
+        self.t_level = time.perf_counter()
+        self.level_stats = {"nodes": g.num_nodes(), "edges": g.num_edges()}
+        self.level_open = True
+        self.observer.emit(LevelStarted(level, g.num_nodes(), g.num_edges()))
+        self.phase(PHASE_MOVE)
+
+    def moved(self, g: GraphLike, p: Partition) -> None:
+        self._close_phase()
+        # Scored outside any phase so that it never inflates a phase's time
+        self.level_stats["communities"] = p.size()
+        self.level_stats["quality"] = self.quality(g, p) if self.quality is not None else None
+
+    def level_finished(self) -> None:
+        if not self.level_open:
+            return
+        self._close_phase()
+        self.levels += 1
+        self.observer.emit(LevelFinished(
+            self.level, seconds=time.perf_counter() - self.t_level, **self.level_stats,
+        ))
+        self.level_open = False
+
+    def run_finished(self, communities: int, reason: str) -> None:
+        self.observer.emit(RunFinished(self.levels, communities, time.perf_counter() - self.t_run, reason))
@@ -0,0 +1,263 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.csr_graph import CSRGraph
+
+if TYPE_CHECKING:
+    from src.lib.domain.types.graph import GraphLike
+
+class _LabelMap(Mapping[int, int]):
+    """
+    Read-only node2com view over a CompactPartition's label array.
+    """
+    def __init__(self, P: CompactPartition) -> None:
+        self._P = P
+
+    def __getitem__(self, v: int) -> int:
+        return int(self._P.labels[v])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._P.labels)))
+
+    def __len__(self) -> int:
+        return len(self._P.labels)
+
+    def items(self) -> Iterator[Tuple[int, int]]:  # type: ignore[override]
+        return zip(range(len(self._P.labels)), self._P.labels.tolist())
+
+class CompactPartition(Partition):
+    """
+    Label-array Partition over int nodes 0..n-1 with int community ids.
+    - labels[v] is v's community; counts[c] its member count.
+    - new_community_id() pops a free id in O(1); move() is O(1) (O(deg v) when bound).
+    - Empty ids stay in the free list; compact() renumbers 0..k-1 at level boundaries,
+      so drop_empty() is a no-op.
+    - snapshot() shares the arrays; whichever copy is written first copies them.
+    Member sets are only built if members()/communities() are asked for.
+    """
+    def __init__(self, labels: np.ndarray) -> None:
+        self.labels = np.array(labels, dtype=np.int64)
+        cap = int(self.labels.max()) + 1 if len(self.labels) else 0
+        self.counts = np.bincount(self.labels, minlength=max(cap, len(self.labels)))
+        self._free: Set[int] = set(np.flatnonzero(self.counts == 0).tolist())
+        self._k = len(self.counts) - len(self._free)
+        self._ids: Optional[List[int]] = None
+        self._index: Optional[Dict[int, Set[int]]] = None
+        self._graph: Optional[GraphLike] = None
+        self._cow = False
+
+    @classmethod
+    def singletons(cls, n: int) -> CompactPartition:
+        return cls(np.arange(n, dtype=np.int64))
+
+    # ---- Partition surface ----
+    @property  # type: ignore[override]
+    def node2com(self) -> Mapping[int, int]:
+        return _LabelMap(self)
+
+    @property
+    def com2nodes(self) -> Dict[int, Set[int]]:  # type: ignore[override]
+        if self._index is None:
+            index: Dict[int, Set[int]] = defaultdict(set)
+            order = np.argsort(self.labels, kind="stable")
+            bounds = np.cumsum(self.counts)
+            start = 0
+            for cid, end in enumerate(bounds.tolist()):
+                if end > start:
+                    index[cid] = set(order[start:end].tolist())
+                start = end
+            self._index = index
+        return self._index
+
+    def communities(self) -> List[Set[int]]:  # type: ignore[override]
+        return [set(self.com2nodes[cid]) for cid in self.community_ids()]
+
+    def community_ids(self) -> List[int]:  # type: ignore[override]
+        if self._ids is None:
+            self._ids = np.flatnonzero(self.counts).tolist()
+        return list(self._ids)
+
+    def size(self) -> int:
+        return self._k
+
+    def community_of(self, v: int) -> int:  # type: ignore[override]
+        return int(self.labels[v])
+
+    def members(self, cid: int) -> Set[int]:  # type: ignore[override]
+        return self.com2nodes.get(cid, set())
+
+    def community_size(self, cid: int) -> int:  # type: ignore[override]
+        return int(self.counts[cid]) if 0 <= cid < len(self.counts) else 0
+
+    def is_singleton(self, v: int) -> bool:  # type: ignore[override]
+        return bool(self.counts[self.labels[v]] == 1)
+
+    def new_community_id(self) -> int:
+        if not self._free:
+            self._grow(max(1, len(self.counts)))
+        return next(iter(self._free))
+
+    def move(self, v: int, dest: Optional[int]) -> int:  # type: ignore[override]
+        src = int(self.labels[v])
+        if dest is None:
+            dest = self.new_community_id()
+        if src == dest:
+            return dest
+        self._own()
+        if dest >= len(self.counts):
+            self._grow(dest + 1 - len(self.counts))
+        if self._graph is not None:
+            self._shift_stats(v, src, dest)
+        self.labels[v] = dest
+        self.counts[src] -= 1
+        self.counts[dest] += 1
+        if self.counts[src] == 0:
+            self._free.add(src)
+            self._k -= 1
+            self._ids = None
+        if self.counts[dest] == 1:
+            self._free.discard(dest)
+            self._k += 1
+            self._ids = None
+        if self._index is not None:
+            self._index[src].discard(v)
+            if not self._index[src]:
+                del self._index[src]
+            self._index[dest].add(v)
+        return dest
+
+    def add_node(self, v: int, cid: Optional[int] = None) -> int:  # type: ignore[override]
+        """
+        Append node v, which must be the next id n, to cid or to a new singleton (see
+        Partition.add_node); the label array grows by one. The community state is
+        dropped, as it was bound to a graph without v: the next bind() rebuilds it.
+        """
+        n = len(self.labels)
+        if 0 <= v < n:
+            raise ValueError(f"node {v!r} is already assigned")
+        if v != n:
+            raise ValueError(f"CompactPartition nodes are 0..n-1: the next node to add is {n}, not {v!r}")
+        self._own()
+        if cid is None:
+            cid = self.new_community_id()
+        elif cid >= len(self.counts):
+            self._grow(cid + 1 - len(self.counts))
+        self.labels = np.append(self.labels, np.int64(cid))
+        self.counts[cid] += 1
+        if self.counts[cid] == 1:
+            self._free.discard(cid)
+            self._k += 1
+            self._ids = None
+        if self._index is not None:
+            self._index[cid].add(v)
+        self._graph = None
+        return cid
+
+    def drop_empty(self) -> None:
+        return None
+
+    # ---- community state (see Partition.bind) ----
+    def bind(self, G: GraphLike) -> None:
+        if self._graph is G:
+            return
+        self._graph = G
+        n, cap = len(self.labels), len(self.counts)
+        self.total_weight = G.total_weight()
+        if isinstance(G, CSRGraph):
+            degrees = G.degrees
+            sizes = np.ones(n) if G.sizes is None else G.sizes
+            rows = G.row_ids()
+            inner = self.labels[rows] == self.labels[G.indices]
+            self.com_internal = np.bincount(self.labels[rows[inner]], weights=G.weights[inner], minlength=cap)
+        else:
+            degrees = np.array([G.degree(u) for u in range(n)], dtype=np.float64)
+            sizes = np.array([G.node_size(u) for u in range(n)], dtype=np.float64)
+            self.com_internal = np.zeros(cap)
+            for u in range(n):
+                c = self.labels[u]
+                for x, w in G.neighbor_items(u):
+                    if self.labels[x] == c:
+                        self.com_internal[c] += w
+        self.com_degree = np.bincount(self.labels, weights=degrees, minlength=cap)
+        self.com_size = np.bincount(self.labels, weights=sizes, minlength=cap)
+
+    def _shift_stats(self, v: int, src: int, dest: int) -> None:  # type: ignore[override]
+        G = self._graph
+        assert G is not None
+        k_src = k_dest = loop = 0.0
+        labels = self.labels
+        for u, w in G.neighbor_items(v):
+            if u == v:
+                loop = w
+                continue
+            c = labels[u]
+            if c == src:
+                k_src += w
+            elif c == dest:
+                k_dest += w
+        deg, size = G.degree(v), G.node_size(v)
+        self.com_degree[src] -= deg
+        self.com_degree[dest] += deg
+        self.com_size[src] -= size
+        self.com_size[dest] += size
+        self.com_internal[src] -= 2.0 * k_src + loop
+        self.com_internal[dest] += 2.0 * k_dest + loop
+
+    # ---- level boundaries and snapshots ----
+    def compact(self) -> np.ndarray:
+        """
+        Renumber the non-empty communities 0..k-1 (in id order) and return the labels,
+        i.e. the membership array used for aggregation.
+        """
+        if self._k == len(self.counts):
+            return self.labels
+        self._own()
+        keep = np.flatnonzero(self.counts)
+        remap = np.full(len(self.counts), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep), dtype=np.int64)
+        self.labels = remap[self.labels]
+        self.counts = self.counts[keep]
+        if self._graph is not None:
+            self.com_degree = self.com_degree[keep]
+            self.com_internal = self.com_internal[keep]
+            self.com_size = self.com_size[keep]
+        self._free = set()
+        self._ids = None
+        self._index = None
+        return self.labels
+
+    def snapshot(self) -> CompactPartition:
+        """
+        O(#free ids) copy that shares the label/count/state arrays until either side moves a node.
+        """
+        other = CompactPartition.__new__(CompactPartition)
+        other.__dict__.update(self.__dict__)
+        other._free = set(self._free)
+        other._index = None
+        self._cow = other._cow = True
+        return other
+
+    def _own(self) -> None:
+        if not self._cow:
+            return
+        self.labels = self.labels.copy()
+        self.counts = self.counts.copy()
+        if self._graph is not None:
+            self.com_degree = self.com_degree.copy()
+            self.com_internal = self.com_internal.copy()
+            self.com_size = self.com_size.copy()
+        self._cow = False
+
+    def _grow(self, extra: int) -> None:
+        self._own()
+        old = len(self.counts)
+        self.counts = np.concatenate((self.counts, np.zeros(extra, dtype=self.counts.dtype)))
+        if self._graph is not None:
+            self.com_degree = np.concatenate((self.com_degree, np.zeros(extra)))
+            self.com_internal = np.concatenate((self.com_internal, np.zeros(extra)))
+            self.com_size = np.concatenate((self.com_size, np.zeros(extra)))
+        self._free.update(range(old, old + extra))
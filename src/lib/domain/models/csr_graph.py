@@ -0,0 +1,212 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.lib.domain.models.graph import Graph
+from src.lib.domain.types.nodes import NodeLike
+
+@dataclass
+class CSRGraph:
+    """
+    Undirected weighted graph in compressed sparse row form over interned int ids 0..n-1.
+    Row u is indices[offsets[u]:offsets[u+1]] (sorted, unique) with matching weights.
+    Every undirected edge is stored in both rows; a self-loop is stored once in its own row,
+    matching Graph.adj so degrees and aggregation weights agree between the two models.
+    labels[i] is the original hashable node of id i; None means the ids are the labels.
+    sizes[i] is the number of base nodes folded into id i; None means all ones.
+    The arrays may be read-only views (e.g. memory-mapped); nothing here writes to them.
+    degrees is derived from the rows unless a loader passes the stored copy.
+    """
+    offsets: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+    labels: Optional[Sequence[NodeLike]] = None
+    sizes: Optional[np.ndarray] = None
+    degrees: np.ndarray = field(default=None, repr=False)  # type: ignore[assignment]
+
+    def __post_init__(self) -> None:
+        if self.degrees is None:
+            self.degrees = self._row_sums(self.weights)
+        self._index: Optional[Dict[NodeLike, int]] = None
+
+    def _row_sums(self, values: np.ndarray) -> np.ndarray:
+        # reduceat over row starts: O(n) extra memory instead of an nnz-long row id array
+        out = np.zeros(self.num_nodes(), dtype=np.float64)
+        starts = self.offsets[:-1]
+        full = np.flatnonzero(self.offsets[1:] > starts)
+        if len(full):
+            out[full] = np.add.reduceat(values, starts[full])
+        return out
+
+    # ---- construction ----
+    @classmethod
+    def from_coo(
+        cls,
+        n: int,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        weights: np.ndarray,
+        labels: Optional[Sequence[NodeLike]] = None,
+    ) -> CSRGraph:
+        """
+        Build from directed (row, col, weight) entries that are already symmetric.
+        Duplicate (row, col) entries are summed.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        order = np.lexsort((cols, rows))
+        rows, cols, weights = rows[order], cols[order], weights[order]
+        if len(rows):
+            starts = np.flatnonzero(
+                np.concatenate(([True], (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])))
+            )
+            rows, cols = rows[starts], cols[starts]
+            weights = np.add.reduceat(weights, starts)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+        return cls(offsets, cols, weights, labels)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> CSRGraph:
+        """
+        Intern hashable endpoints to ids in first-seen order; zero-weight edges are skipped
+        and parallel edges merged, exactly like Graph.add_edge.
+        """
+        index: Dict[NodeLike, int] = {}
+        labels: List[NodeLike] = []
+        src: List[int] = []
+        dst: List[int] = []
+        wts: List[float] = []
+        for u, v, w in edges:
+            if w == 0:
+                continue
+            iu = index.get(u)
+            if iu is None:
+                iu = index[u] = len(labels)
+                labels.append(u)
+            iv = index.get(v)
+            if iv is None:
+                iv = index[v] = len(labels)
+                labels.append(v)
+            src.append(iu)
+            dst.append(iv)
+            wts.append(w)
+        G = cls.from_undirected(len(labels), np.array(src), np.array(dst), np.array(wts), labels)
+        G._index = index
+        return G
+
+    @classmethod
+    def from_graph(cls, G: Graph) -> CSRGraph:
+        labels = list(G.adj.keys())
+        index = {u: i for i, u in enumerate(labels)}
+        # One C-level pass per array over the adjacency dicts instead of a Python loop per entry
+        lens = np.fromiter((len(nbrs) for nbrs in G.adj.values()), dtype=np.int64, count=len(labels))
+        nnz = int(lens.sum())
+        rows = np.repeat(np.arange(len(labels), dtype=np.int64), lens)
+        cols = np.fromiter(map(index.__getitem__, chain.from_iterable(G.adj.values())), dtype=np.int64, count=nnz)
+        wts = np.fromiter(
+            chain.from_iterable(nbrs.values() for nbrs in G.adj.values()), dtype=np.float64, count=nnz,
+        )
+        out = cls.from_coo(len(labels), rows, cols, wts, labels)
+        out._index = index
+        return out
+
+    @classmethod
+    def from_undirected(
+        cls,
+        n: int,
+        src: np.ndarray,
+        dst: np.ndarray,
+        weights: np.ndarray,
+        labels: Optional[Sequence[NodeLike]] = None,
+    ) -> CSRGraph:
+        # Mirror every non-loop edge so both rows carry it; self-loops stay single.
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        off = src != dst
+        rows = np.concatenate((src, dst[off]))
+        cols = np.concatenate((dst, src[off]))
+        wts = np.concatenate((weights, weights[off]))
+        return cls.from_coo(n, rows, cols, wts, labels)
+
+    def to_graph(self) -> Graph:
+        G = Graph()
+        for u in range(self.num_nodes()):
+            a, b = int(self.offsets[u]), int(self.offsets[u + 1])
+            lu = self.label(u)
+            row = G.adj.setdefault(lu, {})
+            for v, w in zip(self.indices[a:b].tolist(), self.weights[a:b].tolist()):
+                row[self.label(v)] = w
+        return G
+
+    # ---- labels ----
+    def label(self, u: int) -> NodeLike:
+        return u if self.labels is None else self.labels[u]
+
+    def id_of(self, node: NodeLike) -> int:
+        if self.labels is None:
+            return int(node)  # type: ignore[arg-type]
+        if self._index is None:
+            self._index = {lbl: i for i, lbl in enumerate(self.labels)}
+        return self._index[node]
+
+    # ---- Graph-compatible surface (ids instead of labels) ----
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    def num_edges(self) -> int:
+        loops = int(np.count_nonzero(self.indices == self.row_ids()))
+        return (len(self.indices) + loops) // 2
+
+    def nodes(self) -> range:
+        return range(self.num_nodes())
+
+    def row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(self.num_nodes(), dtype=np.int64), np.diff(self.offsets))
+
+    def neighbors(self, u: int) -> List[int]:
+        return self.indices[self.offsets[u]:self.offsets[u + 1]].tolist()
+
+    def neighbor_items(self, u: int) -> Iterable[Tuple[int, float]]:
+        nbrs, wts = self.neighbor_weights(u)
+        return zip(nbrs.tolist(), wts.tolist())
+
+    def neighbor_weights(self, u: int) -> Tuple[np.ndarray, np.ndarray]:
+        a, b = self.offsets[u], self.offsets[u + 1]
+        return self.indices[a:b], self.weights[a:b]
+
+    def weight(self, u: int, v: int) -> float:
+        a, b = self.offsets[u], self.offsets[u + 1]
+        i = a + self.indices[a:b].searchsorted(v)
+        if i < b and self.indices[i] == v:
+            return float(self.weights[i])
+        return 0.0
+
+    def degree(self, u: int) -> float:
+        return float(self.degrees[u])
+
+    def total_weight(self) -> float:
+        return float(self.degrees.sum())
+
+    def node_size(self, u: int) -> float:
+        return 1.0 if self.sizes is None else float(self.sizes[u])
+
+    # E(A, B): total edge weight between (disjoint) sets A and B
+    def cut_weight(self, A: Iterable[int], B: Iterable[int]) -> float:
+        Aset, Bset = set(A), set(B)
+        if not Aset or not Bset:
+            return 0.0
+        w = 0.0
+        for a in Aset:
+            nbrs, wts = self.neighbor_weights(a)
+            w += sum(wb for b, wb in zip(nbrs.tolist(), wts.tolist()) if b in Bset)
+        return w
+
+    # ||S||: volume of S = sum of degrees in S
+    def volume(self, S: Iterable[int]) -> float:
+        return float(self.degrees[np.fromiter(S, dtype=np.int64)].sum())
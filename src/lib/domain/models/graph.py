@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Set, Iterable
+from typing import Dict, Set, Iterable, Tuple
 from src.lib.domain.types.positions import Adjacency
 from src.lib.domain.types.nodes import NodeLike
 
@@ -11,12 +11,26 @@ def _adj_factory() -> Adjacency:
 class Graph:
     """
     Undirected weighted graph. Adjacency is symmetric: adj[u][v] == adj[v][u].
-    Nodes may be base nodes (e.g., ints/strings) or aggregated nodes (frozensets of base nodes).
+    Nodes may be base nodes (e.g., ints/strings) or aggregated nodes: aggregate_graph numbers
+    supernodes 0..k-1 per level (legacy frozensets of base nodes are still understood).
     """
     adj: Adjacency = field(default_factory=_adj_factory)
+    _sizes: Dict[NodeLike, float] = field(default_factory=dict, init=False, repr=False, compare=False)
+
     def nodes(self) -> Set[NodeLike]:
         return set(self.adj.keys())
 
+    def num_nodes(self) -> int:
+        return len(self.adj)
+
+    def num_edges(self) -> int:
+        """
+        Undirected edges, a self-loop counting once (as CSRGraph.num_edges).
+        """
+        entries = sum(len(nbrs) for nbrs in self.adj.values())
+        loops = sum(1 for u, nbrs in self.adj.items() if u in nbrs)
+        return (entries + loops) // 2
+
     def add_edge(self, u: NodeLike, v: NodeLike, w: float = 1.0) -> None:
         if w == 0:
             return
@@ -28,15 +42,53 @@ class Graph:
         self.adj[u][v] = self.adj[u].get(v, 0.0) + w
         self.adj[v][u] = self.adj[v].get(u, 0.0) + w
 
+    def set_edge_weight(self, u: NodeLike, v: NodeLike, w: float) -> float:
+        """
+        Set w(u, v) in place (0 removes the edge, nodes stay); returns the previous weight.
+        """
+        self.adj.setdefault(u, {})
+        self.adj.setdefault(v, {})
+        old = self.adj[u].get(v, 0.0)
+        if w == 0:
+            self.adj[u].pop(v, None)
+            self.adj[v].pop(u, None)
+        else:
+            self.adj[u][v] = w
+            self.adj[v][u] = w
+        return old
+
+    def remove_edge(self, u: NodeLike, v: NodeLike) -> float:
+        if v not in self.adj.get(u, {}):
+            raise KeyError(f"no edge {u!r} - {v!r}")
+        return self.set_edge_weight(u, v, 0.0)
+
     def neighbors(self, u: NodeLike) -> Iterable[NodeLike]:
         return self.adj.get(u, {}).keys()
 
+    def neighbor_items(self, u: NodeLike) -> Iterable[Tuple[NodeLike, float]]:
+        return self.adj.get(u, {}).items()
+
     def weight(self, u: NodeLike, v: NodeLike) -> float:
         return self.adj.get(u, {}).get(v, 0.0)
 
     def degree(self, u: NodeLike) -> float:
         return sum(self.adj.get(u, {}).values())
 
+    # 2m: sum of all degrees (a self-loop counts once, as in degree)
+    def total_weight(self) -> float:
+        return sum(sum(nbrs.values()) for nbrs in self.adj.values())
+
+    # Number of base nodes folded into u: set by aggregation for int supernodes,
+    # summed (and memoized) for frozenset supernodes, 1 for a base node
+    def node_size(self, u: NodeLike) -> float:
+        size = self._sizes.get(u)
+        if size is not None:
+            return size
+        if not isinstance(u, frozenset):
+            return 1.0
+        size = self._sizes[u] = sum(self.node_size(x) for x in u)
+        return size
+
     # E(A, B): total edge weight between (disjoint) sets A and B
     def cut_weight(self, A: Iterable[NodeLike], B: Iterable[NodeLike]) -> float:
         Aset, Bset = set(A), set(B)
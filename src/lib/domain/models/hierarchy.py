@@ -0,0 +1,127 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from src.lib.domain.types.nodes import BaseNode
+
+def compact_dtype(max_value: int) -> np.dtype:
+    """
+    Smallest unsigned integer dtype that holds 0..max_value.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+class Hierarchy:
+    """
+    Every level of one Leiden run as nested partitions of the base nodes 0..n-1.
+
+    maps[l][i] is the level-(l+1) node holding level-l node i (level 0 nodes are the
+    base nodes); the last map sends the top-level nodes to the final communities.
+    Partition l is maps[0..l] composed: level 0 is the finest (the refined communities
+    aggregated first), the last level (-1) is the final communities, and every level
+    refines the next. Community ids are dense per level, in the order flatten_hierarchy
+    uses, so communities(-1) is what leiden() returns.
+
+    A level's base-node array is composed on first use and cached; after that
+    membership lookups are O(1). maps may be any sequence (e.g. one that reads arrays
+    from disk on access); labels names the base nodes (None means the ids themselves).
+    """
+    def __init__(self, maps: Sequence[np.ndarray], labels: Optional[Sequence[BaseNode]] = None) -> None:
+        if not len(maps):
+            raise ValueError("a hierarchy needs at least the final community map")
+        self.maps = maps
+        self.labels = labels
+        self._levels: Dict[int, np.ndarray] = {}
+        self._index: Optional[Dict[BaseNode, int]] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.maps)
+
+    def num_nodes(self) -> int:
+        return len(self.maps[0])
+
+    def _level(self, level: int) -> int:
+        if not -self.depth <= level < self.depth:
+            raise IndexError(f"level {level} out of range for a {self.depth}-level hierarchy")
+        return level % self.depth
+
+    def membership(self, level: int = -1) -> np.ndarray:
+        """
+        Read-only array: community of each base node at `level`.
+        """
+        level = self._level(level)
+        cached = self._levels.get(level)
+        if cached is not None:
+            return cached
+        # Compose up from the deepest cached level below this one
+        start = max((l for l in self._levels if l < level), default=-1)
+        labels = self._levels[start] if start >= 0 else None
+        for l in range(start + 1, level + 1):
+            m = np.asarray(self.maps[l])
+            # Level 0 is a view, so freezing it leaves the caller's array writable
+            labels = m.view() if labels is None else m[labels]
+            labels.flags.writeable = False
+            self._levels[l] = labels
+        return labels  # type: ignore[return-value]
+
+    def num_communities(self, level: int = -1) -> int:
+        level = self._level(level)
+        upper = self.maps[level + 1] if level + 1 < self.depth else None
+        if upper is not None:
+            return len(upper)
+        m = self.maps[level]
+        return int(np.max(m)) + 1 if len(m) else 0
+
+    def node_id(self, node: BaseNode) -> int:
+        if self.labels is None:
+            return int(node)  # type: ignore[call-overload]
+        if self._index is None:
+            self._index = {u: i for i, u in enumerate(self.labels)}
+        try:
+            return self._index[node]
+        except KeyError:
+            raise KeyError(f"node {node!r} is not in the hierarchy") from None
+
+    def community_of(self, node: BaseNode, level: int = -1) -> int:
+        """
+        O(1) once membership(level) is cached; before that the node is walked up the
+        maps (depth lookups, no level array is composed), which suits one-off queries
+        against a hierarchy read from disk. With labels, the first call builds the
+        label -> id index of node_id.
+        """
+        level = self._level(level)
+        i = self.node_id(node)
+        cached = self._levels.get(level)
+        if cached is not None:
+            return int(cached[i])
+        for l in range(level + 1):
+            i = int(self.maps[l][i])
+        return i
+
+    def parent(self, community: int, level: int) -> int:
+        """
+        The level-(level+1) community containing `community` of `level`.
+        """
+        level = self._level(level)
+        if level + 1 >= self.depth:
+            raise IndexError("the last level has no parent level")
+        return int(self.maps[level + 1][community])
+
+    def communities(self, level: int = -1) -> List[Set[BaseNode]]:
+        labels = self.membership(level)
+        out: List[Set[BaseNode]] = [set() for _ in range(self.num_communities(level))]
+        names = self.labels if self.labels is not None else range(len(labels))
+        for u, c in zip(names, labels.tolist()):
+            out[c].add(u)
+        return [s for s in out if s]
+
+    def compacted(self) -> Hierarchy:
+        """
+        Same hierarchy with every map in its smallest unsigned dtype.
+        """
+        maps = [np.asarray(m).astype(compact_dtype(int(np.max(m)) if len(m) else 0)) for m in self.maps]
+        return Hierarchy(maps, self.labels)
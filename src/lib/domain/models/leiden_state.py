@@ -0,0 +1,82 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import types
+
+import numpy as np
+
+from src.lib.domain.models.csr_graph import CSRGraph
+
+# Why a leiden() run ended
+STOP_CONVERGED = "converged"
+STOP_MAX_LEVELS = "max_levels"
+STOP_TIME_BUDGET = "time_budget"
+STOP_MIN_IMPROVEMENT = "min_improvement"
+
+@dataclass(frozen=True)
+class RunLimits:
+    """
+    Anytime limits for leiden(), checked between phases (a running phase is never cut):
+    - time_budget: seconds from the start of the call; once spent, the run returns the
+      partition it has, starting no further level.
+    - min_improvement: stop once a level's local moving raises the objective's quality()
+      by less than this over the previous level (needs an IncrementalObjective).
+    Aggregation keeps each community's internal weight and degree, so a partition scores
+    the same on a level graph as on the base graph and the levels' qualities compare
+    directly. Local moving only makes improving moves, so the partition held when a
+    limit hits is the best one found so far.
+    """
+    time_budget: Optional[float] = None
+    min_improvement: Optional[float] = None
+
+@dataclass
+class LeidenState:
+    """
+    A leiden() run between two levels, enough to continue it: the current (aggregated)
+    graph, its nodes' communities, the membership maps from the base graph up, the
+    rng state and the last level's quality. base is the base graph's
+    graph_fingerprint and params the run_parameters of the run; both are checked on
+    resume. stop_reason is set on the state saved when the run ends and None on
+    intermediate ones.
+    """
+    graph: CSRGraph
+    labels: np.ndarray
+    memberships: List[np.ndarray]
+    base: str
+    rng_state: Optional[Tuple[Any, ...]] = None
+    quality: Optional[float] = None
+    stop_reason: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def level(self) -> int:
+        return len(self.memberships)
+
+def graph_fingerprint(G: CSRGraph) -> str:
+    """
+    blake2b of G's CSR arrays and node sizes: equal for the same graph built in the
+    same node order, different for any change of its edges or weights. Labels are
+    left out, as a run only sees ids.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    arrays = [("offsets", G.offsets, "<i8"), ("indices", G.indices, "<i8"), ("weights", G.weights, "<f8")]
+    if G.sizes is not None:
+        arrays.append(("sizes", G.sizes, "<f8"))
+    for name, arr, dtype in arrays:
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(arr, dtype=dtype).data)
+    return h.hexdigest()
+
+def run_parameters(delta_fn: Any, gamma: float, theta: float) -> Dict[str, Any]:
+    """
+    The arguments a resumed run must share with the checkpointed one, as plain JSON
+    values: gamma, theta and the objective (its type and plain public attributes).
+    """
+    kind = delta_fn if isinstance(delta_fn, (types.FunctionType, types.MethodType)) else type(delta_fn)
+    attrs = {
+        k: v for k, v in sorted(getattr(delta_fn, "__dict__", {}).items())
+        if not k.startswith("_") and isinstance(v, (int, float, str, bool, type(None)))
+    }
+    objective = {"type": f"{kind.__module__}.{kind.__qualname__}", "attrs": attrs}
+    return {"gamma": float(gamma), "theta": float(theta), "objective": objective}
@@ -1,10 +1,13 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from collections import defaultdict
-from typing import Dict, Set, Optional, List, cast, FrozenSet
+from typing import Dict, Set, Optional, List, cast, FrozenSet, TYPE_CHECKING
 from src.lib.domain.types.nodes import NodeLike, BaseNode
 from src.lib.domain.types.general import CommunityId
 
+if TYPE_CHECKING:
+    from src.lib.domain.types.graph import GraphLike
+
 @dataclass
 class Partition:
     node2com: Dict[NodeLike, CommunityId]
@@ -13,6 +16,94 @@ class Partition:
         self.com2nodes: Dict[CommunityId, Set[NodeLike]] = defaultdict(set)
         for n, c in self.node2com.items():
             self.com2nodes[c].add(n)
+        self._graph: Optional[GraphLike] = None
+        self._next_cid = 0
+        self._emptied: Set[CommunityId] = set()
+
+    def bind(self, G: GraphLike) -> None:
+        """
+        Track per-community total degree, internal weight and node size against G;
+        move() then keeps them current in O(deg(v)). Internal weight sums adj[u][v]
+        over ordered pairs inside the community (an inner edge counts twice, a loop once).
+        Binding to the already-bound graph is a no-op.
+        """
+        if self._graph is G:
+            return
+        self._graph = G
+        self.total_weight = G.total_weight()
+        self.com_degree: Dict[CommunityId, float] = defaultdict(float)
+        self.com_internal: Dict[CommunityId, float] = defaultdict(float)
+        self.com_size: Dict[CommunityId, float] = defaultdict(float)
+        for n, c in self.node2com.items():
+            self.com_degree[c] += G.degree(n)
+            self.com_size[c] += G.node_size(n)
+            for u, w in G.neighbor_items(n):
+                if self.node2com.get(u) == c:
+                    self.com_internal[c] += w
+
+    def _shift_stats(self, v: NodeLike, src: CommunityId, dest: CommunityId) -> None:
+        G = cast("GraphLike", self._graph)
+        k_src = k_dest = loop = 0.0
+        for u, w in G.neighbor_items(v):
+            if u == v:
+                loop = w
+                continue
+            c = self.node2com[u]
+            if c == src:
+                k_src += w
+            elif c == dest:
+                k_dest += w
+        deg, size = G.degree(v), G.node_size(v)
+        self.com_degree[src] -= deg
+        self.com_degree[dest] += deg
+        self.com_size[src] -= size
+        self.com_size[dest] += size
+        self.com_internal[src] -= 2.0 * k_src + loop
+        self.com_internal[dest] += 2.0 * k_dest + loop
+
+    def add_node(self, v: NodeLike, cid: Optional[CommunityId] = None) -> CommunityId:
+        """
+        Assign a node that is not in the partition yet, to cid or to a new singleton.
+        Bound stats take v's current edges in the bound graph into account.
+        """
+        if v in self.node2com:
+            raise ValueError(f"node {v!r} is already assigned")
+        if cid is None:
+            cid = self.new_community_id()
+        self.node2com[v] = cid
+        self.com2nodes[cid].add(v)
+        self._emptied.discard(cid)
+        if self._graph is not None:
+            G = cast("GraphLike", self._graph)
+            k_in = loop = 0.0
+            for u, w in G.neighbor_items(v):
+                if u == v:
+                    loop = w
+                elif self.node2com.get(u) == cid:
+                    k_in += w
+            self.com_degree[cid] += G.degree(v)
+            self.com_size[cid] += G.node_size(v)
+            self.com_internal[cid] += 2.0 * k_in + loop
+        return cid
+
+    def edge_reweighted(self, u: NodeLike, v: NodeLike, dw: float) -> None:
+        """
+        Keep bound stats current after w(u, v) changed by dw in place in the bound graph
+        (bind() cannot notice in-place edits). Both endpoints must be assigned.
+        """
+        if self._graph is None:
+            return
+        cu, cv = self.node2com[u], self.node2com[v]
+        if u == v:
+            self.total_weight += dw
+            self.com_degree[cu] += dw
+            self.com_internal[cu] += dw
+            return
+        self.total_weight += 2.0 * dw
+        self.com_degree[cu] += dw
+        self.com_degree[cv] += dw
+        if cu == cv:
+            self.com_internal[cu] += 2.0 * dw
 
     def communities(self) -> List[Set[NodeLike]]:
         return [set(s) for s in self.com2nodes.values() if s]
@@ -29,15 +120,20 @@ class Partition:
     def members(self, cid: CommunityId) -> Set[NodeLike]:
         return self.com2nodes[cid]
 
+    def community_size(self, cid: CommunityId) -> int:
+        return len(self.com2nodes.get(cid, ()))
+
     def is_singleton(self, v: NodeLike) -> bool:
         cid = self.community_of(v)
         return len(self.com2nodes[cid]) == 1
 
     def new_community_id(self) -> CommunityId:
+        # Ids below _next_cid were taken when last checked; amortized O(1) per call
         base = "__C__"
-        k = 0
+        k = self._next_cid
         while (base + str(k)) in self.com2nodes:
             k += 1
+        self._next_cid = k
         return base + str(k)
 
     def move(self, v: NodeLike, dest: Optional[CommunityId]) -> CommunityId:
@@ -46,15 +142,26 @@ class Partition:
             dest = self.new_community_id()
         if src == dest:
             return dest
+        if self._graph is not None:
+            self._shift_stats(v, src, dest)
         self.com2nodes[src].remove(v)
+        if not self.com2nodes[src]:
+            self._emptied.add(src)
         self.com2nodes[dest].add(v)
+        self._emptied.discard(dest)
         self.node2com[v] = dest
         return dest
 
     def drop_empty(self) -> None:
-        empty = [cid for cid, nodes in self.com2nodes.items() if not nodes]
+        # Only communities emptied by move() since the last call can be empty
+        empty = [cid for cid in self._emptied if not self.com2nodes.get(cid, True)]
+        self._emptied.clear()
         for cid in empty:
             del self.com2nodes[cid]
+            if self._graph is not None:
+                self.com_degree.pop(cid, None)
+                self.com_internal.pop(cid, None)
+                self.com_size.pop(cid, None)
 
     def flattened_partition(self) -> List[Set[BaseNode]]:
         def expand(node: NodeLike | object) -> Set[BaseNode]:
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.lib.domain.types.nodes import NodeLike
+
+# Bytes of per-node arrays the out-of-core pipeline keeps in memory (degrees, community
+# slots and sums of local moving, refinement and aggregation maps), for budget checks
+STATE_BYTES_PER_NODE = 96
+
+@dataclass
+class GraphShard:
+    """
+    Rows lo..hi-1 of a ShardedGraph: offsets is local (offsets[0] == 0, one entry per
+    row plus one), indices are global node ids. The arrays are usually read-only
+    memory maps; dropping the shard unmaps them.
+    """
+    lo: int
+    hi: int
+    offsets: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.indices.nbytes + self.weights.nbytes)
+
+    def row_ids(self) -> np.ndarray:
+        """
+        Global row id of every stored entry.
+        """
+        return np.repeat(np.arange(self.lo, self.hi, dtype=np.int64), np.diff(self.offsets))
+
+    def rows(self, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        gather_rows() for global ids in lo..hi-1: (owner position in `nodes`, neighbor
+        id, weight).
+        """
+        local = nodes - self.lo
+        starts = self.offsets[local]
+        lens = self.offsets[local + 1] - starts
+        owner = np.repeat(np.arange(len(nodes), dtype=np.int64), lens)
+        shift = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+        pos = np.arange(len(owner), dtype=np.int64) + shift
+        return owner, np.asarray(self.indices[pos], dtype=np.int64), np.asarray(self.weights[pos])
+
+class ShardedGraph:
+    """
+    Undirected weighted graph over int ids 0..n-1 whose rows live outside memory, in
+    shards of consecutive node ranges (bounds[i]..bounds[i+1]-1) that load(i) opens one
+    at a time; the CSRGraph conventions hold for every row (both directions stored,
+    self-loops once). Only degrees (and sizes, labels if any) are per-node data held here.
+    memory_budget (bytes, None: unbounded) caps what the out-of-core stages keep in
+    memory at once: per-node state, the open shard and the working sets of refinement
+    and aggregation. The interpreter and its libraries come on top.
+    """
+    def __init__(
+        self,
+        bounds: Sequence[int],
+        shard_nnz: Sequence[int],
+        degrees: np.ndarray,
+        load: Callable[[int], GraphShard],
+        num_edges: int,
+        labels: Optional[Sequence[NodeLike]] = None,
+        sizes: Optional[np.ndarray] = None,
+        memory_budget: Optional[int] = None,
+    ) -> None:
+        if len(bounds) != len(shard_nnz) + 1 or bounds[0] != 0:
+            raise ValueError("bounds must start at 0 and have one entry more than shard_nnz")
+        if memory_budget is not None and memory_budget <= 0:
+            raise ValueError(f"memory_budget must be > 0, got {memory_budget}")
+        self.bounds = np.asarray(bounds, dtype=np.int64)
+        self.shard_nnz = np.asarray(shard_nnz, dtype=np.int64)
+        self.degrees = degrees
+        self.labels = labels
+        self.sizes = sizes
+        self.memory_budget = memory_budget
+        self._load = load
+        self._num_edges = num_edges
+        self._total = float(np.sum(degrees))
+        self._index: Optional[Dict[NodeLike, int]] = None
+
+    # ---- shards ----
+    def num_shards(self) -> int:
+        return len(self.shard_nnz)
+
+    def shard(self, i: int) -> GraphShard:
+        return self._load(i)
+
+    def shards(self) -> Iterator[GraphShard]:
+        """
+        Every shard in node order, each opened only when the previous one is done with.
+        """
+        for i in range(self.num_shards()):
+            yield self._load(i)
+
+    def shard_of(self, nodes: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.bounds, nodes, side="right") - 1
+
+    # ---- budget ----
+    def state_bytes(self) -> int:
+        return STATE_BYTES_PER_NODE * self.num_nodes()
+
+    def free_bytes(self) -> Optional[int]:
+        """
+        Budget left for working sets once the per-node state is counted (None:
+        unbounded). Raises ValueError if the state alone does not fit.
+        """
+        if self.memory_budget is None:
+            return None
+        free = self.memory_budget - self.state_bytes()
+        if free <= 0:
+            raise ValueError(
+                f"memory_budget {self.memory_budget} bytes cannot hold the per-node state of "
+                f"{self.num_nodes()} nodes ({self.state_bytes()} bytes)"
+            )
+        return free
+
+    # ---- Graph-compatible surface (ids instead of labels) ----
+    def num_nodes(self) -> int:
+        return len(self.degrees)
+
+    def num_edges(self) -> int:
+        return self._num_edges
+
+    def nodes(self) -> range:
+        return range(self.num_nodes())
+
+    def total_weight(self) -> float:
+        return self._total
+
+    def degree(self, u: int) -> float:
+        return float(self.degrees[u])
+
+    def node_size(self, u: int) -> float:
+        return 1.0 if self.sizes is None else float(self.sizes[u])
+
+    def label(self, u: int) -> NodeLike:
+        return u if self.labels is None else self.labels[u]
+
+    def id_of(self, node: NodeLike) -> int:
+        if self.labels is None:
+            return int(node)  # type: ignore[arg-type]
+        if self._index is None:
+            self._index = {lbl: i for i, lbl in enumerate(self.labels)}
+        return self._index[node]
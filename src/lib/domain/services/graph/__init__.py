@@ -1,132 +1,238 @@
 from __future__ import annotations
 from collections import deque, defaultdict
-from typing import Optional, List, Tuple, Set, Dict, FrozenSet
+from typing import Optional, Iterable, List, Tuple, Set, Dict
 import math
 import random
 
+import numpy as np
+
 from src.lib.domain.types.nodes import NodeLike
 from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
 from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.csr_graph import CSRGraph
 from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
 from src.lib.domain.types.general import CommunityId
+from src.lib.domain.types.events import LocalMovingStats, Observer
+from src.lib.domain.services.objective import as_objective, DeltaFnObjective
+
+def community_membership(
+    P: Partition,
+    n: int,
+    index: Optional[Dict[NodeLike, int]] = None,
+) -> np.ndarray:
+    """
+    Dense community index per node position 0..n-1, numbered in P.community_ids() order.
+    Nodes are their own positions (int ids) unless `index` maps them to one.
+    """
+    if isinstance(P, CompactPartition) and index is None:
+        return P.compact().copy()
+    membership = np.empty(n, dtype=np.int64)
+    for idx, cid in enumerate(P.community_ids()):
+        members = P.members(cid)
+        membership[[index[u] for u in members] if index is not None else list(members)] = idx
+    return membership
+
+def aggregate_csr_graph(G: CSRGraph, membership: np.ndarray, k: int) -> CSRGraph:
+    """
+    CSR counterpart of aggregate_graph: supernode s of G2 is {u : membership[u] == s}.
+    Every entry of G is summed into its supernode pair, so an intra-community edge
+    lands on the self-loop from both of its rows (2w): degrees, total weight and the
+    internal weight of every community are preserved, as in the dict path.
+    """
+    su = membership[G.row_ids()]
+    sv = membership[G.indices]
+    G2 = CSRGraph.from_coo(k, su, sv, G.weights)
+    G2.sizes = np.bincount(membership, weights=G.sizes, minlength=k).astype(np.float64)
+    return G2
 
-def aggregate_graph(G: Graph, P_refined: Partition) -> Graph:
+def aggregate_graph(G: GraphLike, P_refined: Partition) -> GraphLike:
     """
     Contract: sum *every* underlying undirected edge exactly once into the supergraph.
     This avoids under-counting when multiple base edges map to the same (su, sv).
+    An edge inside a supernode becomes a self-loop of twice its weight (a loop counts
+    once in degree), so degrees and total weight are preserved across levels.
+    Supernode s of the result is the int id of the s-th refined community, for both models.
     """
-    # Map base nodes to supernodes
-    comm_nodes = [frozenset(P_refined.members(cid)) for cid in P_refined.community_ids()]
-    node_to_super: Dict[NodeLike, FrozenSet[NodeLike]] = {}
-    for supernode in comm_nodes:
-        for u in supernode:
-            node_to_super[u] = supernode
-
-    # Accumulate weights per supernode pair, counting each base edge once
-    pair_weights: Dict[Tuple[FrozenSet[NodeLike], FrozenSet[NodeLike]], float] = defaultdict(float)
-    visited_base_pairs: Set[FrozenSet[NodeLike]] = set()
-
-    for u in G.nodes():
-        for v, w in G.adj.get(u, {}).items():
-            uv = frozenset((u, v))
-            if uv in visited_base_pairs:
-                continue  # already counted the undirected edge (u,v)
-            visited_base_pairs.add(uv)
-            su = node_to_super[u]
+    if isinstance(G, CSRGraph):
+        membership = community_membership(P_refined, G.num_nodes())
+        return aggregate_csr_graph(G, membership, P_refined.size())
+
+    # Map nodes to integer supernodes 0..k-1, in community_ids() order
+    node_to_super: Dict[NodeLike, int] = {}
+    sizes: List[float] = []
+    for s, cid in enumerate(P_refined.community_ids()):
+        size = 0.0
+        for u in P_refined.members(cid):
+            node_to_super[u] = s
+            size += G.node_size(u)
+        sizes.append(size)
+
+    # Accumulate weights per supernode pair, counting each undirected edge once:
+    # from the endpoint that comes first in adjacency order (a loop from its node)
+    order = {u: i for i, u in enumerate(G.adj)}
+    pair_weights: Dict[Tuple[int, int], float] = defaultdict(float)
+    for u, nbrs in G.adj.items():
+        iu, su = order[u], node_to_super[u]
+        for v, w in nbrs.items():
+            if order[v] < iu:
+                continue  # already counted from v's row
             sv = node_to_super[v]
-            pair_weights[(su, sv)] += w
+            pair_weights[(su, sv)] += 2.0 * w if su == sv and u != v else w
 
     G2 = Graph()
+    for s in range(len(sizes)):
+        G2.adj[s] = {}
     for (su, sv), w in pair_weights.items():
         G2.add_edge(su, sv, w)
+    # Carry supernode sizes up a level so node_size never needs the members
+    G2._sizes.update(enumerate(sizes))
     return G2
 
-def move_nodes_fast(G: Graph, P: Partition, delta_fn: DeltaFn) -> Partition:
-    nodes = list(G.nodes())
-    random.shuffle(nodes)
+def move_nodes_fast(
+    G: GraphLike,
+    P: Partition,
+    delta_fn: DeltaFn,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+) -> Partition:
+    """
+    Local moving queue. An Objective delta_fn scores all candidates of a node in one
+    O(deg) gains() call; a plain DeltaFn is wrapped and called per candidate.
+    rng replaces the global `random` module for the initial node order; an observer
+    receives one LocalMovingStats when the queue empties.
+    """
+    move_nodes_frontier(G, P, delta_fn, list(G.nodes()), rng, observer)
+    return P
+
+def move_nodes_frontier(
+    G: GraphLike,
+    P: Partition,
+    delta_fn: DeltaFn,
+    frontier: Iterable[NodeLike],
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+) -> Dict[NodeLike, CommunityId]:
+    """
+    move_nodes_fast's queue, seeded with `frontier` (shuffled) instead of every node;
+    it still grows to the neighbors of every node that moves. Returns, for each node
+    that moved, the community it started in.
+    """
+    objective = as_objective(delta_fn)
+    nodes = list(frontier)
+    (rng or random).shuffle(nodes)
     Q = deque(nodes)
     in_queue: Set[NodeLike] = set(nodes)
+    moved: Dict[NodeLike, CommunityId] = {}
+    # Counted per move, not per visit: visits = initial queue + everything requeued
+    moves = pushed = 0
+    peak = len(Q)
 
     while Q:
         v = Q.popleft()
         in_queue.discard(v)
 
-        neighbor_comms = {P.community_of(u) for u in G.neighbors(v)}
-        candidate_comms: List[Optional[CommunityId]] = list(neighbor_comms)
-        candidate_comms.append(P.community_of(v))
-        candidate_comms.append(None)  # None => new singleton community
-
+        # Candidates: neighbor communities, v's own, and None => new singleton community
         best_C: Optional[CommunityId] = None
         best_delta = float("-inf")
-        for C in candidate_comms:
-            delta = delta_fn(G, P, v, C)
+        for C, delta in objective.gains(G, P, v).items():
             if delta > best_delta:
                 best_delta, best_C = delta, C
 
         if best_delta > 0:
+            moved.setdefault(v, P.community_of(v))
             dest = P.move(v, best_C)
             P.drop_empty()
             N = {u for u in G.neighbors(v) if P.community_of(u) != dest}
+            before = len(Q)
             for u in N:
                 if u not in in_queue:
                     Q.append(u)
                     in_queue.add(u)
+            moves += 1
+            pushed += len(Q) - before
+            peak = max(peak, len(Q))
 
-    return P
+    if observer is not None:
+        observer.emit(LocalMovingStats(len(nodes) + pushed, moves, peak))
+    return moved
 
 def merge_nodes_subset(
-    G: Graph,
+    G: GraphLike,
     P: Partition,
     S: Set[NodeLike],
     delta_fn: DeltaFn,
     gamma: float,
     theta: float,
+    rng: Optional[random.Random] = None,
 ) -> Partition:
-    def S_minus(X: Set[NodeLike]) -> Set[NodeLike]:
-        return set(S) - set(X)
+    """
+    Refine S inside P (Leiden MergeNodesSubset). The cut E(C, S - C) and volume ||C||
+    of every sub-community C within S are kept up to date as nodes merge, and a node
+    only considers the sub-communities of its neighbors in S (a non-adjacent C cannot
+    raise the objective). Emptied communities are left for the caller to drop_empty().
+    rng replaces the global `random` module for the shuffle and the theta-weighted draw.
+    """
+    shuffle = rng.shuffle if rng is not None else random.shuffle
+    draw = rng.random if rng is not None else random.random
+    objective = as_objective(delta_fn)
+    batched = not isinstance(objective, DeltaFnObjective)
+
+    # k_in[v]: weight from v into S - {v}, per neighbor, in one pass over S
+    nbrs_in_S: Dict[NodeLike, List[Tuple[NodeLike, float]]] = {}
+    cut: Dict[CommunityId, float] = {}
+    vol: Dict[CommunityId, float] = {}
+    vol_S = 0.0
+    for v in S:
+        nbrs_in_S[v] = [(u, w) for u, w in G.neighbor_items(v) if u != v and u in S]
+        vol_S += G.degree(v)
+    for v in S:
+        cid = P.community_of(v)
+        cut[cid] = cut.get(cid, 0.0) + sum(w for u, w in nbrs_in_S[v] if P.community_of(u) != cid)
+        vol[cid] = vol.get(cid, 0.0) + G.degree(v)
 
-    R: List[NodeLike] = []
-    vol_S = G.volume(S)
+    def well_connected(cid: CommunityId) -> bool:
+        return cut[cid] >= gamma * vol[cid] * (vol_S - vol[cid])
 
+    R: List[NodeLike] = []
     for v in S:
-        ev = G.cut_weight({v}, S_minus({v}))
-        lhs = ev
-        rhs = gamma * G.volume({v}) * (vol_S - G.volume({v}))
-        if lhs >= rhs:
+        deg_v = G.degree(v)
+        if sum(w for _u, w in nbrs_in_S[v]) >= gamma * deg_v * (vol_S - deg_v):
             R.append(v)
 
-    random.shuffle(R)
+    shuffle(R)
 
     for v in R:
         if not P.is_singleton(v):
             continue
 
-        T: List[CommunityId] = []
-        for cid in P.community_ids():
-            C = P.members(cid)
-            if not C.issubset(S):
-                continue
-            e_cut = G.cut_weight(C, S_minus(C))
-            lhs = e_cut
-            rhs = gamma * G.volume(C) * (vol_S - G.volume(C))
-            if lhs >= rhs:
-                T.append(cid)
-
+        cur = P.community_of(v)
+        k_v: Dict[CommunityId, float] = {}
+        for u, w in nbrs_in_S[v]:
+            c = P.community_of(u)
+            k_v[c] = k_v.get(c, 0.0) + w
+        T = [cid for cid in k_v if well_connected(cid)]
+        if well_connected(cur):
+            T.append(cur)
         if not T:
             continue
 
+        gains = objective.gains(G, P, v) if batched else {}
         deltas: List[Tuple[CommunityId, float]] = []
         for cid in T:
-            d = delta_fn(G, P, v, cid)
+            d = gains.get(cid, 0.0) if batched else delta_fn(G, P, v, cid)
             if d >= 0:
                 deltas.append((cid, d))
 
         if not deltas:
             continue
 
-        weights = [math.exp(d / max(theta, 1e-12)) for (_, d) in deltas]
+        # exp(d / theta) shifted by the max delta: same distribution, no overflow
+        d_max = max(d for _, d in deltas)
+        weights = [math.exp((d - d_max) / max(theta, 1e-12)) for (_, d) in deltas]
         total = sum(weights)
-        r = random.random() * total
+        r = draw() * total
         acc = 0.0
         chosen: Optional[CommunityId] = None
         for (cid, _d), w in zip(deltas, weights):
@@ -135,8 +241,12 @@ def merge_nodes_subset(
                 chosen = cid
                 break
         chosen = chosen if chosen is not None else deltas[-1][0]
+        if chosen == cur:
+            continue
 
+        # Merging singleton {v} into C: E(C+v, S-C-v) = E(C, S-C) + E(v, S-v) - 2 E(v, C)
+        cut[chosen] += cut.pop(cur) - 2.0 * k_v[chosen]
+        vol[chosen] += vol.pop(cur)
         P.move(v, chosen)
-        P.drop_empty()
 
     return P
@@ -0,0 +1,212 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+
+LAPLACIAN_COMBINATORIAL = "combinatorial"
+LAPLACIAN_SYMMETRIC = "symmetric"
+LAPLACIAN_RANDOM_WALK = "random_walk"
+
+def _as_csr(G: GraphLike) -> CSRGraph:
+    return G if isinstance(G, CSRGraph) else CSRGraph.from_graph(G)
+
+def _row_reduce(indptr: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    # Row sums of an nnz-long array (1-D, or 2-D with one column per vector)
+    out = np.zeros((n,) + values.shape[1:], dtype=np.float64)
+    starts = indptr[:-1]
+    full = np.flatnonzero(indptr[1:] > starts)
+    if len(full):
+        out[full] = np.add.reduceat(values, starts[full], axis=0)
+    return out
+
+@dataclass(frozen=True)
+class CSRMatrix:
+    """
+    Square sparse matrix as CSR arrays (the scipy.sparse names: indptr, indices, data).
+    The arrays may be views of a graph's arrays; nothing here writes to them.
+    A @ x takes a vector (n,) or a block of vectors (n, k).
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        n = len(self.indptr) - 1
+        return n, n
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if x.shape[0] != self.shape[1]:
+            raise ValueError(f"operand has {x.shape[0]} rows, expected {self.shape[1]}")
+        weights = self.data if x.ndim == 1 else self.data[:, None]
+        return _row_reduce(self.indptr, weights * x[self.indices], self.shape[0])
+
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        return self.matvec(x)
+
+    def diagonal(self) -> np.ndarray:
+        rows = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+        out = np.zeros(self.shape[0], dtype=np.float64)
+        loop = rows == self.indices
+        out[rows[loop]] = self.data[loop]
+        return out
+
+    def toarray(self) -> np.ndarray:
+        """
+        Dense copy; for small graphs and tests only.
+        """
+        out = np.zeros(self.shape, dtype=np.float64)
+        rows = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+        out[rows, self.indices] = self.data
+        return out
+
+    def to_scipy(self) -> Any:
+        """
+        scipy.sparse.csr_array over the same arrays (no copy). scipy is optional and
+        only imported here.
+        """
+        try:
+            from scipy.sparse import csr_array
+        except ImportError as e:
+            raise ImportError("to_scipy() needs scipy; install it or use matvec()") from e
+        return csr_array((self.data, self.indices, self.indptr), shape=self.shape, copy=False)
+
+class LaplacianOperator:
+    """
+    Matrix-free graph Laplacian over the graph's CSR arrays (A is the weighted
+    adjacency, self-loops on its diagonal; D the degrees, loops counted once as in
+    CSRGraph.degrees):
+    - "combinatorial": L = D - A
+    - "symmetric": L_sym = D^-1/2 (D - A) D^-1/2
+    - "random_walk": L_rw = D^-1 (D - A)
+    Isolated nodes get an all-zero row. L @ x costs one pass over the edges and
+    allocates O(n + nnz) temporaries; nothing edge-sized is stored.
+    """
+    def __init__(self, G: CSRGraph, kind: str = LAPLACIAN_COMBINATORIAL) -> None:
+        if kind not in (LAPLACIAN_COMBINATORIAL, LAPLACIAN_SYMMETRIC, LAPLACIAN_RANDOM_WALK):
+            raise ValueError(f"unknown Laplacian {kind!r}; expected combinatorial, symmetric or random_walk")
+        self.kind = kind
+        self.adjacency = CSRMatrix(G.offsets, G.indices, G.weights)
+        self.degrees = np.asarray(G.degrees, dtype=np.float64)
+        inv = np.zeros_like(self.degrees)
+        np.divide(1.0, self.degrees, out=inv, where=self.degrees > 0)
+        # L = left @ (D - A) @ right, with diagonal scalings (None: identity)
+        self._left: Optional[np.ndarray] = None
+        self._right: Optional[np.ndarray] = None
+        if kind == LAPLACIAN_SYMMETRIC:
+            self._left = self._right = np.sqrt(inv)
+        elif kind == LAPLACIAN_RANDOM_WALK:
+            self._left = inv
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.adjacency.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(np.float64)
+
+    def _scale(self, s: Optional[np.ndarray], x: np.ndarray) -> np.ndarray:
+        if s is None:
+            return x
+        return s * x if x.ndim == 1 else s[:, None] * x
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        x = self._scale(self._right, np.asarray(x, dtype=np.float64))
+        y = self._scale(self.degrees, x) - self.adjacency.matvec(x)
+        return self._scale(self._left, y)
+
+    def __matmul__(self, x: np.ndarray) -> np.ndarray:
+        return self.matvec(x)
+
+    def diagonal(self) -> np.ndarray:
+        diag = self.degrees - self.adjacency.diagonal()
+        for s in (self._left, self._right):
+            if s is not None:
+                diag = diag * s
+        return diag
+
+    def to_csr(self) -> CSRMatrix:
+        """
+        The Laplacian materialized as a CSRMatrix (new arrays: the diagonal is merged
+        into every row that has no self-loop entry).
+        """
+        A = self.adjacency
+        n = self.shape[0]
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(A.indptr))
+        left = self._left if self._left is not None else np.ones(n)
+        right = self._right if self._right is not None else np.ones(n)
+        data = -A.data * left[rows] * right[A.indices]
+        diag = self.diagonal()
+        loop = rows == A.indices
+        data[loop] = diag[rows[loop]]
+        # Rows without a loop entry get their diagonal inserted in column order
+        missing = np.ones(n, dtype=bool)
+        missing[rows[loop]] = False
+        missing &= diag != 0
+        at = np.flatnonzero(missing)
+        key = rows * n + A.indices
+        pos = np.searchsorted(key, at * n + at)
+        indices = np.insert(A.indices, pos, at)
+        data = np.insert(data, pos, diag[at])
+        indptr = A.indptr + np.concatenate(([0], np.cumsum(missing)))
+        return CSRMatrix(indptr, indices, data)
+
+    def to_scipy(self) -> Any:
+        """
+        scipy.sparse.linalg.LinearOperator calling matvec (scipy is optional), for
+        eigsh / cg and friends.
+        """
+        try:
+            from scipy.sparse.linalg import LinearOperator
+        except ImportError as e:
+            raise ImportError("to_scipy() needs scipy; install it or use matvec()") from e
+        return LinearOperator(self.shape, matvec=self.matvec, matmat=self.matvec, rmatvec=self.matvec, dtype=self.dtype)
+
+@dataclass(frozen=True)
+class GraphOperators:
+    """
+    Matrix views of one graph, all over the same CSR arrays. Row/column i is node
+    labels[i] (index maps a node to its row). A CSRGraph is used as is, a Graph is
+    converted once.
+    """
+    graph: CSRGraph
+
+    @classmethod
+    def of(cls, G: GraphLike) -> GraphOperators:
+        return cls(_as_csr(G))
+
+    @property
+    def labels(self) -> Optional[Any]:
+        return self.graph.labels
+
+    def index(self) -> Dict[NodeLike, int]:
+        G = self.graph
+        if G.labels is None:
+            return {i: i for i in range(G.num_nodes())}
+        return {u: i for i, u in enumerate(G.labels)}
+
+    def adjacency(self) -> CSRMatrix:
+        """
+        Weighted adjacency; shares the graph's offsets, indices and weights.
+        """
+        return CSRMatrix(self.graph.offsets, self.graph.indices, self.graph.weights)
+
+    def degrees(self) -> np.ndarray:
+        """
+        Weighted degree per node (the graph's own array, a self-loop counted once).
+        """
+        return self.graph.degrees
+
+    def laplacian(self, kind: str = LAPLACIAN_COMBINATORIAL) -> LaplacianOperator:
+        return LaplacianOperator(self.graph, kind)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import logging
+import random
+
+import numpy as np
+
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.events import LocalMovingStats, Observer
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.sharded_graph import GraphShard, ShardedGraph
+from src.lib.domain.services.graph import community_membership
+from src.lib.domain.services.graph.vectorized import BatchMover
+from src.lib.domain.services.objective import IncrementalObjective
+from src.lib.domain.services.partition import refine_partition
+
+log = logging.getLogger(__name__)
+
+# A shard scan holds row ids, int64 columns and weights next to the mapped arrays
+SHARD_WORKING_SET = 4
+# Working set of refining a community on an in-memory subgraph (the serial refinement
+# keeps Python lists per node), per stored entry and per member node
+REFINE_BYTES_PER_ENTRY = 160
+REFINE_BYTES_PER_NODE = 256
+
+RefineFn = Callable[..., Partition]
+
+# (src, dst, weight) id arrays, each undirected edge once
+EdgeChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Writes a coarse level out of core and opens it with the same memory budget:
+# (chunks, n, sizes) -> ShardedGraph; chunks() streams the level's edges and may be
+# called more than once (see ShardedGraphWriter.write_edges)
+SpillFn = Callable[[Callable[[], Iterable[EdgeChunk]], int, np.ndarray], ShardedGraph]
+
+def check_budget(G: ShardedGraph) -> None:
+    """
+    ValueError unless the per-node state plus the largest shard's scan fit the budget.
+    """
+    free = G.free_bytes()
+    if free is None or not G.num_shards():
+        return
+    largest = int(G.shard_nnz.max()) * 16 * SHARD_WORKING_SET
+    if largest > free:
+        raise ValueError(
+            f"a shard scan needs about {largest} bytes but only {free} of the {G.memory_budget} byte "
+            f"budget are left after per-node state; write the graph with smaller shards"
+        )
+
+def _scan(shard: GraphShard) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Every entry of the shard as (global row, column, weight)
+    return shard.row_ids(), np.asarray(shard.indices, dtype=np.int64), np.asarray(shard.weights, dtype=np.float64)
+
+def _reduce(keys: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(keys, kind="stable")
+    keys, weights = keys[order], weights[order]
+    if not len(keys):
+        return keys, weights
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[starts], np.add.reduceat(weights, starts)
+
+def _merge(parts: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    return _reduce(np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+
+def move_nodes_sharded(
+    G: ShardedGraph,
+    P: Partition,
+    delta_fn: DeltaFn,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+    batch_size: int = 4096,
+) -> Partition:
+    """
+    move_nodes_fast_vectorized over a ShardedGraph, one shard in memory at a time.
+
+    Every pass goes over the shards in order, queueing the shard's pending nodes
+    (shuffled) and draining them with the vectorized batch rules. A neighbor that has
+    to be revisited is marked pending rather than queued, even in the open shard, so
+    it is picked up by the next pass: like the in-memory queue, every node is visited
+    once before any is revisited (draining requeues at once grows a shard's
+    communities outward from the first movers and ends in far larger ones). Passes
+    repeat until nothing is pending. The community state is global, so every move is
+    scored against the current communities of all nodes.
+    """
+    mover = BatchMover(G, P, delta_fn, batch_size)
+    r = rng or random
+    pending = np.ones(G.num_nodes(), dtype=bool)
+    passes = 0
+    while pending.any():
+        passes += 1
+        for i in range(G.num_shards()):
+            lo, hi = int(G.bounds[i]), int(G.bounds[i + 1])
+            nodes = lo + np.flatnonzero(pending[lo:hi])
+            if not len(nodes):
+                continue
+            pending[nodes] = False
+            order = nodes.tolist()
+            r.shuffle(order)
+            shard = G.shard(i)
+            # An empty range: every requeue comes back to be marked pending
+            pending[mover.drain(deque(order), shard.rows, lo, lo)] = True
+            del shard
+    log.debug("sharded local moving: %d passes over %d shards", passes, G.num_shards())
+    if observer is not None:
+        observer.emit(LocalMovingStats(mover.visited, mover.moves, mover.peak))
+    return mover.partition()
+
+def _community_spans(cost: np.ndarray, limit: Optional[float]) -> Iterator[Tuple[int, int]]:
+    # Consecutive community ranges whose summed cost stays within limit (a community
+    # over the limit gets a range of its own)
+    k = len(cost)
+    if limit is None:
+        if k:
+            yield 0, k
+        return
+    c0 = 0
+    while c0 < k:
+        ends = np.cumsum(cost[c0:])
+        c1 = c0 + max(1, int(np.searchsorted(ends, limit, side="right")))
+        if c1 - c0 == 1 and cost[c0] > limit:
+            log.warning("community %d needs about %d bytes to refine, over the budget", c0, int(cost[c0]))
+        yield c0, c1
+        c0 = c1
+
+def refine_subgraph(
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: np.ndarray,
+    labels: np.ndarray,
+    degrees: np.ndarray,
+    sizes: Optional[np.ndarray],
+    total: float,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    rng: Optional[random.Random] = None,
+    refine: RefineFn = refine_partition,
+) -> np.ndarray:
+    """
+    Refines the m nodes of a subgraph cut out of a larger graph: (src, dst, weights)
+    are its entries in local ids 0..m-1 (both directions), labels its communities.
+    Nodes keep their full degrees, and one extra isolated node carries the rest of
+    `total`, so every gain is that of the whole graph. Returns refined communities
+    numbered 0..k-1.
+    """
+    m = len(labels)
+    edges = CSRGraph.from_coo(m + 1, src, dst, weights)
+    sub = CSRGraph(
+        edges.offsets, edges.indices, edges.weights,
+        sizes=np.append(sizes, 1.0) if sizes is not None else None,
+        degrees=np.append(degrees, total - degrees.sum()),
+    )
+    phantom = int(labels.max()) + 1 if m else 0
+    Psub = CompactPartition(np.append(labels, phantom))
+    refined = community_membership(refine(sub, Psub, delta_fn, gamma, theta, rng=rng), m + 1)[:m]
+    return np.unique(refined, return_inverse=True)[1]
+
+def refine_sharded(
+    G: ShardedGraph,
+    P: Partition,
+    delta_fn: DeltaFn,
+    gamma: float,
+    theta: float,
+    rng: Optional[random.Random] = None,
+    refine: RefineFn = refine_partition,
+) -> CompactPartition:
+    """
+    refine_partition over a ShardedGraph. Refining a community only looks at the edges
+    inside it, so communities are refined in batches: the intra-community edges of a
+    batch are collected in one pass over the shards into an in-memory CSRGraph, and
+    `refine` runs on that (refine_subgraph). Batches are sized to the memory budget.
+    Refined communities are numbered 0..k-1, batch by batch.
+    """
+    n = G.num_nodes()
+    comm = community_membership(P, n)
+    k = int(comm.max()) + 1 if n else 0
+    intra = np.zeros(k, dtype=np.float64)
+    for shard in G.shards():
+        rows, cols, _ = _scan(shard)
+        same = comm[rows] == comm[cols]
+        intra += np.bincount(comm[rows[same]], minlength=k)
+    cost = intra * REFINE_BYTES_PER_ENTRY + np.bincount(comm, minlength=k) * REFINE_BYTES_PER_NODE
+    free = G.free_bytes()
+
+    refined = np.empty(n, dtype=np.int64)
+    local = np.full(n, -1, dtype=np.int64)
+    next_id = batches = 0
+    total = G.total_weight()
+    for c0, c1 in _community_spans(cost, free):
+        batches += 1
+        in_batch = (comm >= c0) & (comm < c1)
+        members = np.flatnonzero(in_batch)
+        m = len(members)
+        local[members] = np.arange(m, dtype=np.int64)
+        src: List[np.ndarray] = []
+        dst: List[np.ndarray] = []
+        wts: List[np.ndarray] = []
+        for i in np.unique(G.shard_of(members)).tolist():
+            rows, cols, w = _scan(G.shard(i))
+            keep = in_batch[rows] & (comm[rows] == comm[cols])
+            src.append(local[rows[keep]])
+            dst.append(local[cols[keep]])
+            wts.append(w[keep])
+        dense = refine_subgraph(
+            np.concatenate(src), np.concatenate(dst), np.concatenate(wts), comm[members] - c0,
+            G.degrees[members], G.sizes[members] if G.sizes is not None else None, total,
+            delta_fn, gamma, theta, rng, refine,
+        )
+        refined[members] = dense + next_id
+        next_id += int(dense.max()) + 1 if m else 0
+        local[members] = -1
+    log.debug("sharded refinement: %d communities in %d batches", k, batches)
+    return CompactPartition(refined)
+
+def aggregate_sharded_graph(G: ShardedGraph, membership: np.ndarray, k: int) -> Optional[CSRGraph]:
+    """
+    aggregate_csr_graph for a ShardedGraph, built in memory: every shard is reduced to
+    its (supernode, supernode) weights on its own, and the reductions are merged
+    whenever they outgrow the merged result, so memory stays near twice the size of
+    the coarse graph. Returns None, as soon as that is clear, when the coarse graph
+    would not fit G's free budget (about three times its arrays, to build and then
+    run on it); coarse_edge_chunks then streams it instead.
+    """
+    free = G.free_bytes()
+    limit = None if free is None else (free // 3 - 8 * (k + 1)) // 16
+    merged = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    parts: List[Tuple[np.ndarray, np.ndarray]] = []
+    backlog = 0
+    for shard in G.shards():
+        rows, cols, w = _scan(shard)
+        su, sv = membership[rows], membership[cols]
+        parts.append(_reduce(su * k + sv, w))
+        backlog += len(parts[-1][0])
+        if backlog > max(len(merged[0]), 1 << 20):
+            merged, parts, backlog = _merge([merged] + parts), [], 0
+            if limit is not None and len(merged[0]) > limit:
+                break
+    else:
+        merged = _merge([merged] + parts)
+    if limit is not None and len(merged[0]) > limit:
+        log.info("aggregated graph (%d nodes, over %d entries) does not fit the memory budget", k, limit)
+        return None
+    keys, weights = merged
+    G2 = CSRGraph.from_coo(k, keys // k, keys % k, weights)
+    G2.sizes = np.bincount(membership, weights=G.sizes, minlength=k).astype(np.float64)
+    return G2
+
+def coarse_edge_chunks(G: ShardedGraph, membership: np.ndarray, k: int) -> Callable[[], Iterator[EdgeChunk]]:
+    """
+    The aggregated graph of aggregate_sharded_graph as a re-iterable stream of edge
+    chunks, one per shard, for SpillFn: every (supernode, supernode) pair once with
+    su <= sv, so that mirroring the chunks rebuilds the aggregated entries.
+    """
+    def chunks() -> Iterator[EdgeChunk]:
+        for shard in G.shards():
+            rows, cols, w = _scan(shard)
+            su, sv = membership[rows], membership[cols]
+            upper = su <= sv
+            keys, weights = _reduce(su[upper] * k + sv[upper], w[upper])
+            yield keys // k, keys % k, weights
+    return chunks
+
+def sharded_quality(G: ShardedGraph, P: Partition, objective: IncrementalObjective) -> float:
+    """
+    objective.quality(G, P) in one pass over the shards, with the statistics
+    Partition.bind() would hold (inner entries summed per community, so an inner edge
+    counts twice and a self-loop once).
+    """
+    comm = community_membership(P, G.num_nodes())
+    k = int(comm.max()) + 1 if len(comm) else 0
+    internal = np.zeros(k, dtype=np.float64)
+    for shard in G.shards():
+        rows, cols, w = _scan(shard)
+        inner = comm[rows] == comm[cols]
+        internal += np.bincount(comm[rows[inner]], weights=w[inner], minlength=k)
+    degree = np.bincount(comm, weights=G.degrees, minlength=k)
+    size = np.bincount(comm, weights=G.sizes, minlength=k).astype(np.float64)
+    return objective.community_quality(internal, degree, size, G.total_weight())
@@ -0,0 +1,243 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+import random
+
+import numpy as np
+
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.events import LocalMovingStats, Observer
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.objective import IncrementalObjective
+
+def gather_rows(G: CSRGraph, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Concatenate the CSR rows of `nodes`: (owner position in `nodes`, neighbor id, weight).
+    """
+    starts = G.offsets[nodes]
+    lens = G.offsets[nodes + 1] - starts
+    owner = np.repeat(np.arange(len(nodes), dtype=np.int64), lens)
+    shift = np.repeat(starts - (np.cumsum(lens) - lens), lens)
+    pos = np.arange(len(owner), dtype=np.int64) + shift
+    return owner, G.indices[pos], G.weights[pos]
+
+def score_batch(
+    G: CSRGraph,
+    batch: np.ndarray,
+    comm: np.ndarray,
+    com_degree: np.ndarray,
+    com_size: np.ndarray,
+    sizes: np.ndarray,
+    total: float,
+    objective: IncrementalObjective,
+    rows: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Best move of every batch node against the given community state, in one NumPy pass.
+
+    Returns (owner, nbr) for the batch's non-loop edges, (p_owner, p_c) for every
+    (node, neighbor community) pair, and per batch position the best neighbor
+    community best_c, whether a fresh community wins (to_new), and whether the node
+    moves at all (moving). rows, when given, are the batch's gather_rows() arrays.
+    """
+    L = len(batch)
+    n = G.num_nodes()
+    owner, nbr, w = gather_rows(G, batch) if rows is None else rows
+    keep = nbr != batch[owner]
+    owner, nbr, w = owner[keep], nbr[keep], w[keep]
+    key = owner * n + comm[nbr]
+    pairs, inv = np.unique(key, return_inverse=True)
+    k_vc = np.bincount(inv, weights=w, minlength=len(pairs))
+    p_owner, p_c = pairs // n, pairs % n
+
+    cur = comm[batch]
+    k_v, n_v = G.degrees[batch], sizes[batch]
+    is_cur = p_c == cur[p_owner]
+    k_vcur = np.zeros(L)
+    k_vcur[p_owner[is_cur]] = k_vc[is_cur]
+    stay = objective.insert_gain(k_vcur, k_v, n_v, com_degree[cur] - k_v, com_size[cur] - n_v, total)
+    gain = objective.insert_gain(
+        k_vc, k_v[p_owner], n_v[p_owner], com_degree[p_c], com_size[p_c], total,
+    ) - stay[p_owner]
+    gain = np.where(is_cur, -np.inf, gain)
+    gain_new = objective.insert_gain(np.zeros(L), k_v, n_v, np.zeros(L), np.zeros(L), total) - stay
+
+    best_gain = np.full(L, -np.inf)
+    best_c = np.full(L, -1, dtype=np.int64)
+    if len(pairs):
+        srt = np.lexsort((-gain, p_owner))
+        heads = srt[np.flatnonzero(np.concatenate(([True], p_owner[srt][1:] != p_owner[srt][:-1])))]
+        best_gain[p_owner[heads]] = gain[heads]
+        best_c[p_owner[heads]] = p_c[heads]
+    # Ties go to the neighbor community, as in the serial candidate order
+    to_new = (gain_new > best_gain) & (gain_new > 0)
+    moving = to_new | (~to_new & (best_gain > 0))
+    return owner, nbr, p_owner, p_c, best_c, to_new, moving
+
+class BatchMover:
+    """
+    Community state and batch loop of move_nodes_fast_vectorized, over any source of
+    rows: rows(nodes) returns gather_rows-style (owner, neighbor, weight) arrays. G only
+    needs num_nodes(), degrees, sizes and total_weight(), so a caller can hand over
+    rows from storage it holds only part of at a time (see drain()).
+    """
+    def __init__(self, G: Any, P: Partition, delta_fn: DeltaFn, batch_size: int = 4096) -> None:
+        if not isinstance(delta_fn, IncrementalObjective):
+            raise TypeError(
+                f"vectorized local moving needs an IncrementalObjective, got {type(delta_fn).__name__}"
+            )
+        self.G = G
+        self.objective = delta_fn
+        n = self.n = G.num_nodes()
+        # Dense community slots 0..n-1; a move to None takes a slot from the free list
+        if isinstance(P, CompactPartition):
+            self.comm = P.compact().copy()
+        else:
+            self.comm = np.empty(n, dtype=np.int64)
+            for idx, cid in enumerate(P.community_ids()):
+                self.comm[list(P.members(cid))] = idx
+        self.sizes = np.ones(n, dtype=np.float64) if G.sizes is None else G.sizes
+        self.com_degree = np.bincount(self.comm, weights=G.degrees, minlength=n)
+        self.com_size = np.bincount(self.comm, weights=self.sizes, minlength=n)
+        self.com_count = np.bincount(self.comm, minlength=n)
+        self.free: List[int] = np.flatnonzero(self.com_count == 0)[::-1].tolist()
+        self.total = G.total_weight()
+
+        # first_touch / first_move hold the earliest batch position that changed a
+        # community / moved a node; entries are reset after every batch.
+        self.first_touch = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        self.first_move = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        self.in_queue = np.zeros(n, dtype=bool)
+        self.batch_size = max(1, batch_size)
+        self.B = self.batch_size
+        self.visited = self.moves = self.peak = 0
+
+    def partition(self) -> CompactPartition:
+        return CompactPartition(self.comm)
+
+    def drain(
+        self,
+        Q: Deque[int],
+        rows: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]],
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Runs the queue until it is empty. Only nodes in lo..hi-1 are ever queued: a
+        neighbor outside that range that the serial rules would requeue is returned
+        instead (unique ids), for the caller to visit once its rows are at hand.
+        """
+        hi = self.n if hi is None else hi
+        G, objective = self.G, self.objective
+        comm, sizes, com_degree, com_size, com_count = self.comm, self.sizes, self.com_degree, self.com_size, self.com_count
+        first_touch, first_move, in_queue, free = self.first_touch, self.first_move, self.in_queue, self.free
+        in_queue[np.fromiter(Q, dtype=np.int64, count=len(Q))] = True
+        outside: List[np.ndarray] = []
+        self.peak = max(self.peak, len(Q))
+
+        while Q:
+            L = min(self.B, len(Q))
+            batch = np.fromiter((Q.popleft() for _ in range(L)), dtype=np.int64, count=L)
+            pos = np.arange(L, dtype=np.int64)
+
+            cur = comm[batch]
+            k_v, n_v = G.degrees[batch], sizes[batch]
+            owner, nbr, p_owner, p_c, best_c, to_new, moving = score_batch(
+                G, batch, comm, com_degree, com_size, sizes, self.total, objective, rows(batch),
+            )
+
+            # Conflict check: earliest mover position that affects each batch node
+            mp = pos[moving]
+            np.minimum.at(first_touch, cur[mp], mp)
+            old_mp = mp[~to_new[mp]]
+            np.minimum.at(first_touch, best_c[old_mp], old_mp)
+            first_move[batch[mp]] = mp
+            affected = first_touch[cur]
+            if len(p_owner):
+                np.minimum.at(affected, p_owner, first_touch[p_c])
+                np.minimum.at(affected, owner, first_move[nbr])
+            clean = affected >= pos
+            first_touch[cur[mp]] = np.iinfo(np.int64).max
+            first_touch[best_c[old_mp]] = np.iinfo(np.int64).max
+            first_move[batch[mp]] = np.iinfo(np.int64).max
+
+            movers = pos[moving & clean]
+            src = cur[movers]
+            np.subtract.at(com_count, src, 1)
+            free.extend(np.unique(src[com_count[src] == 0]).tolist())
+            dest = best_c[movers]
+            new_slots = to_new[movers]
+            if new_slots.any():
+                dest[new_slots] = [free.pop() for _ in range(int(new_slots.sum()))]
+            np.add.at(com_count, dest, 1)
+            vs = batch[movers]
+            comm[vs] = dest
+            np.subtract.at(com_degree, src, k_v[movers])
+            np.add.at(com_degree, dest, k_v[movers])
+            np.subtract.at(com_size, src, n_v[movers])
+            np.add.at(com_size, dest, n_v[movers])
+
+            # Requeue, in mover order: neighbors outside the mover's new community
+            in_queue[batch[clean]] = False
+            if len(vs):
+                m_owner, m_nbr, _ = rows(vs)
+                cand = m_nbr[(comm[m_nbr] != dest[m_owner]) & ~in_queue[m_nbr]]
+                if len(cand):
+                    _, first = np.unique(cand, return_index=True)
+                    cand = cand[np.sort(first)]
+                    local = (cand >= lo) & (cand < hi)
+                    if not local.all():
+                        outside.append(cand[~local])
+                        cand = cand[local]
+                    in_queue[cand] = True
+                    Q.extend(cand.tolist())
+
+            deferred = batch[~clean]
+            if len(deferred):
+                Q.extendleft(reversed(deferred.tolist()))
+            self.visited += L - len(deferred)
+            self.moves += len(vs)
+            self.peak = max(self.peak, len(Q))
+            ratio = float(clean.mean())
+            if ratio < 0.5:
+                self.B = max(min(16, self.batch_size), self.B // 2)
+            elif ratio > 0.9:
+                self.B = min(self.batch_size, 2 * self.B)
+
+        if not outside:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(outside))
+
+def move_nodes_fast_vectorized(
+    G: CSRGraph,
+    P: Partition,
+    delta_fn: DeltaFn,
+    batch_size: int = 4096,
+    rng: Optional[random.Random] = None,
+    observer: Optional[Observer] = None,
+) -> Partition:
+    """
+    Array-backed local moving with the same queue/requeue rules as move_nodes_fast.
+
+    Nodes are taken from the queue in batches. One NumPy pass accumulates k_{v,C} for
+    every (node, neighbor community) pair of the batch and evaluates the objective's
+    insert_gain on all of them at once. A node's move is applied only if no earlier
+    mover of the batch is its neighbor or touched one of its candidate communities, so
+    every applied move is scored against exactly the state the serial loop would see.
+    Conflicting nodes go back to the queue front in order; the batch shrinks when
+    conflicts are frequent and grows back when they are rare. rng replaces the global
+    `random` module for the initial node order; an observer receives one
+    LocalMovingStats when the queue empties (deferred nodes are not counted as visits).
+    """
+    mover = BatchMover(G, P, delta_fn, batch_size)
+    n = G.num_nodes()
+    if n == 0:
+        return P
+    order = list(range(n))
+    (rng or random).shuffle(order)
+    mover.drain(deque(order), lambda nodes: gather_rows(G, nodes))
+    if observer is not None:
+        observer.emit(LocalMovingStats(mover.visited, mover.moves, mover.peak))
+    return mover.partition()
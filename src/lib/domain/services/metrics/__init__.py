@@ -0,0 +1,145 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.lib.domain.types.nodes import BaseNode
+from src.lib.domain.models.csr_graph import CSRGraph
+
+# Partition quality over a membership array: (G, labels) -> score, higher is better
+QualityFn = Callable[[CSRGraph, np.ndarray], float]
+
+def membership_array(G: CSRGraph, communities: Sequence[Set[BaseNode]]) -> np.ndarray:
+    """
+    labels[i] = index of the community holding G's node i (communities are keyed by label).
+    """
+    labels = np.full(G.num_nodes(), -1, dtype=np.int64)
+    sizes = np.fromiter(map(len, communities), dtype=np.int64, count=len(communities))
+    ids = np.fromiter(map(G.id_of, chain.from_iterable(communities)), dtype=np.int64, count=int(sizes.sum()))
+    labels[ids] = np.repeat(np.arange(len(communities), dtype=np.int64), sizes)
+    if (labels < 0).any():
+        raise ValueError(f"{int((labels < 0).sum())} nodes are not in any community")
+    return labels
+
+def communities_from_labels(G: CSRGraph, labels: np.ndarray) -> List[Set[BaseNode]]:
+    order = np.argsort(labels, kind="stable")
+    cuts = np.flatnonzero(np.diff(labels[order])) + 1
+    return [{G.label(u) for u in chunk.tolist()} for chunk in np.split(order, cuts) if len(chunk)]
+
+def modularity(G: CSRGraph, labels: np.ndarray, gamma: float = 1.0) -> float:
+    """
+    Q = sum_C [ in_C / 2m - gamma * (Sigma_C / 2m)^2 ], with the same degree and
+    self-loop conventions as ModularityObjective.
+    """
+    total = G.total_weight()
+    if total <= 0:
+        return 0.0
+    rows = G.row_ids()
+    inner = labels[rows] == labels[G.indices]
+    tot = np.bincount(labels, weights=G.degrees)
+    return float(G.weights[inner].sum() / total - gamma * (tot ** 2).sum() / total ** 2)
+
+def cpm(G: CSRGraph, labels: np.ndarray, gamma: float = 1.0) -> float:
+    """
+    H = sum_C [ in_C / 2 - gamma * n_C (n_C - 1) / 2 ] over node sizes (G.sizes, or
+    ones), the same conventions as CPMObjective.community_quality.
+    """
+    rows = G.row_ids()
+    inner = labels[rows] == labels[G.indices]
+    size = np.bincount(labels, weights=G.sizes) if G.sizes is not None else np.bincount(labels).astype(np.float64)
+    return float(G.weights[inner].sum() / 2.0 - gamma * (size * (size - 1.0)).sum() / 2.0)
+
+def dense_labels(labels: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    (ids, k): labels renumbered to 0..k-1 in increasing label order. Non-negative int
+    labels below a few times their count are renumbered by counting, others by sorting.
+    """
+    labels = np.asarray(labels)
+    if not len(labels):
+        return np.zeros(0, dtype=np.int64), 0
+    if labels.dtype.kind in "iu" and labels.min() >= 0 and labels.max() < 4 * len(labels):
+        present = np.bincount(labels) > 0
+        rank = np.cumsum(present) - 1
+        return rank[labels], int(present.sum())
+    uniq, ids = np.unique(labels, return_inverse=True)
+    return ids.astype(np.int64), len(uniq)
+
+def _entropy(counts: np.ndarray, n: int) -> float:
+    p = counts[counts > 0] / n
+    return -float((p * np.log(p)).sum())
+
+def _pairs(counts: np.ndarray) -> float:
+    counts = counts.astype(np.float64)
+    return float((counts * (counts - 1.0)).sum() / 2.0)
+
+@dataclass(frozen=True)
+class PartitionComparison:
+    """
+    Agreement between two labelings of the same nodes. nmi = 2 I / (H_a + H_b)
+    (1 for two single-community labelings); ari is the adjusted Rand index (1 when the
+    labelings are identical, ~0 for independent ones); vi = H_a + H_b - 2 I, the
+    variation of information in nats (0 when identical, at most log n).
+    """
+    nmi: float
+    ari: float
+    vi: float
+
+class ReferenceComparison:
+    """
+    Compares many labelings against one reference: the reference's dense ids, class
+    sizes, entropy and pair count are computed once, and each compare() is one
+    contingency pass over the candidate (counting into a dense table when
+    k_ref * k_candidate is small, sorting the pair keys otherwise).
+    """
+    def __init__(self, reference: np.ndarray) -> None:
+        self.ids, self.k = dense_labels(reference)
+        self.n = len(self.ids)
+        self.counts = np.bincount(self.ids, minlength=self.k)
+        self.entropy = _entropy(self.counts, self.n)
+        self.pairs = _pairs(self.counts)
+
+    def compare(self, labels: np.ndarray) -> PartitionComparison:
+        ids, k = dense_labels(labels)
+        if len(ids) != self.n:
+            raise ValueError(f"labelings differ in length ({self.n} vs {len(ids)})")
+        n = self.n
+        if not n:
+            return PartitionComparison(1.0, 1.0, 0.0)
+        key = self.ids * k + ids
+        if self.k * k <= 4 * n:
+            joint = np.bincount(key, minlength=self.k * k)
+        else:
+            joint = np.unique(key, return_counts=True)[1]
+        counts = np.bincount(ids, minlength=k)
+        h_a, h_b, h_ab = self.entropy, _entropy(counts, n), _entropy(joint, n)
+        mutual = h_a + h_b - h_ab
+        nmi = 1.0 if h_a + h_b == 0 else max(0.0, 2.0 * mutual / (h_a + h_b))
+        both, total = _pairs(joint), n * (n - 1) / 2.0
+        expected = self.pairs * _pairs(counts) / total if total else 0.0
+        top = (self.pairs + _pairs(counts)) / 2.0
+        ari = 1.0 if top == expected else (both - expected) / (top - expected)
+        return PartitionComparison(nmi, ari, max(0.0, h_ab - mutual))
+
+    def compare_many(self, partitions: Iterable[np.ndarray]) -> Iterator[PartitionComparison]:
+        """
+        compare() over partitions as they come (a generator keeps memory at one labeling).
+        """
+        return (self.compare(labels) for labels in partitions)
+
+def compare_partitions(a: np.ndarray, b: np.ndarray) -> PartitionComparison:
+    return ReferenceComparison(a).compare(b)
+
+def normalized_mutual_information(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    NMI = 2 I(a; b) / (H(a) + H(b)) between two labelings of the same nodes, from
+    their sparse contingency table. Two single-community labelings score 1.
+    """
+    return compare_partitions(a, b).nmi
+
+def adjusted_rand_index(a: np.ndarray, b: np.ndarray) -> float:
+    return compare_partitions(a, b).ari
+
+def variation_of_information(a: np.ndarray, b: np.ndarray) -> float:
+    return compare_partitions(a, b).vi
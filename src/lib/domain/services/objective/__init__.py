@@ -0,0 +1,158 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.domain.types.delta import DeltaFn
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.types.objective import Objective
+from src.lib.domain.types.general import CommunityId
+from src.lib.domain.models.partition import Partition
+
+def neighbor_community_weights(
+    G: GraphLike,
+    P: Partition,
+    v: NodeLike,
+) -> Tuple[Dict[CommunityId, float], float]:
+    """
+    One O(deg(v)) pass: k_{v,C} for every community C adjacent to v, plus v's self-loop weight.
+    """
+    k: Dict[CommunityId, float] = defaultdict(float)
+    loop = 0.0
+    for u, w in G.neighbor_items(v):
+        if u == v:
+            loop = w
+        else:
+            k[P.community_of(u)] += w
+    return k, loop
+
+class IncrementalObjective(ABC):
+    """
+    Base for objectives whose move gain only needs k_{v,C} and the community state
+    tracked by Partition.bind(). Subclasses define insert_gain(): the gain of putting
+    an isolated v into C; moving v from A to B then scores insert(B) - insert(A \\ v),
+    and a fresh singleton scores insert(empty) = 0.
+    """
+    @abstractmethod
+    def insert_gain(
+        self,
+        k_vc: float,
+        k_v: float,
+        n_v: float,
+        tot_c: float,
+        n_c: float,
+        total: float,
+    ) -> float:
+        ...
+
+    @abstractmethod
+    def community_quality(self, internal: np.ndarray, degree: np.ndarray, size: np.ndarray, total: float) -> float:
+        """
+        Objective value summed over communities with these bound stats (Partition.bind
+        conventions); differences of it are what insert_gain scores.
+        """
+
+    def quality(self, G: GraphLike, P: Partition) -> float:
+        P.bind(G)
+        return self.community_quality(
+            _stat_array(P.com_internal), _stat_array(P.com_degree), _stat_array(P.com_size), P.total_weight,
+        )
+
+    def _stay_gain(self, G: GraphLike, P: Partition, v: NodeLike, cur: CommunityId, k_vcur: float) -> float:
+        k_v, n_v = G.degree(v), G.node_size(v)
+        return self.insert_gain(
+            k_vcur, k_v, n_v,
+            P.com_degree[cur] - k_v, P.com_size[cur] - n_v,
+            P.total_weight,
+        )
+
+    def gains(self, G: GraphLike, P: Partition, v: NodeLike) -> Dict[Optional[CommunityId], float]:
+        P.bind(G)
+        k, _loop = neighbor_community_weights(G, P, v)
+        cur = P.community_of(v)
+        base = self._stay_gain(G, P, v, cur, k.get(cur, 0.0))
+        k_v, n_v, total = G.degree(v), G.node_size(v), P.total_weight
+        out: Dict[Optional[CommunityId], float] = {}
+        for c, k_vc in k.items():
+            if c != cur:
+                out[c] = self.insert_gain(k_vc, k_v, n_v, P.com_degree[c], P.com_size[c], total) - base
+        out[cur] = 0.0
+        out[None] = self.insert_gain(0.0, k_v, n_v, 0.0, 0.0, total) - base
+        return out
+
+    def __call__(self, G: GraphLike, P: Partition, v: NodeLike, dest: Optional[CommunityId]) -> float:
+        P.bind(G)
+        cur = P.community_of(v)
+        if dest == cur:
+            return 0.0
+        k, _loop = neighbor_community_weights(G, P, v)
+        base = self._stay_gain(G, P, v, cur, k.get(cur, 0.0))
+        k_v, n_v = G.degree(v), G.node_size(v)
+        if dest is None or P.community_size(dest) == 0:
+            return self.insert_gain(0.0, k_v, n_v, 0.0, 0.0, P.total_weight) - base
+        return self.insert_gain(
+            k.get(dest, 0.0), k_v, n_v, P.com_degree[dest], P.com_size[dest], P.total_weight,
+        ) - base
+
+class ModularityObjective(IncrementalObjective):
+    """
+    Newman-Girvan modularity with resolution gamma:
+    dQ(v -> C) = (k_{v,C} - gamma * k_v * Sigma_C / 2m) / m
+    """
+    def __init__(self, gamma: float = 1.0) -> None:
+        self.gamma = gamma
+
+    def insert_gain(self, k_vc: float, k_v: float, n_v: float, tot_c: float, n_c: float, total: float) -> float:
+        if total <= 0:
+            return 0.0
+        return 2.0 * (k_vc - self.gamma * k_v * tot_c / total) / total
+
+    def community_quality(self, internal: np.ndarray, degree: np.ndarray, size: np.ndarray, total: float) -> float:
+        if total <= 0:
+            return 0.0
+        return float(internal.sum() / total - self.gamma * (degree ** 2).sum() / total ** 2)
+
+class CPMObjective(IncrementalObjective):
+    """
+    Constant Potts model with resolution gamma over base-node counts:
+    dH(v -> C) = k_{v,C} - gamma * n_v * n_C
+    """
+    def __init__(self, gamma: float = 1.0) -> None:
+        self.gamma = gamma
+
+    def insert_gain(self, k_vc: float, k_v: float, n_v: float, tot_c: float, n_c: float, total: float) -> float:
+        return k_vc - self.gamma * n_v * n_c
+
+    def community_quality(self, internal: np.ndarray, degree: np.ndarray, size: np.ndarray, total: float) -> float:
+        # Bound internal weight counts every inner edge twice
+        return float(internal.sum() / 2.0 - self.gamma * (size * (size - 1.0)).sum() / 2.0)
+
+def _stat_array(stat: Union[np.ndarray, Mapping[CommunityId, float]]) -> np.ndarray:
+    if isinstance(stat, np.ndarray):
+        return stat
+    return np.fromiter(stat.values(), dtype=np.float64, count=len(stat))
+
+class DeltaFnObjective:
+    """
+    Adapter: exposes a legacy per-candidate DeltaFn through the Objective surface.
+    gains() still calls delta_fn once per candidate, so it keeps the old cost profile.
+    """
+    def __init__(self, delta_fn: DeltaFn) -> None:
+        self.delta_fn = delta_fn
+
+    def gains(self, G: GraphLike, P: Partition, v: NodeLike) -> Dict[Optional[CommunityId], float]:
+        candidates: Dict[Optional[CommunityId], float] = {P.community_of(u): 0.0 for u in G.neighbors(v)}
+        candidates[P.community_of(v)] = 0.0
+        candidates[None] = 0.0
+        return {C: self.delta_fn(G, P, v, C) for C in candidates}
+
+    def __call__(self, G: GraphLike, P: Partition, v: NodeLike, dest: Optional[CommunityId]) -> float:
+        return self.delta_fn(G, P, v, dest)
+
+def as_objective(delta_fn: Union[DeltaFn, Objective]) -> Objective:
+    if hasattr(delta_fn, "gains"):
+        return delta_fn  # type: ignore[return-value]
+    return DeltaFnObjective(delta_fn)
@@ -1,33 +1,93 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Set, Union
+import random
+
+import numpy as np
 
 from src.lib.domain.services.graph import merge_nodes_subset
-from src.lib.domain.types.nodes import NodeLike
-from src.lib.domain.models.graph import Graph
+from src.lib.domain.types.nodes import NodeLike, BaseNode
+from src.lib.domain.types.graph import GraphLike
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.sharded_graph import ShardedGraph
 from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
 from src.lib.domain.types.general import CommunityId
 from src.lib.domain.types.delta import DeltaFn
 
-def singleton_partition(G: Graph) -> Partition:
+def singleton_partition(G: Union[GraphLike, ShardedGraph]) -> Partition:
+    if isinstance(G, (CSRGraph, ShardedGraph)):
+        return CompactPartition.singletons(G.num_nodes())
     return Partition({v: v for v in G.nodes()})
 
+def intern_partition(G: Union[CSRGraph, ShardedGraph], P: Partition) -> CompactPartition:
+    """
+    Re-key a label-keyed partition onto G's int node ids, with dense int community ids.
+    Every node of G must be assigned (ValueError otherwise); a node G lacks raises KeyError.
+    """
+    dense: Dict[CommunityId, int] = {}
+    labels = np.full(G.num_nodes(), -1, dtype=np.int64)
+    for n, cid in P.node2com.items():
+        labels[G.id_of(n)] = dense.setdefault(cid, len(dense))
+    missing = np.flatnonzero(labels < 0)
+    if len(missing):
+        raise ValueError(
+            f"partition leaves {len(missing)} of {G.num_nodes()} nodes unassigned "
+            f"(e.g. {G.label(int(missing[0]))!r})"
+        )
+    return CompactPartition(labels)
+
 def lift_partition_to_aggregated(P_old: Partition, P_refined: Partition) -> Partition:
-    agg_nodes = [frozenset(P_refined.members(cid)) for cid in P_refined.community_ids()]
+    """
+    Partition of aggregate_graph(G, P_refined): supernode s (the s-th refined community)
+    takes the P_old community of any of its members.
+    """
     mapping: Dict[NodeLike, CommunityId] = {}
-    for supernode in agg_nodes:
-        representative: NodeLike = next(iter(supernode))
-        mapping[supernode] = P_old.community_of(representative)
+    for s, cid in enumerate(P_refined.community_ids()):
+        representative: NodeLike = next(iter(P_refined.members(cid)))
+        mapping[s] = P_old.community_of(representative)
     return Partition(mapping)
 
+def lift_partition_by_membership(P_old: Partition, membership: np.ndarray) -> Partition:
+    """
+    Integer-supernode counterpart of lift_partition_to_aggregated: supernode s
+    takes the P_old community of its first member.
+    """
+    supernodes, first = np.unique(membership, return_index=True)
+    if isinstance(P_old, CompactPartition):
+        return CompactPartition(P_old.labels[first])
+    return Partition({
+        int(s): P_old.community_of(int(u)) for s, u in zip(supernodes, first)
+    })
+
+def flatten_hierarchy(
+    top: np.ndarray,
+    memberships: Sequence[np.ndarray],
+    base_labels: Sequence[BaseNode],
+) -> List[Set[BaseNode]]:
+    """
+    Compose level-to-level membership arrays into base-node communities.
+    memberships[l][i] is the level-(l+1) supernode of level-l node i; top[s] is the final
+    community of top-level node s. The composition is one fancy-index per level.
+    """
+    labels = top
+    for membership in reversed(memberships):
+        labels = labels[membership]
+    out: List[Set[BaseNode]] = [set() for _ in range(int(labels.max()) + 1 if len(labels) else 0)]
+    for u, c in zip(base_labels, labels.tolist()):
+        out[c].add(u)
+    return [s for s in out if s]
+
 def refine_partition(
-    G: Graph,
+    G: GraphLike,
     P: Partition,
     delta_fn: DeltaFn,
     gamma: float,
     theta: float,
+    rng: Optional[random.Random] = None,
 ) -> Partition:
     Prefined = singleton_partition(G)
     for cid in P.community_ids():
         C = set(P.members(cid))
-        Prefined = merge_nodes_subset(G, Prefined, C, delta_fn, gamma, theta)
+        Prefined = merge_nodes_subset(G, Prefined, C, delta_fn, gamma, theta, rng)
+    Prefined.drop_empty()
     return Prefined
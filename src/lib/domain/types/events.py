@@ -0,0 +1,85 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Protocol, Union
+
+# Leiden pipeline phases, in the order they run within a level
+PHASE_MOVE = "move"
+PHASE_REFINE = "refine"
+PHASE_AGGREGATE = "aggregate"
+
+@dataclass(frozen=True)
+class LevelStarted:
+    level: int
+    nodes: int
+    edges: int
+
+@dataclass(frozen=True)
+class PhaseStarted:
+    level: int
+    phase: str
+
+@dataclass(frozen=True)
+class PhaseFinished:
+    level: int
+    phase: str
+    seconds: float
+
+@dataclass(frozen=True)
+class LocalMovingStats:
+    """
+    Emitted by a local-moving engine when its queue empties (inside the "move" phase).
+    visited counts node evaluations (a node requeued three times counts three times),
+    moved counts applied moves, queue_peak is the largest queue length reached.
+    """
+    visited: int
+    moved: int
+    queue_peak: int
+
+@dataclass(frozen=True)
+class CommunicationStats:
+    """
+    Emitted by a distributed stage at its end (inside its phase): the coordinator's
+    socket traffic for the stage, summed over all workers. bytes count frames both
+    ways; messages counts frames sent plus received.
+    """
+    phase: str
+    bytes_sent: int
+    bytes_received: int
+    messages: int
+
+@dataclass(frozen=True)
+class LevelFinished:
+    """
+    communities is the count after local moving; quality is the objective's value of
+    that partition (None when the objective cannot score whole partitions). Aggregation
+    keeps every community's internal weight and degree, so the level graph's quality
+    equals the base graph's and never drops from one level to the next.
+    """
+    level: int
+    nodes: int
+    edges: int
+    communities: int
+    quality: Optional[float]
+    seconds: float
+
+@dataclass(frozen=True)
+class RunFinished:
+    """
+    reason says why the run stopped (the STOP_* names of models.leiden_state).
+    """
+    levels: int
+    communities: int
+    seconds: float
+    reason: str = "converged"
+
+LeidenEvent = Union[
+    LevelStarted, PhaseStarted, PhaseFinished, LocalMovingStats, CommunicationStats, LevelFinished, RunFinished,
+]
+
+class Observer(Protocol):
+    """
+    Receives pipeline events synchronously, in order. Stage events (PhaseStarted,
+    LocalMovingStats, CommunicationStats, PhaseFinished) belong to the most recent
+    LevelStarted.
+    """
+    def emit(self, event: LeidenEvent) -> None: ...
@@ -0,0 +1,9 @@
+from __future__ import annotations
+from typing import Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.lib.domain.models.graph import Graph
+    from src.lib.domain.models.csr_graph import CSRGraph
+
+# Either graph model; services only rely on the shared nodes/neighbors/weight/degree surface
+GraphLike = Union['Graph', 'CSRGraph']
@@ -0,0 +1,18 @@
+from __future__ import annotations
+from typing import Dict, Optional, Protocol, TYPE_CHECKING
+from src.lib.domain.types.nodes import NodeLike
+from src.lib.domain.types.general import CommunityId
+from src.lib.domain.types.graph import GraphLike
+
+if TYPE_CHECKING:
+    from src.lib.domain.models.partition import Partition
+
+class Objective(Protocol):
+    """
+    Stateful quality function. gains() scores every candidate community of v
+    (its neighbor communities, its own community and None for a fresh singleton)
+    in one pass; calling it like a DeltaFn scores a single destination.
+    """
+    def gains(self, G: GraphLike, P: 'Partition', v: NodeLike) -> Dict[Optional[CommunityId], float]: ...
+
+    def __call__(self, G: GraphLike, P: 'Partition', v: NodeLike, dest: Optional[CommunityId]) -> float: ...
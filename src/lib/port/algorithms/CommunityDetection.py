@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Protocol, Optional, List, Set
-from src.lib.domain.models.graph import Graph
+from src.lib.domain.types.graph import GraphLike
 from src.lib.domain.models.partition import Partition
 from src.lib.domain.types.nodes import BaseNode
 from src.lib.domain.types.delta import DeltaFn
@@ -9,10 +9,11 @@ class CommunityDetectionPort(Protocol):
     """
     Port: community-detection algorithm.
     Accepts an optional initial partition; returns final communities as sets of base nodes.
+    Partitions are always keyed by the caller's node labels, whichever graph model is used.
     """
     def detect(
         self,
-        g: Graph,
+        g: GraphLike,
         p0: Optional[Partition],
         *,
         delta_fn: DeltaFn,
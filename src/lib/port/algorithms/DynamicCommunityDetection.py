@@ -0,0 +1,31 @@
+from __future__ import annotations
+from typing import Protocol, Optional, Iterable, List, Set, Tuple
+from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.types.nodes import BaseNode, NodeLike
+from src.lib.domain.types.delta import DeltaFn
+
+class DynamicCommunityDetectionPort(Protocol):
+    """
+    Port: community detection that follows one graph through batches of edge updates.
+    start() runs a full detection on g and keeps its state; update() edits g in place
+    and returns the updated communities as sets of base nodes.
+    """
+    def start(
+        self,
+        g: Graph,
+        p0: Optional[Partition],
+        *,
+        delta_fn: DeltaFn,
+        gamma: float = 1.0,
+        theta: float = 1.0,
+        max_levels: int = 100,
+    ) -> List[Set[BaseNode]]: ...
+
+    def update(
+        self,
+        *,
+        inserted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+        deleted: Iterable[Tuple[NodeLike, NodeLike]] = (),
+        reweighted: Iterable[Tuple[NodeLike, NodeLike, float]] = (),
+    ) -> List[Set[BaseNode]]: ...
@@ -0,0 +1,15 @@
+from __future__ import annotations
+from typing import Optional, Protocol
+from src.lib.domain.models.leiden_state import LeidenState
+
+class CheckpointPort(Protocol):
+    """
+    Port: durable store for one run's LeidenState. save() is called after every level
+    and when the run stops (state.stop_reason set); load() returns the last saved state,
+    or None if there is none.
+    """
+    def save(self, state: LeidenState) -> None: ...
+
+    def load(self) -> Optional[LeidenState]: ...
+
+    def clear(self) -> None: ...
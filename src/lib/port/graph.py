@@ -1,7 +1,28 @@
 from __future__ import annotations
-from typing import Protocol, Sequence, Tuple
+from pathlib import Path
+from typing import Iterable, Protocol, Tuple, Union
 from src.lib.domain.types.nodes import NodeLike
 from src.lib.domain.models.graph import Graph
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.sharded_graph import ShardedGraph
 
 class GraphBuilderPort(Protocol):
-    def build(self, edges: Sequence[Tuple[NodeLike, NodeLike, float]]) -> Graph: ...
+    def build(self, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> Graph: ...
+
+class CSRGraphBuilderPort(Protocol):
+    def build(self, edges: Iterable[Tuple[NodeLike, NodeLike, float]]) -> CSRGraph: ...
+
+class GraphReaderPort(Protocol):
+    """
+    Port: loads a graph file (edge list, CSV, binary CSR) into the array-backed graph.
+    """
+    def read(self, path: Union[str, Path]) -> CSRGraph: ...
+
+class GraphWriterPort(Protocol):
+    def write(self, G: CSRGraph, path: Union[str, Path]) -> None: ...
+
+class ShardedGraphReaderPort(Protocol):
+    """
+    Port: opens a graph stored in node-range shards for out-of-core processing.
+    """
+    def read(self, path: Union[str, Path]) -> ShardedGraph: ...
@@ -0,0 +1,14 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Protocol, Union
+from src.lib.domain.models.hierarchy import Hierarchy
+
+class HierarchyWriterPort(Protocol):
+    """
+    Port: persists a Leiden Hierarchy so that other processes can look communities
+    up without rerunning detection.
+    """
+    def write(self, h: Hierarchy, path: Union[str, Path]) -> None: ...
+
+class HierarchyReaderPort(Protocol):
+    def read(self, path: Union[str, Path]) -> Hierarchy: ...
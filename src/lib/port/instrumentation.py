@@ -0,0 +1,13 @@
+from __future__ import annotations
+from typing import Protocol
+from src.lib.domain.types.events import LeidenEvent
+
+class InstrumentationPort(Protocol):
+    """
+    Port: sink for Leiden pipeline events (src.lib.domain.types.events). emit() runs
+    inline on the algorithm's thread, so it should only record; close() flushes
+    whatever the adapter buffers (files, tracing state) once the run is over.
+    """
+    def emit(self, event: LeidenEvent) -> None: ...
+
+    def close(self) -> None: ...
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from typing import Optional, Protocol
+from src.lib.domain.models.hierarchy import Hierarchy
+
+class ResultCachePort(Protocol):
+    """
+    Port: detection results by content key (see detection_key). get() returns None on a
+    miss; put() may drop results it cannot store. Implementations must tolerate other
+    processes reading, writing and evicting the same entries concurrently.
+    """
+    def get(self, key: str) -> Optional[Hierarchy]: ...
+
+    def put(self, key: str, h: Hierarchy) -> None: ...
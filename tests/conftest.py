@@ -0,0 +1,47 @@
+from __future__ import annotations
+import random
+
+import pytest
+
+from src.lib.domain.models.graph import Graph
+from src.lib.benchmark.generators import planted_partition
+
+def _graph(edges):
+    G = Graph()
+    for u, v, w in edges:
+        G.add_edge(u, v, w)
+    return G
+
+@pytest.fixture
+def triangle() -> Graph:
+    return _graph([("a", "b", 1.0), ("b", "c", 1.0), ("a", "c", 1.0)])
+
+@pytest.fixture
+def line() -> Graph:
+    return _graph([(0, 1, 1.0), (1, 2, 2.0), (2, 3, 1.0)])
+
+@pytest.fixture
+def star() -> Graph:
+    return _graph([(0, leaf, 1.0) for leaf in range(1, 6)])
+
+@pytest.fixture
+def bridge() -> Graph:
+    """
+    Two triangles joined by one light edge (plus a self-loop), the smallest graph
+    with an obvious two-community answer.
+    """
+    return _graph([
+        ("a", "b", 1.0), ("b", "c", 1.0), ("a", "c", 1.0), ("c", "d", 0.1),
+        ("d", "e", 1.0), ("e", "f", 1.0), ("d", "f", 1.0), ("f", "f", 0.5),
+    ])
+
+@pytest.fixture
+def planted():
+    """
+    600 nodes in 12 planted blocks of 50: (CSRGraph, planted community per node).
+    """
+    return planted_partition(600, 50, 10.0, 1.0, seed=7)
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(11)
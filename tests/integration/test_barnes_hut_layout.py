@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.layout.force_directed import BarnesHutLayout
+
+def test_default_hierarchy_shrinks_at_every_level(planted):
+    G, truth = planted
+    levels = BarnesHutLayout()._levels(G)
+    counts = [k for _, k in levels]
+    assert len(counts) >= 2
+    assert all(b < a for a, b in zip(counts, counts[1:]))
+    assert counts[0] < G.num_nodes() and counts[-1] <= 2 * len(np.unique(truth))
+
+def test_stalled_levels_are_cut(planted):
+    G, _ = planted
+    h = LeidenAdapter().detect_hierarchy(
+        G, None, delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01, seed=1,
+    )
+    stalled = Hierarchy(list(h.maps) + [np.arange(h.num_communities())])
+    assert BarnesHutLayout(hierarchy=stalled)._levels(G)[-1][1] == h.num_communities()
+    assert len(BarnesHutLayout(hierarchy=stalled)._levels(G)) == len(BarnesHutLayout(hierarchy=h)._levels(G))
+
+def test_planted_blocks_are_laid_out_together(planted):
+    G, truth = planted
+    xy = BarnesHutLayout(iterations=60, seed=3).layout(G)
+    assert xy.shape == (G.num_nodes(), 2) and np.all(np.isfinite(xy))
+    centroids = np.stack([xy[truth == c].mean(axis=0) for c in np.unique(truth)])
+    spread = np.mean([np.linalg.norm(xy[truth == c] - centroids[c], axis=1).mean() for c in np.unique(truth)])
+    gaps = np.linalg.norm(centroids[:, None] - centroids[None, :], axis=2)
+    assert spread < np.median(gaps[np.triu_indices(len(centroids), 1)])
+
+def test_layout_is_deterministic_for_a_seed(bridge):
+    a = BarnesHutLayout(seed=5).get_positions(bridge)
+    b = BarnesHutLayout(seed=5).get_positions(bridge)
+    assert a == b and set(a) == bridge.nodes()
+
+def test_hierarchy_over_other_nodes_is_rejected(planted):
+    G, _ = planted
+    with pytest.raises(ValueError, match="hierarchy has 3 nodes"):
+        BarnesHutLayout(hierarchy=Hierarchy([np.array([0, 0, 1])])).layout(G)
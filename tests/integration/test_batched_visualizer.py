@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.adapter.layout.random_layout import RandomLayout
+from src.lib.adapter.visualizer.batched import (
+    DETAIL_COMMUNITIES,
+    DETAIL_NODES,
+    BatchedMatplotlibVisualizer,
+    _community_view,
+    _edge_arrays,
+)
+from src.lib.adapter.visualizer.hulls import HullCache
+
+def _planted_partition(truth):
+    return [set(np.flatnonzero(truth == c).tolist()) for c in np.unique(truth)]
+
+def _xy(n, seed=0):
+    return np.random.default_rng(seed).random((n, 2))
+
+@pytest.mark.parametrize("detail", [DETAIL_NODES, DETAIL_COMMUNITIES])
+def test_renders_png(planted, tmp_path, detail):
+    G, truth = planted
+    path = tmp_path / "g.png"
+    out = BatchedMatplotlibVisualizer(detail=detail).render(G, _planted_partition(truth), _xy(G.num_nodes()), save_path=str(path))
+    assert out == str(path)
+    assert path.read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+
+def test_density_and_sampled_edges_render(planted, tmp_path):
+    G, truth = planted
+    for vis in (BatchedMatplotlibVisualizer(detail=DETAIL_NODES, density_edges=1, density_bins=64),
+                BatchedMatplotlibVisualizer(detail=DETAIL_NODES, max_edges=100)):
+        path = tmp_path / "g.png"
+        vis.render(G, _planted_partition(truth), _xy(G.num_nodes()), save_path=str(path))
+        assert path.stat().st_size > 0
+
+def test_dict_graph_with_mapping_positions(bridge, tmp_path):
+    positions = RandomLayout(seed=1).get_positions(bridge)
+    vis = BatchedMatplotlibVisualizer(detail=DETAIL_NODES)
+    vis.render(bridge, [{"a", "b", "c"}, {"d", "e", "f"}], positions, save_path=str(tmp_path / "g.png"))
+    assert len(vis.hull_cache) == 2
+
+def test_hulls_are_reused_between_renders(planted, tmp_path):
+    G, truth = planted
+    cache = HullCache()
+    xy = _xy(G.num_nodes())
+    partition = _planted_partition(truth)
+    BatchedMatplotlibVisualizer(detail=DETAIL_NODES, hull_cache=cache).render(G, partition, xy)
+    assert cache.misses == len(partition) and cache.hits == 0
+    BatchedMatplotlibVisualizer(detail=DETAIL_NODES, hull_cache=cache).render(G, partition, xy)
+    assert cache.hits == len(partition)
+
+def test_input_errors(planted, bridge):
+    G, truth = planted
+    vis = BatchedMatplotlibVisualizer()
+    with pytest.raises(ValueError, match="shape"):
+        vis.render(G, _planted_partition(truth), np.zeros((3, 2)))
+    with pytest.raises(ValueError, match="cover every node"):
+        vis.render(G, _planted_partition(truth)[1:], _xy(G.num_nodes()))
+    with pytest.raises(KeyError, match="no position"):
+        vis.render(bridge, [set(bridge.nodes())], {"a": (0.0, 0.0)})
+    with pytest.raises(ValueError, match="detail"):
+        BatchedMatplotlibVisualizer(detail="everything")
+
+def test_edge_arrays_match_between_graph_kinds(planted):
+    G, _ = planted
+    names = list(range(G.num_nodes()))
+    csr = _edge_arrays(G, names)
+    d = _edge_arrays(G.to_graph(), names)
+    key = lambda s, t, w: sorted(zip(s.tolist(), t.tolist(), w.tolist()))
+    assert key(*csr) == key(*d)
+    assert len(csr[0]) == G.num_edges() - int(np.count_nonzero(G.row_ids() == G.indices))
+
+def test_community_view_merges_edges_between_communities():
+    xy = np.array([[0.0, 0.0], [2.0, 0.0], [10.0, 0.0], [10.0, 2.0]])
+    community = np.array([0, 0, 1, 1])
+    src, dst, w = np.array([0, 1, 0, 2]), np.array([1, 2, 3, 3]), np.array([1.0, 2.0, 3.0, 4.0])
+    centroids, s, t, weights, sizes = _community_view(xy, community, src, dst, w, 2)
+    assert centroids.tolist() == [[1.0, 0.0], [10.0, 1.0]]
+    assert (s.tolist(), t.tolist(), weights.tolist()) == ([0], [1], [5.0])
+    assert sizes.tolist() == [2.0, 2.0]
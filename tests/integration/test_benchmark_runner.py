@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pytest
+
+from src.lib.benchmark.runner import PHASES, compare_reports, markdown_table, report, run_case
+
+def test_run_case_measures_every_phase():
+    case = run_case("planted", 3_000, engine="vectorized", seed=1, memory=True)
+    assert case.levels and case.communities > 1
+    assert case.nmi > 0.5
+    for name in PHASES:
+        assert case.phases[name].seconds >= 0.0
+    assert case.phases["move"].peak_bytes > 0
+    assert "| planted |" in markdown_table(report([case]))
+
+def test_same_seed_same_partition():
+    a = run_case("ring_of_cliques", 1_000, seed=2, memory=False)
+    b = run_case("ring_of_cliques", 1_000, seed=2, memory=False)
+    assert (a.communities, a.modularity) == (b.communities, b.modularity)
+
+def test_compare_reports_flags_regressions():
+    base = report([run_case("planted", 2_000, seed=1, memory=False)])
+    worse = report([run_case("planted", 2_000, seed=1, memory=False)])
+    worse["cases"][0]["modularity"] -= 0.1
+    worse["cases"][0]["phases"]["move"]["seconds"] = base["cases"][0]["phases"]["move"]["seconds"] * 3 + 1.0
+    # A fast machine can finish the move phase under the default noise floor
+    problems = compare_reports(base, worse, min_seconds=0.0)
+    assert any("modularity" in p for p in problems)
+    assert any("move" in p for p in problems)
+    assert compare_reports(base, {**worse, "schema": -1})[0].startswith("schema")
+
+def test_unknown_family():
+    with pytest.raises(ValueError, match="unknown graph family"):
+        run_case("nope", 100)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import random
+import socket
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.graph import Graph
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.domain.types.events import PHASE_MOVE, PHASE_REFINE, CommunicationStats
+from src.lib.adapter.algorithms.distributed_leiden import DistributedLeidenAdapter
+from src.lib.adapter.distributed.coordinator import DistributedCoordinator
+from src.lib.adapter.distributed.worker import LocalWorkers
+
+class Collect:
+    def __init__(self) -> None:
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+    def close(self) -> None:
+        pass
+
+@pytest.fixture(scope="module")
+def workers():
+    with LocalWorkers(2) as lw:
+        yield lw.addresses
+
+def _detect(addresses, G, seed=1, **kwargs):
+    adapter = DistributedLeidenAdapter(addresses, batch_size=64, min_nodes=0)
+    h = adapter.detect_hierarchy(
+        G, None, delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01,
+        seed=seed, **kwargs,
+    )
+    return adapter, h
+
+def test_distributed_run_finds_the_planted_blocks(workers, planted):
+    G, truth = planted
+    adapter, h = _detect(workers, G)
+    q = ModularityObjective().quality(G, CompactPartition(h.membership().copy()))
+    assert q > 0.7
+    assert h.num_communities() == len(np.unique(truth))
+    assert [t.level for t in adapter.traffic] == list(range(len(adapter.traffic)))
+    assert adapter.traffic[0].nodes == G.num_nodes()
+    assert all(t.bytes_sent > 0 and t.bytes_received > 0 and t.messages > 0 for t in adapter.traffic)
+
+def test_seeded_runs_are_reproducible(workers, planted):
+    G, _ = planted
+    _, a = _detect(workers, G, seed=3)
+    _, b = _detect(workers, G, seed=3)
+    assert np.array_equal(a.membership(), b.membership())
+
+def test_observer_receives_communication_stats(workers, planted):
+    G, _ = planted
+    obs = Collect()
+    _detect(workers, G, observer=obs, max_levels=2)
+    stats = [e for e in obs.events if isinstance(e, CommunicationStats)]
+    assert {e.phase for e in stats} == {PHASE_MOVE, PHASE_REFINE}
+    assert all(e.bytes_sent > 0 and e.messages > 0 for e in stats)
+
+def test_cpm_and_label_keyed_graph(workers, bridge):
+    adapter = DistributedLeidenAdapter(workers, min_nodes=0)
+    communities = adapter.detect(bridge, None, delta_fn=CPMObjective(0.5), gamma=0.5, seed=1)
+    assert sorted(map(sorted, communities)) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_more_workers_than_nodes(workers):
+    g = Graph()
+    g.add_edge("a", "b", 1.0)
+    communities = DistributedLeidenAdapter(workers, min_nodes=0).detect(
+        g, None, delta_fn=ModularityObjective(), seed=1,
+    )
+    assert sorted(map(sorted, communities)) == [["a", "b"]]
+
+def test_coordinator_rejects_bad_input_and_keeps_serving(workers, planted):
+    G, _ = planted
+    P0 = CompactPartition.singletons(G.num_nodes())
+    with DistributedCoordinator(workers, min_nodes=0) as cluster:
+        with pytest.raises(TypeError, match="IncrementalObjective"):
+            cluster.move_nodes(G, P0, lambda *args: 0.0)
+        with pytest.raises(TypeError, match="CSRGraph"):
+            cluster.move_nodes(Graph(), P0, ModularityObjective())
+        with pytest.raises(ValueError, match="must follow move_nodes"):
+            cluster.refine(G, P0, ModularityObjective(), 1.0, 0.01)
+        P = cluster.move_nodes(G, P0, ModularityObjective(), rng=random.Random(1))
+        assert 1 < P.size() < G.num_nodes()
+        cluster.channels[0].send("refine", {}, {})
+        assert cluster.channels[0].recv().kind == "error"
+
+def test_unreachable_worker_raises_oserror():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    with pytest.raises(OSError, match="could not connect"):
+        DistributedCoordinator([("127.0.0.1", port)], timeout=5).connect()
+    with pytest.raises(ValueError):
+        DistributedCoordinator([])
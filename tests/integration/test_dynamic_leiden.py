@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.algorithms.distance.dynamic_leiden import DynamicLeiden
+from src.lib.adapter.algorithms.dynamic_leiden import DynamicLeidenAdapter
+from src.lib.adapter.heuristics.neighbor_weight_delta import heuristic_delta_by_neighbor_weight
+
+def _key(communities):
+    return sorted(sorted(c) for c in communities)
+
+@pytest.fixture
+def session(bridge):
+    adapter = DynamicLeidenAdapter()
+    adapter.start(bridge, None, delta_fn=ModularityObjective(), gamma=1.0 / bridge.total_weight(), theta=0.01, seed=1)
+    return adapter
+
+def test_start_finds_the_triangles(bridge):
+    found = DynamicLeidenAdapter().start(bridge, None, delta_fn=ModularityObjective(), seed=1)
+    assert _key(found) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_bound_stats_follow_updates(bridge):
+    state = DynamicLeiden(bridge, Partition({u: u for u in bridge.nodes()}), ModularityObjective())
+    state.update(inserted=[("c", "g", 1.0), ("g", "h", 1.0)], reweighted=[("a", "b", 2.0)])
+    fresh = Partition(dict(state.P.node2com))
+    objective = ModularityObjective()
+    assert objective.quality(bridge, state.P) == pytest.approx(objective.quality(bridge, fresh))
+    assert set().union(*state.communities()) == bridge.nodes()
+
+def test_strengthened_bridge_can_merge_the_triangles(session):
+    found = session.update(reweighted=[("c", "d", 20.0)])
+    assert any({"c", "d"} <= c for c in found)
+
+def test_missing_deleted_edge_changes_nothing(session, bridge):
+    before = {u: dict(nbrs) for u, nbrs in bridge.adj.items()}
+    with pytest.raises(KeyError):
+        session.update(inserted=[("a", "z", 1.0)], deleted=[("a", "f")])
+    assert bridge.adj == before
+
+def test_update_before_start_fails():
+    with pytest.raises(RuntimeError, match="start"):
+        DynamicLeidenAdapter().update(inserted=[(0, 1, 1.0)])
+
+def test_plain_delta_fn_is_rejected(bridge):
+    with pytest.raises(TypeError, match="IncrementalObjective"):
+        DynamicLeidenAdapter().start(bridge, None, delta_fn=heuristic_delta_by_neighbor_weight)
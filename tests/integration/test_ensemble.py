@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.ensemble import LeidenEnsemble
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+
+def _key(communities):
+    return sorted(sorted(c) for c in communities)
+
+@pytest.fixture
+def params(planted):
+    G, _ = planted
+    return dict(delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01)
+
+def test_best_run_reproduces_a_single_detection(planted, params):
+    G, _ = planted
+    result = LeidenEnsemble().run(G, runs=3, seed=5, **params)
+    assert len(result.seeds) == len(result.qualities) == 3
+    assert result.best_quality == max(result.qualities)
+    assert _key(result.best) == _key(LeidenAdapter().detect(G, None, seed=result.best_seed, **params))
+
+def test_worker_count_does_not_change_the_ensemble(planted, params):
+    G, _ = planted
+    one = LeidenEnsemble(workers=1).run(G, runs=3, seed=5, **params)
+    two = LeidenEnsemble(workers=2).run(G, runs=3, seed=5, **params)
+    assert one.seeds == two.seeds
+    assert one.qualities == pytest.approx(two.qualities)
+    assert _key(one.best) == _key(two.best)
+
+def test_longer_ensemble_extends_the_seed_list(planted, params):
+    G, _ = planted
+    short = LeidenEnsemble().run(G, runs=2, seed=5, **params)
+    long = LeidenEnsemble().run(G, runs=3, seed=5, **params)
+    assert long.seeds[:2] == short.seeds
+
+def test_consensus_covers_every_node(planted, params):
+    G, truth = planted
+    result = LeidenEnsemble().run(G, runs=3, seed=1, consensus=True, **params)
+    assert sum(len(c) for c in result.consensus) == G.num_nodes()
+    assert len(result.consensus) >= len(set(truth.tolist()))
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"runs": 0}, "runs must be >= 1"),
+    ({"runs": 2, "engine": "parallel"}, "engine='parallel'"),
+])
+def test_invalid_arguments(planted, params, kwargs, message):
+    G, _ = planted
+    with pytest.raises(ValueError, match=message):
+        LeidenEnsemble().run(G, **kwargs, **params)
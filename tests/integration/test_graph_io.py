@@ -0,0 +1,77 @@
+from __future__ import annotations
+import io
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.adapter.graph.binary import BinaryGraphReader, BinaryGraphWriter
+from src.lib.adapter.graph.streaming import ChunkedEdgesGraphBuilder, CSVEdgeReader, EdgeListReader
+
+def _same_graph(a: CSRGraph, b: CSRGraph) -> None:
+    np.testing.assert_array_equal(a.offsets, b.offsets)
+    np.testing.assert_array_equal(a.indices, b.indices)
+    np.testing.assert_allclose(a.weights, b.weights)
+    np.testing.assert_allclose(a.degrees, b.degrees)
+
+def test_edge_list_matches_from_edges():
+    text = "# comment\na b 2\nb c\n\nc a 0\na b 1\nc c 0.5\n"
+    G = EdgeListReader(chunk_lines=2).read_stream(io.StringIO(text))
+    expected = CSRGraph.from_edges([("a", "b", 2.0), ("b", "c", 1.0), ("c", "a", 0.0), ("a", "b", 1.0), ("c", "c", 0.5)])
+    _same_graph(G, expected)
+    assert list(G.labels) == ["a", "b", "c"]
+    assert G.id_of("c") == 2
+
+@pytest.mark.parametrize("int_ids", [False, True])
+def test_indented_comments_are_skipped(int_ids):
+    text = "  # note\n0 1 2\n\t# another note\n1 2\n"
+    G = EdgeListReader(int_ids=int_ids).read_stream(io.StringIO(text))
+    assert G.num_nodes() == 3 and G.num_edges() == 2
+    assert G.total_weight() == pytest.approx(6.0)
+
+def test_int_ids_keep_isolated_ids():
+    G = EdgeListReader(int_ids=True).read_stream(io.StringIO("0 3\n3 1 2.5\n"))
+    assert G.num_nodes() == 4
+    assert G.labels is None
+    assert G.degree(2) == 0.0
+    assert G.weight(1, 3) == 2.5
+
+def test_csv_columns_by_header_name():
+    text = 'weight,target,source\n2,"y",x\n1,z,y\n'
+    G = CSVEdgeReader().read_stream(io.StringIO(text))
+    assert G.weight(G.id_of("x"), G.id_of("y")) == 2.0
+    assert G.num_edges() == 2
+
+def test_csv_header_without_the_columns():
+    with pytest.raises(ValueError, match="lacks"):
+        CSVEdgeReader().read_stream(io.StringIO("a,b\n1,2\n"))
+
+def test_chunked_builder_consumes_a_generator():
+    edges = ((i, (i + 1) % 50, 1.0) for i in range(50))
+    G = ChunkedEdgesGraphBuilder(chunk_size=7).build(edges)
+    assert G.num_nodes() == 50 and G.num_edges() == 50
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_binary_round_trip(tmp_path, planted, mmap):
+    G, _ = planted
+    path = tmp_path / "g.bin"
+    BinaryGraphWriter().write(G, path)
+    _same_graph(BinaryGraphReader(mmap=mmap).read(path), G)
+
+def test_binary_round_trip_keeps_string_labels(tmp_path, bridge):
+    G = CSRGraph.from_graph(bridge)
+    BinaryGraphWriter().write(G, tmp_path / "g.bin")
+    H = BinaryGraphReader().read(tmp_path / "g.bin")
+    assert list(H.labels) == list(G.labels)
+    assert H.id_of("f") == G.id_of("f")
+
+def test_binary_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "not.bin"
+    path.write_bytes(b"hello world, not a graph" * 4)
+    with pytest.raises(ValueError, match="not a binary graph"):
+        BinaryGraphReader().read(path)
+
+def test_binary_writer_rejects_mixed_labels(tmp_path):
+    G = CSRGraph.from_edges([(1, "a", 1.0)])
+    with pytest.raises(TypeError):
+        BinaryGraphWriter().write(G, tmp_path / "g.bin")
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import json
+import logging
+import random
+
+import pytest
+
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.types.events import (
+    PHASE_AGGREGATE,
+    PHASE_MOVE,
+    PHASE_REFINE,
+    LevelFinished,
+    LevelStarted,
+    PhaseFinished,
+    PhaseStarted,
+    RunFinished,
+)
+from src.lib.adapter.instrumentation.chrome_trace import ChromeTraceObserver
+from src.lib.adapter.instrumentation.composite import CompositeObserver
+from src.lib.adapter.instrumentation.logging_observer import LoggingObserver
+from src.lib.adapter.instrumentation.tracemalloc_observer import TracemallocObserver
+
+class Collect:
+    def __init__(self) -> None:
+        self.events = []
+        self.closed = False
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+    def close(self) -> None:
+        self.closed = True
+
+def _run(G, observer, engine="serial", seed=1):
+    return leiden_hierarchy(
+        G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(),
+        gamma=1.0 / G.total_weight(), theta=0.01, engine=engine, rng=random.Random(seed),
+        observer=observer,
+    )
+
+@pytest.mark.parametrize("engine", ["serial", "vectorized"])
+def test_level_quality_never_drops_and_ends_at_base_quality(planted, engine):
+    G, _ = planted
+    obs = Collect()
+    h = _run(G, obs, engine)
+    qualities = [e.quality for e in obs.events if isinstance(e, LevelFinished)]
+    assert len(qualities) >= 2
+    assert all(b >= a - 1e-12 for a, b in zip(qualities, qualities[1:]))
+    base = ModularityObjective().quality(G, CompactPartition(h.membership().copy()))
+    assert qualities[-1] == pytest.approx(base)
+
+def test_dict_path_level_quality_ends_at_base_quality(bridge):
+    obs = Collect()
+    obj = ModularityObjective()
+    h = leiden_hierarchy(
+        bridge, Partition({u: u for u in bridge.nodes()}), obj, rng=random.Random(1), observer=obs,
+    )
+    qualities = [e.quality for e in obs.events if isinstance(e, LevelFinished)]
+    assert all(b >= a - 1e-12 for a, b in zip(qualities, qualities[1:]))
+    final = Partition({u: h.community_of(u) for u in bridge.nodes()})
+    assert qualities[-1] == pytest.approx(obj.quality(bridge, final))
+
+def test_events_are_nested_and_end_with_run_finished(planted):
+    G, _ = planted
+    obs = Collect()
+    h = _run(G, obs)
+    started = [e for e in obs.events if isinstance(e, LevelStarted)]
+    finished = [e for e in obs.events if isinstance(e, LevelFinished)]
+    assert [e.level for e in started] == [e.level for e in finished] == list(range(len(started)))
+    open_phase = None
+    for e in obs.events:
+        if isinstance(e, PhaseStarted):
+            assert open_phase is None
+            open_phase = e.phase
+        elif isinstance(e, PhaseFinished):
+            assert e.phase == open_phase
+            open_phase = None
+    assert open_phase is None
+    assert {e.phase for e in obs.events if isinstance(e, PhaseStarted)} == {PHASE_MOVE, PHASE_REFINE, PHASE_AGGREGATE}
+    last = obs.events[-1]
+    assert isinstance(last, RunFinished)
+    assert last.levels == len(finished) and last.communities == h.num_communities()
+
+def test_chrome_trace_is_balanced_json(planted, tmp_path):
+    G, _ = planted
+    path = tmp_path / "trace.json"
+    _run(G, ChromeTraceObserver(path))
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    depth = 0
+    for e in events:
+        depth += {"B": 1, "E": -1}.get(e["ph"], 0)
+        assert depth >= 0
+    assert depth == 0
+    assert any(e["ph"] == "C" and e["name"] == "quality" for e in events)
+
+def test_composite_fans_out_in_order_and_closes_all(planted):
+    G, _ = planted
+    a, b = Collect(), Collect()
+    composite = CompositeObserver(a, b)
+    _run(G, composite)
+    composite.close()
+    assert a.events == b.events and a.events
+    assert a.closed and b.closed
+
+def test_logging_observer_logs_levels_and_run(planted, caplog):
+    G, _ = planted
+    with caplog.at_level(logging.INFO, logger="src.lib.adapter.instrumentation.logging_observer"):
+        _run(G, LoggingObserver())
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith("level 0:") for m in messages)
+    assert messages[-1].startswith("leiden:") and "(converged)" in messages[-1]
+
+def test_logging_observer_is_silent_when_disabled(planted, caplog):
+    G, _ = planted
+    with caplog.at_level(logging.WARNING, logger="src.lib.adapter.instrumentation.logging_observer"):
+        _run(G, LoggingObserver())
+    assert not caplog.records
+
+def test_tracemalloc_observer_records_every_phase(planted):
+    G, _ = planted
+    obs = TracemallocObserver()
+    _run(G, obs)
+    assert set(obs.peak_by_phase()) == {PHASE_MOVE, PHASE_REFINE, PHASE_AGGREGATE}
+    assert all(r.peak_bytes >= 0 for r in obs.records)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.lib.benchmark.generators import planted_partition
+from src.lib.adapter.service.jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_RUNNING,
+    DetectionRequest,
+    JobService,
+)
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=120))
+
+def test_modularity_job_refines_at_its_resolution(planted):
+    G, truth = planted
+
+    async def main():
+        async with JobService(workers=1) as service:
+            job = await service.submit(DetectionRequest(G, theta=0.01, seed=1))
+            return await service.result(job.id)
+
+    h = _run(main())
+    labels = h.membership()
+    assert len(np.unique(labels)) == len(np.unique(truth))
+    for block in np.unique(truth):
+        assert len(np.unique(labels[truth == block])) == 1
+
+def test_identical_requests_share_one_job(planted):
+    G, _ = planted
+
+    async def main():
+        async with JobService(workers=1) as service:
+            a = await service.submit(DetectionRequest(G, seed=1))
+            b = await service.submit(DetectionRequest(G, seed=1), priority=5)
+            other = await service.submit(DetectionRequest(G, seed=2))
+            await service.result(a.id)
+            await service.result(other.id)
+            return a, b, other
+
+    a, b, other = _run(main())
+    assert a is b and a.subscribers == 2
+    assert other is not a and other.state == JOB_DONE
+
+def test_cancel_keeps_a_job_that_another_submitter_still_wants(planted):
+    G, _ = planted
+
+    async def main():
+        async with JobService(workers=1) as service:
+            job = await service.submit(DetectionRequest(G, seed=1))
+            await service.submit(DetectionRequest(G, seed=1))
+            assert await service.cancel(job.id)
+            await service.result(job.id)
+            return job, await service.cancel(job.id)
+
+    job, again = _run(main())
+    assert job.state == JOB_DONE and job.subscribers == 1
+    assert again is False
+
+def test_cancel_by_the_last_submitter_drops_a_queued_job(planted):
+    G, _ = planted
+    big, _ = planted_partition(20_000, 100, 10.0, 1.0, seed=3)
+
+    async def main():
+        async with JobService(workers=1) as service:
+            running = await service.submit(DetectionRequest(big, engine="serial", seed=1))
+            queued = await service.submit(DetectionRequest(G, seed=1))
+            assert queued.state != JOB_DONE
+            assert await service.cancel(queued.id)
+            with pytest.raises(RuntimeError, match="cancelled"):
+                await service.result(queued.id)
+            await service.cancel(running.id)
+            with pytest.raises(RuntimeError):
+                await service.result(running.id)
+            return queued, running
+
+    queued, running = _run(main())
+    assert queued.state == JOB_CANCELLED and queued.subscribers == 0
+    assert running.state == JOB_CANCELLED
+
+def test_events_replay_to_late_subscribers(planted):
+    G, _ = planted
+
+    async def main():
+        async with JobService(workers=1) as service:
+            job = await service.submit(DetectionRequest(G, seed=1))
+            await service.result(job.id)
+            return [record async for record in service.events(job.id)]
+
+    events = _run(main())
+    assert events[0]["event"] == "LevelStarted" and events[-1]["event"] == "RunFinished"
+
+def test_bad_requests():
+    with pytest.raises(ValueError, match="objective"):
+        DetectionRequest("g.bin", objective="infomap")
+    with pytest.raises(ValueError, match="parallel"):
+        DetectionRequest("g.bin", engine="parallel")
+    with pytest.raises(ValueError, match="workers"):
+        JobService(workers=0)
+
+def test_identical_request_after_cancelling_a_running_job_starts_anew(planted):
+    G, _ = planted
+
+    async def main():
+        async with JobService(workers=1) as service:
+            first = await service.submit(DetectionRequest(G, seed=1))
+            assert first.state == JOB_RUNNING
+            assert await service.cancel(first.id)
+            second = await service.submit(DetectionRequest(G, seed=1))
+            return first, second, await service.result(second.id)
+
+    first, second, h = _run(main())
+    assert second is not first and second.subscribers == 1
+    assert second.state == JOB_DONE and h.depth >= 1
+
+def test_a_finished_job_has_all_its_events(planted):
+    G, _ = planted
+
+    async def main():
+        async with JobService(workers=2) as service:
+            jobs = [await service.submit(DetectionRequest(G, seed=seed)) for seed in range(6)]
+            out = []
+            for job in jobs:
+                await service.result(job.id)
+                # No await between the result and this read: nothing else can arrive
+                out.append(list(job.events))
+            return out
+
+    for events in _run(main()):
+        assert events[-1]["event"] == "RunFinished"
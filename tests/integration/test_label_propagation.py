@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.label_propagation import (
+    MODE_SEMI_SYNCHRONOUS,
+    MODE_SYNCHRONOUS,
+    LabelPropagationAdapter,
+    color_classes,
+    propagate_labels,
+)
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+
+def test_color_classes_are_independent_sets(planted):
+    G, _ = planted
+    classes = color_classes(G, np.random.default_rng(1))
+    assert np.array_equal(np.sort(np.concatenate(classes)), np.arange(G.num_nodes()))
+    color = np.empty(G.num_nodes(), dtype=np.int64)
+    for c, members in enumerate(classes):
+        color[members] = c
+    rows = G.row_ids()
+    off_loop = rows != G.indices
+    assert np.all(color[rows[off_loop]] != color[np.asarray(G.indices)[off_loop]])
+
+@pytest.mark.parametrize("weighted", [True, False])
+def test_semi_synchronous_recovers_planted_blocks(planted, weighted):
+    G, truth = planted
+    P = LabelPropagationAdapter().detect_partition(G, None, weighted=weighted, seed=2)
+    labels = P.labels
+    for block in np.unique(truth):
+        assert len(np.unique(labels[truth == block])) == 1
+    assert len(np.unique(labels)) <= len(np.unique(truth))
+
+def test_same_seed_same_communities(planted):
+    G, _ = planted
+    a = LabelPropagationAdapter().detect_partition(G, None, seed=4)
+    b = LabelPropagationAdapter().detect_partition(G, None, seed=4)
+    assert np.array_equal(a.labels, b.labels)
+
+def test_converged_labels_are_a_fixed_point(planted):
+    G, _ = planted
+    rng = np.random.default_rng(5)
+    labels, _ = propagate_labels(G, np.arange(G.num_nodes()), color_classes(G, rng), rng)
+    again, sweeps = propagate_labels(G, labels, color_classes(G, rng), rng)
+    assert sweeps == 1 and np.array_equal(labels, again)
+
+def test_synchronous_mode_is_bounded_by_max_levels(planted):
+    G, _ = planted
+    P = LabelPropagationAdapter().detect_partition(G, None, mode=MODE_SYNCHRONOUS, max_levels=3, seed=1)
+    assert len(P.labels) == G.num_nodes()
+
+def test_seeded_labels_are_kept_when_stable(bridge):
+    p0 = Partition({u: 0 if u in "abc" else 1 for u in bridge.nodes()})
+    found = LabelPropagationAdapter().detect(bridge, p0, seed=1)
+    assert sorted(map(sorted, found)) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_labelled_graph_gives_a_leiden_warm_start(bridge):
+    P = LabelPropagationAdapter().detect_partition(bridge, None, seed=1)
+    assert isinstance(P, Partition) and set(P.node2com) == bridge.nodes()
+    found = LeidenAdapter().detect(bridge, P, delta_fn=ModularityObjective(), seed=1)
+    assert sorted(map(sorted, found)) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_unlabelled_csr_gives_a_compact_partition(planted):
+    G, _ = planted
+    unlabelled = CSRGraph(G.offsets, G.indices, G.weights)
+    assert isinstance(LabelPropagationAdapter().detect_partition(unlabelled, None, seed=1), CompactPartition)
+
+def test_bad_arguments(planted):
+    G, _ = planted
+    with pytest.raises(ValueError, match="mode"):
+        LabelPropagationAdapter().detect(G, None, mode="async")
+    with pytest.raises(ValueError, match="max_levels"):
+        LabelPropagationAdapter().detect(G, None, mode=MODE_SEMI_SYNCHRONOUS, max_levels=0)
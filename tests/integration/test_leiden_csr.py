@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+
+def _sorted(communities):
+    return sorted(sorted(map(str, c)) for c in communities)
+
+@pytest.mark.parametrize("to_csr", [False, True])
+def test_bridge_splits_into_its_triangles(bridge, to_csr):
+    g = CSRGraph.from_graph(bridge) if to_csr else bridge
+    found = LeidenAdapter().detect(g, None, delta_fn=ModularityObjective(), seed=1)
+    assert _sorted(found) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_csr_and_dict_paths_agree_on_labels(bridge):
+    G = CSRGraph.from_graph(bridge)
+    p0 = Partition({u: u for u in bridge.nodes()})
+    found = LeidenAdapter().detect(G, p0, delta_fn=ModularityObjective(), seed=1)
+    assert set().union(*found) == bridge.nodes()
+
+def test_planted_blocks_are_recovered(planted):
+    G, truth = planted
+    found = LeidenAdapter().detect(
+        G, None, delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01, seed=3,
+    )
+    assert len(found) == len(set(truth.tolist()))
+    for c in found:
+        assert len({int(truth[u]) for u in c}) == 1
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from src.lib.adapter.visualizer.convex_hull import MatplotlibVisualizer, _convex_hull
+from src.lib.adapter.visualizer.hulls import HullCache
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    yield
+    plt.close("all")
+
+def test_hulls_are_drawn_from_the_cache(bridge, tmp_path):
+    positions = {"a": (0.0, 0.0), "b": (2.0, 0.0), "c": (1.0, 2.0), "d": (5.0, 0.0), "e": (7.0, 0.0), "f": (6.0, 2.0)}
+    partition = [{"a", "b", "c"}, {"d", "e", "f"}]
+    cache = HullCache()
+    path = tmp_path / "g.png"
+    assert MatplotlibVisualizer(cache).render(bridge, partition, positions, save_path=str(path)) == str(path)
+    assert path.stat().st_size > 0
+    assert cache.misses == 2 and cache.hits == 0
+    # The last two lines are the hulls, closed back on their first vertex
+    for line, comm in zip(plt.gca().lines[-2:], partition):
+        hull = _convex_hull([positions[n] for n in comm])
+        assert list(zip(line.get_xdata(), line.get_ydata())) == hull + hull[:1]
+    MatplotlibVisualizer(cache).render(bridge, partition, positions)
+    assert cache.hits == 2
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.hierarchy.npz_hierarchy import NpzHierarchyReader, NpzHierarchyWriter
+
+def _same(a: Hierarchy, b: Hierarchy) -> None:
+    assert a.depth == b.depth
+    for level in range(a.depth):
+        assert np.array_equal(a.membership(level), b.membership(level))
+    assert (a.labels is None) == (b.labels is None)
+    if a.labels is not None:
+        assert list(a.labels) == list(b.labels)
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_leiden_hierarchy_round_trips(planted, tmp_path, compress):
+    G, _ = planted
+    h = LeidenAdapter().detect_hierarchy(
+        G, None, delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01, seed=1,
+    )
+    path = tmp_path / "h.npz"
+    NpzHierarchyWriter(compress=compress).write(h, path)
+    back = NpzHierarchyReader().read(path)
+    _same(h, back)
+    if not compress:
+        assert isinstance(back.maps[0], np.memmap)
+
+def test_string_labels_round_trip(bridge, tmp_path):
+    h = LeidenAdapter().detect_hierarchy(bridge, None, delta_fn=ModularityObjective(), seed=1)
+    path = tmp_path / "h.npz"
+    NpzHierarchyWriter().write(h, path)
+    back = NpzHierarchyReader().read(path)
+    _same(h, back)
+    assert back.community_of("a") == h.community_of("a")
+
+def test_unlabelled_hierarchy_round_trips(tmp_path):
+    h = Hierarchy([np.array([1, 0, 1, 2]), np.array([0, 0, 1])])
+    path = tmp_path / "h.npz"
+    NpzHierarchyWriter().write(h, path)
+    _same(h, NpzHierarchyReader().read(path))
+
+def test_unreadable_file_is_a_value_error(tmp_path):
+    path = tmp_path / "h.npz"
+    path.write_bytes(b"not a zip")
+    with pytest.raises(ValueError, match="could not read hierarchy"):
+        NpzHierarchyReader().read(path)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import random
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph.vectorized import move_nodes_fast_vectorized
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.parallel.local_moving import ParallelLocalMover
+from src.lib.adapter.heuristics.neighbor_weight_delta import heuristic_delta_by_neighbor_weight
+
+def test_pooled_moving_stays_close_to_the_vectorized_engine(planted):
+    G, _ = planted
+    objective = ModularityObjective()
+    pooled = ParallelLocalMover(2, batch_size=64, min_nodes=0)(
+        G, CompactPartition.singletons(G.num_nodes()), objective, rng=random.Random(1),
+    )
+    vectorized = move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), objective, rng=random.Random(1))
+    assert pooled.size() < G.num_nodes() // 10
+    assert objective.quality(G, pooled) == pytest.approx(objective.quality(G, vectorized), abs=0.1)
+
+def test_small_graphs_use_the_vectorized_engine(planted):
+    G, _ = planted
+    objective = ModularityObjective()
+    start = CompactPartition.singletons(G.num_nodes())
+    small = ParallelLocalMover(2)(G, start, objective, rng=random.Random(4))
+    direct = move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), objective, 8192, random.Random(4))
+    np.testing.assert_array_equal(small.compact(), direct.compact())
+
+def test_plain_delta_fn_is_rejected(planted):
+    G, _ = planted
+    with pytest.raises(TypeError, match="IncrementalObjective"):
+        ParallelLocalMover(2)(G, CompactPartition.singletons(G.num_nodes()), heuristic_delta_by_neighbor_weight)
+
+def test_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        ParallelLocalMover(0)
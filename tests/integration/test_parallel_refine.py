@@ -0,0 +1,45 @@
+from __future__ import annotations
+import random
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.parallel.refine import ProcessPoolRefiner
+
+def _run(G, refiner, seed):
+    return leiden_hierarchy(
+        G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(),
+        1.0 / G.total_weight(), 0.01, refine=refiner, rng=random.Random(seed),
+    ).membership()
+
+def test_pool_and_in_process_refinement_agree(planted):
+    G, _ = planted
+    serial = _run(G, ProcessPoolRefiner(1), 3)
+    pooled = _run(G, ProcessPoolRefiner(2, min_nodes=0, chunks_per_worker=3), 3)
+    np.testing.assert_array_equal(serial, pooled)
+
+def test_adapter_result_does_not_depend_on_workers(planted):
+    G, _ = planted
+    found = [
+        LeidenAdapter().detect_hierarchy(
+            G, None, delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01,
+            seed=3, workers=workers,
+        ).membership()
+        for workers in (1, 2)
+    ]
+    np.testing.assert_array_equal(found[0], found[1])
+
+def test_refined_partition_nests_in_the_input(planted):
+    G, truth = planted
+    P = CompactPartition(truth.astype(np.int64))
+    R = ProcessPoolRefiner(2, min_nodes=0)(G, P, ModularityObjective(), 1.0 / G.total_weight(), 0.01, rng=random.Random(1))
+    for cid in R.community_ids():
+        assert len({int(truth[u]) for u in R.members(cid)}) == 1
+
+def test_workers_must_be_positive():
+    with pytest.raises(ValueError, match="workers must be >= 1"):
+        ProcessPoolRefiner(0)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+import functools
+import logging
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.hierarchy import Hierarchy
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.cache.disk_cache import DiskResultCache, detection_key, graph_digest
+
+class Collect:
+    def __init__(self) -> None:
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+    def close(self) -> None:
+        pass
+
+def _detect(G, cache, **kwargs):
+    args = dict(delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01, seed=1)
+    args.update(kwargs)
+    return LeidenAdapter().detect_hierarchy(G, None, cache=cache, **args)
+
+def test_second_identical_call_is_a_hit(planted, tmp_path):
+    G, _ = planted
+    cache = DiskResultCache(tmp_path)
+    first = _detect(G, cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    obs = Collect()
+    second = _detect(G, cache, observer=obs)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not obs.events
+    for level in range(first.depth):
+        assert np.array_equal(first.membership(level), second.membership(level))
+
+@pytest.mark.parametrize("change", [
+    {"seed": 2}, {"theta": 0.02}, {"max_levels": 1}, {"delta_fn": CPMObjective(0.05)}, {"engine": "vectorized"},
+])
+def test_changed_arguments_miss(planted, tmp_path, change):
+    G, _ = planted
+    cache = DiskResultCache(tmp_path)
+    _detect(G, cache)
+    _detect(G, cache, **change)
+    assert cache.hits == 0 and cache.misses == 2
+
+def test_unseeded_and_budgeted_runs_are_not_cached(planted, tmp_path):
+    G, _ = planted
+    cache = DiskResultCache(tmp_path)
+    _detect(G, cache, seed=None)
+    _detect(G, cache, time_budget=60.0)
+    assert cache.hits == cache.misses == 0
+    assert not list(tmp_path.glob("??/*.npz"))
+
+def test_string_path_makes_a_disk_cache(bridge, tmp_path):
+    for _ in range(2):
+        found = LeidenAdapter().detect(bridge, None, delta_fn=ModularityObjective(), seed=1, cache=str(tmp_path))
+        assert sorted(map(sorted, found)) == [["a", "b", "c"], ["d", "e", "f"]]
+    assert len(list(tmp_path.glob("??/*.npz"))) == 1
+
+def test_digest_follows_content_not_object(bridge):
+    G = CSRGraph.from_graph(bridge)
+    assert graph_digest(bridge) == graph_digest(G)
+    heavier = CSRGraph(G.offsets, G.indices, G.weights * 2.0, G.labels)
+    assert graph_digest(heavier) != graph_digest(G)
+    key = dict(objective=ModularityObjective(), gamma=1.0, theta=1.0, max_levels=100, seed=1)
+    p0 = Partition({u: 0 for u in bridge.nodes()})
+    assert detection_key(bridge, None, **key) == detection_key(G, None, **key)
+    assert detection_key(bridge, p0, **key) != detection_key(bridge, None, **key)
+    assert detection_key(bridge, None, **key) != detection_key(bridge, None, **key, engine="vectorized")
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskResultCache(tmp_path, max_entries=2)
+    h = Hierarchy([np.array([0, 0, 1])])
+    keys = ["aa" + str(i) * 38 for i in range(3)]
+    cache.put(keys[0], h)
+    time.sleep(0.01)
+    cache.put(keys[1], h)
+    time.sleep(0.01)
+    assert cache.get(keys[0]) is not None  # now the most recent
+    time.sleep(0.01)
+    cache.put(keys[2], h)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+def test_corrupt_entry_is_a_miss(tmp_path, caplog):
+    cache = DiskResultCache(tmp_path)
+    key = "ab" * 20
+    path = tmp_path / key[:2] / f"{key}.npz"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"garbage")
+    with caplog.at_level(logging.WARNING):
+        assert cache.get(key) is None
+    assert "unreadable entry" in caplog.text
+    cache.clear()
+    assert not path.exists()
+
+def test_bad_keys_and_limits(tmp_path):
+    with pytest.raises(ValueError, match="not a cache key"):
+        DiskResultCache(tmp_path).get("../etc")
+    with pytest.raises(ValueError):
+        DiskResultCache(tmp_path, max_bytes=-1)
+
+def _scaled_modularity(G, P, v, cid, gamma=1.0):
+    return gamma * ModularityObjective()(G, P, v, cid)
+
+def _closure(value):
+    return lambda G, P, v, cid: value * ModularityObjective()(G, P, v, cid)
+
+def test_partials_and_closures_are_keyed_by_their_arguments(bridge):
+    key = dict(gamma=1.0, theta=1.0, max_levels=100, seed=1)
+    partial = lambda gamma: functools.partial(_scaled_modularity, gamma=gamma)
+    assert detection_key(bridge, None, objective=partial(0.5), **key) == detection_key(bridge, None, objective=partial(0.5), **key)
+    assert detection_key(bridge, None, objective=partial(0.5), **key) != detection_key(bridge, None, objective=partial(2.0), **key)
+    assert detection_key(bridge, None, objective=_closure(1.0), **key) != detection_key(bridge, None, objective=_closure(2.0), **key)
+    with pytest.raises(TypeError, match="cannot describe"):
+        detection_key(bridge, None, objective=_closure(threading.Lock()), **key)
+
+def test_undescribable_delta_fn_skips_the_cache(bridge, tmp_path, caplog):
+    lock = threading.Lock()
+
+    def delta(G, P, v, cid):
+        with lock:
+            return ModularityObjective()(G, P, v, cid)
+
+    with caplog.at_level(logging.INFO, logger="src.lib.adapter.algorithms.leiden"):
+        found = LeidenAdapter().detect(bridge, None, delta_fn=delta, seed=1, cache=str(tmp_path))
+    assert sorted(map(sorted, found)) == [["a", "b", "c"], ["d", "e", "f"]]
+    assert "result cache skipped" in caplog.text
+    assert not list(tmp_path.glob("??/*.npz"))
@@ -0,0 +1,158 @@
+from __future__ import annotations
+import random
+
+import numpy as np
+import pytest
+
+from src.lib.benchmark.generators import planted_partition
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.leiden_state import (
+    STOP_CONVERGED,
+    STOP_MIN_IMPROVEMENT,
+    STOP_TIME_BUDGET,
+    RunLimits,
+)
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.domain.types.events import LevelFinished, RunFinished
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.checkpoint.npz_store import NpzCheckpointStore
+
+class Collect:
+    def __init__(self) -> None:
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+    def close(self) -> None:
+        pass
+
+class Interrupted(Exception):
+    pass
+
+class StopAfter(NpzCheckpointStore):
+    """
+    Saves like NpzCheckpointStore, then kills the run after `levels` intermediate saves.
+    """
+    def __init__(self, path, levels: int) -> None:
+        super().__init__(path)
+        self.levels = levels
+
+    def save(self, state) -> None:
+        super().save(state)
+        if state.stop_reason is None and state.level >= self.levels:
+            raise Interrupted
+
+def _run(G, limits, seed=1):
+    obs = Collect()
+    h = leiden_hierarchy(
+        G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(),
+        gamma=1.0 / G.total_weight(), theta=0.01, rng=random.Random(seed), observer=obs, limits=limits,
+    )
+    return h, obs.events
+
+def test_zero_min_improvement_does_not_stop_a_converging_run(planted):
+    # Regression: level qualities used to drop after aggregation, so a gain of 0 read as a loss
+    G, _ = planted
+    free, _ = _run(G, None)
+    limited, events = _run(G, RunLimits(min_improvement=0.0))
+    assert events[-1].reason == STOP_CONVERGED
+    assert np.array_equal(free.membership(), limited.membership())
+    assert len([e for e in events if isinstance(e, LevelFinished)]) >= 2
+
+def test_large_min_improvement_stops_after_the_first_gain(planted):
+    G, _ = planted
+    h, events = _run(G, RunLimits(min_improvement=10.0))
+    assert events[-1].reason == STOP_MIN_IMPROVEMENT
+    assert h.depth == 1
+    finished = [e for e in events if isinstance(e, LevelFinished)]
+    assert h.num_communities() == finished[-1].communities
+
+def test_min_improvement_needs_a_quality(planted):
+    G, _ = planted
+    with pytest.raises(TypeError, match="min_improvement"):
+        leiden_hierarchy(
+            G, CompactPartition.singletons(G.num_nodes()), lambda *a: 0.0,
+            limits=RunLimits(min_improvement=0.1),
+        )
+
+def test_spent_time_budget_returns_the_starting_partition(planted):
+    G, _ = planted
+    h, events = _run(G, RunLimits(time_budget=0.0))
+    assert isinstance(events[-1], RunFinished) and events[-1].reason == STOP_TIME_BUDGET
+    assert h.num_communities() == G.num_nodes()
+
+def test_resumed_run_matches_the_uninterrupted_one(planted, tmp_path):
+    G, _ = planted
+    kwargs = dict(delta_fn=ModularityObjective(), gamma=1.0 / G.total_weight(), theta=0.01, seed=5)
+    full = LeidenAdapter().detect_hierarchy(G, None, **kwargs)
+    path = tmp_path / "run.npz"
+    with pytest.raises(Interrupted):
+        LeidenAdapter().detect_hierarchy(G, None, checkpoint=StopAfter(path, 1), **kwargs)
+    saved = NpzCheckpointStore(path).load()
+    assert saved is not None and saved.level == 1 and saved.stop_reason is None
+    resumed = LeidenAdapter().detect_hierarchy(G, None, checkpoint=path, resume=True, **kwargs)
+    assert np.array_equal(full.membership(), resumed.membership())
+    assert NpzCheckpointStore(path).load().stop_reason == STOP_CONVERGED
+
+def test_checkpoint_from_another_graph_is_rejected(planted, tmp_path):
+    G, _ = planted
+    path = tmp_path / "run.npz"
+    LeidenAdapter().detect_hierarchy(G, None, delta_fn=ModularityObjective(), seed=1, checkpoint=path)
+    other, _ = planted_partition(300, 50, 10.0, 1.0, seed=7)
+    with pytest.raises(ValueError, match="different graph"):
+        LeidenAdapter().detect_hierarchy(other, None, delta_fn=ModularityObjective(), checkpoint=path, resume=True)
+
+def _rewired(G):
+    # G with one double edge swap (a-b, c-d -> a-d, c-b): same nodes, edges and weights
+    rows, cols, w = G.row_ids(), np.asarray(G.indices), np.asarray(G.weights)
+    upper = rows < cols
+    edges = set(zip(rows[upper].tolist(), cols[upper].tolist()))
+    a, b = min(edges)
+    c, d = next(
+        (c, d) for c, d in sorted(edges)
+        if len({a, b, c, d}) == 4 and (min(a, d), max(a, d)) not in edges and (min(c, b), max(c, b)) not in edges
+    )
+    edges -= {(a, b), (c, d)}
+    edges |= {(min(a, d), max(a, d)), (min(c, b), max(c, b))}
+    u, v = np.array(sorted(edges)).T
+    assert np.all(w == 1.0)
+    return CSRGraph.from_coo(G.num_nodes(), np.concatenate((u, v)), np.concatenate((v, u)), np.ones(2 * len(u)))
+
+def test_checkpoint_from_a_rewired_graph_of_the_same_size_is_rejected(planted, tmp_path):
+    G, _ = planted
+    H = _rewired(G)
+    assert (H.num_nodes(), H.num_edges(), H.total_weight()) == (G.num_nodes(), G.num_edges(), G.total_weight())
+    path = tmp_path / "run.npz"
+    LeidenAdapter().detect_hierarchy(G, None, delta_fn=ModularityObjective(), seed=1, checkpoint=path)
+    with pytest.raises(ValueError, match="different graph"):
+        LeidenAdapter().detect_hierarchy(H, None, delta_fn=ModularityObjective(), seed=1, checkpoint=path, resume=True)
+
+@pytest.mark.parametrize("change", [dict(gamma=2.0), dict(theta=0.5), dict(delta_fn=CPMObjective(0.1))])
+def test_checkpoint_with_other_parameters_is_rejected(planted, tmp_path, change):
+    G, _ = planted
+    path = tmp_path / "run.npz"
+    kwargs = dict(delta_fn=ModularityObjective(), gamma=1.0, theta=0.01, seed=1)
+    LeidenAdapter().detect_hierarchy(G, None, checkpoint=path, **kwargs)
+    with pytest.raises(ValueError, match="different parameters"):
+        LeidenAdapter().detect_hierarchy(G, None, checkpoint=path, resume=True, **{**kwargs, **change})
+
+def test_npz_store_round_trips_state(planted, tmp_path):
+    G, _ = planted
+    states = []
+    leiden_hierarchy(
+        G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(),
+        gamma=1.0 / G.total_weight(), theta=0.01, rng=random.Random(2), checkpoint=states.append,
+    )
+    store = NpzCheckpointStore(tmp_path / "state.npz")
+    store.save(states[0])
+    back = store.load()
+    assert back.base == states[0].base and back.rng_state == states[0].rng_state
+    assert back.params == states[0].params
+    assert np.array_equal(back.labels, states[0].labels)
+    assert np.array_equal(back.graph.indices, states[0].graph.indices)
+    assert all(np.array_equal(a, b) for a, b in zip(back.memberships, states[0].memberships))
+    store.clear()
+    assert store.load() is None
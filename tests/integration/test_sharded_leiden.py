@@ -0,0 +1,91 @@
+from __future__ import annotations
+import random
+
+import numpy as np
+import pytest
+
+from src.lib.domain.algorithms.distance.leiden import leiden_hierarchy
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph import aggregate_csr_graph
+from src.lib.domain.services.graph.sharded import aggregate_sharded_graph, coarse_edge_chunks
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.adapter.algorithms.leiden import LeidenAdapter
+from src.lib.adapter.graph.sharded import ShardedGraphReader, ShardedGraphWriter, ShardedSpill
+
+# Leaves the aggregated levels of the planted graph over budget, so they are spilled
+BUDGET = 80_000
+
+@pytest.fixture
+def sharded_dir(planted, tmp_path):
+    G, _ = planted
+    ShardedGraphWriter(4000).write(G, tmp_path / "g")
+    return tmp_path / "g"
+
+def _entries(G):
+    return sorted(zip(G.row_ids().tolist(), G.indices.tolist(), np.round(G.weights, 9).tolist()))
+
+def _run(g, n, spill=None, seed=1):
+    return leiden_hierarchy(
+        g, CompactPartition.singletons(n), ModularityObjective(), gamma=1.0 / g.total_weight(),
+        theta=0.01, rng=random.Random(seed), spill=spill,
+    )
+
+def test_write_and_read_round_trip(planted, sharded_dir):
+    G, _ = planted
+    S = ShardedGraphReader(None).read(sharded_dir)
+    assert S.num_shards() > 1
+    assert S.num_nodes() == G.num_nodes() and S.num_edges() == G.num_edges()
+    assert S.total_weight() == pytest.approx(G.total_weight())
+    rows = np.concatenate([shard.row_ids() for shard in S.shards()])
+    cols = np.concatenate([np.asarray(shard.indices) for shard in S.shards()])
+    assert len(rows) == len(G.indices)
+    assert np.array_equal(rows, G.row_ids()) and np.array_equal(cols, G.indices)
+
+def test_sharded_aggregation_matches_csr(planted, sharded_dir):
+    G, truth = planted
+    membership = np.unique(np.asarray(truth), return_inverse=True)[1].astype(np.int64)
+    k = int(membership.max()) + 1
+    S = ShardedGraphReader(None).read(sharded_dir)
+    coarse = aggregate_sharded_graph(S, membership, k)
+    expected = aggregate_csr_graph(G, membership, k)
+    assert _entries(coarse) == _entries(expected)
+    assert np.allclose(coarse.degrees, expected.degrees)
+
+def test_aggregation_over_budget_returns_none_and_streams(planted, sharded_dir, tmp_path):
+    G, _ = planted
+    S = ShardedGraphReader(BUDGET).read(sharded_dir)
+    membership = np.arange(G.num_nodes(), dtype=np.int64) // 2
+    k = G.num_nodes() // 2
+    assert aggregate_sharded_graph(S, membership, k) is None
+    ShardedGraphWriter().write_edges(coarse_edge_chunks(S, membership, k), k, tmp_path / "coarse")
+    spilled = ShardedGraphReader(None).read(tmp_path / "coarse")
+    assert spilled.num_shards() == 1
+    assert _entries(spilled.shard(0)) == _entries(aggregate_csr_graph(G, membership, k))
+    assert spilled.total_weight() == pytest.approx(G.total_weight())
+
+def test_spilled_levels_match_the_in_memory_run(planted, sharded_dir):
+    G, _ = planted
+    expected = _run(ShardedGraphReader(None).read(sharded_dir), G.num_nodes())
+    with ShardedSpill(BUDGET) as spill:
+        h = _run(ShardedGraphReader(BUDGET).read(sharded_dir), G.num_nodes(), spill)
+        assert spill._written and all(p.exists() for p in spill._written)
+        written = list(spill._written)
+    assert not any(p.exists() for p in written)
+    assert h.depth == expected.depth
+    assert np.array_equal(h.membership(), expected.membership())
+    obj = ModularityObjective()
+    assert obj.quality(G, CompactPartition(h.membership().copy())) > 0.7
+
+def test_over_budget_without_spill_raises(planted, sharded_dir):
+    G, _ = planted
+    with pytest.raises(ValueError, match="does not fit"):
+        _run(ShardedGraphReader(BUDGET).read(sharded_dir), G.num_nodes())
+
+def test_adapter_spills_sharded_input(planted, sharded_dir):
+    G, _ = planted
+    expected = _run(ShardedGraphReader(None).read(sharded_dir), G.num_nodes())
+    h = LeidenAdapter().detect_hierarchy(
+        ShardedGraphReader(BUDGET).read(sharded_dir), None, delta_fn=ModularityObjective(),
+        gamma=1.0 / G.total_weight(), theta=0.01, seed=1,
+    )
+    assert np.array_equal(h.membership(), expected.membership())
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph import aggregate_csr_graph, aggregate_graph, community_membership
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.domain.services.partition import lift_partition_by_membership, lift_partition_to_aggregated
+
+OBJECTIVES = [ModularityObjective(), ModularityObjective(0.5), CPMObjective(0.05)]
+OBJECTIVE_IDS = ["modularity", "modularity-0.5", "cpm-0.05"]
+
+def _blocks(G: CSRGraph, size: int) -> CompactPartition:
+    return CompactPartition(np.arange(G.num_nodes(), dtype=np.int64) // size)
+
+def test_csr_aggregation_preserves_degrees_and_total_weight(planted):
+    G, truth = planted
+    membership = truth.astype(np.int64)
+    k = int(membership.max()) + 1
+    G2 = aggregate_csr_graph(G, membership, k)
+    assert G2.total_weight() == pytest.approx(G.total_weight())
+    np.testing.assert_allclose(G2.degrees, np.bincount(membership, weights=G.degrees, minlength=k))
+    np.testing.assert_allclose(G2.sizes, np.bincount(membership, minlength=k))
+
+@pytest.mark.parametrize("objective", OBJECTIVES, ids=OBJECTIVE_IDS)
+def test_csr_aggregation_preserves_quality(planted, objective):
+    G, _ = planted
+    refined = _blocks(G, 10)
+    P = _blocks(G, 50)
+    membership = community_membership(refined, G.num_nodes())
+    G2 = aggregate_csr_graph(G, membership, refined.size())
+    lifted = lift_partition_by_membership(P, membership)
+    assert objective.quality(G2, lifted) == pytest.approx(objective.quality(G, P))
+
+@pytest.mark.parametrize("objective", OBJECTIVES, ids=OBJECTIVE_IDS)
+def test_dict_aggregation_preserves_quality(bridge, objective):
+    refined = Partition({"a": 0, "b": 0, "c": 1, "d": 2, "e": 3, "f": 3})
+    P = Partition({u: int(u in "def") for u in bridge.nodes()})
+    G2 = aggregate_graph(bridge, refined)
+    assert G2.total_weight() == pytest.approx(bridge.total_weight())
+    assert objective.quality(G2, lift_partition_to_aggregated(P, refined)) == pytest.approx(objective.quality(bridge, P))
+
+def test_csr_and_dict_aggregation_agree(bridge):
+    refined = Partition({"a": 0, "b": 0, "c": 1, "d": 2, "e": 3, "f": 3})
+    G = CSRGraph.from_graph(bridge)
+    membership = community_membership(refined, G.num_nodes(), {u: G.id_of(u) for u in bridge.nodes()})
+    csr = aggregate_csr_graph(G, membership, refined.size())
+    dct = aggregate_graph(bridge, refined)
+    assert csr.num_nodes() == dct.num_nodes()
+    for s in dct.nodes():
+        assert dict(csr.neighbor_items(s)) == pytest.approx(dict(dct.neighbor_items(s)))
+        assert csr.node_size(s) == dct.node_size(s)
+
+def test_aggregating_twice_keeps_the_whole_graph_on_one_loop(planted):
+    G, truth = planted
+    G2 = aggregate_csr_graph(G, truth.astype(np.int64), int(truth.max()) + 1)
+    G3 = aggregate_csr_graph(G2, np.zeros(G2.num_nodes(), dtype=np.int64), 1)
+    assert G3.weight(0, 0) == pytest.approx(G.total_weight())
+    assert ModularityObjective().quality(G3, CompactPartition.singletons(1)) == pytest.approx(0.0)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.services.partition import intern_partition
+
+def test_moves_track_counts_and_free_ids():
+    P = CompactPartition(np.array([0, 0, 1, 2]))
+    assert P.size() == 3
+    P.move(2, 0)
+    assert P.size() == 2
+    assert P.community_size(0) == 3
+    assert P.community_of(2) == 0
+    new = P.move(3, None)
+    assert P.community_of(3) == new
+    assert P.members(0) == {0, 1, 2}
+    assert P.is_singleton(3)
+
+def test_add_node_grows_the_label_array():
+    P = CompactPartition(np.array([0, 0, 1]))
+    assert P.add_node(3, 1) == 1
+    new = P.add_node(4)
+    assert P.community_of(4) == new and P.is_singleton(4)
+    assert P.members(1) == {2, 3}
+    assert P.size() == 3
+    with pytest.raises(ValueError, match="already assigned"):
+        P.add_node(0)
+    with pytest.raises(ValueError, match="next node to add is 5"):
+        P.add_node(7)
+
+def test_add_node_rebinds_to_the_grown_graph():
+    P = CompactPartition(np.array([0, 0, 1]))
+    P.bind(CSRGraph.from_edges([(0, 1, 1.0), (1, 2, 1.0)]))
+    P.add_node(3, 1)
+    G = CSRGraph.from_edges([(0, 1, 1.0), (1, 2, 1.0), (2, 3, 2.0)])
+    P.bind(G)
+    fresh = CompactPartition(np.array([0, 0, 1, 1]))
+    fresh.bind(G)
+    ids = fresh.community_ids()
+    assert P.community_ids() == ids
+    np.testing.assert_allclose(P.com_degree[ids], fresh.com_degree[ids])
+    np.testing.assert_allclose(P.com_internal[ids], fresh.com_internal[ids])
+
+def test_compact_renumbers_in_id_order():
+    P = CompactPartition(np.array([4, 4, 1, 7]))
+    np.testing.assert_array_equal(P.compact(), [1, 1, 0, 2])
+    assert P.community_ids() == [0, 1, 2]
+
+def test_snapshot_is_copy_on_write():
+    P = CompactPartition.singletons(4)
+    Q = P.snapshot()
+    Q.move(0, 1)
+    assert P.community_of(0) == 0
+    assert Q.community_of(0) == 1
+    P.move(3, 2)
+    assert Q.community_of(3) == 3
+
+def test_bound_stats_follow_moves(bridge):
+    G = CSRGraph.from_graph(bridge)
+    objective = ModularityObjective()
+    P = CompactPartition.singletons(G.num_nodes())
+    objective.quality(G, P)  # binds
+    for u in range(1, 3):
+        P.move(u, 0)
+    fresh = CompactPartition(P.labels.copy())
+    assert objective.quality(G, P) == pytest.approx(objective.quality(G, fresh))
+
+def test_intern_partition_densifies_community_ids(bridge):
+    G = CSRGraph.from_graph(bridge)
+    P = intern_partition(G, Partition({u: "left" if u in "abc" else "right" for u in bridge.nodes()}))
+    assert P.size() == 2
+    assert P.community_of(G.id_of("a")) == P.community_of(G.id_of("c"))
+    assert P.community_of(G.id_of("a")) != P.community_of(G.id_of("f"))
+
+def test_intern_partition_rejects_a_partial_partition(bridge):
+    G = CSRGraph.from_graph(bridge)
+    with pytest.raises(ValueError, match="2 of 6 nodes unassigned"):
+        intern_partition(G, Partition({u: 0 for u in "abcd"}))
+
+def test_intern_partition_rejects_unknown_nodes(bridge):
+    G = CSRGraph.from_graph(bridge)
+    with pytest.raises(KeyError):
+        intern_partition(G, Partition({u: 0 for u in "abcdefz"}))
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.adapter.graph.from_edges import CSREdgesGraphBuilder
+
+def test_from_graph_matches_dict_surface(bridge):
+    G = CSRGraph.from_graph(bridge)
+    assert G.num_nodes() == bridge.num_nodes()
+    assert G.num_edges() == bridge.num_edges()
+    assert G.total_weight() == pytest.approx(bridge.total_weight())
+    for u in bridge.nodes():
+        i = G.id_of(u)
+        assert G.label(i) == u
+        assert G.degree(i) == pytest.approx(bridge.degree(u))
+        assert {G.label(v): w for v, w in G.neighbor_items(i)} == pytest.approx(dict(bridge.neighbor_items(u)))
+
+def test_rows_are_sorted_and_symmetric(bridge):
+    G = CSRGraph.from_graph(bridge)
+    for u in G.nodes():
+        nbrs, _ = G.neighbor_weights(u)
+        assert np.all(np.diff(nbrs) > 0)
+        for v, w in G.neighbor_items(u):
+            assert G.weight(v, u) == w
+
+def test_degree_sum_is_total_weight(planted):
+    G, _ = planted
+    assert G.degrees.sum() == pytest.approx(G.weights.sum())
+    assert G.total_weight() == pytest.approx(2.0 * G.num_edges())
+
+def test_self_loop_is_stored_once():
+    G = CSRGraph.from_edges([("a", "a", 2.0), ("a", "b", 1.0)])
+    a = G.id_of("a")
+    assert G.weight(a, a) == 2.0
+    assert G.degree(a) == 3.0
+    assert G.num_edges() == 2
+
+def test_from_edges_merges_parallel_and_drops_zero_weight():
+    G = CSREdgesGraphBuilder().build([(1, 2, 1.0), (2, 1, 0.5), (2, 3, 0.0)])
+    assert G.num_nodes() == 2
+    assert G.weight(G.id_of(1), G.id_of(2)) == 1.5
+    with pytest.raises(KeyError):
+        G.id_of(3)
+
+def test_round_trip_to_graph(triangle):
+    assert CSRGraph.from_graph(triangle).to_graph().adj == triangle.adj
+
+def test_cut_weight_and_volume(bridge):
+    G = CSRGraph.from_graph(bridge)
+    left = [G.id_of(u) for u in "abc"]
+    right = [G.id_of(u) for u in "def"]
+    assert G.cut_weight(left, right) == pytest.approx(0.1)
+    assert G.volume(left) == pytest.approx(bridge.volume("abc"))
+    assert G.cut_weight([], right) == 0.0
+
+def test_isolated_ids_have_empty_rows():
+    G = CSRGraph.from_undirected(4, np.array([0]), np.array([1]), np.array([1.0]))
+    assert G.neighbors(3) == []
+    assert G.degree(3) == 0.0
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.benchmark.generators import GENERATORS, lfr_like, planted_partition, ring_of_cliques
+
+@pytest.mark.parametrize("family", sorted(GENERATORS))
+def test_families_are_seeded_simple_graphs(family):
+    G, truth = GENERATORS[family](2_000, 3)
+    H, again = GENERATORS[family](2_000, 3)
+    np.testing.assert_array_equal(G.indices, H.indices)
+    np.testing.assert_array_equal(truth, again)
+    assert len(truth) == G.num_nodes()
+    assert not np.any(G.indices == G.row_ids())
+    assert np.all(G.weights == 1.0)
+    assert 0.5 * 2_000 < G.num_edges() < 2.0 * 2_000
+
+def test_planted_partition_is_mostly_inside_blocks():
+    G, truth = planted_partition(1_000, 50, 8.0, 1.0, seed=1)
+    inner = truth[G.row_ids()] == truth[G.indices]
+    assert inner.mean() > 0.8
+
+def test_ring_of_cliques_without_seed_keeps_cliques_contiguous():
+    G, truth = ring_of_cliques(4, 5, seed=None)
+    np.testing.assert_array_equal(truth, np.arange(20) // 5)
+    assert G.num_edges() == 4 * 10 + 4
+
+def test_lfr_mixing_is_near_target():
+    G, truth = lfr_like(3_000, mu=0.3, seed=2)
+    outside = truth[G.row_ids()] != truth[G.indices]
+    assert 0.15 < outside.mean() < 0.35
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.hierarchy import Hierarchy, compact_dtype
+
+@pytest.fixture
+def h() -> Hierarchy:
+    # 6 base nodes -> 4 refined communities -> 2 final communities
+    return Hierarchy([np.array([0, 0, 1, 2, 3, 3]), np.array([0, 0, 1, 1])], list("abcdef"))
+
+def test_membership_composes_the_maps(h):
+    assert h.membership(0).tolist() == [0, 0, 1, 2, 3, 3]
+    assert h.membership(-1).tolist() == [0, 0, 0, 1, 1, 1]
+    assert not h.membership().flags.writeable
+
+def test_membership_leaves_the_callers_maps_writable():
+    m = np.array([0, 1, 1])
+    h = Hierarchy([m])
+    assert not h.membership().flags.writeable
+    assert m.flags.writeable
+    m[0] = 1
+
+def test_lookups_agree_with_membership(h):
+    for level in range(h.depth):
+        labels = h.membership(level)
+        assert [h.community_of(u, level) for u in "abcdef"] == labels.tolist()
+    assert h.num_communities(0) == 4 and h.num_communities() == 2
+    assert h.parent(2, 0) == 1
+
+def test_uncached_lookup_walks_the_maps(h):
+    assert h.community_of("e") == 1
+    assert not h._levels
+
+def test_communities_use_labels(h):
+    assert sorted(map(sorted, h.communities())) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_errors(h):
+    with pytest.raises(IndexError):
+        h.membership(2)
+    with pytest.raises(IndexError):
+        h.parent(0, -1)
+    with pytest.raises(KeyError, match="'z'"):
+        h.community_of("z")
+    with pytest.raises(ValueError):
+        Hierarchy([])
+
+def test_compacted_keeps_levels_in_small_dtypes(h):
+    c = h.compacted()
+    assert all(m.dtype == np.uint8 for m in c.maps)
+    assert np.array_equal(c.membership(), h.membership())
+    assert compact_dtype(255) == np.uint8 and compact_dtype(256) == np.uint16
+    assert compact_dtype(2**32) == np.uint64
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.adapter.visualizer.convex_hull import _convex_hull
+from src.lib.adapter.visualizer.hulls import HullCache, convex_hulls
+
+def _points(kind, n, rng):
+    t = rng.random(n)
+    if kind == "uniform":
+        return rng.random((n, 2))
+    if kind == "nearly_collinear":
+        a, b = rng.random(2), rng.random(2)
+        return a + t[:, None] * (b - a) + rng.normal(0.0, 1e-12, (n, 2))
+    if kind == "float_line":
+        return np.stack([t, 0.1 + 0.3 * t], axis=1)
+    if kind == "thin":
+        return np.stack([t * 1e6, rng.random(n) * 1e-6], axis=1)
+    if kind == "far_from_origin":
+        return 1e6 + rng.random((n, 2)) * 1e-3
+    return rng.integers(0, 4, (n, 2)).astype(np.float64)  # grid: duplicates and exact collinearity
+
+def _assert_matches_reference(xy, community, k):
+    offsets, vertices = convex_hulls(xy, community, k)
+    for c in range(k):
+        expected = _convex_hull([tuple(p) for p in xy[community == c].tolist()])
+        assert [tuple(p) for p in vertices[offsets[c]:offsets[c + 1]].tolist()] == expected
+
+@pytest.mark.parametrize("kind", ["uniform", "nearly_collinear", "float_line", "thin", "far_from_origin", "grid"])
+def test_fuzz_against_monotone_chain(kind):
+    rng = np.random.default_rng(sum(map(ord, kind)))
+    for _ in range(200):
+        k = int(rng.integers(1, 6))
+        n = int(rng.integers(1, 60))
+        _assert_matches_reference(_points(kind, n, rng), rng.integers(0, k, n), k)
+
+def test_large_communities_use_the_octagon_filter():
+    rng = np.random.default_rng(1)
+    xy = rng.normal(size=(20_000, 2))
+    _assert_matches_reference(xy, rng.integers(0, 20, len(xy)), 20)
+
+def test_empty_and_degenerate_communities():
+    xy = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0], [5.0, 5.0], [-0.0, 3.0]])
+    offsets, vertices = convex_hulls(xy, np.array([0, 0, 0, 2, 3]), 4)
+    assert np.diff(offsets).tolist() == [2, 0, 1, 1]
+    assert vertices[:2].tolist() == [[0.0, 0.0], [2.0, 2.0]]
+    offsets, vertices = convex_hulls(np.empty((0, 2)), np.empty(0, dtype=np.int64), 0)
+    assert offsets.tolist() == [0] and vertices.shape == (0, 2)
+
+def test_cache_recomputes_only_changed_communities():
+    rng = np.random.default_rng(2)
+    xy = rng.random((300, 2))
+    community = rng.integers(0, 10, 300)
+    cache = HullCache()
+    first = cache.hulls(xy, community, 10)
+    assert (cache.hits, cache.misses) == (0, 10)
+    moved = xy.copy()
+    moved[community == 3] += 1.0
+    offsets, vertices = cache.hulls(moved, community, 10)
+    assert (cache.hits, cache.misses) == (9, 11)
+    expected = convex_hulls(moved, community, 10)
+    assert np.array_equal(offsets, expected[0]) and np.array_equal(vertices, expected[1])
+    assert np.array_equal(first[0], convex_hulls(xy, community, 10)[0])
+
+def test_cache_evicts_least_recently_used():
+    xy = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [5.0, 5.0]])
+    cache = HullCache(max_entries=1)
+    cache.hulls(xy, np.array([0, 0, 0, 1]), 2)
+    assert len(cache) == 1
+    with pytest.raises(ValueError):
+        HullCache(max_entries=-1)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+from itertools import combinations
+from math import log
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.services.metrics import (
+    ReferenceComparison,
+    adjusted_rand_index,
+    communities_from_labels,
+    compare_partitions,
+    cpm,
+    dense_labels,
+    membership_array,
+    modularity,
+    normalized_mutual_information,
+    variation_of_information,
+)
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+
+def _naive(a, b):
+    # Pair counting and entropies straight from the definitions
+    n = len(a)
+    same_a = same_b = both = 0
+    for i, j in combinations(range(n), 2):
+        sa, sb = a[i] == a[j], b[i] == b[j]
+        same_a += sa
+        same_b += sb
+        both += sa and sb
+    pairs = n * (n - 1) / 2
+    expected = same_a * same_b / pairs
+    top = (same_a + same_b) / 2
+    ari = 1.0 if top == expected else (both - expected) / (top - expected)
+
+    def h(x):
+        _, c = np.unique(x, return_counts=True)
+        return -sum(k / n * log(k / n) for k in c)
+    h_ab = h([f"{x}|{y}" for x, y in zip(a, b)])
+    mutual = h(a) + h(b) - h_ab
+    return ari, 2 * mutual / (h(a) + h(b)), h(a) + h(b) - 2 * mutual
+
+@pytest.mark.parametrize("seed", range(5))
+def test_comparison_matches_definitions(seed):
+    rng = np.random.default_rng(seed)
+    a, b = rng.integers(0, 4, 40), rng.integers(0, 6, 40)
+    ari, nmi, vi = _naive(a, b)
+    got = compare_partitions(a, b)
+    assert got.ari == pytest.approx(ari) and got.nmi == pytest.approx(nmi) and got.vi == pytest.approx(vi)
+
+def test_identical_and_relabelled_labelings():
+    a = np.array([0, 0, 1, 1, 2, 2])
+    b = np.array([7, 7, 3, 3, 9, 9])
+    assert normalized_mutual_information(a, b) == pytest.approx(1.0)
+    assert adjusted_rand_index(a, b) == pytest.approx(1.0)
+    assert variation_of_information(a, b) == pytest.approx(0.0)
+    assert compare_partitions(np.zeros(5), np.zeros(5)).nmi == 1.0
+
+def test_sparse_and_dense_contingency_agree():
+    rng = np.random.default_rng(9)
+    a = rng.integers(0, 3, 200)
+    many = rng.integers(0, 150, 200)  # k_ref * k exceeds 4n: sorted pair keys
+    assert compare_partitions(a, many) == compare_partitions(a, many.astype(np.float64))
+
+def test_reference_comparison_streams():
+    rng = np.random.default_rng(3)
+    ref = rng.integers(0, 5, 100)
+    candidates = [rng.integers(0, 5, 100) for _ in range(4)]
+    streamed = list(ReferenceComparison(ref).compare_many(iter(candidates)))
+    assert streamed == [compare_partitions(ref, c) for c in candidates]
+    with pytest.raises(ValueError, match="differ in length"):
+        ReferenceComparison(ref).compare(ref[:10])
+
+def test_dense_labels():
+    assert dense_labels(np.array([5, 2, 5, 9]))[0].tolist() == [1, 0, 1, 2]
+    assert dense_labels(np.array([10**9, -1, 10**9]))[0].tolist() == [1, 0, 1]
+    assert dense_labels(np.array(["b", "a"]))[1] == 2
+    assert dense_labels(np.array([], dtype=np.int64))[1] == 0
+
+def test_quality_matches_the_objectives(planted):
+    G, truth = planted
+    labels = truth.astype(np.int64)
+    P = CompactPartition(labels.copy())
+    assert modularity(G, labels) == pytest.approx(ModularityObjective().quality(G, P))
+    assert cpm(G, labels, 0.1) == pytest.approx(CPMObjective(0.1).quality(G, P))
+
+def test_quality_on_a_graph_with_a_loop(bridge):
+    G = CSRGraph.from_graph(bridge)
+    labels = membership_array(G, [{"a", "b", "c"}, {"d", "e", "f"}])
+    P = CompactPartition(labels.copy())
+    assert modularity(G, labels) == pytest.approx(ModularityObjective().quality(G, P))
+    assert cpm(G, labels) == pytest.approx(CPMObjective().quality(G, P))
+
+def test_membership_round_trip(bridge):
+    G = CSRGraph.from_graph(bridge)
+    communities = [{"a", "b", "c"}, {"d", "e", "f"}]
+    labels = membership_array(G, communities)
+    assert sorted(map(sorted, communities_from_labels(G, labels))) == sorted(map(sorted, communities))
+    with pytest.raises(ValueError, match="not in any community"):
+        membership_array(G, communities[:1])
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.objective import CPMObjective, IncrementalObjective, ModularityObjective
+from src.lib.adapter.heuristics.neighbor_weight_delta import NeighborWeightObjective
+
+OBJECTIVES = [ModularityObjective(), CPMObjective(0.1), NeighborWeightObjective()]
+OBJECTIVE_IDS = ["modularity", "cpm", "neighbor-weight"]
+
+def test_incremental_objective_is_abstract():
+    with pytest.raises(TypeError):
+        IncrementalObjective()  # type: ignore[abstract]
+
+    class GainOnly(IncrementalObjective):
+        def insert_gain(self, k_vc, k_v, n_v, tot_c, n_c, total):
+            return k_vc
+
+    with pytest.raises(TypeError):
+        GainOnly()  # type: ignore[abstract]
+
+@pytest.mark.parametrize("objective", OBJECTIVES, ids=OBJECTIVE_IDS)
+def test_gains_match_quality_differences(bridge, objective):
+    P = Partition({"a": 0, "b": 0, "c": 1, "d": 1, "e": 2, "f": 2})
+    before = objective.quality(bridge, P)
+    gains = objective.gains(bridge, P, "c")
+    assert gains[P.community_of("c")] == 0.0
+    for dest, gain in gains.items():
+        Q = Partition(dict(P.node2com))
+        Q.move("c", dest)
+        assert objective.quality(bridge, Q) - before == pytest.approx(gain)
+        assert objective(bridge, P, "c", dest) == pytest.approx(gain)
+
+def test_modularity_of_known_split(bridge):
+    G = CSRGraph.from_graph(bridge)
+    labels = np.array([int(G.label(u) in "def") for u in G.nodes()])
+    m2 = G.total_weight()
+    left = sum(G.degree(u) for u in G.nodes() if labels[u] == 0)
+    inner = m2 - 2 * 0.1
+    expected = inner / m2 - (left ** 2 + (m2 - left) ** 2) / m2 ** 2
+    assert ModularityObjective().quality(G, CompactPartition(labels)) == pytest.approx(expected)
+
+def test_cpm_counts_base_nodes(triangle):
+    P = Partition({u: 0 for u in triangle.nodes()})
+    assert CPMObjective(0.5).quality(triangle, P) == pytest.approx(3.0 - 0.5 * 3)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.csr_graph import CSRGraph
+from src.lib.domain.services.graph.operators import (
+    LAPLACIAN_COMBINATORIAL,
+    LAPLACIAN_RANDOM_WALK,
+    LAPLACIAN_SYMMETRIC,
+    GraphOperators,
+    LaplacianOperator,
+)
+
+@pytest.fixture
+def G(bridge) -> CSRGraph:
+    return CSRGraph.from_graph(bridge)
+
+@pytest.fixture
+def with_isolated() -> CSRGraph:
+    # 0-1-2 path with a loop on 2, node 3 isolated
+    rows, cols = np.array([0, 1, 1, 2, 2]), np.array([1, 0, 2, 1, 2])
+    return CSRGraph.from_coo(4, rows, cols, np.array([1.0, 1.0, 2.0, 2.0, 0.5]))
+
+def _dense_laplacian(G: CSRGraph, kind: str) -> np.ndarray:
+    A = GraphOperators.of(G).adjacency().toarray()
+    d = np.asarray(G.degrees, dtype=np.float64)
+    L = np.diag(d) - A
+    inv = np.where(d > 0, 1.0 / np.where(d > 0, d, 1.0), 0.0)
+    if kind == LAPLACIAN_SYMMETRIC:
+        return np.sqrt(inv)[:, None] * L * np.sqrt(inv)[None, :]
+    if kind == LAPLACIAN_RANDOM_WALK:
+        return inv[:, None] * L
+    return L
+
+def test_adjacency_shares_the_graph_arrays(G):
+    A = GraphOperators.of(G).adjacency()
+    assert A.indices is G.indices and A.data is G.weights and A.indptr is G.offsets
+    assert A.shape == (G.num_nodes(), G.num_nodes()) and A.nnz == len(G.indices)
+
+def test_adjacency_matches_the_graph(G, bridge):
+    ops = GraphOperators.of(bridge)
+    dense = ops.adjacency().toarray()
+    index = ops.index()
+    for u, nbrs in bridge.adj.items():
+        for v, w in nbrs.items():
+            assert dense[index[u], index[v]] == w
+    assert np.allclose(dense, dense.T)
+    assert np.allclose(ops.degrees(), [sum(bridge.adj[u].values()) for u in ops.labels])
+
+@pytest.mark.parametrize("kind", [LAPLACIAN_COMBINATORIAL, LAPLACIAN_SYMMETRIC, LAPLACIAN_RANDOM_WALK])
+@pytest.mark.parametrize("graph", ["G", "with_isolated"])
+def test_laplacian_matches_dense(kind, graph, request):
+    H = request.getfixturevalue(graph)
+    L = LaplacianOperator(H, kind)
+    dense = _dense_laplacian(H, kind)
+    x = np.random.default_rng(0).normal(size=(H.num_nodes(), 3))
+    assert np.allclose(L @ x, dense @ x)
+    assert np.allclose(L @ x[:, 0], dense @ x[:, 0])
+    assert np.allclose(L.diagonal(), np.diag(dense))
+    assert np.allclose(L.to_csr().toarray(), dense)
+
+def test_combinatorial_laplacian_annihilates_constants(G):
+    L = GraphOperators.of(G).laplacian()
+    assert np.allclose(L @ np.ones(G.num_nodes()), 0.0)
+
+def test_symmetric_laplacian_annihilates_sqrt_degrees(G):
+    L = GraphOperators.of(G).laplacian(LAPLACIAN_SYMMETRIC)
+    assert np.allclose(L @ np.sqrt(G.degrees), 0.0)
+
+def test_errors(G):
+    with pytest.raises(ValueError, match="unknown Laplacian"):
+        LaplacianOperator(G, "normalized")
+    with pytest.raises(ValueError, match="rows"):
+        GraphOperators.of(G).adjacency() @ np.ones(2)
+
+def test_scipy_views(G):
+    pytest.importorskip("scipy")
+    ops = GraphOperators.of(G)
+    x = np.arange(G.num_nodes(), dtype=np.float64)
+    assert np.allclose(ops.adjacency().to_scipy() @ x, ops.adjacency() @ x)
+    assert np.allclose(ops.laplacian().to_scipy() @ x, ops.laplacian() @ x)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.adapter.layout.force_directed import QuadTree
+
+def _exact(pos, mass, k2):
+    delta = pos[:, None, :] - pos[None, :, :]
+    r2 = np.maximum((delta ** 2).sum(axis=2), 1e-9)
+    scale = k2 * mass[None, :] / r2
+    np.fill_diagonal(scale, 0.0)
+    return (delta * scale[:, :, None]).sum(axis=1)
+
+@pytest.mark.parametrize("n", [5, 300])
+def test_theta_zero_is_exact(n):
+    rng = np.random.default_rng(n)
+    pos, mass = rng.random((n, 2)) * 10.0, rng.random(n) + 0.5
+    tree = QuadTree(pos, mass, leaf_size=4)
+    assert np.allclose(tree.repulsion(pos, mass, 0.0, 2.0), _exact(pos, mass, 2.0))
+
+def test_approximation_error_is_small():
+    rng = np.random.default_rng(3)
+    pos, mass = rng.random((2000, 2)) * 50.0, np.ones(2000)
+    exact = _exact(pos, mass, 1.0)
+    approx = QuadTree(pos, mass).repulsion(pos, mass, 1.2, 1.0)
+    err = np.linalg.norm(approx - exact, axis=1) / np.maximum(np.linalg.norm(exact, axis=1), 1e-12)
+    assert np.median(err) < 0.05
+
+def test_coincident_points_do_not_blow_up():
+    pos = np.zeros((50, 2))
+    tree = QuadTree(pos, np.ones(50))
+    assert np.all(np.isfinite(tree.repulsion(pos, np.ones(50), 1.0, 1.0)))
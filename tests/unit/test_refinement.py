@@ -0,0 +1,51 @@
+from __future__ import annotations
+import random
+from collections import deque
+
+import numpy as np
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.objective import ModularityObjective
+from src.lib.domain.services.partition import refine_partition
+
+def _connected(G, members) -> bool:
+    members = set(members)
+    start = next(iter(members))
+    seen, Q = {start}, deque([start])
+    while Q:
+        for u in G.neighbors(Q.popleft()):
+            if u in members and u not in seen:
+                seen.add(u)
+                Q.append(u)
+    return seen == members
+
+def test_refined_communities_nest_and_are_connected(planted):
+    G, truth = planted
+    P = CompactPartition(truth.astype(np.int64))
+    R = refine_partition(G, P, ModularityObjective(), 1.0 / G.total_weight(), 0.01, rng=random.Random(1))
+    assert R.size() >= P.size()
+    assert R.size() < G.num_nodes()
+    for cid in R.community_ids():
+        members = R.members(cid)
+        assert len({P.community_of(u) for u in members}) == 1
+        assert _connected(G, members)
+
+def test_refinement_is_reproducible(planted):
+    G, truth = planted
+    P = CompactPartition(truth.astype(np.int64))
+    runs = [
+        refine_partition(G, P, ModularityObjective(), 1.0 / G.total_weight(), 0.01, rng=random.Random(5)).compact()
+        for _ in range(2)
+    ]
+    np.testing.assert_array_equal(runs[0], runs[1])
+
+def test_large_gamma_keeps_singletons(bridge):
+    P = Partition({u: int(u in "def") for u in bridge.nodes()})
+    R = refine_partition(bridge, P, ModularityObjective(), gamma=10.0, theta=0.01, rng=random.Random(0))
+    assert R.size() == bridge.num_nodes()
+
+def test_bridge_refines_to_its_triangles(bridge):
+    P = Partition({u: int(u in "def") for u in bridge.nodes()})
+    R = refine_partition(bridge, P, ModularityObjective(), 1.0 / bridge.total_weight(), 0.01, rng=random.Random(0))
+    assert sorted(sorted(c) for c in R.communities()) == [["a", "b", "c"], ["d", "e", "f"]]
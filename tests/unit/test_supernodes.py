@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.models.partition import Partition
+from src.lib.domain.services.graph import aggregate_graph
+from src.lib.domain.services.partition import (
+    flatten_hierarchy,
+    lift_partition_by_membership,
+    lift_partition_to_aggregated,
+)
+
+def test_flatten_composes_memberships():
+    level0 = np.array([0, 0, 1, 2, 2, 3])
+    level1 = np.array([0, 0, 1, 1])
+    top = np.array([1, 0])
+    found = flatten_hierarchy(top, [level0, level1], list("abcdef"))
+    assert sorted(sorted(c) for c in found) == [["a", "b", "c"], ["d", "e", "f"]]
+
+def test_flatten_of_an_empty_graph():
+    assert flatten_hierarchy(np.empty(0, dtype=np.int64), [], []) == []
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_lift_by_membership_takes_the_first_members_community(compact):
+    membership = np.array([1, 1, 0, 2, 2])
+    labels = [7, 7, 3, 5, 5]
+    P = CompactPartition(np.array(labels)) if compact else Partition(dict(enumerate(labels)))
+    lifted = lift_partition_by_membership(P, membership)
+    assert [lifted.community_of(s) for s in range(3)] == [3, 7, 5]
+
+def test_aggregate_graph_numbers_supernodes_and_carries_sizes(bridge):
+    refined = Partition({"a": "x", "b": "x", "c": "x", "d": "y", "e": "z", "f": "z"})
+    G2 = aggregate_graph(bridge, refined)
+    assert sorted(G2.nodes()) == [0, 1, 2]
+    sizes = sorted(G2.node_size(s) for s in G2.nodes())
+    assert sizes == [1.0, 2.0, 3.0]
+    G3 = aggregate_graph(G2, Partition({s: 0 for s in G2.nodes()}))
+    assert G3.node_size(0) == 6.0
+    P = Partition({u: int(u in "def") for u in bridge.nodes()})
+    lifted = lift_partition_to_aggregated(P, refined)
+    assert {lifted.community_of(s) for s in G2.nodes()} == {0, 1}
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import random
+
+import numpy as np
+import pytest
+
+from src.lib.domain.models.compact_partition import CompactPartition
+from src.lib.domain.services.graph import move_nodes_fast
+from src.lib.domain.services.graph.vectorized import move_nodes_fast_vectorized
+from src.lib.domain.services.objective import CPMObjective, ModularityObjective
+from src.lib.domain.types.events import LocalMovingStats
+from src.lib.adapter.heuristics.neighbor_weight_delta import heuristic_delta_by_neighbor_weight
+
+class _Collect:
+    def __init__(self) -> None:
+        self.events = []
+
+    def emit(self, event) -> None:
+        self.events.append(event)
+
+@pytest.mark.parametrize("objective", [ModularityObjective(), CPMObjective(0.05)], ids=["modularity", "cpm"])
+@pytest.mark.parametrize("batch_size", [1, 64, 4096])
+def test_result_is_a_local_optimum(planted, objective, batch_size):
+    G, _ = planted
+    P = move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), objective, batch_size, random.Random(2))
+    sample = random.Random(0).sample(range(G.num_nodes()), 100)
+    for v in sample:
+        assert max(objective.gains(G, P, v).values()) <= 1e-12
+
+def test_quality_is_on_par_with_serial(planted):
+    # Single runs land in different local optima; compare the mean over a few orders
+    G, _ = planted
+    objective = ModularityObjective()
+
+    def mean_quality(move) -> float:
+        runs = [move(G, CompactPartition.singletons(G.num_nodes()), objective, rng=random.Random(s)) for s in range(4)]
+        return float(np.mean([objective.quality(G, P) for P in runs]))
+
+    assert mean_quality(move_nodes_fast_vectorized) == pytest.approx(mean_quality(move_nodes_fast), abs=0.05)
+
+def test_same_rng_same_result(planted):
+    G, _ = planted
+    runs = [
+        move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(), rng=random.Random(9))
+        for _ in range(2)
+    ]
+    np.testing.assert_array_equal(runs[0].compact(), runs[1].compact())
+
+def test_emits_local_moving_stats(planted):
+    G, _ = planted
+    observer = _Collect()
+    move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), ModularityObjective(), observer=observer)
+    (stats,) = observer.events
+    assert isinstance(stats, LocalMovingStats)
+    assert stats.visited >= G.num_nodes() and stats.moved > 0
+
+def test_plain_delta_fn_is_rejected(planted):
+    G, _ = planted
+    with pytest.raises(TypeError, match="IncrementalObjective"):
+        move_nodes_fast_vectorized(G, CompactPartition.singletons(G.num_nodes()), heuristic_delta_by_neighbor_weight)